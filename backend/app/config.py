@@ -18,7 +18,91 @@ class Settings(BaseSettings):
     db_path: str = "sensor_data.db"
     retention_days: int = 30
     max_db_size_mb: int = 500  # Default 500MB
-    
+    # 보관 기간/크기 정리(+VACUUM)는 시작을 막지 않도록 서버가 준비된 뒤 백그라운드에서 실행
+    db_cleanup_start_delay_s: float = 60.0  # 시작 후 첫 정리까지 대기
+    db_cleanup_interval_s: float = 3600.0  # 이후 정리 주기
+    # 기존 DB의 시계열 카탈로그 채우기는 시작 후 백그라운드에서 readings id 구간씩 (구간마다 저장과 번갈아 씀)
+    db_migration_chunk_rows: int = 200_000
+    # 이력 조회용 읽기 전용 연결 수. 행 변환이 GIL을 잡으므로 크게 잡으면 녹화(save_packet)가 밀린다
+    db_read_pool_size: int = 2
+    db_read_mmap_mb: int = 64  # 읽기 연결 mmap_size
+    db_read_cached_statements: int = 64  # 연결별 prepared statement 캐시 크기
+
+    # History cache settings (/history/chart 결과 캐시, API 워커별)
+    history_cache_mb: int = 32  # 캐시에 보관할 응답 바이트 상한 (LRU)
+    history_closed_margin_s: float = 60.0  # end가 현재보다 이만큼 지난 구간만 닫힌 구간으로 캐시
+    history_immutable_max_age_s: int = 86400  # 닫힌 구간 응답의 Cache-Control max-age
+
+    # Link monitor settings (포트 7001 PING/PONG)
+    ping_interval_s: float = 1.0
+    ping_timeout_s: float = 3.0  # 이 시간 안에 PONG이 없으면 손실로 처리
+    link_window_size: int = 60  # 최근 N개 PING으로 통계 계산
+    link_rtt_degraded_ms: float = 500.0
+    link_loss_degraded_pct: float = 20.0
+    link_status_broadcast_s: float = 10.0  # 링크 통계 주기적 브로드캐스트 간격
+
+    # Command queue settings (포트 7001 송신)
+    command_batch_max_bytes: int = 65536  # drain 1회에 모아 쓸 최대 바이트
+    command_drain_timeout_s: float = 5.0  # 이 시간 안에 drain되지 않으면 연결 정지로 보고 끊는다
+
+    # SENSOR ORDER 연속성 검사 (포트 7000/7001 SENSOR, 재연결 후에도 이어서 판정)
+    sequence_window: int = 1000  # 중복/늦게 온 패킷을 판별할 최근 ORDER 수
+    sequence_restart_jump: int = 10000  # ORDER가 이보다 크게 건너뛰면 손실이 아니라 카운터 재시작으로 본다
+    sequence_recent_gaps: int = 20  # /api/system/sequence에 보여줄 최근 손실 구간 수
+
+    # Bridge state journal (탱크 상태 벡터/선택 유닛/명령·PING IDX를 재시작 후 복원)
+    state_journal_enabled: bool = True
+    state_dir: str = "state"  # 스냅샷/저널 폴더
+    state_journal_flush_s: float = 0.05  # 이 시간 동안 모은 기록을 write + fsync 한 번으로 (Stop은 즉시)
+    state_journal_compact_records: int = 1000  # 저널이 이 건수를 넘으면 스냅샷으로 압축
+    state_counter_block: int = 100  # IDX 예약 단위 (재시작 시 최대 이만큼 건너뛴다)
+
+    # Recipe cache settings
+    recipe_poll_interval_s: float = 5.0  # watchfiles(inotify)를 쓸 수 없을 때 폴링 간격
+
+    # Firmware rollout settings
+    firmware_upload_timeout_s: float = 60.0
+    firmware_concurrency: int = 4  # 동시에 FIRMWARE_UPDATE를 진행할 유닛 수
+    firmware_ack_timeout_s: float = 30.0  # FIRMWARE_UPDATE ACK 대기
+    firmware_verify_timeout_s: float = 5.0  # GET_VERSION 1회 응답 대기
+    firmware_verify_attempts: int = 6  # 업데이트 후 GET_VERSION 재시도 횟수 (유닛 재부팅 대기)
+    firmware_verify_interval_s: float = 5.0
+
+    # CAN-FD direct ingest settings (python-can, TCP 7000 수신과 병행)
+    can_enabled: bool = False
+    can_interface: str = "socketcan"  # python-can interface (테스트: "virtual")
+    can_channel: str = "can0"
+    can_fd: bool = True
+    can_base_id: int = 0x100  # 유닛보드 index(0~31) 프레임 ID = can_base_id + index
+    can_sensors_per_unit: int = 4  # 프레임당 float32 센서값 개수
+    can_sensor_base_id: int = 1100  # 첫 센서값의 SENSOR_ID
+    can_assemble_timeout_s: float = 0.5  # 같은 ORDER의 프레임이 다 모이지 않아도 이 시간 후 전달
+
+    # Event loop monitor / profiler settings (/api/system/loop, /api/system/profiler)
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_s: float = 0.1  # 지연 샘플러 주기 (이 주기로만 깨어나므로 유휴 시 부하 무시 가능)
+    loop_slow_threshold_ms: float = 250.0  # 이 시간 이상 루프가 멈추면 스택 캡처
+    loop_slow_events: int = 20  # 보관할 최근 느린 구간 수
+    profiler_rate_hz: float = 100.0
+    profiler_max_duration_s: float = 120.0  # stop을 호출하지 않아도 이 시간 후 샘플링 중단
+    profiler_dir: str = "profiles"  # folded stack 출력 폴더
+
+    # Job pool settings (내보내기/피벗/다운샘플 프로세스 풀)
+    job_workers: int = 2
+    job_output_dir: str = "exports"  # 작업 결과 CSV 폴더
+    job_chunk_rows: int = 5000  # 워커가 fetchmany로 읽어 파일에 쓰는 단위
+    job_progress_interval_s: float = 0.5  # JOB_PROGRESS 브로드캐스트 최소 간격
+
+    # Process role settings (수신 프로세스 / API 워커 분리)
+    # all: 한 프로세스에서 수신+API (기본), ingest: python -m app.ingest, api: uvicorn --workers N
+    process_role: str = "all"
+    ipc_path: str = "/tmp/unitboard_ingest.sock"  # Unix 소켓 (Windows는 127.0.0.1:ipc_port TCP)
+    ipc_port: int = 7100
+    ipc_client_queue: int = 1024  # API 워커별 이벤트 큐 상한 (넘치면 버리고 집계)
+    ipc_status_interval_s: float = 1.0  # 연결/녹화/큐 상태 스냅샷 전송 주기
+    ipc_call_timeout_s: float = 30.0  # API 워커 → ingest 명령(RPC) 응답 대기
+    ipc_idx_block: int = 1000  # API 워커가 ingest에서 한 번에 예약해 오는 명령 IDX 수
+
     # CORS settings
     cors_origins: List[str] = [
         "http://localhost:3000",
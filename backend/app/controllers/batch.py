@@ -0,0 +1,121 @@
+"""Batch (multi-tank) control API controller"""
+import asyncio
+import logging
+from typing import Dict, List
+
+from litestar import Controller, post
+
+from app.models.batch import BatchControlRequest, BatchGPIOItem, BatchMotorItem, BatchStateItem
+from app.models.protocol import CommandPacketGpio, CommandPacketMotor
+from app.controllers.gpio import motor_onoff
+from app.services.tcp_bridge import tcp_bridge, UNIT_TO_TANK_ID
+from app.services.unit_manager import unit_manager
+
+logger = logging.getLogger(__name__)
+
+
+class BatchController(Controller):
+    """여러 탱크(라인 전체)를 한 번에 제어하는 API 컨트롤러
+
+    - STATE: 변경 탱크 수와 무관하게 STATE 패킷 1개로 전송
+    - GPIO/모터: 탱크당 최대 1개 패킷 (같은 탱크의 중복 요청은 마지막 값만 사용)
+    모든 패킷은 송신 큐에 동시에 들어가 한 번의 drain으로 전송된다.
+    """
+
+    path = "/batch"
+
+    @post("/", summary="STATE/GPIO/모터 일괄 제어")
+    async def batch_control(self, data: BatchControlRequest) -> dict:
+        """여러 탱크의 STATE, GPIO, 모터 변경을 한 번에 적용합니다.
+
+        Args:
+            data: 일괄 제어 요청
+
+        Returns:
+            탱크별 결과와 전송된 패킷 수
+        """
+        return await self._run_batch(data)
+
+    @post("/state", summary="STATE 일괄 변경")
+    async def batch_state(self, data: List[BatchStateItem]) -> dict:
+        """여러 탱크의 STATE를 STATE 패킷 1개로 변경합니다."""
+        return await self._run_batch(BatchControlRequest(state=data))
+
+    @post("/gpio", summary="GPIO 일괄 제어 (여러 탱크)")
+    async def batch_gpio(self, data: List[BatchGPIOItem]) -> dict:
+        """여러 탱크의 GPIO를 탱크당 SET_GPIO 1개로 제어합니다."""
+        return await self._run_batch(BatchControlRequest(gpio=data))
+
+    @post("/motor", summary="모터 일괄 제어 (여러 탱크)")
+    async def batch_motor(self, data: List[BatchMotorItem]) -> dict:
+        """여러 탱크의 모터를 탱크당 TEMP_RPM 1개로 제어합니다."""
+        return await self._run_batch(BatchControlRequest(motor=data))
+
+    async def _run_batch(self, data: BatchControlRequest) -> dict:
+        results: Dict[str, Dict[str, bool]] = {}
+        packets = {"STATE": 0, "SET_GPIO": 0, "TEMP_RPM": 0}
+
+        state_items = {item.unit_id: item for item in data.state}
+        # 매핑에 없는 TANK_ID는 STATE 벡터에 포함되지 않으므로 전송 대상에서 뺀다
+        mapped_state = [item for unit_id, item in state_items.items() if unit_id in UNIT_TO_TANK_ID]
+        gpio_items = {item.unit_id: item for item in data.gpio}
+        motor_items = {item.unit_id: item for item in data.motor}
+
+        # 모든 명령을 동시에 큐에 넣어 한 배치로 전송되게 한다
+        state_ok, gpio_ok, motor_ok = await asyncio.gather(
+            self._apply_state(mapped_state, data.stage),
+            asyncio.gather(*(self._apply_gpio(item) for item in gpio_items.values())),
+            asyncio.gather(*(self._apply_motor(item) for item in motor_items.values())),
+        )
+
+        if mapped_state:
+            packets["STATE"] = 1
+        for unit_id in state_items:
+            results.setdefault(str(unit_id), {})["state"] = state_ok and unit_id in UNIT_TO_TANK_ID
+        for unit_id, ok in zip(gpio_items, gpio_ok):
+            packets["SET_GPIO"] += 1
+            results.setdefault(str(unit_id), {})["gpio"] = ok
+        for unit_id, ok in zip(motor_items, motor_ok):
+            packets["TEMP_RPM"] += 1
+            results.setdefault(str(unit_id), {})["motor"] = ok
+
+        success = all(ok for per_tank in results.values() for ok in per_tank.values())
+        logger.info(f"Batch control: tanks={len(results)}, packets={packets}, success={success}")
+        return {
+            "success": success,
+            "results": results,
+            "packets": packets,
+        }
+
+    async def _apply_state(self, items: List[BatchStateItem], stage: int) -> bool:
+        if not items:
+            # 보낼 탱크가 없으면 STATE 패킷을 보내지 않는다 (IDX도 소비하지 않음)
+            return True
+        return await tcp_bridge.send_state_batch({item.unit_id: item.status for item in items}, stage=stage)
+
+    async def _apply_gpio(self, item: BatchGPIOItem) -> bool:
+        for gpio_index, state in enumerate(item.gpio_states):
+            await unit_manager.control_gpio(unit_id=item.unit_id, gpio_index=gpio_index, state=state)
+        idx = await tcp_bridge.allocate_command_idx()
+        return await tcp_bridge.send_command(CommandPacketGpio(
+            cmd='SET_GPIO',
+            unit_id=str(item.unit_id),  # 프론트엔드에서 이미 매핑된 TANK_ID 값을 문자열로 전송
+            idx=str(idx),
+            tank_id=str(item.unit_id),  # unit_id가 곧 TANK_ID
+            value=list(item.gpio_states),
+        ))
+
+    async def _apply_motor(self, item: BatchMotorItem) -> bool:
+        speed = item.speed or 0
+        await unit_manager.control_motor(unit_id=item.unit_id, is_on=item.is_on, speed=speed)
+        idx = await tcp_bridge.allocate_command_idx()
+        return await tcp_bridge.send_command(CommandPacketMotor(
+            cmd='TEMP_RPM',
+            unit_id=str(item.unit_id),
+            idx=str(idx),
+            tank_id=str(item.unit_id),
+            speed=speed if item.is_on else 0,
+            onoff=motor_onoff(item.is_on, speed),
+            dir=0,
+            time=item.time or 0,
+        ))
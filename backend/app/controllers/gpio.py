@@ -11,7 +11,12 @@ import logging
 
 raw_json_logger = logging.getLogger(__name__)
 
-idx = 0
+
+def motor_onoff(is_on: bool, speed) -> str:
+    """TEMP_RPM ONOFF 값. 끄는 요청은 속도와 무관하게 OFF (프론트엔드는 끌 때도 마지막 속도를 보낸다)"""
+    return "ON" if is_on and speed else "OFF"
+
+
 class GPIOController(Controller):
     """GPIO 제어 API 컨트롤러"""
     
@@ -66,8 +71,8 @@ class GPIOController(Controller):
         import logging
 
         logger = logging.getLogger(__name__)
-        global idx
-        idx = idx + 1
+        # 명령 IDX는 브리지 카운터 하나로 발급 (ACK 매칭, 재시작 후 복원)
+        idx = await tcp_bridge.allocate_command_idx()
         logger.info(f"Sending TEMP_RPM command for Unit {data.unit_id} (Tank {data.unit_id})")
 
         try:
@@ -77,7 +82,7 @@ class GPIOController(Controller):
                 idx=str(idx),
                 tank_id=str(data.unit_id),  # unit_id가 곧 TANK_ID
                 speed=data.speed if data.is_on else 0,
-                onoff="ON" if data.speed else "OFF",
+                onoff=motor_onoff(data.is_on, data.speed),
                 dir= 0,
                 time=data.time or 0,
             ))
@@ -122,13 +127,12 @@ class GPIOController(Controller):
         if not all_success:
             raise NotFoundException(f"Failed to control some GPIOs on unit {data.unit_id}")
         
-        # 임시로 idx 생성 (예: 현재 타임스탬프 또는 랜덤)
         import time
         import logging
         logger = logging.getLogger(__name__)
         
-        global idx
-        idx = idx + 1
+        # 명령 IDX는 브리지 카운터 하나로 발급 (ACK 매칭, 재시작 후 복원)
+        idx = await tcp_bridge.allocate_command_idx()
         logger.info(f"Sending CTRL command for Unit {data.unit_id} (Tank {data.unit_id})")
 
         try:
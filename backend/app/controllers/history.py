@@ -1,12 +1,16 @@
-from typing import List, Optional, Dict
-from litestar import Controller, get, post
+from typing import List, Literal, Optional, Dict
+import msgspec
+from litestar import Controller, Request, Response, get, post
+from litestar.exceptions import ClientException, InternalServerException, NotFoundException
 from litestar.response import File
-from litestar.status_codes import HTTP_200_OK
-from pydantic import BaseModel
+from litestar.status_codes import HTTP_200_OK, HTTP_304_NOT_MODIFIED, HTTP_409_CONFLICT
+from pydantic import BaseModel, Field
 
 from app.services.tcp_bridge import tcp_bridge
+from app.config import settings
 from app.services.db_service import db_service
-import pandas as pd
+from app.services.history_cache import history_cache, is_closed_range, make_etag, make_key
+from app.services.job_pool import job_pool, JOB_COMPLETED, JOB_FAILED
 import io
 import os
 import logging
@@ -23,6 +27,30 @@ class RecordingControlRequest(BaseModel):
     # 일시정지/종료할 유닛(탱크) ID. None이면 현재 선택한 유닛을 사용한다.
     unit_id: Optional[int] = None
 
+class HistoryJobRequest(BaseModel):
+    # export: 행 단위 CSV, pivot: 시각 × 탱크_센서 표, downsample: bucket_s 단위 평균/최소/최대
+    kind: Literal["export", "pivot", "downsample"] = "export"
+    start: str
+    end: str
+    tank_id: Optional[str] = None
+    sensor_ids: Optional[List[int]] = None
+    bucket_s: int = Field(60, ge=1)
+
+def _chart_response(request: Request, body: bytes, etag: str, immutable: bool) -> Response:
+    """ETag/Cache-Control을 붙인 차트 응답. If-None-Match가 같으면 본문 없이 304."""
+    if immutable:
+        # 닫힌 구간: 삭제/정리 전까지 바뀌지 않으므로 브라우저가 재검증 없이 재사용
+        cache_control = f"private, max-age={settings.history_immutable_max_age_s}, immutable"
+    else:
+        # 아직 데이터가 쌓이는 구간: 매번 재검증 (같으면 304)
+        cache_control = "no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(content=b"", status_code=HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 class HistoryController(Controller):
     path = ""
 
@@ -72,18 +100,54 @@ class HistoryController(Controller):
     @get(path="/history/chart")
     async def get_chart_data(
         self, 
+        request: Request,
         start: str, 
         end: str, 
         tank_id: Optional[str] = None, 
         sensor_ids: Optional[List[int]] = None
-    ) -> List[dict]:
+    ) -> Response:
         """
         Get data for charts.
-        start/end format: YYYY-MM-DD HH:MM:SS
+        start/end format: YYYY-MM-DD HH:MM:SS (ISO 표기도 허용, 캐시 키와 같은 값으로 정규화해 조회)
+
+        end가 이미 지난 닫힌 구간은 결과를 history_cache에 보관하고 Cache-Control: immutable로 응답한다.
+        모든 응답에 ETag를 붙이므로 If-None-Match 재요청은 304로 끝난다.
         """
         # Note: sensor_ids might need parsing if passed as comma-separated in some frameworks,
         # but Litestar usually handles List[int] via query params like ?sensor_ids=1&sensor_ids=2
-        return await db_service.get_history(start, end, tank_id, sensor_ids)
+        closed = is_closed_range(end)
+        generation = await db_service.get_data_generation(tank_id) if closed else None
+        key = make_key(start, end, tank_id, sensor_ids)
+        if generation is not None:
+            cached = history_cache.get(key, generation)
+            if cached is not None:
+                return _chart_response(request, cached.body, cached.etag, immutable=True)
+
+        # 캐시 키를 공유하는 요청은 같은 SQL 결과를 받아야 하므로 정규화한 값으로 조회
+        norm_start, norm_end, norm_tank, norm_sensors = key
+        try:
+            rows = await db_service.get_history(norm_start, norm_end, norm_tank, list(norm_sensors) or None)
+        except Exception as e:
+            # 일시적인 DB 오류를 빈 결과로 캐시/immutable 응답하지 않는다
+            raise InternalServerException(f"History query failed: {e}")
+        body = msgspec.json.encode(rows)
+        if generation is None:
+            return _chart_response(request, body, make_etag(body), immutable=False)
+        entry = history_cache.put(key, body, generation)
+        return _chart_response(request, body, entry.etag, immutable=True)
+
+    @get(path="/history/series")
+    async def get_series(self) -> dict:
+        """기록된 시계열 목록 (tank_id, sensor_id별 행 수와 첫/마지막 시각, series_stats 카탈로그).
+
+        기존 DB의 카탈로그 채우기가 끝나기 전에는 complete=False (행 수/첫 시각이 일부만 반영됨).
+        """
+        return await db_service.get_series_stats()
+
+    @get(path="/history/gaps")
+    async def get_gaps(self, start: str, end: str) -> List[dict]:
+        """[start, end]와 겹치는 SENSOR ORDER 손실 구간 (녹화 중 감지분, 빠진 패킷 수와 원인)."""
+        return await db_service.get_sequence_gaps(start, end)
 
     @get(path="/history/export")
     async def export_csv(
@@ -91,27 +155,73 @@ class HistoryController(Controller):
         start: str, 
         end: str
     ) -> File:
-        """Export data to CSV."""
-        data = await db_service.get_export_data(start, end)
-        
-        df = pd.DataFrame(data)
-        if df.empty:
-             return File(
+        """Export data to CSV.
+
+        CSV 생성은 작업 풀 워커 프로세스에서 하고, 이벤트 루프는 완료만 기다린다.
+        """
+        job = await job_pool.run_job("export", {"start": start, "end": end})
+        if job["state"] == JOB_FAILED:
+            raise InternalServerException(f"Export failed: {job['error']}")
+        if job["state"] != JOB_COMPLETED:
+            # 취소 등: 결과 파일이 없다 (get_job_result와 같은 응답)
+            raise ClientException(f"Export job {job['job_id']} is {job['state']}", status_code=HTTP_409_CONFLICT)
+        if not job["rows"]:
+            return File(
                 path=io.BytesIO(b"No data"),
                 filename="export.csv",
                 content_disposition_type="attachment",
                 media_type="text/csv"
             )
 
-        # Convert to CSV
-        csv_buffer = io.BytesIO()
-        df.to_csv(csv_buffer, index=False)
-        csv_buffer.seek(0)
-        
         return File(
-            path=csv_buffer,
+            path=job["path"],
             filename=f"sensor_data_{start}_{end}.csv",
             content_disposition_type="attachment",
             media_type="text/csv"
         )
 
+    # Background Jobs (export / pivot / downsample)
+    @post(path="/history/jobs")
+    async def start_job(self, data: HistoryJobRequest) -> dict:
+        """내보내기/피벗/다운샘플 작업을 작업 풀에서 시작하고 job_id를 반환한다.
+
+        진행 상황은 GET /history/jobs/{job_id} 또는 WebSocket JOB_PROGRESS 이벤트로 확인한다.
+        """
+        params = data.model_dump(exclude={"kind"}, exclude_none=True)
+        return await job_pool.start_job(data.kind, params)
+
+    @get(path="/history/jobs")
+    async def list_jobs(self) -> List[dict]:
+        """최근 작업 목록."""
+        return await job_pool.list_jobs()
+
+    @get(path="/history/jobs/{job_id:str}")
+    async def get_job(self, job_id: str) -> dict:
+        """작업 상태/진행률 조회."""
+        job = await job_pool.get_job(job_id)
+        if job is None:
+            raise NotFoundException(f"Job {job_id} not found")
+        return job
+
+    @post(path="/history/jobs/{job_id:str}/cancel")
+    async def cancel_job(self, job_id: str) -> Dict[str, bool]:
+        """대기/실행 중인 작업 취소."""
+        success = await job_pool.cancel_job(job_id)
+        if success is None:
+            raise NotFoundException(f"Job {job_id} not found")
+        return {"success": success}
+
+    @get(path="/history/jobs/{job_id:str}/result")
+    async def get_job_result(self, job_id: str) -> File:
+        """완료된 작업의 결과 CSV를 스트리밍한다."""
+        job = await job_pool.get_job(job_id, with_path=True)
+        if job is None:
+            raise NotFoundException(f"Job {job_id} not found")
+        if job["state"] != JOB_COMPLETED:
+            raise ClientException(f"Job {job_id} is {job['state']}", status_code=HTTP_409_CONFLICT)
+        return File(
+            path=job["path"],
+            filename=f"{job['kind']}_{job['params']['start']}_{job['params']['end']}.csv",
+            content_disposition_type="attachment",
+            media_type="text/csv"
+        )
@@ -1,20 +1,15 @@
 """Recipe API controller"""
 from litestar import Controller, get, post
 from litestar.exceptions import NotFoundException
-from typing import List, Dict
+from typing import List, Dict, Optional
 import json
-import os
-from pathlib import Path
 import logging
 
 from app.services.tcp_bridge import tcp_bridge
+from app.services.recipe_cache import recipe_cache
 
 logger = logging.getLogger(__name__)
 
-# Reference 디렉토리 경로 (프로젝트 루트 기준)
-# backend/app/controllers/recipe.py -> backend/app/controllers -> backend/app -> backend -> 프로젝트 루트
-REFERENCE_DIR = Path(__file__).resolve().parent.parent.parent.parent / ".cursor" / "reference"
-
 class RecipeController(Controller):
     """레시피 API 컨트롤러"""
     
@@ -28,22 +23,8 @@ class RecipeController(Controller):
             레시피 파일 목록 (파일명과 경로)
         """
         try:
-            if not REFERENCE_DIR.exists():
-                logger.warning(f"Reference directory not found: {REFERENCE_DIR}")
-                return []
-            
-            recipe_files = []
-            for file_path in REFERENCE_DIR.glob("*.json"):
-                recipe_files.append({
-                    "filename": file_path.name,
-                    "path": str(file_path.relative_to(REFERENCE_DIR.parent.parent.parent.parent))
-                })
-            
-            # 파일명으로 정렬
-            recipe_files.sort(key=lambda x: x["filename"])
-            logger.info(f"Found {len(recipe_files)} recipe files")
-            return recipe_files
-            
+            # 디렉토리가 바뀌지 않았으면 캐시된 목록을 그대로 반환
+            return recipe_cache.list_recipes()
         except Exception as e:
             logger.error(f"Failed to list recipe files: {e}")
             return []
@@ -59,24 +40,17 @@ class RecipeController(Controller):
             레시피 JSON 데이터
         """
         try:
-            file_path = REFERENCE_DIR / filename
-            
-            # 보안: 상위 디렉토리 접근 방지
-            if not file_path.resolve().is_relative_to(REFERENCE_DIR.resolve()):
-                raise NotFoundException("Invalid file path")
-            
-            if not file_path.exists():
-                raise NotFoundException(f"Recipe file not found: {filename}")
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                recipe_data = json.load(f)
-            
-            logger.info(f"Loaded recipe file: {filename}")
-            return recipe_data
-            
+            # 파일 mtime이 같으면 캐시에서 반환 (반환값은 읽기 전용으로 취급)
+            return recipe_cache.get(filename).content
+
         except json.JSONDecodeError as e:
+            # JSONDecodeError는 ValueError의 하위 클래스이므로 경로 오류(ValueError)보다 먼저 처리
             logger.error(f"Invalid JSON in recipe file {filename}: {e}")
             raise NotFoundException(f"Invalid JSON format in recipe file: {filename}")
+        except ValueError:
+            raise NotFoundException("Invalid file path")
+        except FileNotFoundError:
+            raise NotFoundException(f"Recipe file not found: {filename}")
         except Exception as e:
             logger.error(f"Failed to read recipe file {filename}: {e}")
             raise NotFoundException(f"Failed to read recipe file: {filename}")
@@ -110,23 +84,25 @@ class RecipeController(Controller):
             return {"success": False, "error": str(e)}
     
     @post("/send/{filename:str}", summary="레시피 파일 전송")
-    async def send_recipe_file(self, filename: str) -> Dict[str, bool]:
+    async def send_recipe_file(self, filename: str, unit_id: Optional[int] = None) -> Dict[str, bool]:
         """레시피 파일을 읽어서 라즈베리파이로 전송합니다.
+
+        레시피 캐시의 사전 직렬화된 REF 페이로드를 사용하므로 여러 탱크에 연속 전송해도
+        파일 읽기/DATA 파싱이 반복되지 않습니다.
         
         Args:
             filename: 레시피 파일명 (예: ref1.json)
+            unit_id: 대상 유닛(TANK_ID). None이면 현재 선택된 유닛
         
         Returns:
             전송 결과
         """
         try:
-            # 레시피 파일 읽기
-            recipe_data = await self.get_recipe_content(filename)
-            
-            # 레시피 전송
-            result = await self.send_recipe(recipe_data)
-            
-            return result
+            recipe = recipe_cache.get(filename)
+            success = await tcp_bridge.send_recipe_compiled(recipe, tank_id=unit_id)
+            if not success:
+                raise Exception("Failed to send recipe to Raspberry Pi")
+            return {"success": True}
             
         except Exception as e:
             logger.error(f"Failed to send recipe file {filename}: {e}")
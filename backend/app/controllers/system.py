@@ -0,0 +1,117 @@
+"""System API controller"""
+import os
+import threading
+from typing import List, Optional
+
+from litestar import Controller, get, post
+
+from app.config import settings
+from app.models.system import ProfilerStartRequest
+from app.services.can_ingest import can_ingest
+from app.services.db_service import db_service
+from app.services.history_cache import history_cache
+from app.services.loop_monitor import loop_monitor, sampling_profiler
+from app.services.tcp_bridge import tcp_bridge
+
+
+class SystemController(Controller):
+    """시스템 상태/메트릭 API 컨트롤러"""
+
+    path = "/system"
+
+    @get("/connection", summary="TCP 연결 상태 조회")
+    async def get_connection_status(self) -> dict:
+        """포트 7000/7001 연결 상태와 링크 품질을 조회합니다."""
+        return tcp_bridge.get_connection_status()["data"]
+
+    @get("/link", summary="링크 품질 메트릭 조회")
+    async def get_link_metrics(self) -> dict:
+        """PING/PONG 기반 RTT·지터·손실 통계를 조회합니다.
+
+        Returns:
+            슬라이딩 윈도우 통계 (RTT 단위: ms)
+        """
+        return tcp_bridge.link_monitor.get_stats()
+
+    @get("/command-queue", summary="송신 큐 메트릭 조회")
+    async def get_command_queue_metrics(self) -> dict:
+        """포트 7001 송신 큐의 깊이, 병합/배치 통계를 조회합니다."""
+        return tcp_bridge.get_command_queue_metrics()
+
+    @get("/ingest", summary="SENSOR 수신 통계 조회")
+    async def get_ingest_stats(self) -> dict:
+        """수신한 SENSOR 패킷 수와 VALUE 형식 오류(NaN 처리) 수를 조회합니다."""
+        return tcp_bridge.get_ingest_stats()
+
+    @get("/state-journal", summary="브리지 상태 저널 메트릭 조회")
+    async def get_state_journal_stats(self) -> Optional[dict]:
+        """STATE 벡터/IDX 저널의 기록 건수, fsync 횟수, 압축 횟수, 시작 시 복원 시간(ms)을 조회합니다."""
+        return tcp_bridge.get_state_journal_stats()
+
+    @get("/sequence", summary="SENSOR ORDER 연속성 메트릭 조회")
+    async def get_sequence_stats(self) -> dict:
+        """수신 경로별 ORDER 손실률, 손실 구간/중복/늦게 온 패킷/카운터 재시작 수(전체, 현재 연결)와 최근 손실 구간을 조회합니다."""
+        return tcp_bridge.get_sequence_stats()
+
+    @get("/can", summary="CAN-FD 직접 수신 상태 조회")
+    async def get_can_stats(self) -> dict:
+        """CAN 수신 프레임/패킷 수와 드롭 수를 조회합니다."""
+        return can_ingest.get_stats()
+
+    @get("/process", summary="프로세스 역할 / ingest IPC 상태 조회")
+    async def get_process_info(self) -> dict:
+        """이 프로세스의 역할(all / api)과, api 워커라면 ingest 프로세스 IPC 연결 통계를 조회합니다."""
+        info = {"role": settings.process_role, "pid": os.getpid()}
+        if hasattr(tcp_bridge, "get_ipc_stats"):
+            info["ipc"] = tcp_bridge.get_ipc_stats()
+        return info
+
+    @get("/db", summary="이력 조회 읽기 연결 풀 메트릭 조회")
+    async def get_db_pool_stats(self) -> dict:
+        """읽기 전용 연결 풀 크기, 사용 중 연결 수, 연결 대기 시간(ms)을 조회합니다."""
+        return db_service.read_pool.get_stats()
+
+    @get("/history-cache", summary="이력 차트 결과 캐시 메트릭 조회")
+    async def get_history_cache_stats(self) -> dict:
+        """닫힌 구간 /history/chart 결과 캐시의 항목 수, 바이트, 적중/무효화/축출 건수를 조회합니다."""
+        return history_cache.get_stats()
+
+    @get("/loop", summary="이벤트 루프 지연 통계 조회")
+    async def get_loop_stats(self) -> dict:
+        """예정 시각 대비 실제 깨어난 시각의 지연(ms) 히스토그램과 백분위를 조회합니다."""
+        return loop_monitor.get_stats()
+
+    @get("/loop/slow", summary="느린 루프 구간 조회")
+    async def get_slow_events(self) -> List[dict]:
+        """루프가 loop_slow_threshold_ms 이상 멈춘 최근 구간과 그때의 스택을 조회합니다. (최신순)"""
+        return loop_monitor.get_slow_events()
+
+    @get("/profiler", summary="샘플링 프로파일러 상태 조회")
+    async def get_profiler_status(self) -> dict:
+        """프로파일러 동작 여부와 마지막 결과 파일을 조회합니다."""
+        return sampling_profiler.get_status()
+
+    @post("/profiler/start", summary="샘플링 프로파일러 시작")
+    async def start_profiler(self, data: Optional[ProfilerStartRequest] = None) -> dict:
+        """이벤트 루프 스레드의 스택 샘플링을 시작합니다.
+
+        Args:
+            data: 샘플링 주기(Hz), 자동 중단 시간
+
+        Returns:
+            시작 여부 (이미 동작 중이면 false)
+        """
+        data = data or ProfilerStartRequest()
+        # 핸들러는 이벤트 루프 스레드에서 실행된다
+        started = sampling_profiler.start(threading.get_ident(), rate_hz=data.rate_hz, duration_s=data.duration_s)
+        return {"success": started, **sampling_profiler.get_status()}
+
+    @post("/profiler/stop", summary="샘플링 프로파일러 중단")
+    async def stop_profiler(self) -> dict:
+        """샘플링을 멈추고 folded stack 파일(flamegraph.pl / speedscope 입력)을 저장합니다.
+
+        Returns:
+            파일 경로, 샘플 수 (시작한 적이 없으면 success false)
+        """
+        result = sampling_profiler.stop()
+        return {"success": result is not None, "result": result}
@@ -1,8 +1,8 @@
 """Unit board API controller"""
 from litestar import Controller, get, post
 from litestar.exceptions import NotFoundException
-from typing import Dict
-from app.models.unit import UnitStatus, FirmwareUpdateRequest
+from typing import Dict, List
+from app.models.unit import UnitStatus, FirmwareUpdateRequest, FirmwareRolloutRequest
 from app.models.gpio import GPIOState
 from app.services.unit_manager import unit_manager
 
@@ -64,3 +64,47 @@ class UnitController(Controller):
         success = await tcp_bridge.send_firmware_update(unit_id, data.file_path)
         return {"success": success}
 
+    @post("/firmware/rollout", summary="여러 유닛 펌웨어 동시 롤아웃")
+    async def start_firmware_rollout(self, data: FirmwareRolloutRequest) -> dict:
+        """이미지를 한 번 업로드하고 여러 유닛에 펌웨어 업데이트를 동시에 진행합니다.
+
+        진행 상황은 GET /units/firmware/rollout/{rollout_id} 또는
+        WebSocket FIRMWARE_ROLLOUT_PROGRESS 이벤트로 확인합니다.
+
+        Args:
+            data: 펌웨어 파일, 대상 유닛, 동시 진행 수
+
+        Returns:
+            롤아웃 상태 (rollout_id 포함)
+        """
+        from app.services.firmware_rollout import firmware_rollout
+        return await firmware_rollout.start_rollout(
+            data.file_path,
+            data.unit_ids,
+            concurrency=data.concurrency,
+            expected_version=data.expected_version,
+            force_upload=data.force_upload,
+        )
+
+    @get("/firmware/rollout", summary="최근 펌웨어 롤아웃 목록")
+    async def list_firmware_rollouts(self) -> List[dict]:
+        """최근 펌웨어 롤아웃 상태 목록을 조회합니다."""
+        from app.services.firmware_rollout import firmware_rollout
+        return await firmware_rollout.list_rollouts()
+
+    @get("/firmware/rollout/{rollout_id:str}", summary="펌웨어 롤아웃 상태 조회")
+    async def get_firmware_rollout(self, rollout_id: str) -> dict:
+        """펌웨어 롤아웃의 유닛별 진행 상태를 조회합니다."""
+        from app.services.firmware_rollout import firmware_rollout
+        rollout = await firmware_rollout.get_rollout(rollout_id)
+        if rollout is None:
+            raise NotFoundException(f"Rollout {rollout_id} not found")
+        return rollout
+
+    @post("/firmware/rollout/{rollout_id:str}/cancel", summary="펌웨어 롤아웃 취소")
+    async def cancel_firmware_rollout(self, rollout_id: str) -> Dict[str, bool]:
+        """진행 중인 펌웨어 롤아웃을 취소합니다. (이미 완료된 유닛은 그대로 유지)"""
+        from app.services.firmware_rollout import firmware_rollout
+        if await firmware_rollout.get_rollout(rollout_id) is None:
+            raise NotFoundException(f"Rollout {rollout_id} not found")
+        return {"success": await firmware_rollout.cancel(rollout_id)}
@@ -4,6 +4,7 @@ from typing import Set
 import json
 import logging
 from app.services.websocket_service import ws_manager
+from app.services.ws_codec import negotiate
 from app.services.tcp_bridge import tcp_bridge
 
 logger = logging.getLogger(__name__)
@@ -11,9 +12,14 @@ logger = logging.getLogger(__name__)
 
 @websocket("/status")
 async def websocket_handler(socket: WebSocket) -> None:
-    """WebSocket 핸들러 - 실시간 상태 업데이트"""
-    await socket.accept()
-    await ws_manager.add_connection(socket)
+    """WebSocket 핸들러 - 실시간 상태 업데이트
+
+    SENSOR_UPDATE 형식은 서브프로토콜(sensor.json / sensor.msgpack.v1 / sensor.binary.v1)
+    또는 ?format=json|msgpack|binary 로 협상한다. 기본값은 JSON.
+    """
+    fmt, subprotocol = negotiate(socket.scope.get("subprotocols", []), socket.query_params.get("format"))
+    await socket.accept(subprotocols=subprotocol)
+    await ws_manager.add_connection(socket, fmt)
     
     # Send initial connection status
     try:
@@ -0,0 +1,70 @@
+"""수신(ingest) 전용 프로세스 엔트리포인트
+
+라즈베리파이 포트 7000/7001, CAN 수신, DB 쓰기, 내보내기/피벗 작업 풀을 이 프로세스 하나가 소유하고
+브로드캐스트/SENSOR 이벤트를 로컬 IPC(app.services.ipc)로 API 워커에 발행한다.
+
+    PROCESS_ROLE=ingest python -m app.ingest
+    PROCESS_ROLE=api uvicorn app.main:app --host 0.0.0.0 --port 9001 --workers 3
+"""
+import asyncio
+import logging
+import signal
+
+from app.config import settings
+from app.services.can_ingest import can_ingest
+from app.services.ipc import IngestServer, ROLE_API
+from app.services.job_pool import job_pool
+from app.services.loop_monitor import loop_monitor
+from app.services.recipe_cache import recipe_cache
+from app.services.tcp_bridge import tcp_bridge
+from app.utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+async def run():
+    if settings.process_role == ROLE_API:
+        raise SystemExit("PROCESS_ROLE=api cannot run the ingest process")
+
+    logger.info("Starting ingest process...")
+    if settings.loop_monitor_enabled:
+        await loop_monitor.start()
+    await tcp_bridge.start()
+    await recipe_cache.start_watcher()
+    if settings.can_enabled:
+        try:
+            await can_ingest.start()
+        except Exception as e:
+            logger.error(f"Failed to start CAN ingest: {e}")
+    server = IngestServer()
+    await server.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C는 KeyboardInterrupt로 처리
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Stopping ingest process...")
+        await server.stop()
+        await job_pool.shutdown()
+        await can_ingest.stop()
+        await recipe_cache.stop_watcher()
+        await tcp_bridge.stop()
+        await loop_monitor.stop()
+
+
+def main():
+    setup_logging()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,15 @@ from app.controllers.unit import UnitController
 from app.controllers.gpio import GPIOController
 from app.controllers.history import HistoryController
 from app.controllers.recipe import RecipeController
+from app.controllers.system import SystemController
+from app.controllers.batch import BatchController
 from app.controllers.websocket import websocket_handler
 from app.services.tcp_bridge import tcp_bridge
+from app.services.recipe_cache import recipe_cache
+from app.services.can_ingest import can_ingest
+from app.services.loop_monitor import loop_monitor, sampling_profiler
+from app.services.job_pool import job_pool
+from app.services.db_service import db_service
 from app.utils.logger import setup_logging
 import logging
 
@@ -25,6 +32,8 @@ api_router = Router(
         GPIOController,
         HistoryController,
         RecipeController,
+        SystemController,
+        BatchController,
     ]
 )
 
@@ -67,15 +76,35 @@ logging_config = LoggingConfig(
 # Startup 핸들러
 async def startup() -> None:
     """애플리케이션 시작 시 실행"""
-    logger.info("Starting Unit Board Control Backend...")
+    logger.info(f"Starting Unit Board Control Backend (role={settings.process_role})...")
+    if settings.process_role == "ingest":
+        # ingest 역할은 python -m app.ingest 로 실행한다 (HTTP 서버 없이 포트 7000/7001 + IPC)
+        raise RuntimeError("PROCESS_ROLE=ingest must be started with `python -m app.ingest`")
+    if settings.loop_monitor_enabled:
+        await loop_monitor.start()
+    # api 역할이면 tcp_bridge는 ingest 프로세스 IPC 클라이언트 (RemoteBridge)
     await tcp_bridge.start()
+    await recipe_cache.start_watcher()
+    if settings.can_enabled:
+        try:
+            await can_ingest.start()
+        except Exception as e:
+            # CAN 인터페이스가 없어도 TCP 수신은 계속 동작해야 한다
+            logger.error(f"Failed to start CAN ingest: {e}")
 
 
 # Shutdown 핸들러
 async def shutdown() -> None:
     """애플리케이션 종료 시 실행"""
     logger.info("Shutting down Unit Board Control Backend...")
+    await can_ingest.stop()
+    await job_pool.shutdown()
+    await db_service.close()
+    await recipe_cache.stop_watcher()
     await tcp_bridge.stop()
+    if sampling_profiler.running:
+        sampling_profiler.stop()
+    await loop_monitor.stop()
 
 
 # Litestar 앱 생성
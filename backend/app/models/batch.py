@@ -0,0 +1,36 @@
+"""Batch (multi-tank) control models"""
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+
+class BatchStateItem(BaseModel):
+    """탱크별 STATE 변경"""
+    unit_id: int = Field(..., ge=0, description="유닛보드 ID (매핑된 TANK_ID)")
+    status: Literal["Run", "Pause", "Stop", "Initial", "None"] = Field(..., description="설정할 상태")
+
+
+class BatchGPIOItem(BaseModel):
+    """탱크별 GPIO 일괄 설정"""
+    unit_id: int = Field(..., ge=0, description="유닛보드 ID (매핑된 TANK_ID)")
+    gpio_states: List[bool] = Field(
+        ...,
+        min_length=8,
+        max_length=8,
+        description="GPIO 1-8 상태 (True=ON, False=OFF)"
+    )
+
+
+class BatchMotorItem(BaseModel):
+    """탱크별 모터 설정"""
+    unit_id: int = Field(..., ge=0, description="유닛보드 ID (매핑된 TANK_ID)")
+    is_on: bool = Field(..., description="모터 ON/OFF")
+    speed: Optional[int] = Field(None, ge=0, le=2000, description="모터 속도 (RPM, 0-2000)")
+    time: Optional[int] = Field(None, ge=0, le=60, description="모터 작동 시간 (0-60s)")
+
+
+class BatchControlRequest(BaseModel):
+    """여러 탱크에 대한 STATE/GPIO/모터 변경을 한 번에 요청"""
+    stage: int = Field(100, description="STATE 패킷의 공정 단계")
+    state: List[BatchStateItem] = Field(default_factory=list)
+    gpio: List[BatchGPIOItem] = Field(default_factory=list)
+    motor: List[BatchMotorItem] = Field(default_factory=list)
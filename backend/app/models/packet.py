@@ -0,0 +1,174 @@
+"""수신 SENSOR 패킷의 내부 표현 (msgspec)
+
+SensorPacket(pydantic)은 값 128개마다 SensorValue 모델을 만들고 field_validator를 실행한다.
+수신 경로(파싱 → 브로드캐스트 → DB 저장)는 msgspec Struct와 숫자 벡터만 사용하고,
+pydantic 모델은 API 경계(to_packet)에서만 만든다.
+"""
+import math
+from array import array
+from typing import List, Optional, Union
+
+import msgspec
+
+from app.models.protocol import SensorPacket
+
+
+class SensorVector:
+    """SENSOR 패킷 VALUES를 파싱 시점에 한 번 변환한 숫자 벡터.
+
+    브로드캐스트/DB 저장 등 하위 처리는 행별 dict 대신 이 배열을 그대로 사용한다.
+    """
+
+    __slots__ = ("tank_ids", "sensor_ids", "values", "parse_errors")
+
+    def __init__(self, tank_ids: array, sensor_ids: array, values: array, parse_errors: Optional[int] = None):
+        self.tank_ids = tank_ids
+        self.sensor_ids = sensor_ids
+        self.values = values
+        # 형식 오류로 NaN이 된 값 수
+        self.parse_errors = sum(1 for v in values if v != v) if parse_errors is None else parse_errors
+
+    @classmethod
+    def from_readings(cls, readings) -> "SensorVector":
+        """tank_id/sensor_id/value 속성을 가진 객체 목록(SensorValue 등)에서 만든다."""
+        return cls(
+            array("l", [r.tank_id for r in readings]),
+            array("l", [r.sensor_id for r in readings]),
+            array("d", [r.value for r in readings]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class TankStatus(msgspec.Struct, rename="upper", gc=False):
+    tank_id: int
+    stage: int
+    status: str
+
+
+class ErrorCode(msgspec.Struct, rename="upper", gc=False):
+    tank_id: int
+    code: str
+
+
+class SensorFrame(msgspec.Struct, gc=False):
+    """수신 경로에서 쓰는 SENSOR 패킷. 필드 이름은 SensorPacket과 같다. (values 대신 vector)"""
+    order: int
+    date: str
+    time: str
+    vector: SensorVector
+    state: List[TankStatus]
+    error: List[ErrorCode]
+    cmd: str = "SENSOR"
+
+    def to_packet(self) -> SensorPacket:
+        """API 응답 등 pydantic 모델이 필요한 곳에서 사용"""
+        v = self.vector
+        return SensorPacket.model_validate({
+            "CMD": self.cmd,
+            "ORDER": self.order,
+            "DATE": self.date,
+            "TIME": self.time,
+            "VALUES": [
+                {"TANK_ID": t, "SENSOR_ID": s, "VALUE": x}
+                for t, s, x in zip(v.tank_ids, v.sensor_ids, v.values)
+            ],
+            "STATE": [{"TANK_ID": s.tank_id, "STAGE": s.stage, "STATUS": s.status} for s in self.state],
+            "ERROR": [{"TANK_ID": e.tank_id, "CODE": e.code} for e in self.error],
+        })
+
+    @classmethod
+    def from_packet(cls, packet: SensorPacket) -> "SensorFrame":
+        return cls(
+            order=packet.order,
+            date=packet.date,
+            time=packet.time,
+            vector=SensorVector.from_readings(packet.values),
+            state=[TankStatus(s.tank_id, s.stage, s.status) for s in packet.state],
+            error=[ErrorCode(e.tank_id, e.code) for e in packet.error],
+            cmd=packet.cmd,
+        )
+
+
+# -----------------------------------------------------------------------------
+# JSON 디코딩 (포트 7000 수신)
+# -----------------------------------------------------------------------------
+
+class _Envelope(msgspec.Struct, rename="upper"):
+    """CMD만 읽고 나머지 필드는 건너뛴다."""
+    cmd: Optional[str] = None
+
+
+class _WireValue(msgspec.Struct, rename="upper", gc=False):
+    tank_id: int
+    sensor_id: int
+    value: float
+
+
+class _LenientValue(msgspec.Struct, rename="upper", gc=False):
+    tank_id: int
+    sensor_id: int
+    value: Union[float, str, None] = None
+
+
+class _WireSensor(msgspec.Struct, rename="upper", gc=False):
+    order: int
+    date: str
+    time: str
+    values: List[_WireValue]
+    state: List[TankStatus]
+    error: List[ErrorCode] = []
+    cmd: str = "SENSOR"
+
+
+class _LenientSensor(_WireSensor):
+    values: List[_LenientValue]
+
+
+# strict=False: Pi가 보내는 "601", "0.00" 같은 문자열 숫자를 int/float로 변환
+_envelope_decoder = msgspec.json.Decoder(_Envelope)
+_sensor_decoder = msgspec.json.Decoder(_WireSensor, strict=False)
+_lenient_decoder = msgspec.json.Decoder(_LenientSensor, strict=False)
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def peek_cmd(raw: Union[str, bytes]) -> Optional[str]:
+    """JSON 메시지의 CMD만 읽는다. (잘못된 JSON이면 msgspec.DecodeError)"""
+    return _envelope_decoder.decode(raw).cmd
+
+
+def decode_sensor(raw: Union[str, bytes]) -> SensorFrame:
+    """SENSOR JSON을 SensorFrame으로 디코딩한다.
+
+    VALUE 형식 오류가 없으면 msgspec이 바로 float로 변환하고, 있으면 관대한 형식으로 다시
+    디코딩해 해당 값만 NaN으로 만든다.
+
+    Raises:
+        msgspec.DecodeError: 잘못된 JSON
+        msgspec.ValidationError: 필수 필드 누락/형식 오류
+    """
+    try:
+        wire = _sensor_decoder.decode(raw)
+        values = wire.values
+        vector = SensorVector(
+            array("l", [r.tank_id for r in values]),
+            array("l", [r.sensor_id for r in values]),
+            array("d", [r.value for r in values]),
+            0,
+        )
+    except msgspec.ValidationError:
+        wire = _lenient_decoder.decode(raw)
+        values = wire.values
+        vector = SensorVector(
+            array("l", [r.tank_id for r in values]),
+            array("l", [r.sensor_id for r in values]),
+            array("d", [_to_float(r.value) for r in values]),
+        )
+    return SensorFrame(wire.order, wire.date, wire.time, vector, wire.state, wire.error, wire.cmd)
@@ -1,5 +1,6 @@
+import math
 from typing import List, Union, Optional
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 # -----------------------------------------------------------------------------
 # 1. Sensor Data Structures
@@ -9,13 +10,27 @@ class SensorValue(BaseModel):
     # Support both string "100" and int 100 for TANK_ID based on user example
     tank_id: Union[str, int] = Field(..., alias="TANK_ID")
     sensor_id: int = Field(..., alias="SENSOR_ID")
-    value: str = Field(..., alias="VALUE")
+    # Pi는 "0.00" 같은 문자열로 보내지만 수신 시 한 번만 float로 변환한다 (형식 오류 = NaN)
+    value: float = Field(..., alias="VALUE")
 
     @field_validator('tank_id')
     @classmethod
     def parse_tank_id(cls, v):
         return int(v) # Normalize to int internally
 
+    @field_validator('value', mode='wrap')
+    @classmethod
+    def parse_value(cls, v, handler):
+        try:
+            return handler(v)
+        except ValidationError:
+            return math.nan
+
+
+# STATE STATUS 문자열 ↔ 코드 (CAN 프레임/바이너리 WebSocket 프레임에서 사용)
+STATUS_CODES: List[str] = ["None", "Initial", "Run", "Pause", "Stop"]
+STATUS_TO_CODE = {s: i for i, s in enumerate(STATUS_CODES)}
+
 class TankState(BaseModel):
     tank_id: int = Field(..., alias="TANK_ID")
     stage: int = Field(..., alias="STAGE")
@@ -61,6 +76,12 @@ class PingPacket(BaseModel):
     idx: Union[str, int] = Field(..., alias="IDX")
     note: str = Field("OK", alias="NOTE")
 
+class PongPacket(BaseModel):
+    # 라즈베리파이 → PC: PING 응답. IDX는 대응하는 PING의 IDX와 동일
+    cmd: str = Field("PONG", alias="CMD")
+    idx: Union[str, int] = Field(..., alias="IDX")
+    note: str = Field("OK", alias="NOTE")
+
 class ControlValue(BaseModel):
     # Support both string "100" and int 100 for TANK_ID based on user example
     sensor_id: Union[str, int] = Field(..., alias="SENSOR_ID")
@@ -0,0 +1,12 @@
+"""System API models"""
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.config import settings
+
+
+class ProfilerStartRequest(BaseModel):
+    """샘플링 프로파일러 시작 요청"""
+    rate_hz: float = Field(settings.profiler_rate_hz, gt=0, le=1000, description="초당 샘플 수")
+    duration_s: Optional[float] = Field(None, gt=0, description="자동 중단까지 시간 (없으면 profiler_max_duration_s)")
@@ -1,8 +1,10 @@
 """Unit board models"""
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+from app.config import settings
+
 
 class UnitInfo(BaseModel):
     """유닛보드 기본 정보"""
@@ -50,3 +52,11 @@ class UnitStatus(BaseModel):
 class FirmwareUpdateRequest(BaseModel):
     """펌웨어 업데이트 요청"""
     file_path: str = Field(..., description="펌웨어 파일 경로")
+
+class FirmwareRolloutRequest(BaseModel):
+    """여러 유닛 펌웨어 롤아웃 요청"""
+    file_path: str = Field(..., description="펌웨어 파일 경로")
+    unit_ids: List[int] = Field(..., min_length=1, description="대상 TANK_ID 목록")
+    concurrency: int = Field(settings.firmware_concurrency, ge=1, le=32, description="동시 진행 유닛 수")
+    expected_version: Optional[int] = Field(None, description="업데이트 후 기대 FW_VERSION (없으면 응답만 확인)")
+    force_upload: bool = Field(False, description="같은 이미지가 업로드되어 있어도 다시 업로드")
@@ -0,0 +1,217 @@
+"""CAN-FD 직접 수신 (python-can)
+
+라즈베리파이 중계 프로세스의 JSON(포트 7000) 대신 유닛보드 프레임을 CAN 버스에서 직접 읽는다.
+프레임을 미리 컴파일한 struct 레이아웃으로 디코딩해 같은 ORDER의 프레임을 SensorFrame 하나로
+모은 뒤, TCP 수신과 동일한 처리 경로(tcp_bridge.handle_sensor_packet: 브로드캐스트/DB 저장)로 넘긴다.
+
+프레임 레이아웃 (리틀 엔디안, 유닛보드 1개 = 프레임 1개):
+    ID    : can_base_id + 유닛보드 index (UNIT_TO_TANK_ID 순서)
+    DATA  : ORDER(u32) STAGE(u8) STATUS(u8) ERROR(u16) VALUE[0..N-1](f32)
+"""
+import asyncio
+import functools
+import logging
+import struct
+import time
+from array import array
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.models.packet import ErrorCode, SensorFrame, SensorVector, TankStatus
+from app.models.protocol import STATUS_CODES, STATUS_TO_CODE
+from app.services.tcp_bridge import tcp_bridge, UNIT_TO_TANK_ID
+
+logger = logging.getLogger(__name__)
+
+HEADER_FORMAT = "<IBBH"
+
+# CAN FD에서 허용되는 DLC 길이
+_FD_LENGTHS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64)
+
+
+def frame_struct(sensors_per_unit: int = settings.can_sensors_per_unit) -> struct.Struct:
+    """프레임 레이아웃 struct (헤더 + float32 N개)"""
+    return struct.Struct(HEADER_FORMAT + "%df" % sensors_per_unit)
+
+
+def encode_frame(order: int, stage: int, status: str, error: int, values: Sequence[float],
+                 layout: Optional[struct.Struct] = None) -> bytes:
+    """유닛보드 프레임 페이로드를 만든다. (시뮬레이터/테스트용, CAN FD 길이로 패딩)"""
+    layout = layout or frame_struct(len(values))
+    payload = layout.pack(order, stage, STATUS_TO_CODE.get(status, 0), error, *values)
+    size = next(n for n in _FD_LENGTHS if n >= len(payload))
+    return payload.ljust(size, b"\x00")
+
+
+class CanIngestService:
+    """python-can 버스에서 유닛보드 프레임을 읽어 SensorFrame으로 조립한다.
+
+    - 프레임은 struct.Struct.unpack_from 한 번으로 디코딩 (JSON 파싱/검증 없음)
+    - 같은 ORDER의 프레임이 모든 유닛에서 모이거나, ORDER가 바뀌거나,
+      can_assemble_timeout_s가 지나면 패킷 하나로 전달
+    """
+
+    def __init__(self, tank_ids: Sequence[int],
+                 on_packet: Optional[Callable[[SensorFrame], Awaitable[None]]] = None,
+                 base_id: int = settings.can_base_id,
+                 sensors_per_unit: int = settings.can_sensors_per_unit,
+                 sensor_base_id: int = settings.can_sensor_base_id,
+                 assemble_timeout_s: float = settings.can_assemble_timeout_s):
+        self.tank_ids: List[int] = list(tank_ids)
+        self.base_id = base_id
+        self.sensor_ids: List[int] = [sensor_base_id + i for i in range(sensors_per_unit)]
+        self.assemble_timeout_s = assemble_timeout_s
+        self._layout = frame_struct(sensors_per_unit)
+        # 기본은 TCP 수신과 같은 처리 경로 (WebSocket 브로드캐스트 + 녹화 중 DB 저장)
+        # 시간 초과로 일부만 모인 ORDER가 나머지 프레임과 함께 다시 올 수 있어 ORDER 중복 검사는 하지 않는다 (source="can")
+        self._on_packet = on_packet or functools.partial(tcp_bridge.handle_sensor_packet, source="can")
+
+        self._bus = None
+        self._notifier = None
+        self._reader = None
+        self._task: Optional[asyncio.Task] = None
+
+        # 조립 중인 ORDER의 유닛 index → 디코딩된 프레임
+        self._order: Optional[int] = None
+        self._frames: Dict[int, Tuple] = {}
+        self._order_started: float = 0.0
+
+        self.frames = 0
+        self.dropped = 0
+        self.packets = 0
+        self.partial_packets = 0
+
+    # ------------------------------------------------------------------
+    # 수명 주기
+    # ------------------------------------------------------------------
+    async def start(self, interface: str = settings.can_interface, channel: str = settings.can_channel,
+                    fd: bool = settings.can_fd, **bus_kwargs):
+        if self._task is not None:
+            return
+        import can
+
+        self._bus = can.Bus(interface=interface, channel=channel, fd=fd, **bus_kwargs)
+        self._reader = can.AsyncBufferedReader()
+        self._notifier = can.Notifier(self._bus, [self._reader], loop=asyncio.get_running_loop())
+        self._task = asyncio.create_task(self._read_loop())
+        logger.info(f"CAN ingest started: interface={interface}, channel={channel}, fd={fd}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._notifier is not None:
+            self._notifier.stop()
+            self._notifier = None
+        if self._bus is not None:
+            self._bus.shutdown()
+            self._bus = None
+        await self.flush()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ------------------------------------------------------------------
+    # 수신/조립
+    # ------------------------------------------------------------------
+    async def _read_loop(self):
+        while True:
+            timeout = None
+            if self._frames:
+                timeout = max(0.0, self._order_started + self.assemble_timeout_s - time.monotonic())
+            try:
+                msg = await asyncio.wait_for(self._reader.get_message(), timeout=timeout)
+            except asyncio.TimeoutError:
+                await self.flush()
+                continue
+            try:
+                await self.feed(msg.arbitration_id, msg.data)
+            except Exception as e:
+                logger.error(f"CAN frame processing error: {e}")
+
+    async def feed(self, arbitration_id: int, data: bytes):
+        """프레임 1개를 디코딩해 조립 버퍼에 넣는다."""
+        index = arbitration_id - self.base_id
+        if not 0 <= index < len(self.tank_ids) or len(data) < self._layout.size:
+            self.dropped += 1
+            return
+        frame = self._layout.unpack_from(data)
+        self.frames += 1
+
+        order = frame[0]
+        if self._order is not None and order != self._order:
+            await self.flush()
+        if not self._frames:
+            self._order = order
+            self._order_started = time.monotonic()
+        self._frames[index] = frame
+        if len(self._frames) == len(self.tank_ids):
+            await self.flush()
+
+    async def flush(self):
+        """조립 중인 프레임을 SensorFrame으로 만들어 전달한다."""
+        if not self._frames:
+            return
+        frames, self._frames = self._frames, {}
+        self._order = None
+        packet = self.build_packet(frames)
+        self.packets += 1
+        if len(frames) < len(self.tank_ids):
+            self.partial_packets += 1
+        await self._on_packet(packet)
+
+    def build_packet(self, frames: Dict[int, Tuple]) -> SensorFrame:
+        """디코딩된 프레임들을 TCP(JSON) 수신과 같은 SensorFrame으로 만든다.
+
+        struct로 디코딩한 숫자를 그대로 벡터 배열에 넣는다. (dict/pydantic 검증 없음)
+        """
+        tank_ids = array("l")
+        sensor_ids = array("l")
+        values = array("d")
+        states = []
+        errors = []
+        unit_sensor_ids = array("l", self.sensor_ids)
+        n_sensors = len(unit_sensor_ids)
+        order = 0
+        for index in sorted(frames):
+            order, stage, status, error, *readings = frames[index]
+            tank_id = self.tank_ids[index]
+            tank_ids.extend([tank_id] * n_sensors)
+            sensor_ids.extend(unit_sensor_ids)
+            values.extend(readings)
+            states.append(TankStatus(tank_id, stage, STATUS_CODES[status] if status < len(STATUS_CODES) else "None"))
+            errors.append(ErrorCode(tank_id, str(error)))
+
+        now = datetime.now()
+        return SensorFrame(
+            order=order,
+            date=now.strftime("%Y-%m-%d"),
+            time=now.strftime("%H:%M:%S"),
+            vector=SensorVector(tank_ids, sensor_ids, values),
+            state=states,
+            error=errors,
+        )
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": settings.can_enabled,
+            "running": self.running,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "packets": self.packets,
+            "partial_packets": self.partial_packets,
+        }
+
+
+# 전역 CAN 수신 서비스 인스턴스 (api 워커는 ingest 프로세스의 통계만 조회)
+if settings.process_role == "api":
+    from app.services.ipc import RemoteCanIngest
+    can_ingest = RemoteCanIngest()
+else:
+    can_ingest = CanIngestService(UNIT_TO_TANK_ID)
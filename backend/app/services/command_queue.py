@@ -0,0 +1,244 @@
+"""포트 7001 송신 명령 큐 (우선순위 + 병합 + 배치 전송)"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 우선순위 (숫자가 작을수록 먼저 전송)
+PRIORITY_STOP = 0      # STATE Stop (비상 정지)
+PRIORITY_CONTROL = 1   # STATE(기타), SET_GPIO, TEMP_RPM, FIRMWARE_UPDATE, Raw JSON
+PRIORITY_REF = 2       # 레시피(REF) — 패킷이 커서 제어 명령 뒤로 보낸다
+PRIORITY_PING = 3
+PRIORITY_VERSION = 4   # GET_VERSION
+
+PRIORITY_NAMES = {
+    PRIORITY_STOP: "stop",
+    PRIORITY_CONTROL: "control",
+    PRIORITY_REF: "ref",
+    PRIORITY_PING: "ping",
+    PRIORITY_VERSION: "version",
+}
+
+
+def classify_command(packet) -> Tuple[int, Optional[str]]:
+    """명령 패킷의 (우선순위, 병합 키)를 결정한다.
+
+    병합 키가 같은 명령이 큐에 대기 중이면 새 명령이 이전 명령을 대체한다.
+    STATE는 항상 32개 탱크 전체 상태 벡터를 싣기 때문에 최신 패킷 하나만 보내면 된다.
+    (병합된 STATE는 이전 명령의 우선순위를 물려받으므로 대기 중이던 Stop이 밀리지 않는다.)
+    """
+    return classify(getattr(packet, "cmd", None), getattr(packet, "tank_id", None))
+
+
+def classify(cmd: Optional[str], tank_id=None) -> Tuple[int, Optional[str]]:
+    """CMD와 TANK_ID로 (우선순위, 병합 키)를 결정한다. (사전 직렬화된 명령용)"""
+    if cmd == "STATE":
+        # Stop 여부는 send_state_command가 priority로 직접 지정한다
+        return PRIORITY_CONTROL, "STATE"
+    if cmd in ("SET_GPIO", "TEMP_RPM"):
+        return PRIORITY_CONTROL, f"{cmd}:{tank_id}"
+    if cmd == "REF":
+        return PRIORITY_REF, f"REF:{tank_id}"
+    if cmd == "PING":
+        return PRIORITY_PING, "PING"
+    if cmd == "GET_VERSION":
+        return PRIORITY_VERSION, f"GET_VERSION:{tank_id}"
+    return PRIORITY_CONTROL, None
+
+
+class _Entry:
+    __slots__ = ("priority", "seq", "data", "key", "label", "futures", "enqueued_at", "cancelled", "on_written")
+
+    def __init__(self, priority: int, seq: int, data: bytes, key: Optional[str], label: str,
+                 on_written: Optional[Callable[[float], None]] = None):
+        self.priority = priority
+        self.seq = seq
+        self.data = data
+        self.key = key
+        self.label = label
+        self.futures: List[asyncio.Future] = []
+        self.enqueued_at = time.monotonic()
+        self.cancelled = False
+        self.on_written = on_written
+
+    def __lt__(self, other: "_Entry"):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class CommandQueue:
+    """포트 7001 단일 송신 태스크용 우선순위 큐.
+
+    - 송신자는 submit()으로 직렬화된 바이트를 넣고, 실제 write+drain 결과(bool)를 기다린다.
+    - 같은 병합 키의 대기 명령은 최신 명령으로 대체되며, 우선순위는 둘 중 높은 쪽을 유지한다.
+    - on_written은 명령 바이트를 writer에 쓴 시각(monotonic)으로 호출된다. 대체된 명령은 쓰이지 않으므로
+      호출되지 않는다 (PING 전송 시각 기록용: 큐 대기 시간이 RTT에 섞이지 않게).
+    - 송신 태스크는 대기 중인 명령을 우선순위 순으로 모아 한 번의 drain으로 전송한다.
+    """
+
+    def __init__(
+        self,
+        max_batch_bytes: int = settings.command_batch_max_bytes,
+        drain_timeout_s: float = settings.command_drain_timeout_s,
+    ):
+        self.max_batch_bytes = max_batch_bytes
+        self.drain_timeout_s = drain_timeout_s
+        self._heap: List[_Entry] = []
+        self._by_key: Dict[str, _Entry] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+
+        # 메트릭
+        self.enqueued_total = 0
+        self.sent_total = 0
+        self.coalesced_total = 0
+        self.failed_total = 0
+        self.batches_total = 0
+        self.max_depth = 0
+        self.last_batch_size = 0
+        self._wait_ms_total = 0.0
+
+    def __len__(self) -> int:
+        return sum(1 for e in self._heap if not e.cancelled)
+
+    def submit(self, data: bytes, priority: int = PRIORITY_CONTROL,
+               key: Optional[str] = None, label: str = "",
+               on_written: Optional[Callable[[float], None]] = None) -> asyncio.Future:
+        """명령을 큐에 넣고, 전송 결과(True/False)로 완료되는 Future를 반환한다."""
+        future = asyncio.get_running_loop().create_future()
+        entry = _Entry(priority, next(self._seq), data, key, label, on_written)
+        entry.futures.append(future)
+
+        if key is not None:
+            old = self._by_key.get(key)
+            if old is not None and not old.cancelled:
+                # 이전 명령을 대체: 대기자는 새 명령의 결과를 받는다
+                old.cancelled = True
+                entry.futures = old.futures + entry.futures
+                entry.priority = min(entry.priority, old.priority)
+                entry.enqueued_at = old.enqueued_at
+                self.coalesced_total += 1
+            self._by_key[key] = entry
+
+        heapq.heappush(self._heap, entry)
+        self.enqueued_total += 1
+        self.max_depth = max(self.max_depth, len(self))
+        self._wakeup.set()
+        return future
+
+    def _pop_batch(self) -> List[_Entry]:
+        batch: List[_Entry] = []
+        size = 0
+        while self._heap:
+            entry = self._heap[0]
+            if entry.cancelled:
+                heapq.heappop(self._heap)
+                continue
+            # 최소 1개는 항상 보내고, 이후는 배치 크기 한도까지만 모은다
+            if batch and size + len(entry.data) > self.max_batch_bytes:
+                break
+            heapq.heappop(self._heap)
+            if entry.key is not None and self._by_key.get(entry.key) is entry:
+                del self._by_key[entry.key]
+            batch.append(entry)
+            size += len(entry.data)
+        return batch
+
+    @staticmethod
+    def _resolve(entries: List[_Entry], result: bool):
+        for entry in entries:
+            for future in entry.futures:
+                if not future.done():
+                    future.set_result(result)
+
+    def fail_all(self):
+        """연결이 끊겼을 때 대기 중인 모든 명령을 실패 처리한다."""
+        pending = [e for e in self._heap if not e.cancelled]
+        self._heap.clear()
+        self._by_key.clear()
+        self.failed_total += len(pending)
+        self._resolve(pending, False)
+
+    async def run(self, writer: asyncio.StreamWriter):
+        """송신 태스크 본체. writer에 대한 유일한 write/drain 호출자다.
+
+        drain 실패나 타임아웃이면 해당 배치와 대기 명령을 모두 실패 처리하고 종료한다.
+        """
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while True:
+                    batch = self._pop_batch()
+                    if not batch:
+                        break
+                    try:
+                        for entry in batch:
+                            writer.write(entry.data)
+                        written_at = time.monotonic()
+                        for entry in batch:
+                            if entry.on_written is not None:
+                                entry.on_written(written_at)
+                        await self._drain(writer)
+                    except Exception as e:
+                        labels = ",".join(entry.label for entry in batch)
+                        logger.error(f"Failed to send command batch ({labels}): {e!r}")
+                        self.failed_total += len(batch)
+                        self._resolve(batch, False)
+                        self.fail_all()
+                        return
+
+                    now = time.monotonic()
+                    for entry in batch:
+                        self._wait_ms_total += (now - entry.enqueued_at) * 1000.0
+                        if entry.label == "PING":
+                            logger.debug(f"Sent command: {entry.label}")
+                        else:
+                            logger.info(f"Sent command: {entry.label}")
+                    self.sent_total += len(batch)
+                    self.batches_total += 1
+                    self.last_batch_size = len(batch)
+                    self._resolve(batch, True)
+        finally:
+            self.fail_all()
+
+    async def _drain(self, writer: asyncio.StreamWriter):
+        """drain_timeout_s 안에 drain이 끝나지 않으면 TimeoutError.
+
+        asyncio.wait_for는 취소 시점에 drain이 막 끝났으면 취소를 삼키므로(Python 3.10/3.11)
+        송신 태스크 취소(_stop_sender_task)가 확실히 전달되도록 asyncio.wait를 쓴다.
+        """
+        drain = asyncio.ensure_future(writer.drain())
+        try:
+            done, _ = await asyncio.wait({drain}, timeout=self.drain_timeout_s)
+        except asyncio.CancelledError:
+            drain.cancel()
+            raise
+        if not done:
+            drain.cancel()
+            raise asyncio.TimeoutError()
+        drain.result()
+
+    def get_metrics(self) -> dict:
+        """큐 깊이와 누적 통계를 반환한다."""
+        depth_by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+        for entry in self._heap:
+            if not entry.cancelled:
+                depth_by_priority[PRIORITY_NAMES.get(entry.priority, str(entry.priority))] += 1
+        return {
+            "depth": sum(depth_by_priority.values()),
+            "depth_by_priority": depth_by_priority,
+            "max_depth": self.max_depth,
+            "enqueued_total": self.enqueued_total,
+            "sent_total": self.sent_total,
+            "coalesced_total": self.coalesced_total,
+            "failed_total": self.failed_total,
+            "batches_total": self.batches_total,
+            "last_batch_size": self.last_batch_size,
+            "avg_wait_ms": round(self._wait_ms_total / self.sent_total, 2) if self.sent_total else None,
+        }
@@ -3,19 +3,170 @@ import asyncio
 import logging
 import os
 import configparser
-import pandas as pd
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from itertools import repeat
+from typing import AsyncIterator, List, Dict, Any, Optional
 
 from app.config import settings
+from app.models.packet import SensorVector, TankStatus
+from app.services.export_jobs import EXPORT_ORDER, EXPORT_QUERY, read_only_uri
 
 logger = logging.getLogger(__name__)
 
+MIGRATION_SERIES_STATS = "series_stats_backfill"
+MIGRATION_SERIES_INDEX = "readings_series_index"
+# 시계열 인덱스: (tank_id, sensor_id)로 찾고 packet_id(저장 순서 = 시각 순서)로 구간을 범위 탐색.
+# value까지 넣어 시계열 조회가 readings 본문을 읽지 않게 한다
+SERIES_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_readings_series ON readings(tank_id, sensor_id, packet_id, value)"
+
+
+class ReadConnectionPool:
+    """이력 조회용 읽기 전용 연결 풀 (쓰기 연결과 분리)
+
+    - 연결은 처음 필요할 때 열어 계속 재사용한다 (mode=ro, query_only, mmap_size, statement 캐시)
+    - WAL 모드이므로 조회가 save_packet 커밋을 막거나 기다리지 않는다
+    - 연결이 모두 사용 중이면 큐에서 기다리고, 그 대기 시간을 집계한다
+    - 조회 중 오류가 난 연결은 닫고 다음 사용 때 다시 연다
+    """
+
+    def __init__(self, db_path: str, size: int = settings.db_read_pool_size,
+                 mmap_mb: int = settings.db_read_mmap_mb,
+                 cached_statements: int = settings.db_read_cached_statements):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self.mmap_bytes = mmap_mb * 1024 * 1024
+        self.cached_statements = cached_statements
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._open_conns: List[aiosqlite.Connection] = []
+
+        self.opened = 0
+        self.acquisitions = 0
+        self.waits = 0
+        self.errors = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+    def _ensure_queue(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 연결(aiosqlite 스레드)은 이벤트 루프에 묶이므로 루프가 바뀌면 새로 연다
+            self._loop = loop
+            self._open_conns = []
+            self._queue = asyncio.Queue()
+            for _ in range(self.size):
+                self._queue.put_nowait(None)  # 아직 열지 않은 자리
+        return self._queue
+
+    async def _open(self) -> aiosqlite.Connection:
+        conn = aiosqlite.connect(read_only_uri(self.db_path), uri=True,
+                                 cached_statements=self.cached_statements)
+        # 닫지 못한 읽기 연결(루프 교체 등)의 스레드가 프로세스 종료를 막지 않도록 한다 (읽기 전용이라 안전)
+        thread = getattr(conn, "_thread", None)
+        if thread is not None:
+            thread.daemon = True
+        conn = await conn
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA query_only = ON")
+        await conn.execute(f"PRAGMA mmap_size = {self.mmap_bytes}")
+        self._open_conns.append(conn)
+        self.opened += 1
+        return conn
+
+    async def _discard(self, conn: aiosqlite.Connection):
+        if conn in self._open_conns:
+            self._open_conns.remove(conn)
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        queue = self._ensure_queue()
+        started = time.perf_counter()
+        had_to_wait = queue.empty()
+        conn = await queue.get()
+        wait_ms = (time.perf_counter() - started) * 1000.0
+        self.acquisitions += 1
+        if had_to_wait:
+            self.waits += 1
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+        self._recent_waits.append(wait_ms)
+        try:
+            if conn is None:
+                conn = await self._open()
+            yield conn
+        except BaseException:
+            self.errors += 1
+            if conn is not None:
+                await self._discard(conn)
+                conn = None
+            raise
+        finally:
+            queue.put_nowait(conn)
+
+    async def close(self):
+        """열린 연결을 모두 닫는다. (다음 조회 때 다시 연다)"""
+        for conn in list(self._open_conns):
+            await self._discard(conn)
+        self._loop = None
+        self._queue = None
+
+    def get_stats(self) -> dict:
+        recent = sorted(self._recent_waits)
+        p99 = recent[min(len(recent) - 1, int(0.99 * (len(recent) - 1)))] if recent else None
+        in_use = self.size - self._queue.qsize() if self._queue is not None else 0
+        return {
+            "size": self.size,
+            "open": len(self._open_conns),
+            "in_use": in_use,
+            "opened_total": self.opened,
+            "acquisitions": self.acquisitions,
+            "waits": self.waits,
+            "wait_ms_avg": round(self.wait_ms_total / self.acquisitions, 3) if self.acquisitions else None,
+            "wait_ms_p99": round(p99, 3) if p99 is not None else None,
+            "wait_ms_max": round(self.wait_ms_max, 3),
+            "errors": self.errors,
+            "mmap_mb": self.mmap_bytes // (1024 * 1024),
+        }
+
+
 class DBService:
     def __init__(self, db_path: str = settings.db_path):
         self.db_path = db_path
+        # save_packet은 패킷마다 create_task로 호출된다. 쓰기 트랜잭션이 await 사이에 걸쳐 있으므로
+        # 동시에 여러 연결이 SQLite 잠금을 다투면 busy timeout(5초)으로 저장이 실패할 수 있어 순서대로 쓴다.
+        self._write_lock = asyncio.Lock()
+        self._migration_task: Optional[asyncio.Task] = None
         self._load_sys_config()
 
+    @property
+    def db_path(self) -> str:
+        return self._db_path
+
+    @db_path.setter
+    def db_path(self, path: str):
+        # 경로가 바뀌면 (테스트 등) 읽기 풀도 새 경로로 만든다
+        self._db_path = path
+        self.read_pool = ReadConnectionPool(path)
+
+    async def close(self):
+        """백그라운드 마이그레이션 중단, 읽기 연결 풀 종료 (마이그레이션은 다음 시작 때 이어서 진행)"""
+        if self._migration_task:
+            self._migration_task.cancel()
+            try:
+                await self._migration_task
+            except asyncio.CancelledError:
+                pass
+            self._migration_task = None
+        await self.read_pool.close()
+
     def _load_sys_config(self):
         """Load configuration from sys.ini to override defaults if present."""
         try:
@@ -44,6 +195,8 @@ class DBService:
         logger.info(f"Initializing database at {self.db_path}")
         async with aiosqlite.connect(self.db_path) as db:
             await db.execute("PRAGMA foreign_keys = ON;")
+            # WAL: 작업 풀 워커의 긴 읽기가 수신 데이터 저장(쓰기)을 막지 않도록 한다 (DB 파일에 유지됨)
+            await db.execute("PRAGMA journal_mode=WAL;")
             
             # Packets table
             await db.execute("""
@@ -66,7 +219,8 @@ class DBService:
                     FOREIGN KEY(packet_id) REFERENCES packets(id) ON DELETE CASCADE
                 )
             """)
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_readings_tank_sensor ON readings(tank_id, sensor_id)")
+            # packets 삭제(보관 기간 정리)의 ON DELETE CASCADE가 패킷마다 readings/states를 전체 스캔하지 않도록
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_readings_packet ON readings(packet_id)")
 
             # States table
             await db.execute("""
@@ -79,18 +233,270 @@ class DBService:
                     FOREIGN KEY(packet_id) REFERENCES packets(id) ON DELETE CASCADE
                 )
             """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_states_packet ON states(packet_id)")
+
+            # 시계열 카탈로그: (tank_id, sensor_id)별 행 수와 첫/마지막 시각. 저장/삭제 때 함께 갱신해
+            # 뷰어가 readings 전체를 COUNT/GROUP BY 하지 않고 시계열 목록을 읽는다
+            async with db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='series_stats'"
+            ) as cursor:
+                has_series_stats = await cursor.fetchone() is not None
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS series_stats (
+                    tank_id TEXT NOT NULL,
+                    sensor_id INTEGER NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    first_at DATETIME,
+                    last_at DATETIME,
+                    PRIMARY KEY (tank_id, sensor_id)
+                )
+            """)
+            # 시작 후 백그라운드에서 진행하는 마이그레이션 (행이 있으면 진행 중, cursor/target은 진행 위치)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    name TEXT PRIMARY KEY,
+                    cursor INTEGER NOT NULL DEFAULT 0,
+                    target INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            async with db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_readings_series'"
+            ) as cursor:
+                has_series_index = await cursor.fetchone() is not None
+            if not has_series_index:
+                async with db.execute("SELECT 1 FROM readings LIMIT 1") as cursor:
+                    has_readings = await cursor.fetchone() is not None
+                if has_readings:
+                    # 기존 DB: readings 전체 인덱스 빌드는 run_migrations에서. 그때까지 idx_readings_tank_sensor로 조회
+                    await db.execute(
+                        "INSERT OR IGNORE INTO schema_migrations (name) VALUES (?)", (MIGRATION_SERIES_INDEX,)
+                    )
+                else:
+                    await db.execute(SERIES_INDEX_SQL)
+                    await db.execute("DROP INDEX IF EXISTS idx_readings_tank_sensor")
+            if not has_series_stats:
+                # 카탈로그 이전에 만든 DB: 지금 있는 readings(id <= target)는 run_migrations가 구간별로 채우고,
+                # 이후 저장분은 save_packet이 바로 반영한다. 전체 GROUP BY로 시작을 막지 않는다
+                async with db.execute("SELECT MAX(id) FROM readings") as cursor:
+                    target = (await cursor.fetchone())[0]
+                if target:
+                    await db.execute(
+                        "INSERT OR IGNORE INTO schema_migrations (name, cursor, target) VALUES (?, 0, ?)",
+                        (MIGRATION_SERIES_STATS, target)
+                    )
+
+            # SENSOR ORDER 손실 구간 (녹화 중 감지분). 이력 조회가 이 구간의 데이터 공백을 구분하는 데 쓴다
+            # cause: gap / reconnect / resync / restart, missing: 빠진 패킷 수 (restart는 NULL = 알 수 없음)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS sequence_gaps (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source TEXT NOT NULL,
+                    cause TEXT NOT NULL,
+                    prev_order INTEGER,
+                    next_order INTEGER NOT NULL,
+                    missing INTEGER,
+                    gap_start DATETIME,
+                    gap_end DATETIME NOT NULL
+                )
+            """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_sequence_gaps_end ON sequence_gaps(gap_end)")
+
+            # 데이터 세대: 기존 행이 삭제/정리될 때마다 증가 (이력 캐시 무효화용, '*'는 전체 탱크)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS data_generations (
+                    tank_id TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL DEFAULT 0
+                )
+            """)
             
             await db.commit()
 
+    @staticmethod
+    async def _bump_generation(db: aiosqlite.Connection, tank_key: str):
+        """삭제와 같은 트랜잭션에서 데이터 세대를 올린다. (tank_key: 탱크 ID 또는 전체 '*')"""
+        await db.execute(
+            "INSERT INTO data_generations (tank_id, generation) VALUES (?, 1) "
+            "ON CONFLICT(tank_id) DO UPDATE SET generation = generation + 1",
+            (tank_key,)
+        )
+
+    @staticmethod
+    async def _delete_packets(db: aiosqlite.Connection, where_sql: str, params: tuple = ()) -> int:
+        """packets를 지우고(CASCADE로 readings/states) series_stats를 맞춘다. 지운 packets 수를 반환.
+
+        지울 readings의 시계열별 개수(카탈로그에 반영된 행만)를 먼저 세어 빼고, 첫 시각은 남은 행 중 가장 작은 packet_id(저장 순서)의
+        시각으로 다시 찾는다 (idx_readings_series 탐색 한 번).
+        """
+        # 카탈로그 채우기가 진행 중이면 아직 반영되지 않은 행(cursor < id <= target)은 빼지 않는다
+        counted_sql, counted_params = "", ()
+        async with db.execute(
+            "SELECT cursor, target FROM schema_migrations WHERE name = ?", (MIGRATION_SERIES_STATS,)
+        ) as cursor:
+            pending = await cursor.fetchone()
+        if pending:
+            counted_sql, counted_params = " AND (r.id <= ? OR r.id > ?)", tuple(pending)
+        async with db.execute(
+            f"""SELECT r.tank_id, r.sensor_id, COUNT(*)
+                FROM readings r
+                JOIN packets p ON r.packet_id = p.id
+                WHERE ({where_sql}){counted_sql}
+                GROUP BY r.tank_id, r.sensor_id""",
+            params + counted_params
+        ) as cursor:
+            removed = await cursor.fetchall()
+        cursor = await db.execute(f"DELETE FROM packets AS p WHERE {where_sql}", params)
+        deleted = cursor.rowcount
+        if removed:
+            await db.executemany(
+                "UPDATE series_stats SET row_count = row_count - ? WHERE tank_id = ? AND sensor_id = ?",
+                [(count, tank_id, sensor_id) for tank_id, sensor_id, count in removed]
+            )
+            await db.execute("DELETE FROM series_stats WHERE row_count <= 0")
+            await db.executemany(
+                """UPDATE series_stats SET first_at = (
+                       SELECT p.created_at FROM readings r JOIN packets p ON r.packet_id = p.id
+                       WHERE r.tank_id = series_stats.tank_id AND r.sensor_id = series_stats.sensor_id
+                       ORDER BY r.packet_id ASC LIMIT 1
+                   ) WHERE tank_id = ? AND sensor_id = ?""",
+                [(tank_id, sensor_id) for tank_id, sensor_id, _ in removed]
+            )
+        return deleted
+
+    async def get_series_stats(self) -> Dict[str, Any]:
+        """시계열 카탈로그 {"complete", "series": [(tank_id, sensor_id, row_count, first_at, last_at), ...]}.
+
+        complete가 False면 기존 DB의 카탈로그 채우기가 진행 중이라 행 수/첫 시각이 아직 일부만 반영된 상태다.
+        """
+        try:
+            async with self.read_pool.connection() as db:
+                async with db.execute(
+                    "SELECT 1 FROM schema_migrations WHERE name = ?", (MIGRATION_SERIES_STATS,)
+                ) as cursor:
+                    complete = await cursor.fetchone() is None
+                async with db.execute(
+                    "SELECT tank_id, sensor_id, row_count, first_at, last_at FROM series_stats ORDER BY tank_id, sensor_id"
+                ) as cursor:
+                    return {"complete": complete, "series": [dict(row) for row in await cursor.fetchall()]}
+        except Exception as e:
+            logger.error(f"Failed to query series stats: {e}")
+            return {"complete": False, "series": []}
+
+    def start_migrations(self):
+        """init_db 뒤 남은 마이그레이션을 백그라운드 작업으로 시작한다 (DB 쓰기를 소유한 프로세스에서)."""
+        if self._migration_task is None or self._migration_task.done():
+            self._migration_task = asyncio.create_task(self.run_migrations())
+
+    async def run_migrations(self, chunk_rows: Optional[int] = None):
+        """schema_migrations에 남은 작업을 끝까지 진행한다. 중단되면 다음 시작 때 cursor부터 이어간다."""
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                async with db.execute(
+                    "SELECT cursor, target FROM schema_migrations WHERE name = ?", (MIGRATION_SERIES_STATS,)
+                ) as cursor:
+                    pending = await cursor.fetchone()
+                async with db.execute(
+                    "SELECT 1 FROM schema_migrations WHERE name = ?", (MIGRATION_SERIES_INDEX,)
+                ) as cursor:
+                    index_pending = await cursor.fetchone() is not None
+            if pending:
+                await self._backfill_series_stats(*pending, chunk_rows or settings.db_migration_chunk_rows)
+            if index_pending:
+                await self._build_series_index()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Database migration failed: {e}")
+
+    async def _build_series_index(self):
+        """idx_readings_series를 만들고 앞부분이 같은 idx_readings_tank_sensor를 지운다.
+
+        CREATE INDEX는 나눌 수 없어 readings 전체를 한 번에 읽는다. _write_lock을 잡아 그동안의 save_packet은
+        busy timeout으로 실패하지 않고 순서를 기다린다 (서버/조회는 이미 동작 중, WAL 읽기는 막히지 않음).
+        """
+        started = time.monotonic()
+        async with self._write_lock, aiosqlite.connect(self.db_path) as db:
+            async with db.execute("BEGIN"):
+                await db.execute(SERIES_INDEX_SQL)
+                await db.execute("DROP INDEX IF EXISTS idx_readings_tank_sensor")
+                await db.execute("DELETE FROM schema_migrations WHERE name = ?", (MIGRATION_SERIES_INDEX,))
+                await db.commit()
+        logger.info(f"idx_readings_series built in {time.monotonic() - started:.1f}s")
+
+    async def _backfill_series_stats(self, start: int, target: int, chunk_rows: int):
+        """readings id (start, target] 구간을 chunk_rows씩 series_stats에 더한다.
+
+        구간마다 _write_lock을 잡은 한 트랜잭션에서 더하고 cursor를 옮기므로, 그 사이 save_packet(id > target)과
+        _delete_packets(반영된 행만 뺌)가 끼어들어도 카탈로그가 어긋나지 않는다.
+        """
+        logger.info(f"Backfilling series_stats: readings id {start}..{target}")
+        started = time.monotonic()
+        lo = start
+        while lo < target:
+            hi = min(lo + chunk_rows, target)
+            async with self._write_lock, aiosqlite.connect(self.db_path) as db:
+                async with db.execute(
+                    "SELECT 1 FROM schema_migrations WHERE name = ?", (MIGRATION_SERIES_STATS,)
+                ) as cursor:
+                    if await cursor.fetchone() is None:
+                        return  # clear_all로 readings가 비워짐
+                async with db.execute("BEGIN"):
+                    # INSERT ... SELECT의 ON CONFLICT는 SELECT에 WHERE가 있어야 파싱이 모호하지 않다
+                    await db.execute("""
+                        INSERT INTO series_stats (tank_id, sensor_id, row_count, first_at, last_at)
+                        SELECT r.tank_id, r.sensor_id, COUNT(*), MIN(p.created_at), MAX(p.created_at)
+                        FROM readings r
+                        JOIN packets p ON r.packet_id = p.id
+                        WHERE r.id > ? AND r.id <= ?
+                        GROUP BY r.tank_id, r.sensor_id
+                        ON CONFLICT(tank_id, sensor_id) DO UPDATE SET
+                            row_count = row_count + excluded.row_count,
+                            first_at = MIN(first_at, excluded.first_at),
+                            last_at = MAX(last_at, excluded.last_at)
+                    """, (lo, hi))
+                    if hi < target:
+                        await db.execute(
+                            "UPDATE schema_migrations SET cursor = ? WHERE name = ?", (hi, MIGRATION_SERIES_STATS)
+                        )
+                    else:
+                        await db.execute("DELETE FROM schema_migrations WHERE name = ?", (MIGRATION_SERIES_STATS,))
+                    await db.commit()
+            lo = hi
+            await asyncio.sleep(0)  # 구간 사이에 대기 중인 저장이 먼저 잠금을 잡도록
+        logger.info(f"series_stats backfill finished in {time.monotonic() - started:.1f}s")
+
+    async def get_data_generation(self, tank_id: Optional[str] = None) -> Optional[int]:
+        """이력 캐시 검증용 데이터 세대.
+
+        특정 탱크 조회는 해당 탱크 + 전체('*') 세대의 합, 전체 탱크 조회는 모든 세대의 합이다.
+        (세대는 증가만 하므로 합이 같으면 그 사이 삭제가 없었다) 읽기 실패 시 None → 캐시를 쓰지 않는다.
+        """
+        if tank_id:
+            query = "SELECT COALESCE(SUM(generation), 0) FROM data_generations WHERE tank_id IN ('*', ?)"
+            params = (str(tank_id),)
+        else:
+            query = "SELECT COALESCE(SUM(generation), 0) FROM data_generations"
+            params = ()
+        try:
+            async with self.read_pool.connection() as db:
+                async with db.execute(query, params) as cursor:
+                    row = await cursor.fetchone()
+                    return int(row[0])
+        except Exception as e:
+            logger.error(f"Failed to read data generation: {e}")
+            return None
+
     async def clear_all(self) -> bool:
         """모든 기록 데이터(packets/readings/states)를 삭제하고 DB를 비운다."""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write_lock, aiosqlite.connect(self.db_path) as db:
                 await db.execute("PRAGMA foreign_keys = ON;")
                 # packets 삭제 시 CASCADE로 readings/states도 삭제되지만 명시적으로 모두 비운다.
                 await db.execute("DELETE FROM readings")
                 await db.execute("DELETE FROM states")
                 await db.execute("DELETE FROM packets")
+                await db.execute("DELETE FROM series_stats")
+                await db.execute("DELETE FROM schema_migrations WHERE name = ?", (MIGRATION_SERIES_STATS,))
+                await db.execute("DELETE FROM sequence_gaps")
                 # AUTOINCREMENT 시퀀스 초기화 (sqlite_sequence 테이블이 존재할 때만)
                 async with db.execute(
                     "SELECT name FROM sqlite_master WHERE type='table' AND name='sqlite_sequence'"
@@ -100,6 +506,7 @@ class DBService:
                     await db.execute(
                         "DELETE FROM sqlite_sequence WHERE name IN ('packets', 'readings', 'states')"
                     )
+                await self._bump_generation(db, "*")
                 await db.commit()
                 # VACUUM은 트랜잭션 밖에서 실행해야 하므로 commit 후 호출
                 await db.execute("VACUUM")
@@ -119,10 +526,12 @@ class DBService:
         """
         try:
             tank_id_str = str(tank_id)
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write_lock, aiosqlite.connect(self.db_path) as db:
                 await db.execute("PRAGMA foreign_keys = ON;")
                 await db.execute("DELETE FROM readings WHERE tank_id = ?", (tank_id_str,))
                 await db.execute("DELETE FROM states WHERE tank_id = ?", (tank_id_str,))
+                await db.execute("DELETE FROM series_stats WHERE tank_id = ?", (tank_id_str,))
+                await self._bump_generation(db, tank_id_str)
                 await db.commit()
             logger.info(f"Database cleared for tank_id={tank_id_str}")
             return True
@@ -130,10 +539,13 @@ class DBService:
             logger.error(f"Failed to clear tank {tank_id}: {e}")
             return False
 
-    async def save_packet(self, order_num: int, created_at: str, readings: List[Dict], states: List[Dict]):
-        """Save a complete packet with its readings and states transactionally."""
+    async def save_packet(self, order_num: int, created_at: str, vector: SensorVector, states: List[TankStatus]):
+        """Save a complete packet with its readings and states transactionally.
+
+        readings는 파싱 시 만든 숫자 벡터를 그대로 쓴다. (형식 오류 NaN은 SQLite에서 NULL로 저장)
+        """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write_lock, aiosqlite.connect(self.db_path) as db:
                 await db.execute("PRAGMA foreign_keys = ON;")
                 async with db.execute("BEGIN"):
                     # Insert packet
@@ -144,20 +556,27 @@ class DBService:
                     packet_id = cursor.lastrowid
 
                     # Insert readings
-                    if readings:
-                        readings_data = [
-                            (packet_id, str(r['TANK_ID']), r['SENSOR_ID'], float(r['VALUE']))
-                            for r in readings
-                        ]
+                    if len(vector):
+                        tank_ids = list(map(str, vector.tank_ids))
                         await db.executemany(
                             "INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, ?, ?, ?)",
-                            readings_data
+                            zip(repeat(packet_id), tank_ids, vector.sensor_ids, vector.values)
+                        )
+                        # 시계열 카탈로그 (같은 트랜잭션)
+                        await db.executemany(
+                            """INSERT INTO series_stats (tank_id, sensor_id, row_count, first_at, last_at)
+                               VALUES (?, ?, 1, ?, ?)
+                               ON CONFLICT(tank_id, sensor_id) DO UPDATE SET
+                                   row_count = row_count + 1,
+                                   first_at = MIN(first_at, excluded.first_at),
+                                   last_at = MAX(last_at, excluded.last_at)""",
+                            zip(tank_ids, vector.sensor_ids, repeat(created_at), repeat(created_at))
                         )
 
                     # Insert states
                     if states:
                         states_data = [
-                            (packet_id, str(s['TANK_ID']), s['STAGE'], s['STATUS'])
+                            (packet_id, str(s.tank_id), s.stage, s.status)
                             for s in states
                         ]
                         await db.executemany(
@@ -171,8 +590,43 @@ class DBService:
             logger.error(f"Failed to save packet: {e}")
             return False
 
+    async def save_sequence_gap(self, gap: dict) -> bool:
+        """SENSOR ORDER 손실 구간 한 건 저장 (SequenceGap.to_dict())"""
+        try:
+            async with self._write_lock, aiosqlite.connect(self.db_path) as db:
+                await db.execute(
+                    """INSERT INTO sequence_gaps (source, cause, prev_order, next_order, missing, gap_start, gap_end)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    (gap["source"], gap["cause"], gap["prev_order"], gap["next_order"], gap["missing"],
+                     gap["gap_start"], gap["gap_end"])
+                )
+                await db.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save sequence gap: {e}")
+            return False
+
+    async def get_sequence_gaps(self, start: str, end: str) -> List[Dict]:
+        """[start, end]와 겹치는 손실 구간 (gap_end 순)"""
+        try:
+            async with self.read_pool.connection() as db:
+                async with db.execute(
+                    """SELECT source, cause, prev_order, next_order, missing, gap_start, gap_end
+                       FROM sequence_gaps
+                       WHERE gap_end >= ? AND COALESCE(gap_start, gap_end) <= ?
+                       ORDER BY gap_end ASC""",
+                    (start, end)
+                ) as cursor:
+                    return [dict(row) for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Failed to query sequence gaps: {e}")
+            return []
+
     async def get_history(self, start: str, end: str, tank_id: Optional[str] = None, sensor_ids: Optional[List[int]] = None) -> List[Dict]:
-        """Query history data for charts."""
+        """Query history data for charts.
+
+        조회 실패는 예외로 올린다. 빈 목록을 돌려주면 닫힌 구간의 빈 결과가 캐시(immutable)에 남는다.
+        """
         query = """
             SELECT p.created_at as time, r.value, r.sensor_id
             FROM readings r
@@ -193,36 +647,21 @@ class DBService:
         query += " ORDER BY p.created_at ASC"
 
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.read_pool.connection() as db:
                 async with db.execute(query, params) as cursor:
                     rows = await cursor.fetchall()
                     return [dict(row) for row in rows]
         except Exception as e:
             logger.error(f"Failed to query history: {e}")
-            return []
+            raise
 
     async def get_export_data(self, start: str, end: str) -> List[Dict]:
         """Query detailed data for CSV export."""
-        query = """
-            SELECT 
-                p.created_at as Timestamp, 
-                r.tank_id as Tank_ID, 
-                r.sensor_id as Sensor_ID, 
-                r.value as Value,
-                s.stage as Stage,
-                s.status as Status
-            FROM packets p
-            JOIN readings r ON p.id = r.packet_id
-            LEFT JOIN states s ON p.id = s.packet_id AND r.tank_id = s.tank_id
-            WHERE p.created_at BETWEEN ? AND ?
-            ORDER BY p.created_at ASC, r.tank_id ASC, r.sensor_id ASC
-        """
+        query = EXPORT_QUERY + EXPORT_ORDER
         params = [start, end]
 
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.read_pool.connection() as db:
                 async with db.execute(query, params) as cursor:
                     rows = await cursor.fetchall()
                     return [dict(row) for row in rows]
@@ -231,7 +670,10 @@ class DBService:
             return []
 
     async def cleanup_old_data(self):
-        """Delete data older than retention_days or if DB size exceeds limit."""
+        """Delete data older than retention_days or if DB size exceeds limit.
+
+        삭제 트랜잭션(과 VACUUM)마다 _write_lock을 잡아 save_packet과 번갈아 쓴다.
+        """
         # Refresh config in case sys.ini changed
         self._load_sys_config()
         
@@ -242,8 +684,12 @@ class DBService:
                 await db.execute("PRAGMA foreign_keys = ON;")
                 
                 # Delete by date
-                await db.execute("DELETE FROM packets WHERE created_at < ?", (cutoff_date,))
-                await db.commit()
+                async with self._write_lock:
+                    deleted_by_date = await self._delete_packets(db, "p.created_at < ?", (cutoff_date,))
+                    await db.execute("DELETE FROM sequence_gaps WHERE gap_end < ?", (cutoff_date,))
+                    if deleted_by_date > 0:
+                        await self._bump_generation(db, "*")
+                    await db.commit()
                 
                 # 2. Size-based cleanup
                 # Check current DB size
@@ -262,28 +708,63 @@ class DBService:
                         while current_size > max_size_bytes and iteration < max_iterations:
                             # Delete oldest 100 packets (adjustable)
                             # Using subquery to identify oldest packets
-                            await db.execute("""
-                                DELETE FROM packets 
-                                WHERE id IN (
-                                    SELECT id FROM packets ORDER BY created_at ASC LIMIT 100
-                                )
-                            """)
-                            await db.commit()
-                            
-                            # VACUUM to reclaim space and update file size
-                            await db.execute("VACUUM")
+                            async with self._write_lock:
+                                await self._delete_packets(db, """
+                                    p.id IN (
+                                        SELECT id FROM packets ORDER BY created_at ASC LIMIT 100
+                                    )
+                                """)
+                                await self._bump_generation(db, "*")
+                                await db.commit()
+
+                                # VACUUM to reclaim space and update file size
+                                await db.execute("VACUUM")
                             
                             current_size = os.path.getsize(self.db_path)
                             iteration += 1
                             
                         logger.info(f"Cleanup finished. Final size: {current_size/1024/1024:.2f}MB")
-                    else:
+                    elif deleted_by_date > 0:
                         # Just VACUUM if we deleted by date, to keep it tidy
-                        await db.execute("VACUUM")
+                        # (삭제가 없으면 전체 파일을 다시 쓰는 VACUUM은 건너뛴다)
+                        async with self._write_lock:
+                            await db.execute("VACUUM")
                         
                 logger.info(f"Cleaned up data older than {cutoff_date}")
         except Exception as e:
             logger.error(f"Failed to cleanup database: {e}")
 
+class IngestWriteDBService(DBService):
+    """api 워커용 db_service: 조회는 WAL 읽기로 직접 하고, 삭제는 DB 쓰기를 소유한 ingest 프로세스로 RPC.
+
+    _write_lock은 프로세스마다 따로라 워커에서 직접 지우면 ingest의 저장과 잠금을 다툰다.
+    """
+
+    def __init__(self, db_path: str = settings.db_path, client=None):
+        super().__init__(db_path)
+        self.client = client  # None이면 api 워커 공용 ingest_client
+
+    async def _remote_write(self, name: str, *args) -> bool:
+        from app.services.ipc import IngestUnavailable, RemoteCallError, ingest_client
+        try:
+            return await (self.client or ingest_client).call(name, *args)
+        except (IngestUnavailable, RemoteCallError, asyncio.TimeoutError) as e:
+            logger.error(f"{name} failed: {e!r}")
+            return False
+
+    async def clear_all(self) -> bool:
+        return await self._remote_write("db_service.clear_all")
+
+    async def clear_tank(self, tank_id) -> bool:
+        return await self._remote_write("db_service.clear_tank", tank_id)
+
+    async def cleanup_old_data(self):
+        pass  # 보관 기간 정리는 ingest 프로세스가 주기적으로 실행한다
+
+
 db_service = DBService()
 
+# process_role=api 워커는 DB에 쓰지 않는다 (저장/삭제/정리는 ingest 프로세스)
+if settings.process_role == "api":
+    db_service = IngestWriteDBService()
+
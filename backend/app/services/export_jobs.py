@@ -0,0 +1,202 @@
+"""작업 풀 워커에서 실행되는 내보내기/피벗/다운샘플 작업
+
+이 모듈은 워커 프로세스(spawn)에서 import되므로 앱 설정/서비스를 import하지 않는다.
+워커마다 읽기 전용 SQLite 연결을 하나 열어 두고, 결과는 청크 단위로 파일에 쓴다.
+진행률은 공유 큐로 보내고, 취소는 공유 배열의 플래그로 확인한다. (긴 SQL 실행 중에도
+sqlite progress handler로 확인해 중단)
+"""
+import csv
+import os
+import sqlite3
+from typing import Optional
+
+# 공유 취소 플래그 슬롯 수 (job serial % CANCEL_SLOTS 위치에 취소된 serial 기록)
+CANCEL_SLOTS = 256
+CHUNK_ROWS = 5000
+
+EXPORT_COLUMNS = ["Timestamp", "Tank_ID", "Sensor_ID", "Value", "Stage", "Status"]
+EXPORT_QUERY = """
+    SELECT
+        p.created_at as Timestamp,
+        r.tank_id as Tank_ID,
+        r.sensor_id as Sensor_ID,
+        r.value as Value,
+        s.stage as Stage,
+        s.status as Status
+    FROM packets p
+    JOIN readings r ON p.id = r.packet_id
+    LEFT JOIN states s ON p.id = s.packet_id AND r.tank_id = s.tank_id
+    WHERE p.created_at BETWEEN ? AND ?
+"""
+EXPORT_ORDER = " ORDER BY p.created_at ASC, r.tank_id ASC, r.sensor_id ASC"
+
+_conn: Optional[sqlite3.Connection] = None
+_progress = None
+_cancel_flags = None
+_current_serial = 0
+_chunk_rows = CHUNK_ROWS
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def read_only_uri(db_path: str) -> str:
+    """sqlite 읽기 전용 URI (경로의 ?, # 이스케이프)"""
+    return "file:" + os.path.abspath(db_path).replace("?", "%3f").replace("#", "%23") + "?mode=ro"
+
+
+def init_worker(db_path: str, progress_queue, cancel_flags, chunk_rows: int = CHUNK_ROWS):
+    """워커 프로세스 초기화: 읽기 전용 연결 + 진행률 큐 + 취소 플래그"""
+    global _conn, _progress, _cancel_flags, _chunk_rows
+    _progress = progress_queue
+    _cancel_flags = cancel_flags
+    _chunk_rows = chunk_rows
+    _conn = sqlite3.connect(read_only_uri(db_path), uri=True, check_same_thread=False)
+    _conn.execute("PRAGMA query_only = ON")
+    # 긴 SQL 실행 중에도 취소 확인 (0이 아니면 쿼리 중단 → OperationalError: interrupted)
+    _conn.set_progress_handler(_is_cancelled, 20000)
+
+
+def _is_cancelled() -> int:
+    return 1 if _cancel_flags[_current_serial % CANCEL_SLOTS] == _current_serial else 0
+
+
+def _report(done: int, total: Optional[int]):
+    if _is_cancelled():
+        raise JobCancelled()
+    _progress.put((_current_serial, done, total))
+
+
+def _filters(params: dict):
+    """tank_id / sensor_ids 조건 (readings r 기준)"""
+    sql = ""
+    args = []
+    if params.get("tank_id"):
+        sql += " AND r.tank_id = ?"
+        args.append(str(params["tank_id"]))
+    sensor_ids = params.get("sensor_ids")
+    if sensor_ids:
+        sql += f" AND r.sensor_id IN ({','.join('?' * len(sensor_ids))})"
+        args.extend(sensor_ids)
+    return sql, args
+
+
+def _count(params: dict) -> int:
+    where, args = _filters(params)
+    row = _conn.execute(
+        "SELECT COUNT(*) FROM packets p JOIN readings r ON p.id = r.packet_id "
+        "WHERE p.created_at BETWEEN ? AND ?" + where,
+        [params["start"], params["end"], *args],
+    ).fetchone()
+    return row[0]
+
+
+def _write_rows(cursor, path: str, header, total: Optional[int]) -> int:
+    rows_written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(header)
+        while True:
+            rows = cursor.fetchmany(_chunk_rows)
+            if not rows:
+                break
+            writer.writerows(rows)
+            rows_written += len(rows)
+            _report(rows_written, total)
+    return rows_written
+
+
+def export_csv(params: dict, path: str) -> int:
+    """행 단위 CSV (기존 /history/export와 같은 컬럼)"""
+    total = _count(params)
+    _report(0, total)
+    where, args = _filters(params)
+    cursor = _conn.execute(EXPORT_QUERY + where + EXPORT_ORDER, [params["start"], params["end"], *args])
+    return _write_rows(cursor, path, EXPORT_COLUMNS, total)
+
+
+def downsample_csv(params: dict, path: str) -> int:
+    """bucket_s 초 단위 탱크/센서별 평균·최소·최대 (SQL 집계)"""
+    _report(0, None)
+    bucket = max(1, int(params.get("bucket_s") or 60))
+    where, args = _filters(params)
+    cursor = _conn.execute(
+        f"""
+        SELECT datetime(CAST(strftime('%s', p.created_at) AS INTEGER) / {bucket} * {bucket}, 'unixepoch') AS Timestamp,
+               r.tank_id AS Tank_ID, r.sensor_id AS Sensor_ID,
+               AVG(r.value) AS Avg, MIN(r.value) AS Min, MAX(r.value) AS Max, COUNT(r.value) AS Count
+        FROM packets p
+        JOIN readings r ON p.id = r.packet_id
+        WHERE p.created_at BETWEEN ? AND ?{where}
+        GROUP BY 1, r.tank_id, r.sensor_id
+        ORDER BY 1 ASC, r.tank_id ASC, r.sensor_id ASC
+        """,
+        [params["start"], params["end"], *args],
+    )
+    return _write_rows(cursor, path, ["Timestamp", "Tank_ID", "Sensor_ID", "Avg", "Min", "Max", "Count"], None)
+
+
+def pivot_csv(params: dict, path: str) -> int:
+    """시각 × (TANK_ID_SENSOR_ID) 넓은 표 (pandas pivot_table)"""
+    import pandas as pd
+
+    total = _count(params)
+    _report(0, total)
+    where, args = _filters(params)
+    cursor = _conn.execute(
+        "SELECT p.created_at, r.tank_id, r.sensor_id, r.value FROM packets p "
+        "JOIN readings r ON p.id = r.packet_id WHERE p.created_at BETWEEN ? AND ?" + where,
+        [params["start"], params["end"], *args],
+    )
+    frames = []
+    done = 0
+    while True:
+        rows = cursor.fetchmany(_chunk_rows)
+        if not rows:
+            break
+        frames.append(pd.DataFrame.from_records(rows, columns=["Timestamp", "Tank_ID", "Sensor_ID", "Value"]))
+        done += len(rows)
+        _report(done, total)
+    if not frames:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("Timestamp\n")
+        return 0
+    df = pd.concat(frames, ignore_index=True)
+    df["Column"] = df["Tank_ID"].astype(str) + "_" + df["Sensor_ID"].astype(str)
+    wide = df.pivot_table(index="Timestamp", columns="Column", values="Value", aggfunc="mean")
+    wide.to_csv(path)
+    return len(wide)
+
+
+JOBS = {
+    "export": export_csv,
+    "pivot": pivot_csv,
+    "downsample": downsample_csv,
+}
+
+
+def run_job(serial: int, kind: str, params: dict, path: str) -> dict:
+    """워커에서 작업 하나를 실행하고 결과 파일 정보를 반환한다. (취소 시 JobCancelled)"""
+    global _current_serial
+    _current_serial = serial
+    part = path + ".part"
+    try:
+        rows = JOBS[kind](params, part)
+        os.replace(part, path)
+    except sqlite3.OperationalError as e:
+        _remove(part)
+        if _is_cancelled():
+            raise JobCancelled() from None
+        raise RuntimeError(f"SQLite error: {e}") from None
+    except BaseException:
+        _remove(part)
+        raise
+    return {"rows": rows, "bytes": os.path.getsize(path)}
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,291 @@
+"""여러 유닛 펌웨어 동시 롤아웃 서비스"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.models.protocol import AckPacketInitialize, CommandPacketFirmware, CommandPacketGetVersion
+from app.services.firmware_upload import firmware_uploader, load_firmware_config, PI_FIRMWARE_PATH
+from app.services.tcp_bridge import tcp_bridge
+from app.services.websocket_service import ws_manager
+
+logger = logging.getLogger(__name__)
+
+# 유닛별 진행 상태
+UNIT_PENDING = "pending"
+UNIT_SENDING = "sending"
+UNIT_WAITING_ACK = "waiting_ack"
+UNIT_VERIFYING = "verifying"
+UNIT_DONE = "done"
+UNIT_FAILED = "failed"
+UNIT_CANCELLED = "cancelled"
+
+# 롤아웃 전체 상태
+ROLLOUT_UPLOADING = "uploading"
+ROLLOUT_RUNNING = "running"
+ROLLOUT_COMPLETED = "completed"
+ROLLOUT_FAILED = "failed"
+ROLLOUT_CANCELLED = "cancelled"
+
+# 보관할 최근 롤아웃 수
+MAX_ROLLOUT_HISTORY = 20
+
+
+class RolloutUnit:
+    __slots__ = ("unit_id", "state", "version", "error", "started_at", "finished_at")
+
+    def __init__(self, unit_id: int):
+        self.unit_id = unit_id
+        self.state = UNIT_PENDING
+        self.version: Optional[int] = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "unit_id": self.unit_id,
+            "state": self.state,
+            "version": self.version,
+            "error": self.error,
+            "elapsed_s": round((self.finished_at or time.time()) - self.started_at, 2) if self.started_at else None,
+        }
+
+
+class Rollout:
+    def __init__(self, file_path: str, unit_ids: List[int], concurrency: int,
+                 expected_version: Optional[int], force_upload: bool):
+        self.id = uuid.uuid4().hex[:12]
+        self.file_path = file_path
+        self.concurrency = max(1, concurrency)
+        self.expected_version = expected_version
+        self.force_upload = force_upload
+        # 중복 유닛 제거 (순서 유지)
+        self.units: Dict[int, RolloutUnit] = {u: RolloutUnit(u) for u in dict.fromkeys(unit_ids)}
+        self.state = ROLLOUT_UPLOADING
+        self.sha256: Optional[str] = None
+        self.upload_skipped = False
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (ROLLOUT_COMPLETED, ROLLOUT_FAILED, ROLLOUT_CANCELLED)
+
+    def to_dict(self) -> dict:
+        counts: Dict[str, int] = {}
+        for unit in self.units.values():
+            counts[unit.state] = counts.get(unit.state, 0) + 1
+        return {
+            "rollout_id": self.id,
+            "state": self.state,
+            "file_path": self.file_path,
+            "sha256": self.sha256,
+            "upload_skipped": self.upload_skipped,
+            "concurrency": self.concurrency,
+            "expected_version": self.expected_version,
+            "error": self.error,
+            "counts": counts,
+            "units": [unit.to_dict() for unit in self.units.values()],
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class FirmwareRolloutService:
+    """펌웨어 이미지를 한 번 업로드한 뒤 여러 유닛에 FIRMWARE_UPDATE를 동시 진행한다.
+
+    - 동시 진행 유닛 수는 concurrency(세마포어)로 제한
+    - 유닛별로 FIRMWARE_UPDATE ACK를 기다린 뒤 GET_VERSION(ACK_INITIALIZE)으로 버전 확인
+    - 상태가 바뀔 때마다 WebSocket으로 FIRMWARE_ROLLOUT_PROGRESS 이벤트 전송
+    """
+
+    def __init__(self):
+        self._rollouts: Dict[str, Rollout] = {}
+
+    def get(self, rollout_id: str) -> Optional[Rollout]:
+        return self._rollouts.get(rollout_id)
+
+    def list(self) -> List[dict]:
+        return [r.to_dict() for r in self._rollouts.values()]
+
+    def start(self, file_path: str, unit_ids: List[int],
+              concurrency: int = settings.firmware_concurrency,
+              expected_version: Optional[int] = None,
+              force_upload: bool = False) -> Rollout:
+        """롤아웃을 시작하고 즉시 반환한다. 진행 상황은 get()/WebSocket으로 확인."""
+        rollout = Rollout(file_path, unit_ids, concurrency, expected_version, force_upload)
+        self._rollouts[rollout.id] = rollout
+        # 오래된 완료 롤아웃 정리
+        while len(self._rollouts) > MAX_ROLLOUT_HISTORY:
+            oldest = next((r for r in self._rollouts.values() if r.finished), None)
+            if oldest is None:
+                break
+            del self._rollouts[oldest.id]
+        rollout.task = asyncio.create_task(self._run(rollout))
+        logger.info(f"[rollout {rollout.id}] 시작: file={file_path}, units={list(rollout.units)}, concurrency={rollout.concurrency}")
+        return rollout
+
+    async def cancel(self, rollout_id: str) -> bool:
+        rollout = self._rollouts.get(rollout_id)
+        if rollout is None or rollout.finished or rollout.task is None:
+            return False
+        rollout.task.cancel()
+        try:
+            await rollout.task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    # 컨트롤러용 dict 반환 메서드 (api 워커에서는 같은 이름으로 ingest 프로세스에 RPC)
+    async def start_rollout(self, file_path: str, unit_ids: List[int], **kwargs) -> dict:
+        return self.start(file_path, unit_ids, **kwargs).to_dict()
+
+    async def get_rollout(self, rollout_id: str) -> Optional[dict]:
+        rollout = self.get(rollout_id)
+        return rollout.to_dict() if rollout is not None else None
+
+    async def list_rollouts(self) -> List[dict]:
+        return self.list()
+
+    async def _broadcast(self, rollout: Rollout):
+        try:
+            await ws_manager.broadcast({
+                "type": "FIRMWARE_ROLLOUT_PROGRESS",
+                "data": rollout.to_dict(),
+            })
+        except Exception as e:
+            logger.error(f"Failed to broadcast rollout progress: {e}")
+
+    async def _run(self, rollout: Rollout):
+        try:
+            await self._broadcast(rollout)
+
+            # 1단계: 이미지 업로드 (롤아웃당 1회, 같은 내용이면 생략)
+            url, firmware_dir = load_firmware_config()
+            full_path = os.path.join(firmware_dir, rollout.file_path)
+            try:
+                rollout.sha256, rollout.upload_skipped = await firmware_uploader.upload(
+                    full_path, rollout.file_path, url, force=rollout.force_upload
+                )
+            except Exception as e:
+                rollout.error = f"upload failed: {e}"
+                rollout.state = ROLLOUT_FAILED
+                for unit in rollout.units.values():
+                    unit.state = UNIT_FAILED
+                    unit.error = "upload failed"
+                logger.error(f"[rollout {rollout.id}] 업로드 실패: {e}")
+                return
+
+            # 2단계: 유닛별 FIRMWARE_UPDATE (동시 진행 수 제한)
+            rollout.state = ROLLOUT_RUNNING
+            await self._broadcast(rollout)
+            window = asyncio.Semaphore(rollout.concurrency)
+            await asyncio.gather(*(self._update_unit(rollout, unit, window, url) for unit in rollout.units.values()))
+
+            failed = [u.unit_id for u in rollout.units.values() if u.state != UNIT_DONE]
+            rollout.state = ROLLOUT_FAILED if failed else ROLLOUT_COMPLETED
+            if failed:
+                rollout.error = f"failed units: {failed}"
+            logger.info(f"[rollout {rollout.id}] 종료: state={rollout.state}, failed={failed}")
+        except asyncio.CancelledError:
+            rollout.state = ROLLOUT_CANCELLED
+            for unit in rollout.units.values():
+                if unit.state not in (UNIT_DONE, UNIT_FAILED):
+                    unit.state = UNIT_CANCELLED
+            logger.info(f"[rollout {rollout.id}] 취소됨")
+            raise
+        finally:
+            rollout.finished_at = time.time()
+            await self._broadcast(rollout)
+
+    async def _update_unit(self, rollout: Rollout, unit: RolloutUnit, window: asyncio.Semaphore, url: str):
+        async with window:
+            unit.started_at = time.time()
+            flashed = False
+            try:
+                await self._set_state(rollout, unit, UNIT_SENDING)
+                idx = tcp_bridge.next_command_idx()
+                ack = tcp_bridge.expect_ack(idx)
+                try:
+                    sent = await tcp_bridge.send_command(CommandPacketFirmware(
+                        cmd="FIRMWARE_UPDATE",
+                        unit_id=str(unit.unit_id),  # 프론트엔드에서 이미 매핑된 TANK_ID 값을 문자열로 전송
+                        tank_id=str(unit.unit_id),
+                        idx=idx,
+                        file=PI_FIRMWARE_PATH,
+                        send=False,
+                    ))
+                    if not sent:
+                        raise RuntimeError("FIRMWARE_UPDATE send failed (Pi not connected?)")
+
+                    await self._set_state(rollout, unit, UNIT_WAITING_ACK)
+                    packet = await asyncio.wait_for(ack, timeout=settings.firmware_ack_timeout_s)
+                    if str(packet.note).upper() != "OK":
+                        raise RuntimeError(f"FIRMWARE_UPDATE rejected: NOTE={packet.note}")
+                    flashed = True
+                except asyncio.TimeoutError:
+                    raise RuntimeError("FIRMWARE_UPDATE ACK timeout")
+                finally:
+                    tcp_bridge.discard_ack(idx)
+
+                await self._set_state(rollout, unit, UNIT_VERIFYING)
+                unit.version = await self._query_version(unit.unit_id)
+                if unit.version is None:
+                    raise RuntimeError("GET_VERSION no response")
+                if rollout.expected_version is not None and unit.version != rollout.expected_version:
+                    raise RuntimeError(f"version mismatch: {unit.version} != {rollout.expected_version}")
+                unit.finished_at = time.time()
+                await self._set_state(rollout, unit, UNIT_DONE)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                unit.error = str(e)
+                unit.finished_at = time.time()
+                if not flashed:
+                    # 플래싱 실패: Pi의 firmware.bin 상태를 알 수 없으므로 다음 롤아웃은 다시 업로드
+                    firmware_uploader.forget(url)
+                logger.error(f"[rollout {rollout.id}] unit {unit.unit_id} 실패: {e}")
+                await self._set_state(rollout, unit, UNIT_FAILED)
+
+    async def _set_state(self, rollout: Rollout, unit: RolloutUnit, state: str):
+        unit.state = state
+        await self._broadcast(rollout)
+
+    async def _query_version(self, unit_id: int) -> Optional[int]:
+        """GET_VERSION을 보내 ACK_INITIALIZE의 FW_VERSION을 받는다. 유닛 재부팅 동안은 재시도."""
+        for attempt in range(settings.firmware_verify_attempts):
+            idx = tcp_bridge.next_command_idx()
+            reply = tcp_bridge.expect_ack(idx)
+            try:
+                sent = await tcp_bridge.send_command(CommandPacketGetVersion(
+                    cmd="GET_VERSION",
+                    unit_id=str(unit_id),
+                    tank_id=str(unit_id),
+                    idx=str(idx),
+                    send=True,
+                ))
+                if sent:
+                    packet = await asyncio.wait_for(reply, timeout=settings.firmware_verify_timeout_s)
+                    if isinstance(packet, AckPacketInitialize):
+                        return packet.fw_version
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                tcp_bridge.discard_ack(idx)
+            if attempt + 1 < settings.firmware_verify_attempts:
+                await asyncio.sleep(settings.firmware_verify_interval_s)
+        return None
+
+
+# 전역 펌웨어 롤아웃 서비스 인스턴스 (api 워커는 ingest 프로세스의 서비스를 RPC로 사용)
+if settings.process_role == "api":
+    from app.services.ipc import RemoteRolloutService
+    firmware_rollout = RemoteRolloutService()
+else:
+    firmware_rollout = FirmwareRolloutService()
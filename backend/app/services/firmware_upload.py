@@ -0,0 +1,131 @@
+"""펌웨어 이미지 업로드 (비동기 스트리밍 + 내용 해시 캐시)"""
+import asyncio
+import configparser
+import hashlib
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+INI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ini', 'sys.ini')
+DEFAULT_UPLOAD_URL = "http://172.30.1.100:9001/upload"
+DEFAULT_DIR_WINDOWS = "C:/Projects/M-FACTORY/Software/control_server/Unitboardmonitoringdashboard/firmware/"
+DEFAULT_DIR_LINUX = "/home/pi/Projects/cosmo-m/firmware/"
+# 라즈베리파이에 업로드된 펌웨어 전체 경로 (FIRMWARE_UPDATE 패킷의 FILE)
+PI_FIRMWARE_PATH = "/home/pi/Projects/cosmo-m/firmware/firmware.bin"
+
+# sys.ini 파싱 결과 캐시: (mtime_ns, (url, firmware_dir))
+_config_cache: Optional[Tuple[int, Tuple[str, str]]] = None
+
+
+def load_firmware_config(ini_path: str = INI_PATH) -> Tuple[str, str]:
+    """sys.ini의 [FIRMWARE_UPDATE] 설정 (업로드 URL, 펌웨어 디렉토리)을 반환한다.
+
+    파일 mtime이 바뀌었을 때만 다시 읽는다.
+    """
+    global _config_cache
+    # OS에 따른 펌웨어 디렉토리 자동 설정
+    dir_key, default_dir = ('DIR_WINDOWS', DEFAULT_DIR_WINDOWS) if os.name == 'nt' else ('DIR_LINUX', DEFAULT_DIR_LINUX)
+    try:
+        mtime_ns = os.stat(ini_path).st_mtime_ns
+    except OSError:
+        return DEFAULT_UPLOAD_URL, default_dir
+    if _config_cache is not None and _config_cache[0] == mtime_ns:
+        return _config_cache[1]
+
+    try:
+        config = configparser.ConfigParser()
+        config.read(ini_path)
+        url = config.get('FIRMWARE_UPDATE', 'URL', fallback=DEFAULT_UPLOAD_URL)
+        firmware_dir = config.get('FIRMWARE_UPDATE', dir_key, fallback=default_dir)
+    except Exception as e:
+        logger.error(f"Failed to load config from {ini_path}: {e}")
+        return DEFAULT_UPLOAD_URL, default_dir
+
+    _config_cache = (mtime_ns, (url, firmware_dir))
+    logger.info(f"Loaded firmware config: url={url}, firmware_dir={firmware_dir}")
+    return url, firmware_dir
+
+
+class FirmwareUploader:
+    """펌웨어 이미지를 라즈베리파이 업로드 서버로 보낸다.
+
+    - httpx.AsyncClient로 파일을 청크 단위 스트리밍 업로드 (이벤트 루프/메모리 점유 최소화)
+    - Pi는 항상 같은 경로(PI_FIRMWARE_PATH)에 저장하므로 URL마다 마지막으로 올린 SHA-256만 기억하고,
+      그 이미지와 같을 때만 다시 올리지 않는다 (A → B → A면 두 번째 A도 업로드)
+    """
+
+    def __init__(self, timeout_s: float = settings.firmware_upload_timeout_s):
+        self.timeout_s = timeout_s
+        # url → Pi에 마지막으로 올라간 이미지의 sha256
+        self._uploaded: Dict[str, str] = {}
+        # (path, mtime_ns, size) → sha256
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+    async def file_hash(self, path: str) -> str:
+        """파일 SHA-256 (mtime/크기가 같으면 캐시 사용)"""
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+        cached = self._hashes.get(key)
+        if cached is not None:
+            return cached
+
+        def _hash():
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    h.update(chunk)
+            return h.hexdigest()
+
+        digest = await asyncio.to_thread(_hash)
+        self._hashes[key] = digest
+        return digest
+
+    def forget(self, url: Optional[str] = None):
+        """업로드 캐시를 비운다. (업로드/플래싱 실패, Pi 재부팅 등으로 파일 내용을 알 수 없을 때)"""
+        if url is None:
+            self._uploaded.clear()
+        else:
+            self._uploaded.pop(url, None)
+
+    async def upload(self, full_path: str, filename: str, url: str, force: bool = False) -> Tuple[str, bool]:
+        """이미지를 업로드한다.
+
+        Returns:
+            (sha256, skipped): skipped가 True면 같은 내용이 이미 업로드되어 생략한 것
+
+        Raises:
+            FileNotFoundError: 파일 없음
+            httpx.HTTPError: 업로드 실패
+        """
+        import httpx
+
+        digest = await self.file_hash(full_path)
+        if not force and self._uploaded.get(url) == digest:
+            logger.info(f"[firmware_upload] 동일 이미지 이미 업로드됨 (sha256={digest[:12]}) — 생략")
+            return digest, True
+
+        # 업로드가 중간에 실패하면 Pi의 파일 내용을 알 수 없다
+        self.forget(url)
+        size = os.path.getsize(full_path)
+        started = time.monotonic()
+        async with httpx.AsyncClient(timeout=self.timeout_s) as client:
+            with open(full_path, "rb") as f:
+                # multipart 본문은 파일에서 청크 단위로 읽혀 전송된다
+                resp = await client.post(url, files={"file": (filename, f)})
+            resp.raise_for_status()  # Check for HTTP errors
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"[firmware_upload] 업로드 성공: {size} bytes, {elapsed:.2f}s, "
+            f"status={resp.status_code}, resp={resp.text[:200]}"
+        )
+        self._uploaded[url] = digest
+        return digest, False
+
+
+# 전역 업로더 인스턴스
+firmware_uploader = FirmwareUploader()
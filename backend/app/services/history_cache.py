@@ -0,0 +1,134 @@
+"""이력 차트 조회 결과 캐시 (/history/chart)
+
+이미 지난 구간의 차트 데이터는 보존 기간 정리나 clear_tank/clear_all이 아니면 바뀌지 않는데,
+탱크를 오갈 때마다 같은 JOIN을 다시 실행한다. 끝난 구간의 결과를 직렬화된 JSON 바이트로 보관한다.
+
+- 키: 정규화한 (start, end, tank_id, sensor_ids)
+- 크기: 응답 바이트 합계 기준 LRU (history_cache_mb)
+- 무효화: 항목마다 저장 당시 데이터 세대(db_service.get_data_generation)를 기록하고,
+  조회 때 현재 세대와 다르면 버린다. 세대는 DB 테이블에 있으므로 다른 프로세스(ingest)의
+  정리/삭제도 반영된다.
+- ETag는 응답 바이트의 해시라 워커가 달라도 같은 데이터면 같은 값이다.
+"""
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+CacheKey = Tuple[str, str, Optional[str], Tuple[int, ...]]
+
+
+def normalize_time(value: str) -> str:
+    """'2026-06-01T00:00', '2026-06-01 00:00:00' 등을 저장 형식으로 맞춘다. (해석 불가면 그대로)"""
+    try:
+        return datetime.fromisoformat(value.strip()).strftime(TIME_FORMAT)
+    except ValueError:
+        return value
+
+
+def make_key(start: str, end: str, tank_id: Optional[str], sensor_ids: Optional[List[int]]) -> CacheKey:
+    tank = str(tank_id).strip() if tank_id not in (None, "") else None
+    return (normalize_time(start), normalize_time(end), tank, tuple(sorted(set(sensor_ids or ()))))
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def is_closed_range(end: str, now: Optional[datetime] = None) -> bool:
+    """end가 현재 시각보다 history_closed_margin_s 이상 지났으면 더 이상 데이터가 추가되지 않는 구간"""
+    try:
+        end_dt = datetime.strptime(normalize_time(end), TIME_FORMAT)
+    except ValueError:
+        return False
+    now = now or datetime.now()
+    return end_dt < now - timedelta(seconds=settings.history_closed_margin_s)
+
+
+class CachedResult:
+    __slots__ = ("body", "etag", "generation")
+
+    def __init__(self, body: bytes, etag: str, generation: int):
+        self.body = body
+        self.etag = etag
+        self.generation = generation
+
+
+class HistoryCache:
+    """응답 바이트 기준 LRU 캐시"""
+
+    def __init__(self, max_bytes: int = settings.history_cache_mb * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # 항목 하나가 캐시를 독차지하지 않도록 전체의 1/4까지만 보관
+        self.max_entry_bytes = max_bytes // 4
+        self._entries: "OrderedDict[CacheKey, CachedResult]" = OrderedDict()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.skipped = 0
+
+    def get(self, key: CacheKey, generation: int) -> Optional[CachedResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.generation != generation:
+            # 저장 이후 해당 탱크(또는 전체) 데이터가 삭제/정리됨
+            self._remove(key)
+            self.stale += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: CacheKey, body: bytes, generation: int, etag: Optional[str] = None) -> CachedResult:
+        entry = CachedResult(body, etag or make_etag(body), generation)
+        if len(body) > self.max_entry_bytes:
+            self.skipped += 1
+            return entry
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self.bytes += len(body)
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return entry
+
+    def _remove(self, key: CacheKey):
+        entry = self._entries.pop(key)
+        self.bytes -= len(entry.body)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "skipped_too_large": self.skipped,
+        }
+
+
+# 전역 이력 캐시 인스턴스 (API 워커별)
+history_cache = HistoryCache()
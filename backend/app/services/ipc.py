@@ -0,0 +1,684 @@
+"""수신(ingest) 프로세스 ↔ API 워커 프로세스 로컬 IPC
+
+process_role=ingest 프로세스가 포트 7000/7001(라즈베리파이), DB 쓰기, 작업 풀(job_pool)을 소유하고,
+process_role=api 워커(uvicorn --workers N)는 REST/WebSocket과 이력 조회(WAL 읽기)만 담당한다.
+
+- 전송: Unix 도메인 소켓(ipc_path). Windows 등 AF_UNIX를 쓸 수 없으면 127.0.0.1:ipc_port TCP
+- 메시지: u32(LE) 길이 + MessagePack 본문
+- ingest → api 이벤트
+    {"ev": "broadcast", "data": dict}    ws_manager.broadcast 메시지 그대로
+    {"ev": "sensor", "data": wire}       SensorFrame (벡터는 array 바이트 그대로, frame_to_wire)
+    {"ev": "status", "data": snapshot}   연결/녹화/큐/수신 통계 스냅샷 (ipc_status_interval_s 주기)
+- api → ingest RPC: {"id", "call": "대상.메서드", "args", "kwargs"} → {"id", "result"} 또는 {"id", "error"}
+  호출 가능한 메서드는 RPC_METHODS로 제한한다. pydantic 인자는 {"__model__", "data"}로 보내고 되살린다.
+
+이벤트는 클라이언트별 큐(ipc_client_queue)에 쌓이며, 느린 워커 때문에 수신 경로가 막히지 않도록
+큐가 차면 이벤트를 버리고 수를 센다. (RPC 응답은 버리지 않는다)
+"""
+import asyncio
+import logging
+import os
+import socket
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+import msgspec
+from pydantic import BaseModel
+
+from app.config import settings
+from app.models import protocol
+from app.models.packet import ErrorCode, SensorFrame, SensorVector, TankStatus
+from app.services.websocket_service import ws_manager, WebSocketManager
+
+logger = logging.getLogger(__name__)
+
+ROLE_ALL = "all"
+ROLE_INGEST = "ingest"
+ROLE_API = "api"
+
+# 메시지 길이 접두사 / 최대 메시지 크기 (이보다 크면 프로토콜 오류로 보고 연결을 끊는다)
+_HEADER = struct.Struct("<I")
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+# api 워커가 호출할 수 있는 ingest 프로세스 메서드
+RPC_METHODS: Dict[str, frozenset] = {
+    "tcp_bridge": frozenset({
+        "send_command", "send_state_command", "send_state_batch", "send_raw_json",
+        "send_recipe", "send_firmware_update", "set_selected_unit_id", "reserve_command_idx",
+    }),
+    "firmware_rollout": frozenset({"start_rollout", "get_rollout", "list_rollouts", "cancel"}),
+    "job_pool": frozenset({"start_job", "wait_job", "get_job", "list_jobs", "cancel_job"}),
+    "db_service": frozenset({"clear_all", "clear_tank"}),
+    "ingest": frozenset({"send_recipe_file"}),
+}
+
+
+class IngestUnavailable(ConnectionError):
+    """ingest 프로세스에 연결되어 있지 않음"""
+
+
+class RemoteCallError(RuntimeError):
+    """ingest 프로세스에서 RPC 실행 중 예외 발생"""
+
+
+def _enc_hook(obj):
+    if isinstance(obj, BaseModel):
+        return {"__model__": type(obj).__name__, "data": obj.model_dump(by_alias=True)}
+    raise NotImplementedError(f"Cannot encode {type(obj).__name__} over IPC")
+
+
+def _revive(value):
+    """{"__model__": 이름, "data": ...} 를 app.models.protocol 모델로 되살린다."""
+    if isinstance(value, dict) and "__model__" in value:
+        model = getattr(protocol, value["__model__"], None)
+        if not (isinstance(model, type) and issubclass(model, BaseModel)):
+            raise ValueError(f"Unknown model: {value['__model__']}")
+        return model.model_validate(value["data"])
+    return value
+
+
+_encoder = msgspec.msgpack.Encoder(enc_hook=_enc_hook)
+_decoder = msgspec.msgpack.Decoder()
+
+
+def pack_message(message: dict) -> bytes:
+    body = _encoder.encode(message)
+    return _HEADER.pack(len(body)) + body
+
+
+async def read_message(reader: asyncio.StreamReader) -> dict:
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ConnectionError(f"IPC message too large: {size} bytes")
+    return _decoder.decode(await reader.readexactly(size))
+
+
+def frame_to_wire(frame: SensorFrame) -> dict:
+    """SensorFrame → IPC 전송 형식 (벡터는 array 원본 바이트, 같은 머신이므로 엔디언/크기 동일)"""
+    vector = frame.vector
+    return {
+        "order": frame.order,
+        "date": frame.date,
+        "time": frame.time,
+        "cmd": frame.cmd,
+        "tank_ids": vector.tank_ids.tobytes(),
+        "sensor_ids": vector.sensor_ids.tobytes(),
+        "values": vector.values.tobytes(),
+        "parse_errors": vector.parse_errors,
+        "state": [(s.tank_id, s.stage, s.status) for s in frame.state],
+        "error": [(e.tank_id, e.code) for e in frame.error],
+    }
+
+
+def frame_from_wire(data: dict) -> SensorFrame:
+    tank_ids = array("l")
+    tank_ids.frombytes(data["tank_ids"])
+    sensor_ids = array("l")
+    sensor_ids.frombytes(data["sensor_ids"])
+    values = array("d")
+    values.frombytes(data["values"])
+    return SensorFrame(
+        order=data["order"],
+        date=data["date"],
+        time=data["time"],
+        vector=SensorVector(tank_ids, sensor_ids, values, data["parse_errors"]),
+        state=[TankStatus(t, stage, status) for t, stage, status in data["state"]],
+        error=[ErrorCode(t, code) for t, code in data["error"]],
+        cmd=data["cmd"],
+    )
+
+
+def _use_unix_socket(path: str) -> bool:
+    return bool(path) and hasattr(socket, "AF_UNIX") and sys.platform != "win32"
+
+
+# -------------------------------------------------------------------------
+# ingest 프로세스 쪽
+# -------------------------------------------------------------------------
+class _Subscriber:
+    """api 워커 연결 하나의 송신 큐 (이벤트는 상한, RPC 응답은 항상 보존)"""
+
+    def __init__(self, writer: asyncio.StreamWriter, limit: int):
+        self.writer = writer
+        self.limit = limit
+        self.pending: Deque[tuple] = deque()  # (이벤트 여부, 바이트)
+        self.events_queued = 0
+        self.dropped = 0
+        self.wakeup = asyncio.Event()
+
+    def push_event(self, data: bytes):
+        if self.events_queued >= self.limit:
+            self.dropped += 1
+            return
+        self.events_queued += 1
+        self.pending.append((True, data))
+        self.wakeup.set()
+
+    def push_reply(self, data: bytes):
+        self.pending.append((False, data))
+        self.wakeup.set()
+
+    async def pump(self):
+        try:
+            while True:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                while self.pending:
+                    is_event, data = self.pending.popleft()
+                    if is_event:
+                        self.events_queued -= 1
+                    self.writer.write(data)
+                await self.writer.drain()
+        except (ConnectionError, OSError):
+            pass  # 연결 종료는 _handle_client가 읽기 쪽에서 정리한다
+
+
+class IngestServer:
+    """ingest 프로세스의 IPC 서버: 브로드캐스트/SENSOR 이벤트 발행 + api 워커 RPC 처리"""
+
+    def __init__(self, path: str = settings.ipc_path, port: int = settings.ipc_port,
+                 queue_size: int = settings.ipc_client_queue,
+                 status_interval_s: float = settings.ipc_status_interval_s,
+                 targets: Optional[Dict[str, Any]] = None,
+                 ws: WebSocketManager = ws_manager):
+        self.path = path
+        self.port = port
+        self.queue_size = queue_size
+        self.status_interval_s = status_interval_s
+        self._targets = targets
+        self._ws = ws
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._subscribers: List[_Subscriber] = []
+        self._status_task: Optional[asyncio.Task] = None
+
+        self.events_published = 0
+        self.events_dropped = 0
+        self.rpc_calls = 0
+        self.rpc_errors = 0
+
+    def _default_targets(self) -> Dict[str, Any]:
+        # tcp_bridge 등은 이 모듈을 import하므로 순환 import를 피해 시작 시점에 가져온다
+        from app.services.tcp_bridge import tcp_bridge
+        from app.services.firmware_rollout import firmware_rollout
+        from app.services.job_pool import job_pool
+        from app.services.db_service import db_service
+        return {"tcp_bridge": tcp_bridge, "firmware_rollout": firmware_rollout, "job_pool": job_pool,
+                "db_service": db_service}
+
+    async def start(self):
+        if self._targets is None:
+            self._targets = self._default_targets()
+        if _use_unix_socket(self.path):
+            if os.path.exists(self.path):
+                os.unlink(self.path)  # 이전 실행이 남긴 소켓 파일
+            self._server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+            where = self.path
+        else:
+            self._server = await asyncio.start_server(self._handle_client, "127.0.0.1", self.port)
+            where = f"127.0.0.1:{self.port}"
+        self._ws.set_relay(self.publish)
+        self._status_task = asyncio.create_task(self._status_loop())
+        logger.info(f"Ingest IPC server listening on {where}")
+
+    async def stop(self):
+        self._ws.set_relay(None)
+        if self._status_task is not None:
+            self._status_task.cancel()
+            try:
+                await self._status_task
+            except asyncio.CancelledError:
+                pass
+            self._status_task = None
+        if self._server is not None:
+            self._server.close()
+            for sub in list(self._subscribers):
+                sub.writer.close()
+            await self._server.wait_closed()
+            self._server = None
+            if _use_unix_socket(self.path) and os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def publish(self, kind: str, payload):
+        """ws_manager 릴레이: 이벤트를 한 번 인코딩해 모든 api 워커 큐에 넣는다. (블로킹 없음)"""
+        if not self._subscribers:
+            return
+        if kind == "sensor":
+            payload = frame_to_wire(payload)
+        data = pack_message({"ev": kind, "data": payload})
+        self.events_published += 1
+        for sub in self._subscribers:
+            before = sub.dropped
+            sub.push_event(data)
+            self.events_dropped += sub.dropped - before
+
+    def snapshot(self) -> dict:
+        """api 워커가 동기 getter로 돌려줄 상태 스냅샷"""
+        bridge = self._targets["tcp_bridge"]
+        from app.services.can_ingest import can_ingest
+        return {
+            "connection": bridge.get_connection_status(),
+            "recording": bridge.get_recording_status(),
+            "selected_unit_id": bridge.get_selected_unit_id(),
+            "command_queue": bridge.get_command_queue_metrics(),
+            "ingest": bridge.get_ingest_stats(),
+            "state_journal": bridge.get_state_journal_stats(),
+            "sequence": bridge.get_sequence_stats(),
+            "can": can_ingest.get_stats(),
+            "ipc": self.get_stats(),
+            "pid": os.getpid(),
+        }
+
+    async def _status_loop(self):
+        while True:
+            await asyncio.sleep(self.status_interval_s)
+            if self._subscribers:
+                try:
+                    self.publish("status", self.snapshot())
+                except Exception as e:
+                    logger.error(f"Failed to publish ingest status: {e}")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        sub = _Subscriber(writer, self.queue_size)
+        pump = asyncio.create_task(sub.pump())
+        self._subscribers.append(sub)
+        logger.info(f"API worker connected to ingest IPC ({len(self._subscribers)} workers)")
+        try:
+            sub.push_event(pack_message({"ev": "status", "data": self.snapshot()}))
+            while True:
+                request = await read_message(reader)
+                asyncio.create_task(self._dispatch(sub, request))
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, msgspec.DecodeError) as e:
+            if not isinstance(e, asyncio.IncompleteReadError):
+                logger.warning(f"Ingest IPC client error: {e}")
+        finally:
+            self._subscribers.remove(sub)
+            pump.cancel()
+            writer.close()
+            logger.info(f"API worker disconnected from ingest IPC ({len(self._subscribers)} workers)")
+
+    async def _dispatch(self, sub: _Subscriber, request: dict):
+        call_id = request.get("id")
+        self.rpc_calls += 1
+        try:
+            target_name, _, method = str(request.get("call", "")).partition(".")
+            if method not in RPC_METHODS.get(target_name, ()):
+                raise PermissionError(f"RPC not allowed: {request.get('call')}")
+            target = self if target_name == "ingest" else self._targets[target_name]
+            func = getattr(target, method)
+            args = [_revive(a) for a in request.get("args") or ()]
+            kwargs = {k: _revive(v) for k, v in (request.get("kwargs") or {}).items()}
+            result = func(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                result = await result
+            reply = {"id": call_id, "result": result}
+        except Exception as e:
+            self.rpc_errors += 1
+            logger.error(f"Ingest RPC {request.get('call')} failed: {e}")
+            reply = {"id": call_id, "error": f"{type(e).__name__}: {e}"}
+        try:
+            sub.push_reply(pack_message(reply))
+        except Exception as e:
+            sub.push_reply(pack_message({"id": call_id, "error": f"Unencodable result: {e}"}))
+
+    async def send_recipe_file(self, filename: str, tank_id: Optional[int] = None) -> bool:
+        """api 워커의 send_recipe_compiled: ingest 쪽 레시피 캐시로 REF 전송"""
+        from app.services.recipe_cache import recipe_cache
+        recipe = recipe_cache.get(filename)
+        return await self._targets["tcp_bridge"].send_recipe_compiled(recipe, tank_id=tank_id)
+
+    def get_stats(self) -> dict:
+        return {
+            "workers": len(self._subscribers),
+            "events_published": self.events_published,
+            "events_dropped": self.events_dropped,
+            "rpc_calls": self.rpc_calls,
+            "rpc_errors": self.rpc_errors,
+        }
+
+
+# -------------------------------------------------------------------------
+# api 워커 쪽
+# -------------------------------------------------------------------------
+class IngestClient:
+    """api 워커의 IPC 클라이언트: 이벤트를 로컬 ws_manager로 중계하고 RPC를 보낸다. (끊기면 재연결)"""
+
+    def __init__(self, path: str = settings.ipc_path, port: int = settings.ipc_port,
+                 call_timeout_s: float = settings.ipc_call_timeout_s,
+                 ws: WebSocketManager = ws_manager):
+        self.path = path
+        self.port = port
+        self.call_timeout_s = call_timeout_s
+        self.ws = ws
+        self.snapshot: dict = {}
+        self.snapshot_at: Optional[float] = None
+        self.on_connection_change: Optional[Callable[[bool], Any]] = None
+
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+
+        self.connects = 0
+        self.events = 0
+        self.rpc_calls = 0
+        self.rpc_errors = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def wait_connected(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.connected and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        return self.connected
+
+    async def _open(self):
+        if _use_unix_socket(self.path):
+            return await asyncio.open_unix_connection(self.path)
+        return await asyncio.open_connection("127.0.0.1", self.port)
+
+    async def _run(self):
+        backoff = 0.2
+        while True:
+            try:
+                reader, writer = await self._open()
+            except OSError:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+                continue
+            backoff = 0.2
+            self._writer = writer
+            self.connects += 1
+            logger.info("Connected to ingest process")
+            self._notify(True)
+            try:
+                while True:
+                    message = await read_message(reader)
+                    if "ev" in message:
+                        await self._on_event(message["ev"], message["data"])
+                    else:
+                        self._on_reply(message)
+            except (asyncio.IncompleteReadError, ConnectionError, OSError, msgspec.DecodeError) as e:
+                logger.warning(f"Ingest IPC connection lost: {e!r}")
+            finally:
+                self._writer = None
+                writer.close()
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(IngestUnavailable("Ingest process disconnected"))
+                self._pending.clear()
+                self._notify(False)
+
+    def _notify(self, connected: bool):
+        if self.on_connection_change is not None:
+            try:
+                result = self.on_connection_change(connected)
+                if asyncio.iscoroutine(result):
+                    asyncio.create_task(result)
+            except Exception as e:
+                logger.error(f"Ingest connection callback failed: {e}")
+
+    async def _on_event(self, kind: str, data):
+        self.events += 1
+        try:
+            if kind == "sensor":
+                await self.ws.broadcast_sensor(frame_from_wire(data))
+            elif kind == "broadcast":
+                await self.ws.broadcast(data)
+            elif kind == "status":
+                self.snapshot = data
+                self.snapshot_at = time.time()
+        except Exception as e:
+            logger.error(f"Failed to relay ingest event {kind}: {e}")
+
+    def _on_reply(self, message: dict):
+        future = self._pending.pop(message.get("id"), None)
+        if future is None or future.done():
+            return
+        if "error" in message:
+            future.set_exception(RemoteCallError(message["error"]))
+        else:
+            future.set_result(message.get("result"))
+
+    async def call(self, name: str, *args, timeout: Optional[float] = None, **kwargs):
+        """ingest 프로세스의 RPC_METHODS 메서드를 호출하고 결과를 기다린다."""
+        writer = self._writer
+        if writer is None:
+            raise IngestUnavailable("Ingest process not connected")
+        self._next_id += 1
+        call_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = future
+        self.rpc_calls += 1
+        try:
+            writer.write(pack_message({"id": call_id, "call": name, "args": list(args), "kwargs": kwargs}))
+            await writer.drain()
+            return await asyncio.wait_for(future, timeout or self.call_timeout_s)
+        except Exception:
+            self.rpc_errors += 1
+            raise
+        finally:
+            self._pending.pop(call_id, None)
+
+    def get_stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "events": self.events,
+            "rpc_calls": self.rpc_calls,
+            "rpc_errors": self.rpc_errors,
+            "snapshot_age_s": round(time.time() - self.snapshot_at, 2) if self.snapshot_at else None,
+        }
+
+
+# api 워커 공용 클라이언트 (RemoteBridge/RemoteCanIngest/RemoteRolloutService가 공유)
+ingest_client = IngestClient()
+
+
+class _RemoteLinkMonitor:
+    def __init__(self, client: IngestClient):
+        self._client = client
+
+    def get_stats(self) -> dict:
+        return self._client.snapshot.get("connection", {}).get("data", {}).get("link", {})
+
+
+class RemoteBridge:
+    """api 워커용 tcp_bridge: 명령은 ingest 프로세스로 RPC, 상태 조회는 최근 스냅샷에서 반환한다."""
+
+    def __init__(self, tank_ids: Sequence[int], client: IngestClient = ingest_client):
+        self.client = client
+        self.link_monitor = _RemoteLinkMonitor(client)
+        # ingest에서 예약해 온 명령 IDX 블록 [_idx_next, _idx_end)
+        self._idx_next = 0
+        self._idx_end = 0
+        self._idx_lock = asyncio.Lock()
+        client.ws.set_sensor_layout(tank_ids)
+        client.on_connection_change = self._on_connection_change
+
+    async def start(self):
+        await self.client.start()
+
+    async def stop(self):
+        await self.client.stop()
+
+    async def _on_connection_change(self, connected: bool):
+        await self.client.ws.broadcast(self.get_connection_status())
+
+    async def _call(self, name: str, *args, **kwargs):
+        """송신 명령 RPC. ingest 프로세스가 없으면 tcp_bridge와 같이 False를 반환한다."""
+        try:
+            return await self.client.call(name, *args, **kwargs)
+        except (IngestUnavailable, RemoteCallError, asyncio.TimeoutError) as e:
+            logger.warning(f"{name} failed: {e!r}")
+            return False
+
+    def get_connection_status(self) -> dict:
+        status = self.client.snapshot.get("connection") if self.client.connected else None
+        data = dict(status["data"]) if status else {"connected": False, "rx": False, "tx": False, "link": {}}
+        # ingest 프로세스 연결 여부 (끊기면 Pi 연결 상태를 알 수 없으므로 연결 안 됨으로 표시)
+        data["ingest"] = self.client.connected
+        return {"type": "SYSTEM_CONNECTION_STATUS", "data": data}
+
+    def get_recording_status(self):
+        return self.client.snapshot.get("recording", False)
+
+    def get_selected_unit_id(self) -> int:
+        return self.client.snapshot.get("selected_unit_id", 601)
+
+    def get_command_queue_metrics(self) -> dict:
+        return self.client.snapshot.get("command_queue", {})
+
+    def get_ingest_stats(self) -> dict:
+        return self.client.snapshot.get("ingest", {})
+
+    def get_sequence_stats(self) -> dict:
+        return self.client.snapshot.get("sequence", {})
+
+    def get_state_journal_stats(self) -> Optional[dict]:
+        return self.client.snapshot.get("state_journal")
+
+    def get_ipc_stats(self) -> dict:
+        return {"client": self.client.get_stats(), "server": self.client.snapshot.get("ipc")}
+
+    def set_selected_unit_id(self, unit_id: int):
+        self.client.snapshot["selected_unit_id"] = unit_id
+        asyncio.create_task(self._call("tcp_bridge.set_selected_unit_id", unit_id))
+
+    async def allocate_command_idx(self) -> int:
+        """ingest 카운터에서 예약한 블록으로 명령 IDX를 발급한다. (블록이 비면 RPC로 다음 블록 예약)
+
+        ingest가 예약을 저널에 남기므로 워커/ingest 재시작이나 PID 재사용에도 IDX가 겹치지 않는다.
+        ingest에 연결되어 있지 않으면 0 (어차피 전송도 실패한다).
+        """
+        async with self._idx_lock:
+            if self._idx_next >= self._idx_end:
+                block = settings.ipc_idx_block
+                try:
+                    start = await self.client.call("tcp_bridge.reserve_command_idx", block)
+                except (IngestUnavailable, RemoteCallError, asyncio.TimeoutError) as e:
+                    logger.warning(f"reserve_command_idx failed: {e!r}")
+                    return 0
+                self._idx_next, self._idx_end = start, start + block
+            idx = self._idx_next
+            self._idx_next += 1
+            return idx
+
+    async def send_command(self, packet, priority: Optional[int] = None):
+        return await self._call("tcp_bridge.send_command", packet, priority=priority)
+
+    async def send_state_command(self, status: str, stage: int = 100, unit_id: Optional[int] = None) -> bool:
+        return await self._call("tcp_bridge.send_state_command", status, stage=stage, unit_id=unit_id)
+
+    async def send_state_batch(self, statuses: Dict[int, str], stage: int = 100) -> bool:
+        return await self._call("tcp_bridge.send_state_batch", statuses, stage=stage)
+
+    async def send_raw_json(self, json_data: dict) -> bool:
+        return await self._call("tcp_bridge.send_raw_json", json_data)
+
+    async def send_recipe(self, recipe_data: dict) -> bool:
+        return await self._call("tcp_bridge.send_recipe", recipe_data)
+
+    async def send_recipe_compiled(self, recipe, tank_id: Optional[int] = None) -> bool:
+        # 컴파일된 페이로드 대신 파일명을 보내고 ingest 프로세스의 레시피 캐시를 사용한다
+        return await self._call("ingest.send_recipe_file", recipe.filename, tank_id=tank_id)
+
+    async def send_firmware_update(self, unit_id: int, file_path: str) -> bool:
+        return await self._call("tcp_bridge.send_firmware_update", unit_id, file_path,
+                                timeout=settings.firmware_upload_timeout_s + settings.ipc_call_timeout_s)
+
+
+class RemoteCanIngest:
+    """api 워커용 can_ingest: CAN 수신은 ingest 프로세스에서만 동작한다."""
+
+    def __init__(self, client: IngestClient = ingest_client):
+        self.client = client
+
+    async def start(self, *args, **kwargs):
+        pass
+
+    async def stop(self):
+        pass
+
+    @property
+    def running(self) -> bool:
+        return bool(self.get_stats().get("running"))
+
+    def get_stats(self) -> dict:
+        return self.client.snapshot.get("can", {"enabled": settings.can_enabled, "running": False})
+
+
+class RemoteRolloutService:
+    """api 워커용 firmware_rollout: 롤아웃은 ACK를 받는 ingest 프로세스에서 실행한다."""
+
+    def __init__(self, client: IngestClient = ingest_client):
+        self.client = client
+
+    async def start_rollout(self, *args, **kwargs) -> dict:
+        return await self.client.call("firmware_rollout.start_rollout", *args, **kwargs)
+
+    async def get_rollout(self, rollout_id: str) -> Optional[dict]:
+        return await self.client.call("firmware_rollout.get_rollout", rollout_id)
+
+    async def list_rollouts(self) -> List[dict]:
+        return await self.client.call("firmware_rollout.list_rollouts")
+
+    async def cancel(self, rollout_id: str) -> bool:
+        return await self.client.call("firmware_rollout.cancel", rollout_id)
+
+
+class RemoteJobPool:
+    """api 워커용 job_pool: 작업은 ingest 프로세스의 작업 풀에서 실행하고 상태도 그쪽에만 둔다.
+
+    워커마다 작업 목록을 따로 가지면 /history/jobs/{id} 요청이 다른 워커로 가서 404가 된다.
+    결과 파일은 같은 머신에 있으므로 경로만 받아 이 워커가 직접 응답한다.
+    """
+
+    def __init__(self, client: IngestClient = ingest_client):
+        self.client = client
+
+    async def start_job(self, kind: str, params: dict) -> dict:
+        return await self.client.call("job_pool.start_job", kind, params)
+
+    async def run_job(self, kind: str, params: dict) -> dict:
+        """작업을 시작하고 끝날 때까지 기다린다. RPC 타임아웃보다 짧게 나눠 기다린다."""
+        from app.services.job_pool import JOB_FAILED, FINISHED_STATES
+        job = await self.start_job(kind, params)
+        window = self.client.call_timeout_s
+        while job["state"] not in FINISHED_STATES:
+            waited = await self.client.call("job_pool.wait_job", job["job_id"], window, timeout=window * 2)
+            if waited is None:
+                # ingest 재시작 등으로 작업이 사라짐
+                return {**job, "state": JOB_FAILED, "error": "job lost (ingest restarted?)"}
+            job = waited
+        return job
+
+    async def get_job(self, job_id: str, with_path: bool = False) -> Optional[dict]:
+        return await self.client.call("job_pool.get_job", job_id, with_path=with_path)
+
+    async def list_jobs(self) -> List[dict]:
+        return await self.client.call("job_pool.list_jobs")
+
+    async def cancel_job(self, job_id: str) -> Optional[bool]:
+        return await self.client.call("job_pool.cancel_job", job_id)
+
+    async def shutdown(self):
+        pass
@@ -0,0 +1,285 @@
+"""CPU 작업 풀 (내보내기/피벗/다운샘플)
+
+CSV 생성, 피벗, 집계를 이벤트 루프에서 하면 그동안 TCP 수신과 WebSocket 브로드캐스트가 멈춘다.
+작업은 별도 프로세스 풀(spawn)에서 실행하고, 이벤트 루프는 진행률만 받아 갱신한다.
+
+- 작업마다 job_id, 진행률(done/total), 취소, 결과 파일(청크 단위로 기록)을 가진다
+- 워커는 읽기 전용 SQLite 연결을 하나씩 유지한다 (export_jobs.init_worker)
+- 상태가 바뀌거나 진행률이 갱신되면 WebSocket JOB_PROGRESS 이벤트 전송 (최대 job_progress_interval_s 간격)
+- process_role=api 워커(uvicorn --workers N)에서는 작업을 ingest 프로세스가 소유한다 (RemoteJobPool).
+  요청이 어느 워커로 가도 같은 작업이 보이고, JOB_PROGRESS는 IPC 브로드캐스트로 모든 워커에 전달된다
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services import export_jobs
+from app.services.db_service import db_service
+from app.services.websocket_service import ws_manager
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+JOB_KINDS = tuple(export_jobs.JOBS)
+
+# 보관할 최근 작업 수 (오래된 완료 작업의 결과 파일은 삭제)
+MAX_JOB_HISTORY = 20
+
+
+class Job:
+    def __init__(self, serial: int, kind: str, params: dict, output_dir: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.serial = serial
+        self.kind = kind
+        self.params = params
+        self.path = os.path.abspath(os.path.join(output_dir, f"{kind}_{self.id}.csv"))
+        self.state = JOB_QUEUED
+        self.done = 0
+        self.total: Optional[int] = None
+        self.rows: Optional[int] = None
+        self.bytes: Optional[int] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.future: Optional[asyncio.Future] = None
+        self._last_broadcast = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def to_dict(self, with_path: bool = False) -> dict:
+        """API 응답용 dict. with_path면 결과 파일 경로 포함 (같은 머신의 api 워커가 파일을 직접 응답)"""
+        progress = None
+        if self.state == JOB_COMPLETED:
+            progress = 100.0
+        elif self.total:
+            progress = round(min(self.done, self.total) * 100.0 / self.total, 1)
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "params": self.params,
+            "done": self.done,
+            "total": self.total,
+            "progress_pct": progress,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if with_path:
+            data["path"] = self.path
+        return data
+
+
+class JobPoolService:
+    """프로세스 풀에서 무거운 조회/변환 작업을 실행한다. 풀은 첫 작업 때 만든다."""
+
+    def __init__(self, workers: int = settings.job_workers, output_dir: str = settings.job_output_dir,
+                 db_path: Optional[str] = None):
+        self.workers = workers
+        self.output_dir = output_dir
+        self.db_path = db_path
+        self._jobs: Dict[str, Job] = {}
+        self._by_serial: Dict[int, Job] = {}
+        self._serial = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._cancel_flags = None
+        self._listener: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_pool(self):
+        if self._pool is not None:
+            return
+        # fork는 실행 중인 이벤트 루프/스레드를 복제하므로 spawn 사용 (Windows와 동작 동일)
+        ctx = multiprocessing.get_context("spawn")
+        self._progress_queue = ctx.Queue()
+        self._cancel_flags = ctx.RawArray("q", export_jobs.CANCEL_SLOTS)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=export_jobs.init_worker,
+            initargs=(self.db_path or db_service.db_path, self._progress_queue, self._cancel_flags,
+                      settings.job_chunk_rows),
+        )
+        self._loop = asyncio.get_running_loop()
+        self._listener = threading.Thread(target=self._listen, name="job-progress", daemon=True)
+        self._listener.start()
+        logger.info(f"Job pool started ({self.workers} workers)")
+
+    def _listen(self):
+        """워커 진행률 큐를 읽어 이벤트 루프로 넘긴다."""
+        queue = self._progress_queue
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            try:
+                self._loop.call_soon_threadsafe(self._on_progress, *item)
+            except RuntimeError:
+                return  # 루프 종료
+
+    def _on_progress(self, serial: int, done: int, total: Optional[int]):
+        job = self._by_serial.get(serial)
+        if job is None or job.finished:
+            return
+        job.done = done
+        if total is not None:
+            job.total = total
+        if job.state == JOB_QUEUED:
+            job.state = JOB_RUNNING
+            self._broadcast(job, force=True)
+        else:
+            self._broadcast(job)
+
+    def _broadcast(self, job: Job, force: bool = False):
+        now = time.monotonic()
+        if not force and now - job._last_broadcast < settings.job_progress_interval_s:
+            return
+        job._last_broadcast = now
+        asyncio.create_task(ws_manager.broadcast({"type": "JOB_PROGRESS", "data": job.to_dict()}))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[dict]:
+        return [job.to_dict() for job in self._jobs.values()]
+
+    def start(self, kind: str, params: dict) -> Job:
+        """작업을 풀에 넣고 즉시 반환한다. 진행 상황은 get()/WebSocket으로 확인."""
+        if kind not in export_jobs.JOBS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self._ensure_pool()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._serial += 1
+        job = Job(self._serial, kind, params, self.output_dir)
+        self._jobs[job.id] = job
+        self._by_serial[job.serial] = job
+        self._trim_history()
+
+        future = self._pool.submit(export_jobs.run_job, job.serial, kind, params, job.path)
+        job.future = asyncio.wrap_future(future)
+        job.future.add_done_callback(lambda f, job=job: self._on_done(job, f))
+        logger.info(f"[job {job.id}] {kind} 시작: {params}")
+        return job
+
+    def _on_done(self, job: Job, future: asyncio.Future):
+        self._by_serial.pop(job.serial, None)
+        job.finished_at = time.time()
+        if future.cancelled():
+            job.state = JOB_CANCELLED
+        else:
+            error = future.exception()
+            if error is None:
+                result = future.result()
+                job.state = JOB_COMPLETED
+                job.rows = result["rows"]
+                job.bytes = result["bytes"]
+                job.done = max(job.done, job.rows)
+            elif isinstance(error, (export_jobs.JobCancelled, CancelledError)):
+                job.state = JOB_CANCELLED
+            else:
+                job.state = JOB_FAILED
+                job.error = str(error)
+                logger.error(f"[job {job.id}] 실패: {error}")
+        logger.info(f"[job {job.id}] {job.state} ({job.rows} rows, {job.finished_at - job.created_at:.1f}s)")
+        self._broadcast(job, force=True)
+
+    async def wait(self, job: Job) -> Job:
+        """작업이 끝날 때까지 기다린다. (취소/실패해도 예외를 올리지 않음)"""
+        await asyncio.wait([job.future])
+        # _on_done 콜백이 먼저 실행되도록 한 번 양보
+        while not job.finished:
+            await asyncio.sleep(0)
+        return job
+
+    # 컨트롤러용 dict 반환 메서드 (api 워커에서는 같은 이름으로 ingest 프로세스에 RPC)
+    async def start_job(self, kind: str, params: dict) -> dict:
+        return self.start(kind, params).to_dict()
+
+    async def run_job(self, kind: str, params: dict) -> dict:
+        """작업을 시작하고 끝날 때까지 기다린다. (결과 파일 경로 포함)"""
+        job = await self.wait(self.start(kind, params))
+        return job.to_dict(with_path=True)
+
+    async def wait_job(self, job_id: str, timeout_s: float) -> Optional[dict]:
+        """작업이 끝나거나 timeout_s가 지날 때까지 기다린 뒤 상태를 반환한다. (RemoteJobPool.run_job용)"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if not job.finished:
+            await asyncio.wait([job.future], timeout=timeout_s)
+            while job.future.done() and not job.finished:
+                await asyncio.sleep(0)
+        return job.to_dict(with_path=True)
+
+    async def get_job(self, job_id: str, with_path: bool = False) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return job.to_dict(with_path=with_path) if job is not None else None
+
+    async def list_jobs(self) -> List[dict]:
+        return self.list()
+
+    async def cancel_job(self, job_id: str) -> Optional[bool]:
+        """작업이 없으면 None"""
+        if job_id not in self._jobs:
+            return None
+        return self.cancel(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        # 아직 시작 전이면 풀에서 빼고, 실행 중이면 워커가 취소 플래그를 확인해 중단한다
+        self._cancel_flags[job.serial % export_jobs.CANCEL_SLOTS] = job.serial
+        job.future.cancel()
+        return True
+
+    def _trim_history(self):
+        while len(self._jobs) > MAX_JOB_HISTORY:
+            oldest = next((j for j in self._jobs.values() if j.finished), None)
+            if oldest is None:
+                break
+            del self._jobs[oldest.id]
+            try:
+                os.remove(oldest.path)
+            except OSError:
+                pass
+
+    async def shutdown(self):
+        if self._pool is None:
+            return
+        for job in self._jobs.values():
+            if not job.finished:
+                self._cancel_flags[job.serial % export_jobs.CANCEL_SLOTS] = job.serial
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: self._pool.shutdown(wait=True, cancel_futures=True))
+        self._progress_queue.put(None)
+        self._listener.join(timeout=1.0)
+        self._pool = None
+        logger.info("Job pool stopped")
+
+
+# 전역 작업 풀 인스턴스
+job_pool = JobPoolService()
+
+# process_role=api 워커는 작업 상태를 프로세스마다 따로 갖지 않도록 ingest 프로세스의 작업 풀을 쓴다
+if settings.process_role == "api":
+    from app.services.ipc import RemoteJobPool
+    job_pool = RemoteJobPool()
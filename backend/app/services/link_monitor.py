@@ -0,0 +1,143 @@
+"""PING/PONG 기반 링크 품질(RTT/지터/손실) 모니터"""
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LinkMonitor:
+    """포트 7001 PING과 라즈베리파이 PONG 응답을 IDX로 짝지어 링크 품질을 측정한다.
+
+    최근 window개의 PING 결과(응답 RTT 또는 손실)를 슬라이딩 윈도우로 유지하며,
+    RTT 평균/최소/최대/p95, 지터(연속 RTT 차이의 평균), 손실률을 계산한다.
+    손실률이나 평균 RTT가 임계치를 넘으면 degraded 상태로 전환한다.
+    """
+
+    def __init__(
+        self,
+        window: int = settings.link_window_size,
+        timeout_s: float = settings.ping_timeout_s,
+        rtt_degraded_ms: float = settings.link_rtt_degraded_ms,
+        loss_degraded_pct: float = settings.link_loss_degraded_pct,
+    ):
+        self.window = window
+        self.timeout_s = timeout_s
+        self.rtt_degraded_ms = rtt_degraded_ms
+        self.loss_degraded_pct = loss_degraded_pct
+
+        # 응답 대기 중인 PING: IDX(str) → 전송 시각(monotonic)
+        self._pending: Dict[str, float] = {}
+        # 윈도우 내 결과: RTT(ms) 또는 손실이면 None
+        self._samples: Deque[Optional[float]] = deque(maxlen=window)
+
+        self.sent_total = 0
+        self.received_total = 0
+        self.lost_total = 0
+        self.late_total = 0  # 타임아웃 이후 도착한 PONG
+        self.last_rtt_ms: Optional[float] = None
+        self.last_reply_at: Optional[float] = None
+        self.degraded = False
+
+    def reset(self):
+        """새 7001 연결 시 대기 중 PING과 윈도우를 초기화한다. (누적 카운터는 유지)"""
+        self._pending.clear()
+        self._samples.clear()
+        self.last_rtt_ms = None
+        self.last_reply_at = None
+        self.degraded = False
+
+    def record_sent(self, idx, now: Optional[float] = None):
+        """PING 전송 기록. 타임아웃이 지난 대기 PING은 손실로 처리한다."""
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+        self._pending[str(idx)] = now
+        self.sent_total += 1
+
+    def record_reply(self, idx, now: Optional[float] = None) -> Optional[float]:
+        """PONG 수신 기록. 매칭된 PING의 RTT(ms)를 반환하고, 없으면 None."""
+        now = time.monotonic() if now is None else now
+        sent_at = self._pending.pop(str(idx), None)
+        if sent_at is None:
+            # 이미 손실 처리된 PING의 늦은 응답이거나 알 수 없는 IDX
+            self.late_total += 1
+            return None
+        rtt_ms = (now - sent_at) * 1000.0
+        self._samples.append(rtt_ms)
+        self.received_total += 1
+        self.last_rtt_ms = rtt_ms
+        self.last_reply_at = now
+        return rtt_ms
+
+    def expire(self, now: Optional[float] = None):
+        """timeout_s 이상 응답이 없는 PING을 손실로 확정한다."""
+        now = time.monotonic() if now is None else now
+        expired = [k for k, t in self._pending.items() if now - t >= self.timeout_s]
+        for k in expired:
+            del self._pending[k]
+            self._samples.append(None)
+            self.lost_total += 1
+
+    def update_degraded(self) -> Optional[bool]:
+        """degraded 상태를 재평가한다. 상태가 바뀌었으면 새 상태를, 아니면 None을 반환."""
+        # 이번 연결에서 PONG을 한 번도 받지 못했다면 Pi가 PONG을 지원하지 않는 것으로 보고 판단 보류
+        if self.last_reply_at is None:
+            return None
+        stats = self.get_stats()
+        # 표본이 너무 적으면 판단 보류 (연결 직후 오탐 방지)
+        if stats["samples"] < min(5, self.window):
+            return None
+        degraded = (
+            stats["loss_pct"] >= self.loss_degraded_pct
+            or (stats["rtt_avg_ms"] is not None and stats["rtt_avg_ms"] >= self.rtt_degraded_ms)
+        )
+        if degraded == self.degraded:
+            return None
+        self.degraded = degraded
+        if degraded:
+            logger.warning(
+                f"Link degraded: loss={stats['loss_pct']:.1f}%, "
+                f"rtt_avg={stats['rtt_avg_ms']}ms, jitter={stats['jitter_ms']}ms"
+            )
+        else:
+            logger.info("Link recovered")
+        return degraded
+
+    def get_stats(self) -> dict:
+        """슬라이딩 윈도우 통계를 반환한다. (RTT 단위: ms)"""
+        rtts = [s for s in self._samples if s is not None]
+        samples = len(self._samples)
+        lost = samples - len(rtts)
+
+        rtt_avg = rtt_min = rtt_max = rtt_p95 = jitter = None
+        if rtts:
+            rtt_avg = sum(rtts) / len(rtts)
+            ordered = sorted(rtts)
+            rtt_min = ordered[0]
+            rtt_max = ordered[-1]
+            rtt_p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        if len(rtts) >= 2:
+            jitter = sum(abs(b - a) for a, b in zip(rtts, rtts[1:])) / (len(rtts) - 1)
+
+        def _r(v):
+            return round(v, 2) if v is not None else None
+
+        return {
+            "samples": samples,
+            "pending": len(self._pending),
+            "loss_pct": round(lost * 100.0 / samples, 2) if samples else 0.0,
+            "rtt_last_ms": _r(self.last_rtt_ms),
+            "rtt_avg_ms": _r(rtt_avg),
+            "rtt_min_ms": _r(rtt_min),
+            "rtt_max_ms": _r(rtt_max),
+            "rtt_p95_ms": _r(rtt_p95),
+            "jitter_ms": _r(jitter),
+            "degraded": self.degraded,
+            "sent_total": self.sent_total,
+            "received_total": self.received_total,
+            "lost_total": self.lost_total,
+            "late_total": self.late_total,
+        }
@@ -0,0 +1,273 @@
+"""이벤트 루프 지연 모니터 / 샘플링 프로파일러
+
+TCP 수신, 검증, 브로드캐스트, sqlite 스레드 전환, CSV 생성이 모두 uvicorn 이벤트 루프 하나에서
+돌기 때문에, 한 작업이 루프를 오래 잡으면 실시간 SENSOR_UPDATE가 멈춘다.
+
+- LoopMonitor: interval_s마다 깨어나는 샘플러로 예정 시각 대비 실제 깨어난 시각의 지연을
+  히스토그램으로 집계한다. 감시 스레드가 루프 heartbeat를 확인해 slow_threshold_ms 이상 멈추면
+  그 순간 루프 스레드의 스택을 캡처한다. (asyncio debug 모드는 모든 콜백을 계측하므로 쓰지 않는다)
+- SamplingProfiler: 요청 시에만 켜지는 스레드 샘플러. 루프 스레드 스택을 rate_hz로 수집해
+  flamegraph.pl / speedscope가 읽는 folded stack 형식("a;b;c 횟수")으로 저장한다.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 지연 히스토그램 버킷 상한 (ms). 마지막 버킷은 그 이상 전부
+LAG_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def fold_stack(frame) -> str:
+    """프레임을 바깥 → 안쪽 순서의 folded stack 문자열로 만든다."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class LoopMonitor:
+    """이벤트 루프 지연(스케줄 대비 실제 깨어남) 히스토그램과 느린 구간 스택 캡처"""
+
+    def __init__(
+        self,
+        interval_s: float = settings.loop_monitor_interval_s,
+        slow_threshold_ms: float = settings.loop_slow_threshold_ms,
+        max_events: int = settings.loop_slow_events,
+    ):
+        self.interval_s = interval_s
+        self.slow_threshold_ms = slow_threshold_ms
+        self.max_events = max_events
+
+        self.buckets: List[int] = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.samples = 0
+        self.lag_sum_ms = 0.0
+        self.lag_max_ms = 0.0
+        self._recent: Deque[float] = deque(maxlen=600)
+        self.slow_events: Deque[dict] = deque(maxlen=max_events)
+        self.slow_total = 0
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = time.monotonic()
+        self._open_event: Optional[dict] = None
+
+    @property
+    def loop_thread_id(self) -> Optional[int]:
+        return self._loop_thread_id
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._sample_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Loop monitor started (interval={self.interval_s}s, slow>{self.slow_threshold_ms}ms)")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _sample_loop(self):
+        loop = asyncio.get_running_loop()
+        interval = self.interval_s
+        while True:
+            scheduled = loop.time() + interval
+            await asyncio.sleep(interval)
+            self.record_lag(max(0.0, (loop.time() - scheduled) * 1000.0))
+
+    def record_lag(self, lag_ms: float):
+        """샘플러가 깨어날 때마다 호출된다. (루프 스레드)"""
+        self._last_tick = time.monotonic()
+        self.samples += 1
+        self.lag_sum_ms += lag_ms
+        if lag_ms > self.lag_max_ms:
+            self.lag_max_ms = lag_ms
+        self._recent.append(lag_ms)
+        index = 0
+        for bound in LAG_BUCKETS_MS:
+            if lag_ms <= bound:
+                break
+            index += 1
+        self.buckets[index] += 1
+
+        event = self._open_event
+        if event is not None:
+            # 감시 스레드가 캡처한 멈춤 구간이 끝났다 — 실제 지연으로 확정
+            self._open_event = None
+            event["lag_ms"] = round(lag_ms, 1)
+            event["resolved"] = True
+            logger.warning(f"Event loop blocked for {lag_ms:.0f}ms\n{event['stack'][-1] if event['stack'] else ''}")
+
+    def _watch(self):
+        """루프가 slow_threshold_ms 이상 heartbeat를 갱신하지 못하면 루프 스레드 스택을 캡처한다."""
+        threshold_s = self.slow_threshold_ms / 1000.0
+        period = max(threshold_s / 2, 0.01)
+        while not self._stop.wait(period):
+            stalled_s = time.monotonic() - self._last_tick - self.interval_s
+            if stalled_s < threshold_s or self._open_event is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame)
+            del frame
+            event = {
+                "at": datetime.now().isoformat(timespec="milliseconds"),
+                "lag_ms": round(stalled_s * 1000.0, 1),  # 해소되면 실제 지연으로 갱신
+                "resolved": False,
+                "stack": [line.rstrip() for line in stack],
+            }
+            self._open_event = event
+            self.slow_events.append(event)
+            self.slow_total += 1
+
+    def get_stats(self) -> dict:
+        recent = sorted(self._recent)
+
+        def pct(p):
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(round(p * (len(recent) - 1))))], 2)
+
+        histogram = {f"<={b}ms": n for b, n in zip(LAG_BUCKETS_MS, self.buckets)}
+        histogram[f">{LAG_BUCKETS_MS[-1]}ms"] = self.buckets[-1]
+        return {
+            "running": self.running,
+            "interval_ms": self.interval_s * 1000.0,
+            "slow_threshold_ms": self.slow_threshold_ms,
+            "samples": self.samples,
+            "lag_avg_ms": round(self.lag_sum_ms / self.samples, 2) if self.samples else None,
+            "lag_max_ms": round(self.lag_max_ms, 2),
+            "lag_p50_ms": pct(0.50),
+            "lag_p99_ms": pct(0.99),
+            "histogram": histogram,
+            "slow_total": self.slow_total,
+        }
+
+    def get_slow_events(self) -> List[dict]:
+        """최근 느린 구간 (최신순, 캡처 스택 포함)"""
+        return list(reversed(self.slow_events))
+
+
+class SamplingProfiler:
+    """요청 시에만 동작하는 루프 스레드 샘플링 프로파일러 (folded stack 출력)"""
+
+    def __init__(self, output_dir: str = settings.profiler_dir,
+                 max_duration_s: float = settings.profiler_max_duration_s):
+        self.output_dir = output_dir
+        self.max_duration_s = max_duration_s
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started_at: Optional[float] = None
+        self._rate_hz = 0.0
+        self._thread_id: Optional[int] = None
+        self.last_result: Optional[dict] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id: int, rate_hz: float = settings.profiler_rate_hz,
+              duration_s: Optional[float] = None) -> bool:
+        """thread_id 스레드의 샘플링 시작. 이미 동작 중이면 False."""
+        if self.running:
+            return False
+        self._stacks = Counter()
+        self._samples = 0
+        self._rate_hz = rate_hz
+        self._thread_id = thread_id
+        self._started_at = time.monotonic()
+        self._stop.clear()
+        duration = min(duration_s or self.max_duration_s, self.max_duration_s)
+        self._thread = threading.Thread(target=self._run, args=(1.0 / rate_hz, duration),
+                                        name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"Sampling profiler started ({rate_hz}Hz, max {duration}s)")
+        return True
+
+    def _run(self, period: float, duration: float):
+        deadline = time.monotonic() + duration
+        stacks = self._stacks
+        while not self._stop.wait(period):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                stacks[fold_stack(frame)] += 1
+                self._samples += 1
+                del frame
+            if time.monotonic() >= deadline:
+                break
+
+    def stop(self) -> Optional[dict]:
+        """샘플링을 멈추고 folded stack 파일을 쓴다. 시작한 적이 없으면 None."""
+        if self._thread is None:
+            return self.last_result
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.abspath(os.path.join(
+            self.output_dir, f"loop_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"))
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        self.last_result = {
+            "path": path,
+            "samples": self._samples,
+            "unique_stacks": len(self._stacks),
+            "duration_s": round(time.monotonic() - self._started_at, 2),
+            "rate_hz": self._rate_hz,
+        }
+        logger.info(f"Sampling profiler stopped: {self.last_result}")
+        return self.last_result
+
+    def get_status(self) -> dict:
+        return {
+            "running": self.running,
+            "samples": self._samples,
+            "elapsed_s": round(time.monotonic() - self._started_at, 2) if self.running else None,
+            "last_result": self.last_result,
+        }
+
+
+# 전역 인스턴스
+loop_monitor = LoopMonitor()
+sampling_profiler = SamplingProfiler()
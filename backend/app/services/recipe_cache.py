@@ -0,0 +1,232 @@
+"""레시피 파일 캐시 (목록/내용/사전 직렬화된 REF 페이로드)"""
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.models.protocol import RecipeDataItem
+
+logger = logging.getLogger(__name__)
+
+# Reference 디렉토리 경로 (프로젝트 루트 기준)
+# backend/app/services/recipe_cache.py -> backend/app/services -> backend/app -> backend -> 프로젝트 루트
+REFERENCE_DIR = Path(__file__).resolve().parent.parent.parent.parent / ".cursor" / "reference"
+
+
+class CompiledRecipe:
+    """검증이 끝난 레시피와 미리 직렬화한 REF DATA 배열.
+
+    DATA 배열은 전송 때마다 바뀌지 않으므로 한 번만 RecipeDataItem으로 검증하고
+    JSON으로 직렬화해 둔다. 전송 시에는 IDX/TANK_ID 등 헤더만 채워 넣는다.
+    """
+
+    __slots__ = ("filename", "mtime_ns", "content", "data_items", "data_json")
+
+    def __init__(self, filename: str, mtime_ns: int, content: dict):
+        self.filename = filename
+        self.mtime_ns = mtime_ns
+        self.content = content
+        self.data_items: Optional[List[RecipeDataItem]] = None
+        self.data_json: Optional[bytes] = None
+
+    def compile(self):
+        """REF DATA 배열을 검증하고 직렬화한다. (REF가 아닌 파일은 전송 시점에 오류)"""
+        if self.data_json is not None:
+            return
+        if self.content.get("CMD") != "REF":
+            raise ValueError("Invalid recipe format: CMD must be 'REF'")
+        items = []
+        for i, item_dict in enumerate(self.content.get("DATA", [])):
+            try:
+                items.append(RecipeDataItem(**item_dict))
+            except Exception as item_err:
+                raise ValueError(f"DATA[{i}] 파싱 실패: {item_err}") from item_err
+        self.data_items = items
+        # CommandPacketRef.model_dump_json(by_alias=True)의 DATA 부분과 동일한 형식
+        self.data_json = (
+            b"[" + b",".join(item.model_dump_json(by_alias=True).encode("utf-8") for item in items) + b"]"
+        )
+
+    def render_ref(self, idx, tank_id, unit_id=None) -> bytes:
+        """REF 패킷 전체를 와이어 형식(개행 포함)으로 만든다.
+
+        필드 순서/형식은 CommandPacketRef.model_dump_json(by_alias=True)와 동일하다.
+        IDX는 레시피 파일의 IDX를 우선 사용하고, 없으면 idx를 사용한다. (send_recipe와 동일)
+        """
+        self.compile()
+        unit_id = tank_id if unit_id is None else unit_id
+        head = {
+            "CMD": "REF",
+            "UNIT_ID": str(unit_id),
+            "IDX": self.content.get("IDX", str(idx)),
+            "TANK_ID": str(tank_id),
+            "STAGE": self.content.get("STAGE", "0"),
+            "STEP": self.content.get("STEP", "3600"),
+        }
+        head_json = json.dumps(head, separators=(",", ":"), ensure_ascii=False)
+        return (
+            head_json[:-1].encode("utf-8")
+            + b',"DATA":' + self.data_json + b',"SEND":false}\n'
+        )
+
+
+class RecipeCache:
+    """reference 디렉토리의 레시피 목록과 파일 내용을 메모리에 캐시한다.
+
+    - 파일 캐시 키는 (경로, mtime_ns): 조회 시 stat 한 번으로 최신 여부를 확인한다.
+    - 목록은 디렉토리 mtime이 바뀌거나 watcher가 변경을 알리면 다시 만든다.
+    - watcher는 watchfiles(inotify)를 쓰고, 없으면 폴링으로 대체한다.
+    """
+
+    def __init__(self, directory: Path = REFERENCE_DIR):
+        self.directory = directory
+        self._files: Dict[str, CompiledRecipe] = {}
+        self._listing: Optional[List[Dict[str, str]]] = None
+        self._listing_mtime_ns: Optional[int] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None
+
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def list_recipes(self) -> List[Dict[str, str]]:
+        """레시피 파일 목록 (파일명 정렬)"""
+        try:
+            dir_mtime = self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            logger.warning(f"Reference directory not found: {self.directory}")
+            self._listing = None
+            return []
+        if self._listing is not None and self._listing_mtime_ns == dir_mtime:
+            return self._listing
+
+        recipe_files = []
+        for file_path in self.directory.glob("*.json"):
+            recipe_files.append({
+                "filename": file_path.name,
+                "path": str(file_path.relative_to(self.directory.parent.parent.parent.parent))
+            })
+        # 파일명으로 정렬
+        recipe_files.sort(key=lambda x: x["filename"])
+        self._listing = recipe_files
+        self._listing_mtime_ns = dir_mtime
+        logger.info(f"Found {len(recipe_files)} recipe files")
+        return recipe_files
+
+    def resolve(self, filename: str) -> Path:
+        """파일명을 reference 디렉토리 내부 경로로 변환. 상위 디렉토리 접근이면 ValueError."""
+        file_path = self.directory / filename
+        # 보안: 상위 디렉토리 접근 방지
+        if not file_path.resolve().is_relative_to(self.directory.resolve()):
+            raise ValueError("Invalid file path")
+        return file_path
+
+    def get(self, filename: str) -> CompiledRecipe:
+        """레시피 파일을 캐시에서 가져온다. 파일이 바뀌었으면 다시 읽는다.
+
+        Raises:
+            ValueError: 잘못된 경로
+            FileNotFoundError: 파일 없음
+            json.JSONDecodeError: JSON 형식 오류
+        """
+        file_path = self.resolve(filename)
+        mtime_ns = file_path.stat().st_mtime_ns
+        cached = self._files.get(filename)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+        recipe = CompiledRecipe(filename, mtime_ns, content)
+        if content.get("CMD") == "REF":
+            try:
+                recipe.compile()
+            except ValueError as e:
+                # 내용 조회는 가능하도록 두고, 전송 시점에 오류를 낸다
+                logger.error(f"Invalid recipe DATA in {filename}: {e}")
+        self._files[filename] = recipe
+        logger.info(f"Loaded recipe file: {filename}")
+        return recipe
+
+    def invalidate(self, path: Optional[str] = None):
+        """캐시 무효화. path가 없으면 전체."""
+        self._listing = None
+        if path is None:
+            self._files.clear()
+        else:
+            self._files.pop(os.path.basename(path), None)
+
+    def get_stats(self) -> dict:
+        return {
+            "files": len(self._files),
+            "hits": self.hits,
+            "misses": self.misses,
+            "watching": self._watch_task is not None and not self._watch_task.done(),
+        }
+
+    # ------------------------------------------------------------------
+    # 파일 감시
+    # ------------------------------------------------------------------
+    async def start_watcher(self):
+        if self._watch_task is not None:
+            return
+        self._stop_event = asyncio.Event()
+        self._watch_task = asyncio.create_task(self._watch_loop())
+
+    async def stop_watcher(self):
+        if self._watch_task is None:
+            return
+        self._stop_event.set()
+        self._watch_task.cancel()
+        try:
+            await self._watch_task
+        except asyncio.CancelledError:
+            pass
+        self._watch_task = None
+
+    async def _watch_loop(self):
+        try:
+            from watchfiles import awatch
+        except ImportError:
+            awatch = None
+
+        while not self._stop_event.is_set():
+            if awatch is not None and self.directory.exists():
+                try:
+                    logger.info(f"Watching recipe directory (inotify): {self.directory}")
+                    async for changes in awatch(self.directory, stop_event=self._stop_event):
+                        for _change, path in changes:
+                            self.invalidate(path)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Recipe watcher failed, falling back to polling: {e}")
+                if self._stop_event.is_set():
+                    break
+            # 폴링: 디렉토리가 없거나 watchfiles를 쓸 수 없을 때. 디렉토리가 생기면 다음 루프에서 inotify로 전환
+            await self._poll_once()
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=settings.recipe_poll_interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll_once(self):
+        """mtime이 바뀐 파일과 목록을 무효화한다."""
+        for filename, recipe in list(self._files.items()):
+            try:
+                if (self.directory / filename).stat().st_mtime_ns != recipe.mtime_ns:
+                    self.invalidate(filename)
+            except FileNotFoundError:
+                self.invalidate(filename)
+
+
+# 전역 레시피 캐시 인스턴스
+recipe_cache = RecipeCache()
@@ -0,0 +1,224 @@
+"""SENSOR ORDER 연속성 검사 (손실 구간/중복/카운터 재시작)
+
+라즈베리파이는 SENSOR 패킷마다 ORDER를 1씩 올려 보낸다. 재연결이나 수신 버퍼 리셋(resync) 뒤에는
+패킷이 빠지거나, Pi가 미전송분을 다시 보내 같은 패킷이 두 번 들어올 수 있다.
+
+판정 (expected = 마지막으로 받은 ORDER + 1):
+    order == expected            → 정상
+    expected < order <= +restart → 손실 구간 (expected ~ order-1), 받은 패킷은 정상 처리
+    order < expected, 최근 window 안에서 ORDER와 DATE/TIME이 같은 패킷을 받았음 → 중복 (버림)
+    order < expected, 최근 손실 구간에 있던 ORDER → 늦게 도착 (받고, 손실 수에서 뺀다)
+    그 밖의 역행 / restart보다 큰 건너뜀 → 카운터 재시작 (Pi 재부팅 등, 손실로 세지 않음)
+
+DATE/TIME까지 비교하므로 Pi가 재시작해 예전 ORDER를 다시 쓰더라도 새 데이터를 중복으로 버리지 않는다.
+"""
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Hashable, List, Optional
+
+from app.config import settings
+
+SEQ_OK = "ok"
+SEQ_FIRST = "first"
+SEQ_GAP = "gap"
+SEQ_DUPLICATE = "duplicate"
+SEQ_LATE = "late"
+SEQ_RESTART = "restart"
+
+# 손실 구간 원인 (구간 직전에 있었던 일)
+CAUSE_GAP = "gap"
+CAUSE_RECONNECT = "reconnect"
+CAUSE_RESYNC = "resync"
+CAUSE_RESTART = "restart"
+
+# 손실 구간으로 비워 둔 ORDER 표시
+_MISSING = object()
+
+
+class SequenceGap:
+    """ORDER가 끊긴 구간 하나. missing은 빠진 패킷 수 (카운터 재시작이면 알 수 없으므로 None)."""
+
+    __slots__ = ("source", "cause", "prev_order", "next_order", "missing", "gap_start", "gap_end")
+
+    def __init__(self, source: str, cause: str, prev_order: Optional[int], next_order: int,
+                 missing: Optional[int], gap_start: Optional[float], gap_end: float):
+        self.source = source
+        self.cause = cause
+        self.prev_order = prev_order
+        self.next_order = next_order
+        self.missing = missing
+        self.gap_start = gap_start  # 구간 직전 패킷 수신 시각 (epoch 초)
+        self.gap_end = gap_end  # 구간을 드러낸 패킷 수신 시각
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "cause": self.cause,
+            "prev_order": self.prev_order,
+            "next_order": self.next_order,
+            "missing": self.missing,
+            "gap_start": _format_time(self.gap_start),
+            "gap_end": _format_time(self.gap_end),
+        }
+
+
+class _Counters:
+    __slots__ = ("received", "accepted", "duplicates", "late", "gaps", "missing", "restarts")
+
+    def __init__(self):
+        self.received = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.late = 0
+        self.gaps = 0
+        self.missing = 0
+        self.restarts = 0
+
+    def as_dict(self) -> dict:
+        total = self.accepted + self.missing
+        return {
+            "received": self.received,
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "late": self.late,
+            "gaps": self.gaps,
+            "missing": self.missing,
+            "restarts": self.restarts,
+            "loss_pct": round(self.missing / total * 100, 3) if total else 0.0,
+        }
+
+
+class SequenceTracker:
+    """수신 경로 하나의 ORDER 추적기.
+
+    재연결 뒤에 다시 온 패킷도 중복으로 걸러야 하므로 상태(expected, 최근 ORDER)는 연결이 바뀌어도
+    유지하고, 통계는 전체 누적과 현재 연결분을 따로 센다 (connect()에서 연결분만 초기화).
+    """
+
+    def __init__(self, source: str, window: int = settings.sequence_window,
+                 restart_jump: int = settings.sequence_restart_jump,
+                 recent_gaps: int = settings.sequence_recent_gaps):
+        self.source = source
+        self.window = max(1, window)
+        self.restart_jump = restart_jump
+        self.expected: Optional[int] = None
+        self._last_at: Optional[float] = None
+        # 최근 ORDER → DATE/TIME (손실 구간이면 _MISSING), 삽입 순서로 window개까지
+        self._recent: Dict[int, object] = {}
+        self._recent_order: Deque[int] = deque()
+        self._pending_cause: Optional[str] = None
+
+        self.total = _Counters()
+        self.connection = _Counters()
+        self.connections = 0
+        self.resyncs = 0
+        self.recent_gaps: Deque[SequenceGap] = deque(maxlen=recent_gaps)
+
+    # ------------------------------------------------------------------
+    # 연결 이벤트
+    # ------------------------------------------------------------------
+    def connect(self):
+        """새 수신 연결. 다음 손실 구간의 원인을 재연결로 표시한다."""
+        self.connections += 1
+        self.connection = _Counters()
+        if self.expected is not None:
+            self._pending_cause = CAUSE_RECONNECT
+
+    def resync(self):
+        """수신 버퍼를 버리고 다시 맞춤 (버린 바이트에 있던 패킷은 다음 ORDER에서 손실로 드러난다)."""
+        self.resyncs += 1
+        if self.expected is not None:
+            self._pending_cause = CAUSE_RESYNC
+
+    # ------------------------------------------------------------------
+    # 판정
+    # ------------------------------------------------------------------
+    def check(self, order: int, stamp: Hashable) -> tuple:
+        """패킷 하나를 판정한다. (판정, 새 손실 구간 또는 None)을 반환하며 판정이 SEQ_DUPLICATE면 버린다.
+
+        stamp: 패킷의 DATE/TIME (같은 ORDER가 같은 패킷의 재전송인지 구분)
+        """
+        self.total.received += 1
+        self.connection.received += 1
+        expected = self.expected
+        if order == expected:
+            self._accept(order, stamp)
+            return SEQ_OK, None
+
+        now = time.time()
+        if expected is None:
+            self._accept(order, stamp, now)
+            return SEQ_FIRST, None
+
+        if expected < order <= expected + self.restart_jump:
+            missing = order - expected
+            gap = self._gap(self._pending_cause or CAUSE_GAP, missing, order, now)
+            for skipped in range(max(expected, order - self.window), order):
+                self._remember(skipped, _MISSING)
+            self._count("gaps", 1)
+            self._count("missing", missing)
+            self._accept(order, stamp, now)
+            return SEQ_GAP, gap
+
+        if order < expected:
+            seen = self._recent.get(order)
+            if seen is _MISSING:
+                self._recent[order] = stamp
+                self._count("late", 1)
+                self._count("missing", -1)
+                self._count("accepted", 1)
+                return SEQ_LATE, None
+            if seen is not None and seen == stamp:
+                self._count("duplicates", 1)
+                return SEQ_DUPLICATE, None
+
+        # 큰 역행/건너뜀: 카운터 재시작 (이전 ORDER 기록은 더 이상 비교 대상이 아니다)
+        gap = self._gap(CAUSE_RESTART, None, order, now)
+        self._recent.clear()
+        self._recent_order.clear()
+        self._count("restarts", 1)
+        self._accept(order, stamp, now)
+        return SEQ_RESTART, gap
+
+    def _accept(self, order: int, stamp: Hashable, now: Optional[float] = None):
+        self.expected = order + 1
+        self._last_at = now if now is not None else time.time()
+        self._pending_cause = None
+        self.total.accepted += 1
+        self.connection.accepted += 1
+        self._remember(order, stamp)
+
+    def _remember(self, order: int, stamp):
+        if order not in self._recent:
+            self._recent_order.append(order)
+            if len(self._recent_order) > self.window:
+                self._recent.pop(self._recent_order.popleft(), None)
+        self._recent[order] = stamp
+
+    def _gap(self, cause: str, missing: Optional[int], order: int, now: float) -> SequenceGap:
+        gap = SequenceGap(self.source, cause, self.expected - 1, order, missing, self._last_at, now)
+        self.recent_gaps.append(gap)
+        return gap
+
+    def _count(self, name: str, delta: int):
+        setattr(self.total, name, getattr(self.total, name) + delta)
+        setattr(self.connection, name, getattr(self.connection, name) + delta)
+
+    def get_stats(self) -> dict:
+        return {
+            "source": self.source,
+            "expected_order": self.expected,
+            "connections": self.connections,
+            "resyncs": self.resyncs,
+            "total": self.total.as_dict(),
+            "connection": self.connection.as_dict(),
+            "recent_gaps": [gap.to_dict() for gap in reversed(self.recent_gaps)],
+        }
+
+
+def _format_time(epoch: Optional[float]) -> Optional[str]:
+    """packets.created_at과 같은 형식 (백엔드 로컬 시각)"""
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,62 @@
+"""STATE 명령 인코더 (사전 직렬화 템플릿)"""
+import json
+from typing import Dict, List, Optional, Sequence, Union
+
+
+class StateEncoder:
+    """32개 탱크 상태 벡터를 보관하고 STATE 패킷 JSON을 템플릿으로 만든다.
+
+    STATE 패킷은 매번 모든 탱크의 UNIT_ID/TANK_ID/STAGE/STATUS를 싣지만, 바뀌는 것은
+    STATUS(와 공통 STAGE)뿐이다. 탱크별 고정 부분을 미리 직렬화해 두고 상태 문자열만
+    끼워 넣어 StateDataItem 32개 생성과 model_dump_json을 생략한다.
+    출력은 CommandPacketState.model_dump_json(by_alias=True)와 바이트 단위로 같다.
+    """
+
+    def __init__(self, tank_ids: Sequence[int], initial_status: str = "None"):
+        self.tank_ids: List[int] = list(tank_ids)
+        self._index: Dict[int, int] = {tank_id: i for i, tank_id in enumerate(self.tank_ids)}
+        # 상태 벡터 (UNIT_TO_TANK_ID 순서)
+        self.statuses: List[str] = [initial_status] * len(self.tank_ids)
+        # 탱크별 고정 접두부: {"UNIT_ID":"601","TANK_ID":"601","STAGE":
+        # UNIT_ID/TANK_ID는 다른 명령어와 동일하게 매핑된 TANK_ID 값을 사용
+        self._prefixes: List[str] = [
+            '{"UNIT_ID":%s,"TANK_ID":%s,"STAGE":' % (json.dumps(str(t)), json.dumps(str(t)))
+            for t in self.tank_ids
+        ]
+        self._status_json: Dict[str, str] = {}
+
+    def __contains__(self, tank_id: int) -> bool:
+        return tank_id in self._index
+
+    def get_status(self, tank_id: int) -> Optional[str]:
+        i = self._index.get(tank_id)
+        return self.statuses[i] if i is not None else None
+
+    def set_status(self, tank_id: int, status: str) -> bool:
+        """탱크 상태를 갱신한다. 매핑에 없는 TANK_ID면 False."""
+        i = self._index.get(tank_id)
+        if i is None:
+            return False
+        self.statuses[i] = status
+        return True
+
+    def as_dict(self) -> Dict[int, str]:
+        return dict(zip(self.tank_ids, self.statuses))
+
+    def _quote(self, status: str) -> str:
+        quoted = self._status_json.get(status)
+        if quoted is None:
+            quoted = json.dumps(status, ensure_ascii=False)
+            self._status_json[status] = quoted
+        return quoted
+
+    def encode(self, idx: Union[str, int], stage: int = 100) -> bytes:
+        """현재 상태 벡터로 STATE 패킷을 와이어 형식(개행 포함)으로 만든다."""
+        stage_str = str(int(stage)) + ',"STATUS":'
+        quote = self._quote
+        items = ",".join(
+            prefix + stage_str + quote(status) + "}"
+            for prefix, status in zip(self._prefixes, self.statuses)
+        )
+        idx_json = json.dumps(idx, ensure_ascii=False)
+        return ('{"CMD":"STATE","IDX":%s,"DATA":[%s]}\n' % (idx_json, items)).encode("utf-8")
@@ -0,0 +1,316 @@
+"""TCP 브리지 상태 저널 (탱크 상태 벡터, 선택 유닛, 명령/PING IDX)
+
+재시작 후에도 STATE 패킷이 모든 탱크를 "None"으로 보내지 않도록, 바뀐 값만 추가 기록(append-only)하고
+시작 시 스냅샷 + 저널을 재생해 복원한다.
+
+- 저널: 한 줄에 JSON 레코드 하나. 기록은 메모리 버퍼에 모았다가 state_journal_flush_s마다
+  write + fsync 한 번으로 내보낸다 (그룹 커밋). Stop 상태는 기다리지 않고 바로 내보낸다
+- 스냅샷: 저널 레코드가 state_journal_compact_records를 넘으면 현재 상태 전체를 임시 파일에 쓰고
+  fsync 후 os.replace로 교체한 뒤 저널을 비운다. 종료 시에도 한 번 압축한다
+- 명령/PING IDX는 매번 기록하지 않고 state_counter_block 단위로 미리 예약해 둔 상한만 기록한다.
+  복원 시 예약 상한부터 시작하므로 재시작 전에 보낸 IDX를 다시 쓰지 않는다
+- 마지막 줄이 쓰다 만 줄(전원 차단)이면 그 줄만 버린다
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "bridge_state.json"
+JOURNAL_FILE = "bridge_state.journal"
+
+COUNTER_COMMAND = "command_idx"
+COUNTER_PING = "ping_idx"
+
+
+class BridgeState:
+    """저널로 복원한 상태. 기록이 없던 항목은 None."""
+
+    __slots__ = ("tanks", "selected_unit_id", "counters")
+
+    def __init__(self):
+        self.tanks: Dict[int, str] = {}
+        self.selected_unit_id: Optional[int] = None
+        self.counters: Dict[str, int] = {}
+
+    def apply(self, record: dict):
+        kind = record.get("k")
+        if kind == "tank":
+            self.tanks[int(record["t"])] = str(record["v"])
+        elif kind == "selected":
+            self.selected_unit_id = int(record["v"])
+        elif kind == "counter":
+            self.counters[str(record["n"])] = int(record["v"])
+
+    def to_dict(self) -> dict:
+        return {
+            "tanks": {str(t): s for t, s in self.tanks.items()},
+            "selected_unit_id": self.selected_unit_id,
+            "counters": dict(self.counters),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BridgeState":
+        state = cls()
+        state.tanks = {int(t): str(s) for t, s in data.get("tanks", {}).items()}
+        selected = data.get("selected_unit_id")
+        state.selected_unit_id = int(selected) if selected is not None else None
+        state.counters = {str(n): int(v) for n, v in data.get("counters", {}).items()}
+        return state
+
+
+class StateJournal:
+    """브리지 상태의 append-only 저널 + 압축 스냅샷. 이벤트 루프(수신 프로세스) 하나에서만 사용한다."""
+
+    def __init__(self, directory: str, flush_s: float = 0.05, compact_records: int = 1000,
+                 counter_block: int = 100):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.flush_s = flush_s
+        self.compact_records = compact_records
+        self.counter_block = max(1, counter_block)
+
+        self.state = BridgeState()
+        self._pending: List[bytes] = []
+        self._journal_records = 0
+        self._journal_fd: Optional[int] = None
+        # 카운터별 [이번 예약 시작값, 예약 상한]
+        self._reserved: Dict[str, List[int]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_now = asyncio.Event()
+
+        # 통계
+        self.records_written = 0
+        self.fsyncs = 0
+        self.compactions = 0
+        self.load_ms = 0.0
+        self.torn_records = 0
+
+    # ------------------------------------------------------------------
+    # 시작/종료
+    # ------------------------------------------------------------------
+    def load(self) -> BridgeState:
+        """스냅샷을 읽고 저널을 재생해 상태를 복원한다. (시작 시 1회, 동기)"""
+        started = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        state = BridgeState()
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                state = BridgeState.from_dict(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError, OSError) as e:
+            logger.error(f"상태 스냅샷을 읽지 못함 — 저널만 재생: {e}")
+
+        records = 0
+        valid_bytes = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # 쓰다 만 마지막 줄 (fsync 전 전원 차단)
+                        self.torn_records += 1
+                        break
+                    try:
+                        state.apply(json.loads(line))
+                    except (ValueError, TypeError, KeyError):
+                        self.torn_records += 1
+                        break
+                    records += 1
+                    valid_bytes += len(line)
+        except FileNotFoundError:
+            pass
+
+        self.state = state
+        self._open_journal(truncate_to=valid_bytes)
+        self._journal_records = records
+        self._reserved = {name: [value, value] for name, value in state.counters.items()}
+        self.load_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"상태 저널 복원: 탱크 {len(state.tanks)}개, 선택 유닛 {state.selected_unit_id}, "
+            f"카운터 {state.counters}, 저널 {records}건, {self.load_ms:.1f}ms"
+        )
+        return state
+
+    def _open_journal(self, truncate_to: Optional[int] = None):
+        if self._journal_fd is not None:
+            os.close(self._journal_fd)
+        self._journal_fd = os.open(self.journal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        if truncate_to is not None and os.fstat(self._journal_fd).st_size != truncate_to:
+            # 깨진 꼬리를 잘라 다음 기록이 이어 붙지 않게 한다
+            os.ftruncate(self._journal_fd, truncate_to)
+
+    async def close(self):
+        """남은 기록을 내보내고 스냅샷으로 압축한다."""
+        if self._flush_task is not None and not self._flush_task.done():
+            # 스레드에서 fsync 중일 수 있으므로 취소하지 않고 끝나기를 기다린다
+            self._flush_now.set()
+            await self._flush_task
+        self._flush_task = None
+        if self._journal_fd is None:
+            return
+        await self._flush_pending()
+        await asyncio.to_thread(self._write_snapshot, self.state.to_dict())
+        os.close(self._journal_fd)
+        self._journal_fd = None
+
+    # ------------------------------------------------------------------
+    # 기록
+    # ------------------------------------------------------------------
+    def record_tank(self, tank_id: int, status: str):
+        if self.state.tanks.get(tank_id) == status:
+            return
+        self._append({"k": "tank", "t": tank_id, "v": status}, urgent=status == "Stop")
+
+    def record_selected(self, unit_id: int):
+        if self.state.selected_unit_id == unit_id:
+            return
+        self._append({"k": "selected", "v": unit_id})
+
+    def restore_counter(self, name: str, default: int = 0) -> int:
+        """복원된 카운터 값 (이전 실행의 예약 상한). 기록이 없으면 default."""
+        return self.state.counters.get(name, default)
+
+    def reserve(self, name: str, value: int):
+        """카운터 value를 쓰기 전에 호출. 예약 범위를 벗어나면(순환 포함) 다음 블록을 예약 기록한다."""
+        reserved = self._reserved.get(name)
+        if reserved is not None and reserved[0] <= value < reserved[1]:
+            return
+        limit = value + self.counter_block
+        self._reserved[name] = [value, limit]
+        # 예약 기록은 블록마다 한 번뿐이므로 배치를 기다리지 않는다 (유실되면 IDX가 재사용될 수 있음)
+        self._append({"k": "counter", "n": name, "v": limit}, urgent=True)
+
+    def _append(self, record: dict, urgent: bool = False):
+        self.state.apply(record)
+        if self._journal_fd is None:
+            return
+        self._pending.append(json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n")
+        self._schedule_flush(urgent)
+
+    def _schedule_flush(self, urgent: bool):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 이벤트 루프 밖(시작 전/도구)에서는 바로 내보낸다
+            self.flush()
+            if self._journal_records >= self.compact_records:
+                self._write_snapshot(self.state.to_dict())
+            return
+        if urgent:
+            self._flush_now.set()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        """flush_s 동안 기록을 모았다가 스레드에서 write + fsync. 그동안 쌓인 기록이 있으면 반복한다."""
+        while self._pending:
+            if not self._flush_now.is_set():
+                try:
+                    await asyncio.wait_for(self._flush_now.wait(), self.flush_s)
+                except asyncio.TimeoutError:
+                    pass
+            self._flush_now.clear()
+            try:
+                await self._flush_pending()
+                if self._journal_records >= self.compact_records:
+                    # 상태 복사는 루프에서 (스레드에서 읽는 동안 dict가 바뀌지 않게)
+                    await asyncio.to_thread(self._write_snapshot, self.state.to_dict())
+            except OSError as e:
+                logger.error(f"상태 저널 기록 실패: {e}")
+                return
+
+    async def _flush_pending(self) -> int:
+        """버퍼를 루프에서 떼어 내 스레드에서 write + fsync.
+
+        _append는 루프에서만 버퍼에 붙이므로 교체도 루프에서 해야 스레드가 join하는 동안 붙은 기록이
+        떨어져 나가지 않는다. 스레드는 넘겨받은 묶음만 쓰고, 실패하면 묶음을 버퍼 앞에 되돌린다.
+        """
+        if not self._pending or self._journal_fd is None:
+            return 0
+        batch, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self._write_batch, batch)
+        except OSError:
+            self._pending[:0] = batch
+            raise
+        return self._count_written(batch)
+
+    def flush(self) -> int:
+        """버퍼의 기록을 한 번의 write + fsync로 내보낸다. (이벤트 루프 밖에서 동기 호출)"""
+        if not self._pending or self._journal_fd is None:
+            return 0
+        batch, self._pending = self._pending, []
+        try:
+            self._write_batch(batch)
+        except OSError:
+            self._pending[:0] = batch
+            raise
+        return self._count_written(batch)
+
+    def _write_batch(self, batch: List[bytes]):
+        os.write(self._journal_fd, b"".join(batch))
+        os.fsync(self._journal_fd)
+
+    def _count_written(self, batch: List[bytes]) -> int:
+        self.fsyncs += 1
+        self.records_written += len(batch)
+        self._journal_records += len(batch)
+        return len(batch)
+
+    def _write_snapshot(self, data: dict):
+        """상태 사본 data로 스냅샷을 원자적으로 교체하고 저널을 비운다.
+
+        data에는 아직 버퍼에 남은 기록까지 반영되어 있고, 그 기록은 이후 저널에 다시 쓰여도
+        같은 값을 덮어쓸 뿐이다.
+        """
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_dir(self.directory)
+        # 스냅샷이 저널 내용을 모두 포함한 뒤에만 저널을 비운다
+        os.ftruncate(self._journal_fd, 0)
+        os.fsync(self._journal_fd)
+        self._journal_records = 0
+        self.compactions += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "records_written": self.records_written,
+            "fsyncs": self.fsyncs,
+            "compactions": self.compactions,
+            "journal_records": self._journal_records,
+            "pending": len(self._pending),
+            "torn_records": self.torn_records,
+            "load_ms": round(self.load_ms, 2),
+        }
+
+
+def _fsync_dir(directory: str):
+    """os.replace 결과(디렉토리 항목)까지 디스크에 남긴다. Windows는 디렉토리를 열 수 없으므로 생략."""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def create_state_journal() -> StateJournal:
+    return StateJournal(
+        settings.state_dir,
+        flush_s=settings.state_journal_flush_s,
+        compact_records=settings.state_journal_compact_records,
+        counter_block=settings.state_counter_block,
+    )
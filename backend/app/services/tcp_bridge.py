@@ -1,19 +1,25 @@
 import asyncio
 import json
 import logging
-import requests
-import configparser
 import os
 from datetime import datetime
-from typing import Optional, Dict, List, Union
+from typing import Callable, Optional, Dict, List, Union
 from pydantic import ValidationError
+import msgspec
 
-from app.models.protocol import SensorPacket, AckPacket, AckPacketInitialize, CommandPacket, CommandPacketGpio, CommandPacketMotor, CommandPacketFirmware, CommandPacketGetVersion, CommandPacketRef, RecipeDataItem, CommandPacketState, StateDataItem, PingPacket
+from app.models.protocol import AckPacket, AckPacketInitialize, CommandPacket, CommandPacketGpio, CommandPacketMotor, CommandPacketFirmware, CommandPacketGetVersion, CommandPacketRef, RecipeDataItem, CommandPacketState, StateDataItem, PingPacket, PongPacket
+from app.models.packet import SensorFrame, decode_sensor, peek_cmd
+from app.config import settings
 from app.services.websocket_service import ws_manager
 from app.services.db_service import db_service
+from app.services.link_monitor import LinkMonitor
+from app.services.state_encoder import StateEncoder
+from app.services.sequence_tracker import SEQ_DUPLICATE, SequenceGap, SequenceTracker
+from app.services.state_journal import COUNTER_COMMAND, COUNTER_PING, StateJournal, create_state_journal
+from app.services.firmware_upload import firmware_uploader, load_firmware_config, PI_FIRMWARE_PATH
+from app.services.command_queue import CommandQueue, classify, classify_command, PRIORITY_CONTROL, PRIORITY_STOP
 
 logger = logging.getLogger(__name__)
-idx = 0
 
 # 프론트엔드 config.ts의 UNIT_TO_TANK_ID와 동일한 매핑
 # 유닛보드 index(0~31) → 라즈베리파이 TANK_ID
@@ -32,6 +38,10 @@ class TCPBridgeService:
         self._sender_server = None
         self._sender_writer: Optional[asyncio.StreamWriter] = None
         self._sender_writer_lock = asyncio.Lock()
+
+        # 7001 송신은 단일 송신 태스크가 우선순위 큐에서 꺼내 배치로 write/drain 한다
+        self._command_queue = CommandQueue()
+        self._sender_task: Optional[asyncio.Task] = None
         
         self._rx_connected = False
         self._tx_connected = False
@@ -47,14 +57,33 @@ class TCPBridgeService:
 
         # PING IDX 카운터 (0~99,999 순환)
         self._ping_idx: int = 0
+
+        # PING/PONG RTT·지터·손실 측정
+        self.link_monitor = LinkMonitor()
+
+        # IDX별 ACK/ACK_INITIALIZE 대기자 (펌웨어 롤아웃 등에서 명령 결과 확인용)
+        self._ack_waiters: Dict[str, asyncio.Future] = {}
         
         # 현재 선택된 유닛보드 ID (프론트엔드 매핑된 TANK_ID, 기본값: 601 = 유닛보드 1)
         self._selected_unit_id: int = 601
         
         # 각 TANK_ID별 상태 저장 (UNIT_TO_TANK_ID 매핑 기반)
-        # 초기 상태는 모두 "None"
-        self._tank_states: Dict[int, str] = {tank_id: "None" for tank_id in UNIT_TO_TANK_ID}
+        # 초기 상태는 모두 "None". STATE 패킷은 이 벡터로 템플릿 직렬화한다.
+        self._state_encoder = StateEncoder(UNIT_TO_TANK_ID)
+
+        # 상태 벡터/선택 유닛/IDX 카운터 저널 (start에서 복원, 비활성화면 None)
+        self._state_journal: Optional[StateJournal] = None
+
+        # 바이너리/MessagePack SENSOR_UPDATE의 탱크 순서
+        ws_manager.set_sensor_layout(UNIT_TO_TANK_ID)
         
+        # SENSOR 수신 통계 (VALUE 형식 오류 수 포함)
+        self.sensor_packets = 0
+        self.value_parse_errors = 0
+
+        # 수신 경로별 SENSOR ORDER 추적기 (손실 구간/중복/재시작). 추적기가 없는 경로(CAN)는 검사하지 않는다
+        self._sequences: Dict[str, SequenceTracker] = {"tcp": SequenceTracker("tcp")}
+
         # Tasks
         self._cleanup_task: Optional[asyncio.Task] = None
 
@@ -62,9 +91,10 @@ class TCPBridgeService:
         """Set the currently selected unit ID to filter/focus data if needed."""
         logger.info(f"Selected Unit ID changed to: {unit_id}")
         self._selected_unit_id = unit_id
-        # 임시로 idx 생성 (예: 현재 타임스탬프 또는 랜덤)
-        global idx
-        idx = idx + 1
+        if self._state_journal is not None:
+            self._state_journal.record_selected(unit_id)
+        # 명령 IDX는 next_command_idx() 하나로 발급 (저널 예약으로 재시작 후에도 재사용하지 않음)
+        idx = self.next_command_idx()
 
         try:
             # Create a task for the async command
@@ -81,6 +111,10 @@ class TCPBridgeService:
         except Exception as e:
             logger.error(f"Failed to send command: {e}")
 
+    def get_selected_unit_id(self) -> int:
+        """현재 선택된 유닛보드 TANK_ID"""
+        return self._selected_unit_id
+
     async def _broadcast_connection_status(self):
         """Broadcast current connection status to all WebSocket clients"""
         status = self.get_connection_status()
@@ -97,17 +131,45 @@ class TCPBridgeService:
             "data": {
                 "connected": is_connected,
                 "rx": self._rx_connected,
-                "tx": self._tx_connected
+                "tx": self._tx_connected,
+                "link": self.link_monitor.get_stats(),
             }
         }
 
+    def get_ingest_stats(self) -> dict:
+        """SENSOR 수신 패킷 수와 VALUE 형식 오류(NaN 처리) 수"""
+        return {
+            "sensor_packets": self.sensor_packets,
+            "value_parse_errors": self.value_parse_errors,
+        }
+
+    def get_sequence_stats(self) -> Dict[str, dict]:
+        """수신 경로별 ORDER 연속성 통계 (손실률, 중복, 재시작, 최근 손실 구간)"""
+        return {source: tracker.get_stats() for source, tracker in self._sequences.items()}
+
+    async def _evaluate_link_quality(self):
+        """링크 degraded 상태를 재평가하고, 바뀌었으면 LINK_ALERT와 연결 상태를 브로드캐스트한다."""
+        changed = self.link_monitor.update_degraded()
+        if changed is None:
+            return
+        await ws_manager.broadcast({
+            "type": "LINK_ALERT",
+            "data": {
+                "degraded": changed,
+                "stats": self.link_monitor.get_stats(),
+            }
+        })
+        await self._broadcast_connection_status()
+
     async def _periodic_cleanup_task(self):
-        """Run DB cleanup periodically (every 1 hour)."""
+        """Run DB cleanup periodically (every db_cleanup_interval_s, first run after db_cleanup_start_delay_s)."""
         logger.info("Starting periodic DB cleanup task")
+        delay = settings.db_cleanup_start_delay_s
         while True:
             try:
-                # Initial delay to avoid startup contention or wait for 1 hour
-                await asyncio.sleep(3600) 
+                # 첫 정리는 시작 직후가 아니라 서버가 요청을 받기 시작한 뒤에 실행 (VACUUM이 시작을 막지 않게)
+                await asyncio.sleep(delay)
+                delay = settings.db_cleanup_interval_s
                 logger.info("Running periodic cleanup...")
                 await db_service.cleanup_old_data()
             except asyncio.CancelledError:
@@ -118,16 +180,40 @@ class TCPBridgeService:
                 # Wait a bit before retrying to avoid tight loop on error
                 await asyncio.sleep(60)
 
+    def _restore_state(self):
+        """상태 저널에서 탱크 상태 벡터, 선택 유닛, 명령/PING IDX를 복원한다."""
+        journal = create_state_journal()
+        try:
+            state = journal.load()
+        except OSError as e:
+            logger.error(f"상태 저널을 열지 못함 — 복원/기록 없이 시작: {e}")
+            return
+        for tank_id, status in state.tanks.items():
+            if not self._state_encoder.set_status(tank_id, status):
+                logger.warning(f"복원한 TANK_ID={tank_id}가 UNIT_TO_TANK_ID에 없음 — 무시")
+        if state.selected_unit_id is not None:
+            self._selected_unit_id = state.selected_unit_id
+        self._command_idx = journal.restore_counter(COUNTER_COMMAND, self._command_idx)
+        self._ping_idx = journal.restore_counter(COUNTER_PING, self._ping_idx) % 100000
+        self._state_journal = journal
+
+    def get_state_journal_stats(self) -> Optional[dict]:
+        """상태 저널 기록/fsync/압축 통계 (비활성화면 None)"""
+        return self._state_journal.get_stats() if self._state_journal is not None else None
+
     async def start(self):
         """Start both TCP servers (Receiver on 7000, Sender Connection Handler on 7001)"""
         logger.info("Starting TCP Bridge Service...")
+
+        # 이전 실행의 STATE 벡터/IDX 복원 (스냅샷 + 짧은 저널 재생, 수 ms)
+        if settings.state_journal_enabled:
+            self._restore_state()
         
-        # Initialize Database
+        # Initialize Database (기존 DB의 카탈로그 채우기 등은 백그라운드에서 이어서 진행)
         await db_service.init_db()
-        # Cleanup old data on startup
-        await db_service.cleanup_old_data()
+        db_service.start_migrations()
         
-        # Start periodic cleanup task
+        # Start periodic cleanup task (시작 시 정리도 이 작업이 지연 후 실행)
         self._cleanup_task = asyncio.create_task(self._periodic_cleanup_task())
         
         # 1. Receiver Server (Port 7000) - Listens for incoming data
@@ -179,12 +265,18 @@ class TCPBridgeService:
             self._sender_server.close()
             await self._sender_server.wait_closed()
             
+        await self._stop_sender_task()
+
         async with self._sender_writer_lock:
             if self._sender_writer:
                 self._sender_writer.close()
                 await self._sender_writer.wait_closed()
                 self._sender_writer = None
 
+        if self._state_journal is not None:
+            await self._state_journal.close()
+            self._state_journal = None
+
     # -------------------------------------------------------------------------
     # Port 7000 Logic: Receiving Data
     # -------------------------------------------------------------------------
@@ -193,6 +285,7 @@ class TCPBridgeService:
         logger.info(f"Receiver (7000) connected by {addr}")
         self._receiver_writer = writer
         self._rx_connected = True
+        self._sequences["tcp"].connect()
         await self._broadcast_connection_status()
 
         try:
@@ -222,6 +315,7 @@ class TCPBridgeService:
                         f"complete JSON — resyncing (data discarded)"
                     )
                     buffer = b""
+                    self._sequences["tcp"].resync()
 
         except Exception as e:
             logger.error(f"Receiver connection error: {e}")
@@ -275,38 +369,57 @@ class TCPBridgeService:
 
     async def process_message(self, json_str: str):
         """Parse and route the incoming JSON message."""
+        cmd = None
         try:
-            data = json.loads(json_str)
-            cmd = data.get("CMD")
-
+            # SENSOR는 msgspec으로 바로 SensorFrame 디코딩 (pydantic 객체 그래프 생성 없음)
+            cmd = peek_cmd(json_str)
             if cmd == "SENSOR":
-                packet = SensorPacket(**data)
-                await self.handle_sensor_packet(packet)
-            elif cmd == "ACK":
+                await self.handle_sensor_packet(decode_sensor(json_str))
+                return
+
+            data = json.loads(json_str)
+            if cmd == "ACK":
                 packet = AckPacket(**data)
                 await self.handle_ack_packet(packet)
             elif cmd == "ACK_INITIALIZE":
                 packet = AckPacketInitialize(**data)
                 await self.handle_ack_packet_initialize(packet)
+            elif cmd == "PONG":
+                packet = PongPacket(**data)
+                await self.handle_pong_packet(packet)
             else:
                 logger.warning(f"Unknown CMD received: {cmd} | keys: {list(data.keys())} | raw: {json_str[:300]}")
 
-        except json.JSONDecodeError:
+        except (ValidationError, msgspec.ValidationError) as e:
+            # msgspec.ValidationError는 DecodeError의 하위 클래스이므로 먼저 처리
+            logger.error(f"Validation Error for CMD={cmd or '?'}: {e}")
+        except (json.JSONDecodeError, msgspec.DecodeError):
             logger.error(f"Invalid JSON received (len={len(json_str)}): {json_str[:200]}...")
-        except ValidationError as e:
-            logger.error(f"Validation Error for CMD={data.get('CMD') if 'data' in dir() else '?'}: {e}")
         except Exception as e:
             logger.error(f"Unexpected error parsing message: {e} | raw: {json_str[:200]}")
 
-    async def handle_sensor_packet(self, packet: SensorPacket):
+    async def handle_sensor_packet(self, packet: SensorFrame, source: str = "tcp"):
         # Broadcast SENSOR_UPDATE to all clients
         # Frontend will filter based on selected unit_id
         try:
-            update_msg = {
-                "type": "SENSOR_UPDATE",
-                "data": packet.model_dump(by_alias=True)
-            }
-            await ws_manager.broadcast(update_msg)
+            # ORDER 연속성 검사: 재전송된 중복 패킷은 브로드캐스트/DB 저장 전에 버린다
+            tracker = self._sequences.get(source)
+            if tracker is not None:
+                verdict, gap = tracker.check(packet.order, (packet.date, packet.time))
+                if verdict == SEQ_DUPLICATE:
+                    logger.debug(f"Duplicate SENSOR Order={packet.order} dropped ({source})")
+                    return
+                if gap is not None:
+                    self._on_sequence_gap(gap)
+
+            # VALUES는 디코딩 시 숫자 벡터로 한 번만 변환되고, 브로드캐스트/DB 저장이 그대로 재사용한다
+            vector = packet.vector
+            self.sensor_packets += 1
+            if vector.parse_errors:
+                self.value_parse_errors += vector.parse_errors
+                logger.warning(f"SENSOR Order={packet.order}: {vector.parse_errors} malformed VALUE(s) → NaN")
+
+            await ws_manager.broadcast_sensor(packet)
             logger.debug(f"Broadcasted sensor update for Order={packet.order}")
             
             # Save to DB if recording
@@ -315,9 +428,6 @@ class TCPBridgeService:
                 # 백엔드(PC)의 현재 시각을 사용한다. (Pi 시계 오차와 무관하게 정확한 시간 기록)
                 created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 
-                # Convert models to dicts for DB service
-                readings = [r.model_dump(by_alias=True) for r in packet.values]
-                states = [s.model_dump(by_alias=True) for s in packet.state]
                 
                 # Async save (fire and forget or await? await is safer for order but slower)
                 # Requirement: "모든 저장은 비동기(Async)로 수행하여 메인 통신 루프를 차단하지 않아야 함."
@@ -328,14 +438,46 @@ class TCPBridgeService:
                 asyncio.create_task(db_service.save_packet(
                     order_num=packet.order,
                     created_at=created_at,
-                    readings=readings,
-                    states=states
+                    vector=vector,
+                    states=packet.state
                 ))
                 
         except Exception as e:
             logger.error(f"Failed to process sensor packet: {e}")
 
+    def _on_sequence_gap(self, gap: SequenceGap):
+        """손실 구간/카운터 재시작 기록. 녹화 중이면 이력 조회용으로 sequence_gaps에 저장한다."""
+        if gap.missing is None:
+            logger.warning(f"SENSOR ORDER restart ({gap.source}): {gap.prev_order} → {gap.next_order}")
+        else:
+            logger.warning(
+                f"SENSOR ORDER gap ({gap.source}, {gap.cause}): {gap.missing} packet(s) missing "
+                f"between {gap.prev_order} and {gap.next_order}"
+            )
+        if self.is_recording:
+            asyncio.create_task(db_service.save_sequence_gap(gap.to_dict()))
+
+    def expect_ack(self, idx) -> asyncio.Future:
+        """IDX에 대한 ACK/ACK_INITIALIZE 수신 시 완료되는 Future를 등록한다.
+
+        명령 전송 전에 등록해야 응답을 놓치지 않는다. 사용 후 discard_ack로 정리한다.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._ack_waiters[str(idx)] = future
+        return future
+
+    def discard_ack(self, idx):
+        future = self._ack_waiters.pop(str(idx), None)
+        if future is not None and not future.done():
+            future.cancel()
+
+    def _resolve_ack(self, packet: Union[AckPacket, AckPacketInitialize]):
+        future = self._ack_waiters.pop(str(packet.idx), None)
+        if future is not None and not future.done():
+            future.set_result(packet)
+
     async def handle_ack_packet(self, packet: AckPacket):
+        self._resolve_ack(packet)
         # Broadcast ACK to all clients
         try:
             ack_msg = {
@@ -348,6 +490,7 @@ class TCPBridgeService:
             logger.error(f"Failed to broadcast ACK: {e}")
 
     async def handle_ack_packet_initialize(self, packet: AckPacketInitialize):
+        self._resolve_ack(packet)
         # Broadcast ACK_INITIALIZE to all clients
         try:
             ack_msg = {
@@ -358,6 +501,15 @@ class TCPBridgeService:
             logger.info(f"Broadcasted ACK_INITIALIZE: Idx={packet.idx}, FW_Version={packet.fw_version}, Note={packet.note}")    
         except Exception as e:
             logger.error(f"Failed to broadcast ACK_INITIALIZE: {e}")
+
+    async def handle_pong_packet(self, packet: PongPacket):
+        # PING IDX와 매칭해 RTT 기록 (7000/7001 어느 쪽으로 와도 동일하게 처리)
+        rtt_ms = self.link_monitor.record_reply(packet.idx)
+        if rtt_ms is None:
+            logger.debug(f"Unmatched PONG: Idx={packet.idx}")
+            return
+        logger.debug(f"PONG Idx={packet.idx} RTT={rtt_ms:.1f}ms")
+        await self._evaluate_link_quality()
     # -------------------------------------------------------------------------
     # Port 7001 Logic: Sending Commands
     # -------------------------------------------------------------------------
@@ -380,17 +532,27 @@ class TCPBridgeService:
                 except:
                     pass
             self._sender_writer = writer
+            await self._stop_sender_task()
+            self._sender_task = asyncio.create_task(self._run_sender(writer))
 
+        self.link_monitor.reset()
         ping_task = asyncio.create_task(self._ping_loop())
 
         # Keep connection alive
         try:
-            # We just listen for closure here, or maybe heartbeats from Pi?
-            # If Pi sends anything on 7001, we ignore or log it.
+            # Pi가 7001로 보내는 응답(PONG 등)은 7000과 동일한 프레이밍으로 파싱한다.
+            buffer = b""
             while True:
                 data = await reader.read(1024)
                 if not data:
                     break
+                buffer += data
+                objects, buffer = self._extract_json_objects(buffer)
+                for obj_str in objects:
+                    await self.process_message(obj_str)
+                if len(buffer) > 65536:
+                    logger.warning(f"Sender buffer overflow ({len(buffer)} bytes) — resyncing")
+                    buffer = b""
         except Exception as e:
             logger.error(f"Sender connection loop error: {e}")
         finally:
@@ -405,90 +567,107 @@ class TCPBridgeService:
                 if self._sender_writer == writer:
                     self._sender_writer = None
                     self._tx_connected = False
+                    await self._stop_sender_task()
             await self._broadcast_connection_status()
             writer.close()
             await writer.wait_closed()
 
+    async def _run_sender(self, writer: asyncio.StreamWriter):
+        """송신 태스크. 큐가 drain 실패/타임아웃으로 종료되면 연결을 무효화하고 닫는다.
+
+        _sender_writer를 여기서 비우면 연결 핸들러의 finally가 자기 연결이 아니라고 보고 건너뛰므로,
+        연결 상태(_tx_connected)와 브로드캐스트도 여기서 함께 처리한다.
+        """
+        await self._command_queue.run(writer)
+        async with self._sender_writer_lock:
+            if self._sender_writer is not writer:
+                return
+            logger.warning("Sender queue stopped — invalidating port 7001 connection")
+            self._sender_writer = None
+            self._tx_connected = False
+            self._sender_task = None
+        await self._broadcast_connection_status()
+        # 상대가 멈춰 송신 버퍼가 차 있으면 close()는 버퍼를 비울 때까지 끊지 않으므로 바로 끊는다
+        writer.transport.abort()
+
+    async def _stop_sender_task(self):
+        """현재 송신 태스크를 취소하고 대기 중인 명령을 실패 처리한다."""
+        task, self._sender_task = self._sender_task, None
+        if task and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._command_queue.fail_all()
+
+    def get_command_queue_metrics(self) -> dict:
+        """7001 송신 큐 깊이/병합/배치 메트릭"""
+        return self._command_queue.get_metrics()
+
     async def _ping_loop(self):
-        """포트 7001 연결 동안 1초마다 PING 패킷 전송. IDX는 0~99,999 순환."""
-        logger.info("PING 루프 시작 (1초 간격)")
+        """포트 7001 연결 동안 주기적으로(기본 1초) PING 패킷 전송. IDX는 0~99,999 순환.
+
+        송신 큐가 PING을 실제로 쓴 시각을 link_monitor에 기록해 PONG 수신 시 RTT를 계산하고,
+        응답 없는 PING은 타임아웃 후 손실로 집계한다.
+        """
+        interval = settings.ping_interval_s
+        logger.info(f"PING 루프 시작 ({interval}초 간격)")
+        loop = asyncio.get_running_loop()
+        last_status_broadcast = loop.time()
         while True:
+            if self._state_journal is not None:
+                self._state_journal.reserve(COUNTER_PING, self._ping_idx)
             packet = PingPacket.model_validate({"CMD": "PING", "IDX": str(self._ping_idx), "NOTE": "OK"})
-            sent = await self.send_command(packet)
+            # 전송 시각은 큐에서 실제로 쓴 시각 (큐 대기 제외). 다음 PING에 대체되어 쓰이지 않은 IDX는 기록되지 않음
+            sent = await self.send_command(
+                packet, on_written=lambda now, idx=packet.idx: self.link_monitor.record_sent(idx, now)
+            )
             if not sent:
                 logger.warning("PING 전송 실패 — 루프 종료")
                 break
             self._ping_idx = (self._ping_idx + 1) % 100000
-            await asyncio.sleep(1)
+            await asyncio.sleep(interval)
+
+            # 손실 확정 및 degraded 판정
+            self.link_monitor.expire()
+            await self._evaluate_link_quality()
+            if loop.time() - last_status_broadcast >= settings.link_status_broadcast_s:
+                last_status_broadcast = loop.time()
+                await self._broadcast_connection_status()
 
     async def send_firmware_update(self, unit_id: int, file_path: str) -> bool:
         """
         Send firmware update command with file path.
+        이미지는 비동기 스트리밍으로 업로드하며, 같은 내용이 이미 업로드되어 있으면 생략한다.
+        여러 유닛 동시 업데이트/ACK 확인은 firmware_rollout 서비스를 사용한다.
         """
         logger.info(f"[send_firmware] 시작: unit_id={unit_id}, file_path={file_path}")
 
-        # Load configuration from sys.ini
-        config = configparser.ConfigParser()
-        ini_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ini', 'sys.ini')
-
-        try:
-            config.read(ini_path)
-            url = config.get('FIRMWARE_UPDATE', 'URL', fallback="http://172.30.1.100:9001/upload")
-            
-            # OS에 따른 펌웨어 디렉토리 자동 설정
-            if os.name == 'nt':  # Windows
-                default_dir = "C:/Projects/M-FACTORY/Software/control_server/Unitboardmonitoringdashboard/firmware/"
-                firmware_dir = config.get('FIRMWARE_UPDATE', 'DIR_WINDOWS', fallback=default_dir)
-            else:  # Linux (Raspberry Pi)
-                default_dir = "/home/pi/Projects/cosmo-m/firmware/"
-                firmware_dir = config.get('FIRMWARE_UPDATE', 'DIR_LINUX', fallback=default_dir)
-
-            logger.info(f"[send_firmware] 1단계 설정 로드 완료: url={url}, firmware_dir={firmware_dir}")
-
-        except Exception as e:
-            logger.error(f"Failed to load config from {ini_path}: {e}")
-            # Fallback values
-            url = "http://172.30.1.100:9001/upload"
-            if os.name == 'nt':
-                firmware_dir = "C:/Projects/M-FACTORY/Software/control_server/Unitboardmonitoringdashboard/firmware/"
-            else:
-                firmware_dir = "/home/pi/Projects/cosmo-m/firmware/"
+        # sys.ini 설정은 파일이 바뀌었을 때만 다시 읽는다
+        url, firmware_dir = load_firmware_config()
+        full_path = os.path.join(firmware_dir, file_path)
 
         try:
-            # 파일이 존재하는지 확인하고 업로드 시도
             # file_path가 로컬 서버(백엔드가 실행중인 PC)의 경로라면 직접 읽을 수 있음
-            full_path = os.path.join(firmware_dir, file_path)
             logger.info(f"[send_firmware] 2단계 펌웨어 파일 업로드 시도: {full_path} -> {url}")
-
-            # requests.post는 동기 blocking 호출이므로 asyncio.to_thread로 별도 스레드에서 실행
-            # → 서버 무응답 시에도 이벤트 루프(다른 명령/WebSocket/센서 수신)가 멈추지 않음
-            # timeout=5로 서버가 죽어 있으면 빠르게 실패하도록 설정
-            def _upload():
-                with open(full_path, "rb") as f:
-                    files = {"file": (file_path, f)}
-                    resp = requests.post(url, files=files, timeout=5)
-                    resp.raise_for_status()  # Check for HTTP errors
-                    return resp
-
-            response = await asyncio.to_thread(_upload)
-            logger.info(f"[send_firmware] 2단계 업로드 성공: status={response.status_code}, resp={response.text[:200]}")
+            digest, skipped = await firmware_uploader.upload(full_path, file_path, url)
+            logger.info(f"[send_firmware] 2단계 업로드 {'생략(캐시)' if skipped else '성공'}: sha256={digest[:12]}")
         except FileNotFoundError:
              logger.error(f"[send_firmware] 2단계 실패: 펌웨어 파일 없음 -> {full_path}")
-             # 파일이 없더라도 명령은 보낼지, 아니면 중단할지 결정 필요.
-             # 여기서는 로그만 남기고 일단 진행 (또는 리턴 False)
              return False
         except Exception as e:
             logger.error(f"[send_firmware] 2단계 실패: 펌웨어 파일 업로드 오류: {e}", exc_info=True)
             return False
 
-        self._command_idx += 1
+        self.next_command_idx()
         try:
             packet = CommandPacketFirmware(
                 cmd="FIRMWARE_UPDATE",
                 unit_id=str(unit_id),  # 프론트엔드에서 이미 매핑된 TANK_ID 값을 문자열로 전송
                 tank_id=str(unit_id),  # 프론트엔드에서 이미 매핑된 TANK_ID 값을 문자열로 전송
                 idx=self._command_idx,
-                file="/home/pi/Projects/cosmo-m/firmware/firmware.bin", # 라즈베리파이 펌웨어 전체 경로 포함
+                file=PI_FIRMWARE_PATH, # 라즈베리파이 펌웨어 전체 경로 포함
                 send=False
             )
             logger.info(f"[send_firmware] 3단계 FIRMWARE_UPDATE 패킷 생성 완료: idx={packet.idx}, unit_id={packet.unit_id}, tank_id={packet.tank_id}")
@@ -499,6 +678,9 @@ class TCPBridgeService:
         # 4단계: FIRMWARE_UPDATE 패킷 전송 (실제 전송 결과를 로그로 남긴다)
         result = await self.send_command(packet)
         logger.info(f"[send_firmware] 4단계 FIRMWARE_UPDATE 패킷 전송 결과: {result}")
+        if not result:
+            # 다음 시도는 업로드부터 다시 (Pi의 파일 상태를 알 수 없음)
+            firmware_uploader.forget(url)
         return result
 
     async def send_recipe(self, recipe_data: dict) -> bool:
@@ -551,7 +733,7 @@ class TCPBridgeService:
                 send=False
             )
             logger.info(f"[send_recipe] 3단계 REF 패킷 생성 완료: idx={packet.idx}, tank_id={packet.tank_id}")
-            self._command_idx += 1
+            self.next_command_idx()
 
             # 4단계: REF 패킷 전송
             result = await self.send_command(packet)
@@ -563,6 +745,37 @@ class TCPBridgeService:
             logger.error(f"[send_recipe] 레시피 패킷 처리 실패: {e}", exc_info=True)
             return False
 
+    async def send_recipe_compiled(self, recipe, tank_id: Optional[int] = None) -> bool:
+        """
+        레시피 캐시(recipe_cache)의 사전 직렬화된 REF 페이로드를 전송한다.
+        DATA 재파싱/재직렬화 없이 헤더만 채워 보내므로 여러 탱크에 연속 전송할 때 빠르다.
+
+        Args:
+            recipe: CompiledRecipe
+            tank_id: 대상 TANK_ID (None이면 현재 선택된 유닛)
+        """
+        target = tank_id if tank_id is not None else self._selected_unit_id
+        logger.info(f"[send_recipe] 시작(캐시): file={recipe.filename}, TANK_ID={target}")
+        try:
+            # Initial을 보내기 전에 DATA 오류를 먼저 확인
+            recipe.compile()
+        except Exception as e:
+            logger.error(f"[send_recipe] 레시피 패킷 처리 실패: {e}")
+            return False
+
+        # 레시피 전송 전 Initial 상태 전송
+        initial_ok = await self.send_state_command("Initial", unit_id=target)
+        if not initial_ok:
+            logger.warning("[send_recipe] Initial 상태 전송 실패 (연결 문제 가능성) - 레시피 전송 계속 진행")
+
+        # 파일에 IDX가 없으면 send_recipe와 같이 Initial STATE의 IDX를 사용
+        data = recipe.render_ref(idx=self._command_idx, tank_id=target)
+        self.next_command_idx()
+
+        result = await self.send_serialized(data, "REF", tank_id=str(target))
+        logger.info(f"[send_recipe] REF 패킷 전송 결과: {result}")
+        return result
+
     async def send_state_command(self, status: str, stage: int = 100, unit_id: Optional[int] = None) -> bool:
         """
         Send STATE command to the connected Pi.
@@ -575,85 +788,135 @@ class TCPBridgeService:
             stage: 공정 단계 (기본값: 100)
             unit_id: 특정 유닛의 TANK_ID (None이면 현재 선택된 유닛 사용)
         """
+        selected_tank_id = unit_id if unit_id is not None else self._selected_unit_id
+        return await self.send_state_batch({selected_tank_id: status}, stage=stage)
+
+    async def send_state_batch(self, statuses: Dict[int, str], stage: int = 100) -> bool:
+        """
+        여러 탱크의 상태를 한꺼번에 갱신하고 STATE 패킷 하나로 전송한다.
+        STATE 패킷은 항상 32개 탱크 전체 상태를 싣기 때문에 변경 탱크 수와 무관하게 1회 전송이면 충분하다.
+
+        Args:
+            statuses: TANK_ID → 상태 문자열
+            stage: 공정 단계 (기본값: 100)
+        """
         try:
-            self._command_idx += 1
-            selected_tank_id = unit_id if unit_id is not None else self._selected_unit_id
-            
-            # 선택된 유닛의 상태만 업데이트
-            self._tank_states[selected_tank_id] = status
-            logger.info(f"Updated TANK_ID={selected_tank_id} status to '{status}'")
-            
-            # UNIT_TO_TANK_ID 매핑 기반으로 32개의 StateDataItem 생성
-            # 각 유닛은 저장된 상태를 사용
-            state_data_list = []
-            for tank_id in UNIT_TO_TANK_ID:
-                item_status = self._tank_states.get(tank_id, "None")
-                
-                state_data = StateDataItem(
-                    # UNIT_ID/TANK_ID는 다른 명령어와 동일하게 매핑된 TANK_ID 값을 사용
-                    UNIT_ID=str(tank_id),
-                    TANK_ID=str(tank_id),
-                    STAGE=stage,
-                    STATUS=item_status
-                )
-                state_data_list.append(state_data)
-            
-            packet = CommandPacketState(
-                cmd="STATE",
-                idx=self._command_idx,
-                data=state_data_list
-            )
-            
-            logger.info(f"Sending STATE command: Selected TANK_ID={selected_tank_id}, STATUS={status}")
-            return await self.send_command(packet)
+            self.next_command_idx()
+
+            # 요청된 탱크들의 상태만 업데이트
+            for tank_id, status in statuses.items():
+                if not self._state_encoder.set_status(tank_id, status):
+                    logger.warning(f"TANK_ID={tank_id} is not in UNIT_TO_TANK_ID — not included in STATE")
+                    continue
+                if self._state_journal is not None:
+                    self._state_journal.record_tank(tank_id, status)
+                logger.info(f"Updated TANK_ID={tank_id} status to '{status}'")
+
+            # 32개 탱크 상태 벡터를 사전 직렬화 템플릿으로 인코딩 (StateDataItem 생성 생략)
+            data = self._state_encoder.encode(self._command_idx, stage=stage)
+
+            logger.info(f"Sending STATE command: {statuses}")
+            # 비상 정지(Stop)는 큐에서 다른 모든 명령보다 먼저 전송한다
+            priority = PRIORITY_STOP if "Stop" in statuses.values() else PRIORITY_CONTROL
+            return await self.send_serialized(data, "STATE", priority=priority)
         except Exception as e:
             logger.error(f"Failed to send state command: {e}")
             return False
 
-    async def send_command(self, packet: Union[CommandPacket, CommandPacketGpio, CommandPacketMotor, CommandPacketFirmware, CommandPacketRef, PingPacket]):
+    def get_tank_states(self) -> Dict[int, str]:
+        """TANK_ID → 현재 STATE 상태 문자열"""
+        return self._state_encoder.as_dict()
+
+    def next_command_idx(self) -> int:
+        """명령 IDX 카운터를 증가시키고 새 값을 반환한다. (저널에 예약 범위를 넘을 때만 기록)"""
+        self._command_idx += 1
+        if self._state_journal is not None:
+            self._state_journal.reserve(COUNTER_COMMAND, self._command_idx)
+        return self._command_idx
+
+    async def allocate_command_idx(self) -> int:
+        """컨트롤러용 명령 IDX 발급. api 워커의 RemoteBridge와 같은 인터페이스 (ingest 프로세스에서는 바로 발급)"""
+        return self.next_command_idx()
+
+    def reserve_command_idx(self, count: int) -> int:
+        """api 워커용으로 명령 IDX count개를 한꺼번에 예약하고 첫 IDX를 반환한다. (저널에 예약 기록)"""
+        start = self._command_idx + 1
+        self._command_idx += max(1, int(count))
+        if self._state_journal is not None:
+            self._state_journal.reserve(COUNTER_COMMAND, self._command_idx)
+        return start
+
+    async def send_command(self, packet: Union[CommandPacket, CommandPacketGpio, CommandPacketMotor, CommandPacketFirmware, CommandPacketRef, PingPacket], priority: Optional[int] = None,
+                           on_written: Optional[Callable[[float], None]] = None):
         """
         Public method to send JSON command to the connected Pi.
+        명령은 송신 큐에 들어가며, 실제 전송(drain) 결과를 기다려 반환한다.
+        priority를 지정하지 않으면 명령 종류로 결정한다. (command_queue.classify_command)
+        on_written: 큐가 명령을 writer에 쓴 시각으로 호출 (병합으로 대체되면 호출되지 않음)
         """
-        async with self._sender_writer_lock:
-            if self._sender_writer is None:
-                logger.warning("Cannot send command: No Pi connected on port 7001")
-                return False
+        if self._sender_writer is None:
+            logger.warning("Cannot send command: No Pi connected on port 7001")
+            return False
 
-            try:
-                # Serialize
-                data_str = packet.model_dump_json(by_alias=True)
-                self._sender_writer.write(data_str.encode('utf-8') + b'\n')
-                await self._sender_writer.drain()
-                if packet.cmd == "PING":
-                    logger.debug(f"Sent command: {packet.cmd}")
-                else:
-                    logger.info(f"Sent command: {packet.cmd}")
-                return True
-            except Exception as e:
-                logger.error(f"Failed to send command (cmd={getattr(packet, 'cmd', '?')}): {e}", exc_info=True)
-                self._sender_writer = None # Invalidate
-                return False
+        try:
+            # Serialize
+            data = packet.model_dump_json(by_alias=True).encode('utf-8') + b'\n'
+        except Exception as e:
+            logger.error(f"Failed to serialize command (cmd={getattr(packet, 'cmd', '?')}): {e}", exc_info=True)
+            return False
+
+        default_priority, key = classify_command(packet)
+        if key is not None and str(getattr(packet, "idx", "")) in self._ack_waiters:
+            # ACK를 기다리는 명령(롤아웃 GET_VERSION 등)은 병합되면 그 IDX가 전송되지 않아 응답이 오지 않는다
+            key = None
+        return await self._command_queue.submit(
+            data,
+            priority=default_priority if priority is None else priority,
+            key=key,
+            label=packet.cmd,
+            on_written=on_written,
+        )
+
+    async def send_serialized(self, data: bytes, cmd: str, tank_id=None, priority: Optional[int] = None) -> bool:
+        """
+        이미 와이어 형식(개행 포함)으로 직렬화된 명령을 전송한다.
+        우선순위/병합 키는 send_command와 같은 규칙(cmd, tank_id)으로 정한다.
+        """
+        if self._sender_writer is None:
+            logger.warning("Cannot send command: No Pi connected on port 7001")
+            return False
+
+        default_priority, key = classify(cmd, tank_id)
+        return await self._command_queue.submit(
+            data,
+            priority=default_priority if priority is None else priority,
+            key=key,
+            label=cmd,
+        )
 
     async def send_raw_json(self, json_data: dict) -> bool:
         """
         Send raw JSON dict directly to the connected Pi without Pydantic validation.
         """
-        async with self._sender_writer_lock:
-            if self._sender_writer is None:
-                logger.warning("Cannot send raw JSON: No Pi connected on port 7001")
-                return False
-            
-            try:
-                data_str = json.dumps(json_data, ensure_ascii=False)
-                self._sender_writer.write(data_str.encode('utf-8') + b'\n')
-                await self._sender_writer.drain()
-                logger.info(f"Sent raw JSON: {data_str[:200]}")
-                return True
-            except Exception as e:
-                logger.error(f"Failed to send raw JSON: {e}")
-                self._sender_writer = None
-                return False
+        if self._sender_writer is None:
+            logger.warning("Cannot send raw JSON: No Pi connected on port 7001")
+            return False
+
+        data_str = json.dumps(json_data, ensure_ascii=False)
+        result = await self._command_queue.submit(
+            data_str.encode('utf-8') + b'\n',
+            priority=PRIORITY_CONTROL,
+            label=f"RAW:{json_data.get('CMD', '?')}",
+        )
+        if result:
+            logger.info(f"Sent raw JSON: {data_str[:200]}")
+        return result
 
 # Global instance
-tcp_bridge = TCPBridgeService()
+# process_role=api 워커는 포트 7000/7001을 열지 않고 ingest 프로세스에 명령을 위임한다
+if settings.process_role == "api":
+    from app.services.ipc import RemoteBridge
+    tcp_bridge = RemoteBridge(UNIT_TO_TANK_ID)
+else:
+    tcp_bridge = TCPBridgeService()
 
@@ -1,45 +1,121 @@
 import json
 import logging
-from typing import Set
+from typing import Callable, Dict, Optional, Sequence, Set
 from litestar import WebSocket
 
+from app.models.packet import SensorFrame
+from app.services.ws_codec import FORMAT_BINARY, FORMAT_JSON, FORMAT_MSGPACK, SensorFrameEncoder, SensorJsonEncoder
+
 logger = logging.getLogger(__name__)
 
 class WebSocketManager:
     """WebSocket 연결 관리자"""
-    
+
     def __init__(self):
         self.connections: Set[WebSocket] = set()
-    
-    async def add_connection(self, socket: WebSocket) -> None:
+        # 연결별 SENSOR_UPDATE 형식 (json / msgpack / binary)
+        self._formats: Dict[WebSocket, str] = {}
+        # 연결별로 마지막에 보낸 SENSOR_LAYOUT 버전 (msgpack / binary)
+        self._layout_sent: Dict[WebSocket, int] = {}
+        self.sensor_encoder = SensorFrameEncoder(tank_ids=())
+        self.json_encoder = SensorJsonEncoder()
+        # ingest 프로세스에서 API 워커로 이벤트를 넘기는 릴레이 (ipc.IngestServer.publish)
+        self._relay: Optional[Callable[[str, object], None]] = None
+
+    def set_sensor_layout(self, tank_ids: Sequence[int]) -> None:
+        """바이너리/MessagePack 프레임의 탱크 순서 지정 (UNIT_TO_TANK_ID)"""
+        self.sensor_encoder = SensorFrameEncoder(tank_ids)
+
+    def set_relay(self, relay: Optional[Callable[[str, object], None]]) -> None:
+        """브로드캐스트마다 relay("broadcast" | "sensor", 메시지)를 호출한다. (로컬 연결이 없어도)"""
+        self._relay = relay
+
+    async def add_connection(self, socket: WebSocket, fmt: str = FORMAT_JSON) -> None:
         """연결 추가"""
         self.connections.add(socket)
-        logger.info(f"WebSocket connected: {len(self.connections)} connections")
-    
+        self._formats[socket] = fmt
+        if fmt != FORMAT_JSON:
+            await self._send_layout(socket, fmt)
+        logger.info(f"WebSocket connected ({fmt}): {len(self.connections)} connections")
+
     async def remove_connection(self, socket: WebSocket) -> None:
         """연결 제거"""
         self.connections.discard(socket)
+        self._formats.pop(socket, None)
+        self._layout_sent.pop(socket, None)
         logger.info(f"WebSocket disconnected: {len(self.connections)} connections")
-    
+
+    async def _send_layout(self, socket: WebSocket, fmt: str) -> None:
+        encoder = self.sensor_encoder
+        await socket.send_text(encoder.layout_message(fmt))
+        self._layout_sent[socket] = encoder.layout_version
+
     async def broadcast(self, message: dict) -> None:
         """모든 연결에 메시지 브로드캐스트"""
+        if self._relay is not None:
+            self._relay("broadcast", message)
         if not self.connections:
             return
-        
+
         message_str = json.dumps(message)
         disconnected = set()
-        
+
         for socket in self.connections:
             try:
                 await socket.send_text(message_str)
             except Exception as e:
                 logger.error(f"Error broadcasting to socket: {e}")
                 disconnected.add(socket)
-        
+
         # 연결이 끊어진 소켓 제거
         for socket in disconnected:
-            self.connections.discard(socket)
+            await self.remove_connection(socket)
+
+    async def broadcast_sensor(self, packet: SensorFrame) -> None:
+        """SENSOR_UPDATE를 연결별 협상 형식으로 브로드캐스트
+
+        형식별 인코딩은 브로드캐스트당 한 번만 수행한다.
+        """
+        if self._relay is not None:
+            self._relay("sensor", packet)
+        if not self.connections:
+            return
+
+        encoder = self.sensor_encoder
+        payloads: Dict[str, object] = {}
+        layout_checked = False
+        disconnected = set()
+
+        for socket in list(self.connections):
+            fmt = self._formats.get(socket, FORMAT_JSON)
+            try:
+                payload = payloads.get(fmt)
+                if payload is None:
+                    if fmt == FORMAT_JSON:
+                        payload = self.json_encoder.encode(packet)
+                    else:
+                        if not layout_checked:
+                            encoder.update_layout(packet)
+                            layout_checked = True
+                        if fmt == FORMAT_BINARY:
+                            payload = encoder.encode_binary(packet)
+                        else:
+                            payload = encoder.encode_msgpack(packet)
+                    payloads[fmt] = payload
+
+                if fmt == FORMAT_JSON:
+                    await socket.send_text(payload)
+                else:
+                    # 레이아웃이 바뀌었으면 프레임보다 먼저 새 SENSOR_LAYOUT 전송
+                    if self._layout_sent.get(socket) != encoder.layout_version:
+                        await self._send_layout(socket, fmt)
+                    await socket.send_bytes(payload)
+            except Exception as e:
+                logger.error(f"Error broadcasting sensor update to socket: {e}")
+                disconnected.add(socket)
+
+        for socket in disconnected:
+            await self.remove_connection(socket)
 
 # 전역 WebSocket 관리자 인스턴스
 ws_manager = WebSocketManager()
-
@@ -0,0 +1,231 @@
+"""WebSocket SENSOR_UPDATE 인코더 (JSON / MessagePack / 바이너리)
+
+/ws/status 연결 시 서브프로토콜(또는 ?format=)로 형식을 협상한다.
+  - json    : 기존 형식 (기본값). {"type": "SENSOR_UPDATE", "data": SensorPacket 형식}, VALUE는 숫자(없으면 null)
+  - msgpack : 레이아웃 순서의 값 배열을 MessagePack 맵으로 (중간 단계)
+  - binary  : 고정 헤더 + float32 배열 (탱크 × 센서 고정 레이아웃)
+
+msgpack/binary는 연결 시 텍스트(JSON) SENSOR_LAYOUT 메시지로 탱크/센서 순서를 한 번 보내고,
+레이아웃이 바뀌면(새 SENSOR_ID 등장) 버전을 올려 다시 보낸다. SENSOR_UPDATE 외 메시지는 모두 JSON 텍스트.
+
+바이너리 프레임 (리틀 엔디안):
+    헤더 24B : MAGIC "SU"(2s) VERSION(u8) FLAGS(u8) LAYOUT_VERSION(u16) pad(2)
+               ORDER(u32) TIMESTAMP(f64, epoch 초) ... 아래 HEADER 참조
+    VALUES   : float32[n_tanks * n_sensors] (탱크 순서 × 센서 순서, 값 없음 = NaN)
+    STAGE    : uint16[n_tanks]
+    ERROR    : uint16[n_tanks] (숫자가 아닌 CODE = 0xFFFF)
+    STATUS   : uint8[n_tanks]  (STATUS_CODES 인덱스)
+"""
+import json
+import math
+import struct
+import time
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+import msgspec
+
+from app.models.packet import SensorFrame
+from app.models.protocol import STATUS_CODES, STATUS_TO_CODE
+
+FORMAT_JSON = "json"
+FORMAT_MSGPACK = "msgpack"
+FORMAT_BINARY = "binary"
+
+# Sec-WebSocket-Protocol 서브프로토콜 이름 → 형식
+SUBPROTOCOLS: Dict[str, str] = {
+    "sensor.json": FORMAT_JSON,
+    "sensor.msgpack.v1": FORMAT_MSGPACK,
+    "sensor.binary.v1": FORMAT_BINARY,
+}
+
+MAGIC = b"SU"
+FRAME_VERSION = 1
+# MAGIC, VERSION, FLAGS, LAYOUT_VERSION, ORDER, TIMESTAMP, N_TANKS, N_SENSORS (24B: float32 배열 4바이트 정렬)
+HEADER = struct.Struct("<2sBBHxxIdHH")
+ERROR_UNKNOWN = 0xFFFF
+_NAN = float("nan")
+
+
+def negotiate(requested: Sequence[str], query_format: str = None) -> Tuple[str, str]:
+    """클라이언트가 요청한 서브프로토콜 중 처음 지원하는 것을 고른다.
+
+    Returns:
+        (형식, accept에 돌려줄 서브프로토콜 이름 또는 None)
+    """
+    for name in requested or ():
+        fmt = SUBPROTOCOLS.get(name)
+        if fmt is not None:
+            return fmt, name
+    if query_format in (FORMAT_JSON, FORMAT_MSGPACK, FORMAT_BINARY):
+        return query_format, None
+    return FORMAT_JSON, None
+
+
+def _error_code(code) -> int:
+    try:
+        code = int(code)
+    except (TypeError, ValueError):
+        return ERROR_UNKNOWN
+    return code if 0 <= code < ERROR_UNKNOWN else ERROR_UNKNOWN
+
+
+class SensorJsonEncoder:
+    """JSON SENSOR_UPDATE를 템플릿으로 만든다.
+
+    (TANK_ID, SENSOR_ID)별 고정 접두부를 캐시해 두고 숫자 벡터의 값만 끼워 넣는다.
+    행별 model_dump/dict 생성 없이 json.loads 결과가 model_dump(by_alias=True)와 같은
+    메시지를 만든다. (값 없음/형식 오류 NaN은 null)
+    """
+
+    def __init__(self):
+        self._value_prefix: Dict[Tuple[int, int], str] = {}
+        self._tank_prefix: Dict[int, str] = {}
+        self._quoted: Dict[str, str] = {}
+
+    def _quote(self, text: str) -> str:
+        """CMD/STATUS/CODE처럼 값 종류가 적은 문자열만 메모한다. (DATE/TIME은 매초 달라 메모하면 계속 늘어남)"""
+        quoted = self._quoted.get(text)
+        if quoted is None:
+            quoted = self._quoted[text] = json.dumps(text, ensure_ascii=False)
+        return quoted
+
+    def _tank(self, tank_id: int) -> str:
+        prefix = self._tank_prefix.get(tank_id)
+        if prefix is None:
+            prefix = self._tank_prefix[tank_id] = '{"TANK_ID":%d,' % tank_id
+        return prefix
+
+    def encode(self, packet: SensorFrame) -> str:
+        vector = packet.vector
+        value_prefix = self._value_prefix
+        items = []
+        append = items.append
+        for key, value in zip(zip(vector.tank_ids, vector.sensor_ids), vector.values):
+            prefix = value_prefix.get(key)
+            if prefix is None:
+                prefix = value_prefix[key] = '{"TANK_ID":%d,"SENSOR_ID":%d,"VALUE":' % key
+            append(prefix + (repr(value) if math.isfinite(value) else "null") + "}")
+
+        quote = self._quote
+        tank = self._tank
+        state = ",".join(
+            tank(s.tank_id) + '"STAGE":%d,"STATUS":%s}' % (s.stage, quote(s.status)) for s in packet.state
+        )
+        error = ",".join(tank(e.tank_id) + '"CODE":%s}' % quote(e.code) for e in packet.error)
+        return (
+            '{"type":"SENSOR_UPDATE","data":{"CMD":%s,"ORDER":%d,"DATE":%s,"TIME":%s,'
+            '"VALUES":[%s],"STATE":[%s],"ERROR":[%s]}}'
+            % (quote(packet.cmd), packet.order,
+               json.dumps(packet.date, ensure_ascii=False), json.dumps(packet.time, ensure_ascii=False),
+               ",".join(items), state, error)
+        )
+
+
+class SensorFrameEncoder:
+    """SensorFrame을 고정 탱크×센서 레이아웃의 바이너리/MessagePack 프레임으로 만든다.
+
+    탱크 순서는 UNIT_TO_TANK_ID로 고정하고, 센서 순서는 처음 본 SENSOR_ID를 정렬해 유지한다.
+    레이아웃에 없는 TANK_ID/SENSOR_ID가 들어오면 레이아웃에 추가하고 layout_version을 올린다.
+    """
+
+    def __init__(self, tank_ids: Sequence[int], sensor_ids: Sequence[int] = ()):
+        self.tank_ids: List[int] = list(tank_ids)
+        self.sensor_ids: List[int] = sorted(set(sensor_ids))
+        self.layout_version = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        self.layout_version += 1
+        self._tank_index = {t: i for i, t in enumerate(self.tank_ids)}
+        n_sensors = len(self.sensor_ids)
+        sensor_index = {s: i for i, s in enumerate(self.sensor_ids)}
+        # (TANK_ID, SENSOR_ID) → VALUES 배열 위치
+        self._slot: Dict[Tuple[int, int], int] = {
+            (t, s): ti * n_sensors + si
+            for t, ti in self._tank_index.items()
+            for s, si in sensor_index.items()
+        }
+        self._empty_values = array("f", [_NAN]) * (len(self.tank_ids) * n_sensors)
+        self._layout_json = None
+
+    def update_layout(self, packet: SensorFrame) -> bool:
+        """패킷에 레이아웃에 없는 탱크/센서가 있으면 레이아웃을 넓힌다. 바뀌었으면 True."""
+        new_tanks = []
+        new_sensors = set()
+        slot = self._slot
+        vector = packet.vector
+        for key in zip(vector.tank_ids, vector.sensor_ids):
+            if key not in slot:
+                tank_id, sensor_id = key
+                if tank_id not in self._tank_index and tank_id not in new_tanks:
+                    new_tanks.append(tank_id)
+                if sensor_id not in self.sensor_ids:
+                    new_sensors.add(sensor_id)
+        for s in packet.state:
+            if s.tank_id not in self._tank_index and s.tank_id not in new_tanks:
+                new_tanks.append(s.tank_id)
+        if not new_tanks and not new_sensors:
+            return False
+        self.tank_ids.extend(new_tanks)
+        self.sensor_ids = sorted(set(self.sensor_ids) | new_sensors)
+        self._rebuild()
+        return True
+
+    def layout_message(self, fmt: str) -> str:
+        """SENSOR_LAYOUT 텍스트 메시지 (JSON)"""
+        if self._layout_json is None:
+            self._layout_json = {
+                "version": self.layout_version,
+                "tank_ids": self.tank_ids,
+                "sensor_ids": self.sensor_ids,
+                "status_codes": STATUS_CODES,
+                "header_bytes": HEADER.size,
+            }
+        return json.dumps({"type": "SENSOR_LAYOUT", "data": dict(self._layout_json, format=fmt)})
+
+    def _columns(self, packet: SensorFrame, typecode: str = "f"):
+        n_tanks = len(self.tank_ids)
+        values = array(typecode, self._empty_values)
+        slot = self._slot
+        vector = packet.vector
+        for tank_id, sensor_id, value in zip(vector.tank_ids, vector.sensor_ids, vector.values):
+            values[slot[(tank_id, sensor_id)]] = value
+
+        stage = array("H", bytes(2 * n_tanks))
+        status = bytearray(n_tanks)
+        tank_index = self._tank_index
+        for s in packet.state:
+            i = tank_index[s.tank_id]
+            stage[i] = s.stage & 0xFFFF
+            status[i] = STATUS_TO_CODE.get(s.status, 0)
+
+        error = array("H", bytes(2 * n_tanks))
+        for e in packet.error:
+            i = tank_index.get(e.tank_id)
+            if i is not None:
+                error[i] = _error_code(e.code)
+        return values, stage, error, status
+
+    def encode_binary(self, packet: SensorFrame) -> bytes:
+        """바이너리 SENSOR_UPDATE 프레임. 호출 전에 update_layout을 불러야 한다."""
+        values, stage, error, status = self._columns(packet)
+        header = HEADER.pack(MAGIC, FRAME_VERSION, 0, self.layout_version, packet.order & 0xFFFFFFFF,
+                             time.time(), len(self.tank_ids), len(self.sensor_ids))
+        return b"".join((header, values.tobytes(), stage.tobytes(), error.tobytes(), bytes(status)))
+
+    def encode_msgpack(self, packet: SensorFrame) -> bytes:
+        """MessagePack SENSOR_UPDATE 프레임 (레이아웃 순서의 값 배열, 값 없음 = None)"""
+        # float32로 줄이면 "0.10" 같은 값이 0.100000001로 바뀌므로 float64 유지
+        values, stage, error, status = self._columns(packet, "d")
+        return msgspec.msgpack.encode({
+            "type": "SENSOR_UPDATE",
+            "layout": self.layout_version,
+            "ORDER": packet.order,
+            "DATE": packet.date,
+            "TIME": packet.time,
+            "VALUES": [None if math.isnan(v) else v for v in values],
+            "STAGE": stage.tolist(),
+            "ERROR": error.tolist(),
+            "STATUS": list(status),
+        })
@@ -0,0 +1,129 @@
+"""
+일괄 제어(batch) API 검증.
+
+라즈베리파이 없이 로컬 TCP 서버로 포트 7001 연결을 흉내 내어
+
+  - STATE/GPIO/모터가 섞인 요청이 STATE 패킷 1개 + 탱크당 SET_GPIO/TEMP_RPM 1개로 전송되는지
+  - 같은 탱크의 중복 요청은 마지막 값만 보내는지, 모터 OFF는 속도와 무관하게 ONOFF=OFF인지
+  - 매핑에 없는 탱크만 있는 STATE 요청은 패킷을 보내지 않는지 (IDX도 소비하지 않음)
+
+를 확인한다.
+
+실행: python test_batch_commands.py
+"""
+import asyncio
+import json
+import logging
+import sys
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from app.controllers import batch as batch_module
+from app.controllers.batch import BatchController
+from app.models.batch import BatchControlRequest
+from app.services.tcp_bridge import TCPBridgeService
+
+# 매핑에 없는 TANK_ID 경고는 이 테스트에서 의도된 것
+logging.getLogger("app.services.tcp_bridge").setLevel(logging.ERROR)
+
+
+async def read_commands(reader, timeout=0.5):
+    """timeout 동안 들어온 명령 패킷(PING 제외)을 모두 읽는다."""
+    packets = []
+    while True:
+        try:
+            line = await asyncio.wait_for(reader.readline(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return packets
+        if not line:
+            return packets
+        packet = json.loads(line)
+        if packet["CMD"] != "PING":
+            packets.append(packet)
+
+
+async def run_async(check):
+    bridge = TCPBridgeService()
+    original_bridge = batch_module.tcp_bridge
+    batch_module.tcp_bridge = bridge
+    server = await asyncio.start_server(bridge.handle_sender_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await asyncio.sleep(0.05)
+    # 라우터 없이 핸들러만 호출 (Controller.__init__은 owner 라우터가 필요)
+    controller = BatchController.__new__(BatchController)
+    batch_control = BatchController.batch_control.fn
+    try:
+        print("\n[케이스 1] STATE/GPIO/모터 혼합 요청")
+        request = BatchControlRequest.model_validate({
+            "state": [{"unit_id": 601, "status": "Run"}, {"unit_id": 101, "status": "Pause"},
+                      {"unit_id": 102, "status": "Run"}],
+            "gpio": [{"unit_id": 601, "gpio_states": [True] * 8},
+                     {"unit_id": 101, "gpio_states": [False] * 8},
+                     {"unit_id": 601, "gpio_states": [True, False] * 4}],  # 601 중복 → 마지막 값
+            "motor": [{"unit_id": 101, "is_on": True, "speed": 300, "time": 10},
+                      {"unit_id": 102, "is_on": False, "speed": 300}],
+        })
+        result = await batch_control(controller, request)
+        packets = await read_commands(reader)
+        by_cmd = {}
+        for packet in packets:
+            by_cmd.setdefault(packet["CMD"], []).append(packet)
+        print(f"  응답 packets={result['packets']}, 수신 {[p['CMD'] for p in packets]}")
+        check("응답 성공", result["success"] and set(result["results"]) == {"601", "101", "102"})
+        check("STATE 1개 + 탱크당 1개", len(by_cmd.get("STATE", [])) == 1
+              and len(by_cmd.get("SET_GPIO", [])) == 2 and len(by_cmd.get("TEMP_RPM", [])) == 2
+              and len(packets) == 5)
+        check("응답 packets가 실제 전송 수와 일치", result["packets"] == {"STATE": 1, "SET_GPIO": 2, "TEMP_RPM": 2})
+        states = {item["TANK_ID"]: item["STATUS"] for item in by_cmd["STATE"][0]["DATA"]}
+        check("STATE 벡터에 세 탱크 반영", (states["601"], states["101"], states["102"]) == ("Run", "Pause", "Run"))
+        gpio = {p["TANK_ID"]: p["VALUE"] for p in by_cmd["SET_GPIO"]}
+        check("중복 GPIO는 마지막 값", gpio["601"] == [True, False] * 4)
+        motor = {p["TANK_ID"]: (p["ONOFF"], p["SPEED"]) for p in by_cmd["TEMP_RPM"]}
+        check("모터 ON / OFF (OFF는 속도와 무관)", motor == {"101": ("ON", 300), "102": ("OFF", 0)})
+        idxs = [str(p["IDX"]) for p in packets]
+        check("패킷마다 다른 IDX", len(set(idxs)) == len(idxs))
+
+        print("\n[케이스 2] 매핑에 없는 탱크만 있는 STATE")
+        last_idx = bridge._command_idx
+        result = await batch_control(controller, BatchControlRequest.model_validate({
+            "state": [{"unit_id": 999, "status": "Run"}],
+        }))
+        packets = await read_commands(reader)
+        print(f"  응답 {result}, 수신 {len(packets)}건")
+        check("STATE 패킷을 보내지 않음", packets == [] and result["packets"]["STATE"] == 0)
+        check("결과는 실패, IDX 소비 없음", result["results"] == {"999": {"state": False}}
+              and not result["success"] and bridge._command_idx == last_idx)
+    finally:
+        batch_module.tcp_bridge = original_bridge
+        writer.close()
+        await asyncio.sleep(0.1)  # 서버 측 핸들러가 연결 종료를 처리할 시간
+        server.close()
+        await server.wait_closed()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    asyncio.run(run_async(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,181 @@
+"""
+CAN-FD 직접 수신(can_ingest) 검증 및 벤치마크.
+
+python-can의 프로세스 내 virtual 인터페이스로 유닛보드 프레임을 보내
+  - 프레임 디코딩/조립 결과가 TCP(JSON) 수신 패킷과 같은지
+  - ORDER 변경/타임아웃 시 부분 패킷 전달, 잘못된 프레임 드롭
+을 확인하고, 초당 처리 프레임 수(frames/sec)를 JSON 경로와 비교한다.
+
+실행: python test_can_ingest.py
+"""
+import asyncio
+import json
+import sys
+import time
+import timeit
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+import can
+
+from app.models.packet import SensorFrame, decode_sensor
+from app.models.protocol import SensorPacket
+from app.services.can_ingest import CanIngestService, encode_frame, frame_struct
+from app.services.tcp_bridge import UNIT_TO_TANK_ID
+
+BASE_ID = 0x100
+SENSOR_BASE = 1100
+
+
+def unit_values(index, order):
+    """float32로 정확히 표현되는 값 (x.25 단위)"""
+    return [index + order * 0.25 + i for i in range(4)]
+
+
+def make_frames(order, indices=None):
+    frames = []
+    for index in (range(len(UNIT_TO_TANK_ID)) if indices is None else indices):
+        status = "Run" if index % 2 else "Pause"
+        frames.append((BASE_ID + index, encode_frame(order, 100, status, index % 3, unit_values(index, order))))
+    return frames
+
+
+def make_json(order):
+    """같은 내용을 Pi가 포트 7000으로 보내는 JSON 형식으로 만든다."""
+    values, state, error = [], [], []
+    for index, tank in enumerate(UNIT_TO_TANK_ID):
+        for i, v in enumerate(unit_values(index, order)):
+            values.append({"TANK_ID": str(tank), "SENSOR_ID": str(SENSOR_BASE + i), "VALUE": "%.2f" % v})
+        state.append({"TANK_ID": tank, "STAGE": 100, "STATUS": "Run" if index % 2 else "Pause"})
+        error.append({"TANK_ID": str(tank), "CODE": str(index % 3)})
+    return json.dumps({"CMD": "SENSOR", "ORDER": str(order), "DATE": "2026-06-20", "TIME": "12:00:00",
+                       "VALUES": values, "STATE": state, "ERROR": error})
+
+
+def comparable(packet):
+    if isinstance(packet, SensorFrame):
+        packet = packet.to_packet()
+    d = packet.model_dump(by_alias=True)
+    d.pop("DATE")
+    d.pop("TIME")
+    return d
+
+
+async def scenario(check):
+    received = []
+
+    async def sink(packet):
+        received.append(packet)
+
+    svc = CanIngestService(UNIT_TO_TANK_ID, on_packet=sink, base_id=BASE_ID,
+                           sensor_base_id=SENSOR_BASE, assemble_timeout_s=0.2)
+    await svc.start(interface="virtual", channel="test_can_ingest", fd=True)
+    tx = can.Bus(interface="virtual", channel="test_can_ingest", fd=True)
+
+    def send(frames):
+        for arb_id, data in frames:
+            tx.send(can.Message(arbitration_id=arb_id, data=data, is_extended_id=False, is_fd=True))
+
+    print("\n[케이스 1] 32개 프레임 → SensorFrame 1개 (JSON 경로와 동일)")
+    send(make_frames(1))
+    await asyncio.sleep(0.1)
+    check("패킷 1개 전달", len(received) == 1)
+    expected = SensorPacket(**json.loads(make_json(1)))
+    check("JSON 수신 결과와 내용 동일", len(received) == 1 and comparable(received[0]) == comparable(expected))
+
+    print("\n[케이스 2] ORDER 변경 시 이전 ORDER 부분 패킷 전달")
+    received.clear()
+    send(make_frames(2, range(10)))
+    send(make_frames(3))
+    await asyncio.sleep(0.1)
+    check("부분 패킷 + 전체 패킷", [len(p.vector) for p in received] == [40, 128])
+    check("ORDER 순서", [p.order for p in received] == [2, 3])
+
+    print("\n[케이스 3] 타임아웃 시 부분 패킷 전달 / 잘못된 프레임 드롭")
+    received.clear()
+    dropped_before = svc.dropped
+    send(make_frames(4, range(5)))
+    send([(BASE_ID + 99, b"\x00" * 24), (BASE_ID, b"\x00" * 4)])
+    await asyncio.sleep(0.4)
+    check("타임아웃 부분 패킷", len(received) == 1 and len(received[0].vector) == 20)
+    check("범위 밖 ID/짧은 프레임 드롭", svc.dropped - dropped_before == 2)
+
+    print("\n[벤치마크] 초당 처리 프레임 수")
+    json_packet = make_json(5)
+    frames = make_frames(5)
+    frame_bytes = sum(len(d) for _, d in frames)
+    print(f"  패킷 1개 크기: JSON {len(json_packet.encode())} bytes / CAN {frame_bytes} bytes (프레임 {len(frames)}개)")
+
+    n = 300
+    total_frames = n * len(frames)
+    layout = frame_struct()
+
+    # 디코딩만: JSON 문자열 파싱 vs 프레임 struct 언팩
+    t_json_decode = timeit.timeit(lambda: json.loads(json_packet), number=n)
+    t_can_decode = timeit.timeit(lambda: [layout.unpack_from(d) for _, d in frames], number=n)
+    print(f"  디코딩  JSON json.loads:        {total_frames / t_json_decode:10.0f} frames/s")
+    print(f"  디코딩  CAN struct.unpack_from: {total_frames / t_can_decode:10.0f} frames/s  (x{t_json_decode / t_can_decode:.1f})")
+
+    # SensorFrame 생성까지 (두 경로 모두 같은 방식으로 측정)
+    count = 0
+
+    async def counter(packet):
+        nonlocal count
+        count += 1
+
+    started = time.perf_counter()
+    for _ in range(n):
+        await counter(decode_sensor(json_packet))
+    t_json = time.perf_counter() - started
+
+    bench = CanIngestService(UNIT_TO_TANK_ID, on_packet=counter, base_id=BASE_ID, sensor_base_id=SENSOR_BASE)
+    count = 0
+    started = time.perf_counter()
+    for _ in range(n):
+        for arb_id, data in frames:
+            await bench.feed(arb_id, data)
+    t_can = time.perf_counter() - started
+    print(f"  패킷화  JSON msgspec 디코딩:     {total_frames / t_json:10.0f} frames/s (패킷 {n / t_json:6.0f}/s)")
+    print(f"  패킷화  CAN 디코딩+조립:        {total_frames / t_can:10.0f} frames/s (패킷 {n / t_can:6.0f}/s)  (x{t_json / t_can:.1f})")
+    check("디코딩 패킷 수", count == n)
+
+    # virtual 버스 경유 (Notifier 스레드 → 이벤트 루프)
+    received.clear()
+    started = time.perf_counter()
+    for order in range(100, 100 + n):
+        send(make_frames(order))
+    while len(received) < n and time.perf_counter() - started < 30:
+        await asyncio.sleep(0.01)
+    t_bus = time.perf_counter() - started
+    print(f"  virtual 버스 경유:               {len(received) * len(frames) / t_bus:10.0f} frames/s")
+    check("virtual 버스 경유 패킷 수", len(received) == n)
+
+    tx.shutdown()
+    await svc.stop()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    asyncio.run(scenario(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,187 @@
+"""
+포트 7001 송신 명령 큐(command_queue) 검증.
+
+  - 우선순위: STOP이 제어 명령/PING/GET_VERSION보다 먼저 전송
+  - 같은 병합 키의 대기 명령은 최신 명령으로 대체, 모든 대기자가 최신 명령의 결과를 받음
+  - 배치 크기가 max_batch_bytes를 넘지 않음 (한도보다 큰 명령은 단독 전송)
+  - drain 실패 시 배치와 대기 명령이 모두 False로 완료 (fail_all)
+  - 브리지: drain 타임아웃 후 7001 연결 상태(_tx_connected)가 해제되는지
+
+실행: python test_command_queue.py
+"""
+import asyncio
+import logging
+import sys
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from app.models.protocol import PingPacket
+from app.services import tcp_bridge as bridge_module
+from app.services.command_queue import (
+    PRIORITY_CONTROL, PRIORITY_PING, PRIORITY_REF, PRIORITY_STOP, PRIORITY_VERSION, CommandQueue,
+)
+from app.services.tcp_bridge import TCPBridgeService
+
+# drain 실패/연결 무효화 로그는 이 테스트에서 의도된 것
+logging.getLogger("app.services.command_queue").setLevel(logging.CRITICAL)
+logging.getLogger("app.services.tcp_bridge").setLevel(logging.CRITICAL)
+
+
+class FakeWriter:
+    """write를 모았다가 drain 한 번을 배치 하나로 기록한다."""
+
+    def __init__(self, fail_after=None):
+        self.batches = []
+        self._current = []
+        self.fail_after = fail_after  # 이 수만큼 drain한 뒤부터 실패
+
+    def write(self, data):
+        self._current.append(data)
+
+    async def drain(self):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise ConnectionResetError("peer reset")
+        self.batches.append(self._current)
+        self._current = []
+
+    @property
+    def sent(self):
+        return [data for batch in self.batches for data in batch]
+
+
+async def drain_queue(queue, writer, futures):
+    """futures가 모두 완료될 때까지 송신 태스크를 돌린다."""
+    task = asyncio.create_task(queue.run(writer))
+    await asyncio.wait_for(asyncio.gather(*futures), timeout=1.0)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def queue_cases(check):
+    print("\n[케이스 1] 우선순위")
+    queue = CommandQueue(max_batch_bytes=4096)
+    futures = [
+        queue.submit(b"version\n", PRIORITY_VERSION, key="GET_VERSION:101", label="GET_VERSION"),
+        queue.submit(b"ping\n", PRIORITY_PING, key="PING", label="PING"),
+        queue.submit(b"gpio\n", PRIORITY_CONTROL, key="SET_GPIO:101", label="SET_GPIO"),
+        queue.submit(b"stop\n", PRIORITY_STOP, key="STATE", label="STATE"),
+    ]
+    writer = FakeWriter()
+    await drain_queue(queue, writer, futures)
+    print(f"  전송 순서 {writer.sent}")
+    check("STOP → 제어 → PING → GET_VERSION", writer.sent == [b"stop\n", b"gpio\n", b"ping\n", b"version\n"])
+    check("전송 결과 모두 True", [f.result() for f in futures] == [True] * 4)
+
+    print("\n[케이스 2] 같은 키 병합")
+    queue = CommandQueue(max_batch_bytes=4096)
+    first = queue.submit(b"state-1\n", PRIORITY_STOP, key="STATE", label="STATE")
+    second = queue.submit(b"state-2\n", PRIORITY_CONTROL, key="STATE", label="STATE")
+    gpio = queue.submit(b"gpio\n", PRIORITY_CONTROL, key="SET_GPIO:101", label="SET_GPIO")
+    third = queue.submit(b"state-3\n", PRIORITY_CONTROL, key="STATE", label="STATE")
+    check("대기 중인 명령은 2개", len(queue) == 2 and queue.coalesced_total == 2)
+    writer = FakeWriter()
+    await drain_queue(queue, writer, [first, second, gpio, third])
+    print(f"  전송 {writer.sent}")
+    check("최신 STATE만 한 번 전송", writer.sent.count(b"state-3\n") == 1
+          and b"state-1\n" not in writer.sent and b"state-2\n" not in writer.sent)
+    check("병합된 STATE가 Stop 우선순위 유지", writer.sent[0] == b"state-3\n")
+    check("모든 대기자가 최신 명령의 결과를 받음", [f.result() for f in (first, second, third)] == [True] * 3)
+
+    print("\n[케이스 3] 배치 크기 한도")
+    queue = CommandQueue(max_batch_bytes=100)
+    futures = [queue.submit(b"%039d\n" % i, PRIORITY_CONTROL, label=f"RAW{i}") for i in range(10)]  # 40바이트
+    big = queue.submit(b"x" * 250 + b"\n", PRIORITY_REF, label="BIG")
+    writer = FakeWriter()
+    await drain_queue(queue, writer, futures + [big])
+    sizes = [sum(len(data) for data in batch) for batch in writer.batches]
+    print(f"  배치 크기 {sizes}")
+    check("40바이트 10건 → 80바이트 배치 5개", sizes[:5] == [80] * 5)
+    check("한도보다 큰 명령은 단독 전송", writer.batches[-1] == [b"x" * 250 + b"\n"] and big.result() is True)
+    check("한도를 넘는 배치는 단독 전송분뿐", all(size <= 100 for size in sizes[:-1]))
+
+    print("\n[케이스 4] drain 실패 → 대기 명령 모두 실패")
+    queue = CommandQueue(max_batch_bytes=50)
+    futures = [queue.submit(b"%039d\n" % i, PRIORITY_CONTROL, label=f"RAW{i}") for i in range(5)]
+    writer = FakeWriter(fail_after=1)
+    await asyncio.wait_for(queue.run(writer), timeout=1.0)  # 실패하면 스스로 종료
+    results = [f.result() for f in futures]
+    print(f"  결과 {results}, failed_total={queue.failed_total}")
+    check("첫 배치 성공, 실패 배치와 대기 명령은 False", results == [True, False, False, False, False])
+    check("큐가 비고 실패 수 집계", len(queue) == 0 and queue.failed_total == 4)
+    late = queue.submit(b"late\n", PRIORITY_CONTROL, label="LATE")
+    queue.fail_all()
+    check("종료 후 fail_all은 새 대기 명령도 False로 완료", late.result() is False)
+
+
+async def bridge_cases(check):
+    print("\n[케이스 5] 브리지: drain 타임아웃 후 연결 해제")
+    bridge = TCPBridgeService()
+    statuses = []
+
+    async def record_status(message):
+        statuses.append(message["data"])
+
+    original_broadcast = bridge_module.ws_manager.broadcast
+    bridge_module.ws_manager.broadcast = record_status
+    server = await asyncio.start_server(bridge.handle_sender_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await asyncio.sleep(0.05)
+        check("연결 시 _tx_connected", bridge._tx_connected and bridge._sender_writer is not None)
+
+        # Pi가 읽지 않아 송신 버퍼가 가득 찬 상황: drain이 끝나지 않음
+        async def stalled_drain():
+            await asyncio.Event().wait()
+
+        bridge._sender_writer.drain = stalled_drain
+        bridge._command_queue.drain_timeout_s = 0.1
+        ok = await bridge.send_command(PingPacket.model_validate({"CMD": "PING", "IDX": "1", "NOTE": "OK"}))
+        await asyncio.sleep(0.05)
+        check("drain 실패 명령은 False", ok is False)
+        check("_tx_connected / _sender_writer 해제", not bridge._tx_connected and bridge._sender_writer is None)
+        check("해제 상태 브로드캐스트", bool(statuses) and statuses[-1]["tx"] is False)
+        check("이후 명령은 바로 실패", await asyncio.wait_for(bridge.send_state_command("Run"), 1.0) is False)
+        try:
+            await asyncio.wait_for(reader.read(), 1.0)  # EOF까지 읽음
+            closed = True
+        except asyncio.TimeoutError:
+            closed = False
+        check("Pi 쪽 연결도 끊김", closed)
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+        bridge_module.ws_manager.broadcast = original_broadcast
+        await bridge.stop()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    asyncio.run(queue_cases(check))
+    asyncio.run(bridge_cases(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,201 @@
+"""
+이력 조회 읽기 연결 풀(db_service.ReadConnectionPool) 검증 및 벤치마크.
+
+  - 풀 조회 결과가 기존(요청마다 새 연결) 조회와 같은지
+  - 연결 재사용(풀 크기만큼만 열림), 읽기 전용(query_only), 풀 초과 동시 조회 시 대기 집계
+  - DB가 아직 없을 때 조회는 예외로 실패하고(빈 결과로 캐시되지 않게), 실패한 연결은 버리고 다음 조회에서 다시 여는지
+  - 대시보드 8개가 0.5초마다 차트를 다시 읽는 동안 녹화(save_packet, 50ms 주기) 지연,
+    짧은 구간 차트 조회 1건 지연(기존 새 연결 vs 풀) 비교
+
+실행: python test_db_read_pool.py
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime, timedelta
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+import aiosqlite
+
+from app.models.packet import SensorVector, TankStatus
+from app.services.db_service import DBService
+from app.services.tcp_bridge import UNIT_TO_TANK_ID
+
+N_PACKETS = 3000
+BASE = datetime(2026, 6, 1, 0, 0, 0)
+ts = lambda sec: (BASE + timedelta(seconds=sec)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def fill_db(db_path):
+    with sqlite3.connect(db_path) as conn:
+        for i in range(N_PACKETS):
+            packet_id = conn.execute("INSERT INTO packets (order_num, created_at) VALUES (?, ?)",
+                                     (i, ts(i))).lastrowid
+            conn.executemany(
+                "INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, ?, ?, ?)",
+                [(packet_id, str(tank), 1100 + s, t * 0.5 + s + i * 0.25)
+                 for t, tank in enumerate(UNIT_TO_TANK_ID) for s in range(4)])
+
+
+async def legacy_history(db_path, start, end, tank_id=None, sensor_ids=None):
+    """기존 get_history: 요청마다 새 aiosqlite 연결"""
+    query = ("SELECT p.created_at as time, r.value, r.sensor_id FROM readings r "
+             "JOIN packets p ON r.packet_id = p.id WHERE p.created_at BETWEEN ? AND ?")
+    params = [start, end]
+    if tank_id:
+        query += " AND r.tank_id = ?"
+        params.append(str(tank_id))
+    if sensor_ids:
+        query += f" AND r.sensor_id IN ({','.join('?' * len(sensor_ids))})"
+        params.extend(sensor_ids)
+    query += " ORDER BY p.created_at ASC"
+    async with aiosqlite.connect(db_path) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute(query, params) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+
+def make_vector(order):
+    tanks = array("l", [t for t in UNIT_TO_TANK_ID for _ in range(4)])
+    sensors = array("l", [1100 + s for _ in UNIT_TO_TANK_ID for s in range(4)])
+    values = array("d", [order * 0.1 + i for i in range(len(tanks))])
+    return SensorVector(tanks, sensors, values, 0)
+
+
+STATES = [TankStatus(t, 100, "Run") for t in UNIT_TO_TANK_ID]
+
+
+async def record_latency(db, stop_at, period=0.01):
+    """period마다 save_packet 1건 (예정 시각 → 커밋 완료) 지연"""
+    loop = asyncio.get_running_loop()
+    latencies = []
+    order = 100_000
+    next_at = loop.time()
+    while loop.time() < stop_at:
+        next_at += period
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+        ok = await db.save_packet(order, ts(N_PACKETS + order), make_vector(order), STATES)
+        latencies.append((loop.time() - next_at) * 1000.0 if ok else float("inf"))
+        order += 1
+    latencies.sort()
+    pick = lambda p: latencies[min(len(latencies) - 1, int(p * (len(latencies) - 1)))]
+    return {"n": len(latencies), "p50": pick(0.5), "p99": pick(0.99), "max": latencies[-1]}
+
+
+async def dashboards(query, n_dashboards, stop_at, think_s=0.5):
+    loop = asyncio.get_running_loop()
+    counts = [0] * n_dashboards
+
+    async def one(i):
+        tank = UNIT_TO_TANK_ID[i % len(UNIT_TO_TANK_ID)]
+        while loop.time() < stop_at:
+            await query(ts(0), ts(N_PACKETS), tank, [1100, 1101])
+            counts[i] += 1
+            await asyncio.sleep(think_s)  # 탱크 전환 간격
+
+    await asyncio.gather(*(one(i) for i in range(n_dashboards)))
+    return sum(counts)
+
+
+async def scenario(check):
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "pool.db")
+
+    print("\n[케이스 1] DB 생성 전 조회 → 이후 재연결")
+    db = DBService(db_path)
+    db.db_path = db_path
+    try:
+        await db.get_history(ts(0), ts(10))
+        raised = False
+    except sqlite3.OperationalError:
+        raised = True
+    check("DB 없음: 조회 실패는 예외", raised and db.read_pool.get_stats()["errors"] == 1)
+    await db.init_db()
+    fill_db(db_path)
+    rows = await db.get_history(ts(0), ts(9), "601", [1100])
+    check("다음 조회에서 다시 열어 성공", len(rows) == 10 and db.read_pool.get_stats()["open"] == 1)
+
+    print("\n[케이스 2] 결과 동일 / 연결 재사용 / 읽기 전용")
+    same = True
+    for tank, sensors in ((None, None), ("101", None), ("601", [1100, 1103])):
+        same &= await db.get_history(ts(100), ts(400), tank, sensors) == await legacy_history(
+            db_path, ts(100), ts(400), tank, sensors)
+    check("get_history = 기존 조회", same)
+    await asyncio.gather(*(db.get_history(ts(0), ts(600), str(t)) for t in UNIT_TO_TANK_ID))
+    stats = db.read_pool.get_stats()
+    check("풀 크기만큼만 연결", stats["opened_total"] == stats["size"] == stats["open"])
+    check("32건 동시 조회 → 대기 집계", stats["waits"] > 0 and stats["wait_ms_max"] > 0 and stats["in_use"] == 0)
+    try:
+        async with db.read_pool.connection() as conn:
+            await conn.execute("DELETE FROM readings")
+        writable = True
+    except sqlite3.OperationalError:
+        writable = False
+    check("읽기 연결은 쓰기 불가 (오류 연결은 교체)", not writable
+          and db.read_pool.get_stats()["open"] == stats["size"] - 1)
+
+    print("\n[케이스 3] 짧은 구간 차트 1건 지연 (새 연결 vs 풀)")
+    rounds = 200
+    started = time.perf_counter()
+    for i in range(rounds):
+        await legacy_history(db_path, ts(i), ts(i + 10), "601", [1100])
+    t_legacy = (time.perf_counter() - started) / rounds * 1000
+    started = time.perf_counter()
+    for i in range(rounds):
+        await db.get_history(ts(i), ts(i + 10), "601", [1100])
+    t_pool = (time.perf_counter() - started) / rounds * 1000
+    print(f"  기존(요청마다 연결) {t_legacy:.2f} ms, 풀 {t_pool:.2f} ms ({t_legacy / t_pool:.1f}x)")
+    check("풀 조회가 더 빠름", t_pool < t_legacy)
+
+    print("\n[케이스 4] 대시보드 8개 차트 반복 조회 중 녹화 지연 (50ms 주기, 3초)")
+    loop = asyncio.get_running_loop()
+    results = {}
+    for name, query in (("기존: 요청마다 연결", lambda *a: legacy_history(db_path, *a)), ("읽기 풀", db.get_history)):
+        stop_at = loop.time() + 3.0
+        record, served = await asyncio.gather(record_latency(db, stop_at, period=0.05),
+                                              dashboards(query, 8, stop_at))
+        results[name] = (record, served)
+    print(f"  {'':<20}{'저장':>6}{'p50(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}{'차트 조회':>10}")
+    for name, (r, served) in results.items():
+        print(f"  {name:<20}{r['n']:>6}{r['p50']:>10.1f}{r['p99']:>10.1f}{r['max']:>10.1f}{served:>10}")
+    legacy, _ = results["기존: 요청마다 연결"]
+    pooled, _ = results["읽기 풀"]
+    check("조회 중 녹화 저장 모두 성공", all(r["max"] != float("inf") for r, _ in results.values()))
+    check("읽기 풀: 녹화 p99가 기존보다 작음", pooled["p99"] < legacy["p99"])
+    check("읽기 풀: 녹화 p99 < 200ms", pooled["p99"] < 200)
+    print(f"  풀 메트릭: {db.read_pool.get_stats()}")
+
+    await db.close()
+    check("close 후 연결 없음", db.read_pool.get_stats()["open"] == 0)
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    asyncio.run(scenario(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,209 @@
+"""
+펌웨어 롤아웃(firmware_rollout) 오프라인 검증 테스트.
+
+라즈베리파이 없이 로컬 업로드 서버(http.server)와 가짜 Pi(7001 송신 포트 클라이언트)를
+띄워 다음을 확인한다.
+  - 이미지는 롤아웃당 한 번만 업로드되고, 같은 내용이면 다음 롤아웃에서 생략된다
+  - 플래싱/업로드가 실패하거나 다른 이미지를 올린 뒤(A → B → A)에는 다시 업로드한다
+  - 여러 유닛이 concurrency 제한 안에서 동시에 진행된다
+  - FIRMWARE_UPDATE ACK / GET_VERSION(ACK_INITIALIZE) 버전 확인 결과가 유닛별로 반영된다
+  - ACK를 기다리는 GET_VERSION은 같은 탱크의 GET_VERSION과 병합되지 않는다
+
+실행: python test_firmware_rollout.py
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from app.config import settings
+from app.models.protocol import CommandPacketGetVersion
+from app.services import firmware_rollout as rollout_module
+from app.services.firmware_rollout import firmware_rollout, UNIT_DONE, UNIT_FAILED, ROLLOUT_COMPLETED, ROLLOUT_FAILED
+from app.services.tcp_bridge import tcp_bridge
+
+NEW_VERSION = 7
+UPLOADS = []
+FAIL_UPLOADS = threading.Event()
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    """업로드 서버 대역: 본문 크기만 기록한다."""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if FAIL_UPLOADS.is_set():
+            self.send_response(500)
+            self.end_headers()
+            return
+        UPLOADS.append(length)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"OK")
+
+    def log_message(self, *args):
+        pass
+
+
+async def fake_pi(reader, writer, reject_units, state):
+    """7001로 받은 명령에 응답하는 가짜 Pi.
+
+    FIRMWARE_UPDATE → ACK (reject_units는 NOTE=FAIL), GET_VERSION → ACK_INITIALIZE.
+    동시에 처리 중인 FIRMWARE_UPDATE 수의 최댓값을 기록한다.
+    """
+    in_flight = 0
+
+    async def reply_ack(cmd):
+        nonlocal in_flight
+        in_flight += 1
+        state["max_in_flight"] = max(state["max_in_flight"], in_flight)
+        await asyncio.sleep(0.05)  # 플래싱 시간
+        in_flight -= 1
+        note = "FAIL" if int(cmd["TANK_ID"]) in reject_units else "OK"
+        writer.write(json.dumps({"CMD": "ACK", "IDX": cmd["IDX"], "NOTE": note}).encode() + b"\n")
+        await writer.drain()
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        cmd = json.loads(line)
+        if cmd["CMD"] == "FIRMWARE_UPDATE":
+            asyncio.create_task(reply_ack(cmd))
+        elif cmd["CMD"] == "GET_VERSION":
+            writer.write(json.dumps({
+                "CMD": "ACK_INITIALIZE", "IDX": cmd["IDX"], "FW_VERSION": NEW_VERSION, "NOTE": "OK"
+            }).encode() + b"\n")
+            await writer.drain()
+
+
+async def wait_rollout(rollout, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not rollout.finished and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+    return rollout
+
+
+async def scenario(check):
+    # 로컬 업로드 서버
+    http = HTTPServer(("127.0.0.1", 0), UploadHandler)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{http.server_address[1]}/upload"
+
+    firmware_dir = tempfile.mkdtemp()
+    for name in ("fw.bin", "fw_b.bin"):
+        with open(os.path.join(firmware_dir, name), "wb") as f:
+            f.write(os.urandom(256 * 1024))
+    rollout_module.load_firmware_config = lambda: (url, firmware_dir)
+
+    settings.firmware_verify_interval_s = 0.05
+    settings.firmware_verify_timeout_s = 1
+    settings.firmware_ack_timeout_s = 2
+
+    # 7001 송신 포트에 가짜 Pi 연결
+    server = await asyncio.start_server(tcp_bridge.handle_sender_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    state = {"max_in_flight": 0}
+    pi_task = asyncio.create_task(fake_pi(reader, writer, reject_units={103}, state=state))
+    await asyncio.sleep(0.05)
+
+    units = [601, 101, 102, 103, 104, 105]
+
+    print("\n[케이스 1] 첫 롤아웃: 업로드 1회 + 유닛별 ACK/버전 확인")
+    started = time.monotonic()
+    r1 = await wait_rollout(firmware_rollout.start("fw.bin", units, concurrency=3, expected_version=NEW_VERSION))
+    elapsed = time.monotonic() - started
+    states = {u.unit_id: u.state for u in r1.units.values()}
+    check("업로드 1회", len(UPLOADS) == 1 and not r1.upload_skipped)
+    check("NOTE=FAIL 유닛만 실패", states[103] == UNIT_FAILED
+          and all(s == UNIT_DONE for u, s in states.items() if u != 103))
+    check("버전 확인", r1.units[601].version == NEW_VERSION)
+    check("롤아웃 상태 failed", r1.state == ROLLOUT_FAILED)
+    check(f"동시 진행 수 제한 (최대 {state['max_in_flight']} ≤ 3)", 1 < state["max_in_flight"] <= 3)
+    print(f"  유닛 {len(units)}개 소요: {elapsed:.2f}s")
+
+    print("\n[케이스 2] 플래싱 실패 뒤 재롤아웃: 다시 업로드, 그다음은 생략")
+    r2 = await wait_rollout(firmware_rollout.start("fw.bin", [101, 102], concurrency=2, expected_version=NEW_VERSION))
+    check("유닛 103 플래싱 실패 후 재업로드", len(UPLOADS) == 2 and not r2.upload_skipped)
+    check("롤아웃 완료", r2.state == ROLLOUT_COMPLETED)
+    r2 = await wait_rollout(firmware_rollout.start("fw.bin", [101], expected_version=NEW_VERSION))
+    check("같은 이미지는 업로드 생략", len(UPLOADS) == 2 and r2.upload_skipped)
+
+    print("\n[케이스 3] 기대 버전 불일치")
+    r3 = await wait_rollout(firmware_rollout.start("fw.bin", [101], expected_version=NEW_VERSION + 1))
+    check("버전 불일치로 실패", r3.units[101].state == UNIT_FAILED and "mismatch" in (r3.units[101].error or ""))
+
+    print("\n[케이스 4] 파일 없음")
+    r4 = await wait_rollout(firmware_rollout.start("missing.bin", [101]))
+    check("업로드 실패로 전체 실패", r4.state == ROLLOUT_FAILED and r4.units[101].state == UNIT_FAILED)
+
+    print("\n[케이스 5] ACK를 기다리는 GET_VERSION은 병합하지 않음")
+    # 롤아웃 버전 확인과 유닛 선택(set_selected_unit_id)의 GET_VERSION이 같은 탱크로 동시에 큐에 들어온 경우
+    idx = tcp_bridge.next_command_idx()
+    reply = tcp_bridge.expect_ack(idx)
+    packets = [CommandPacketGetVersion(cmd="GET_VERSION", unit_id="101", tank_id="101", idx=str(i), send=True)
+               for i in (idx, tcp_bridge.next_command_idx())]
+    coalesced = tcp_bridge.get_command_queue_metrics()["coalesced_total"]
+    sent = await asyncio.gather(*(tcp_bridge.send_command(p) for p in packets))
+    try:
+        replied = (await asyncio.wait_for(reply, timeout=1.0)).idx == str(idx)
+    except asyncio.TimeoutError:
+        replied = False
+    finally:
+        tcp_bridge.discard_ack(idx)
+    check("ACK 대기 IDX가 전송되어 응답 수신", all(sent) and replied)
+    check("병합 없음", tcp_bridge.get_command_queue_metrics()["coalesced_total"] == coalesced)
+
+    print("\n[케이스 6] 이미지 A → B → A, 업로드 실패")
+    uploads = len(UPLOADS)
+    rb = await wait_rollout(firmware_rollout.start("fw_b.bin", [101]))
+    ra = await wait_rollout(firmware_rollout.start("fw.bin", [101]))
+    check("B 다음의 A는 다시 업로드", len(UPLOADS) == uploads + 2
+          and not rb.upload_skipped and not ra.upload_skipped and ra.state == ROLLOUT_COMPLETED)
+    FAIL_UPLOADS.set()
+    rb = await wait_rollout(firmware_rollout.start("fw_b.bin", [101]))
+    FAIL_UPLOADS.clear()
+    ra = await wait_rollout(firmware_rollout.start("fw.bin", [101]))
+    check("B 업로드 실패 뒤의 A도 다시 업로드", rb.state == ROLLOUT_FAILED
+          and len(UPLOADS) == uploads + 3 and not ra.upload_skipped)
+
+    writer.close()
+    pi_task.cancel()
+    server.close()
+    await asyncio.sleep(0.1)
+    http.shutdown()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    asyncio.run(scenario(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,207 @@
+"""
+이력 차트 결과 캐시(history_cache) + ETag/Cache-Control 검증.
+
+  - 닫힌 구간 조회: 첫 요청 miss → 같은 바이트로 hit, hit가 DB 조회보다 빠른지
+  - 키 정규화 (시각 표기, sensor_ids 순서/중복)
+  - clear_tank는 해당 탱크와 전체 탱크 항목만, clear_all/cleanup_old_data는 모든 항목 무효화
+  - 다른 프로세스(DBService 인스턴스)의 삭제도 DB 세대로 감지
+  - 응답 바이트 기준 LRU 상한/축출
+  - 응답 헤더: 닫힌 구간 immutable, 열린 구간 no-cache, If-None-Match → 304
+  - ISO 표기 시각도 정규화한 값으로 조회, 조회 실패는 500이고 캐시에 남지 않음
+
+실행: python test_history_cache.py
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from litestar import Litestar, Router
+from litestar.testing import AsyncTestClient
+
+from app.controllers import history as history_module
+from app.controllers.history import HistoryController
+from app.services.db_service import DBService
+from app.services.history_cache import HistoryCache, history_cache, make_key
+from app.services.tcp_bridge import UNIT_TO_TANK_ID
+
+N_PACKETS = 2000
+BASE = datetime(2026, 6, 1, 0, 0, 0)
+ts = lambda sec: (BASE + timedelta(seconds=sec)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def fill_db(db_path, base=BASE, n=N_PACKETS):
+    with sqlite3.connect(db_path) as conn:
+        for i in range(n):
+            created = (base + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+            packet_id = conn.execute("INSERT INTO packets (order_num, created_at) VALUES (?, ?)",
+                                     (i, created)).lastrowid
+            conn.executemany(
+                "INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, ?, ?, ?)",
+                [(packet_id, str(tank), 1100 + s, t * 0.5 + s + i * 0.25)
+                 for t, tank in enumerate(UNIT_TO_TANK_ID) for s in range(4)])
+
+
+def cache_cases(check):
+    print("\n[케이스 1] 키 정규화 / LRU 바이트 상한")
+    check("시각 표기·센서 순서/중복 정규화",
+          make_key("2026-06-01T00:00", "2026-06-01 01:00:00", 601, [1101, 1100, 1101])
+          == make_key("2026-06-01 00:00:00", "2026-06-01T01:00:00", "601", [1100, 1101]))
+    cache = HistoryCache(max_bytes=4000)
+    for i in range(5):
+        cache.put(("a", "b", str(i), ()), b"x" * 900, generation=0)
+    stats = cache.get_stats()
+    check("바이트 상한 안에서 오래된 항목 축출", stats["bytes"] <= 4000 and stats["evictions"] == 1
+          and cache.get(("a", "b", "0", ()), 0) is None and cache.get(("a", "b", "4", ()), 0) is not None)
+    cache.get(("a", "b", "1", ()), 0)  # 최근 사용으로 갱신
+    cache.put(("a", "b", "5", ()), b"y" * 900, generation=0)
+    check("LRU: 최근 조회 항목은 남음", cache.get(("a", "b", "1", ()), 0) is not None
+          and cache.get(("a", "b", "2", ()), 0) is None)
+    cache.put(("a", "b", "big", ()), b"z" * 1500, generation=0)
+    check("상한의 1/4 초과 항목은 보관 안 함", cache.get_stats()["skipped_too_large"] == 1
+          and cache.get(("a", "b", "big", ()), 0) is None)
+    check("세대가 다르면 miss", cache.get(("a", "b", "1", ()), 1) is None and cache.get_stats()["stale"] == 1)
+
+
+async def endpoint_cases(check):
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "history.db")
+    db = DBService(db_path)
+    db.db_path = db_path  # sys.ini 설정과 무관하게 임시 DB 사용
+    await db.init_db()
+    fill_db(db_path)
+    history_module.db_service = db
+    history_cache.clear()
+
+    app = Litestar(route_handlers=[Router(path="/api", route_handlers=[HistoryController])])
+    async with AsyncTestClient(app) as client:
+        def chart(tank_id=None, sensors=(1100, 1101), start=ts(0), end=ts(N_PACKETS), headers=None):
+            params = {"start": start, "end": end}
+            if tank_id:
+                params["tank_id"] = tank_id
+            if sensors:
+                params["sensor_ids"] = list(sensors)
+            return client.get("/api/history/chart", params=params, headers=headers)
+
+        print("\n[케이스 2] 닫힌 구간 miss → hit")
+        started = time.perf_counter()
+        first = await chart("601")
+        t_miss = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        second = await chart("601")
+        t_hit = (time.perf_counter() - started) * 1000
+        expected = await db.get_history(ts(0), ts(N_PACKETS), "601", [1100, 1101])
+        print(f"  miss {t_miss:.1f} ms, hit {t_hit:.1f} ms ({t_miss / t_hit:.1f}x)")
+        check("응답 = get_history 결과", first.status_code == 200 and first.json() == expected
+              and len(expected) == N_PACKETS * 2)
+        check("hit 바이트 동일 + 같은 ETag", second.content == first.content
+              and second.headers["etag"] == first.headers["etag"]
+              and history_cache.get_stats()["hits"] == 1)
+        check("hit가 DB 조회보다 빠름", t_hit < t_miss)
+        check("Cache-Control: immutable", "immutable" in first.headers["cache-control"])
+
+        print("\n[케이스 3] If-None-Match → 304")
+        not_modified = await chart("601", headers={"If-None-Match": first.headers["etag"]})
+        check("304 + 빈 본문", not_modified.status_code == 304 and not_modified.content == b"")
+        changed = await chart("601", headers={"If-None-Match": '"other"'})
+        check("다른 ETag면 200", changed.status_code == 200 and changed.content == first.content)
+
+        print("\n[케이스 4] 열린 구간 (end가 현재 이후)")
+        now = datetime.now()
+        fill_db(db_path, base=now - timedelta(seconds=30), n=10)
+        start_open = (now - timedelta(seconds=30)).strftime("%Y-%m-%d %H:%M:%S")
+        end_open = (now + timedelta(seconds=60)).strftime("%Y-%m-%d %H:%M:%S")
+        entries = history_cache.get_stats()["entries"]
+        opened = await chart("601", start=start_open, end=end_open)
+        check("no-cache + ETag, 서버 캐시 안 함", opened.headers["cache-control"] == "no-cache"
+              and opened.headers.get("etag") and len(opened.json()) == 20
+              and history_cache.get_stats()["entries"] == entries)
+        revalidated = await chart("601", start=start_open, end=end_open,
+                                  headers={"If-None-Match": opened.headers["etag"]})
+        check("열린 구간도 변경 없으면 304", revalidated.status_code == 304)
+
+        print("\n[케이스 4-1] 시각 정규화 / 조회 실패")
+        iso = await chart("102", start=ts(0).replace(" ", "T"), end=ts(N_PACKETS).replace(" ", "T"))
+        check("ISO 표기 시각도 같은 결과", iso.status_code == 200 and len(iso.json()) == N_PACKETS * 2)
+        original_get_history = db.get_history
+
+        async def failing_get_history(*args, **kwargs):
+            raise sqlite3.OperationalError("database is locked")
+
+        db.get_history = failing_get_history
+        entries = history_cache.get_stats()["entries"]
+        try:
+            failed = await chart("103")
+        finally:
+            db.get_history = original_get_history
+        check("조회 실패 → 500, immutable 아님", failed.status_code == 500
+              and "immutable" not in failed.headers.get("cache-control", ""))
+        check("실패 결과는 캐시하지 않음", history_cache.get_stats()["entries"] == entries)
+        recovered = await chart("103")
+        check("다음 요청은 DB에서 다시 조회", recovered.status_code == 200 and len(recovered.json()) == N_PACKETS * 2)
+
+        print("\n[케이스 5] 무효화: clear_tank / clear_all / cleanup / 다른 프로세스")
+        await chart("101")
+        await chart(None)
+        before = history_cache.get_stats()
+        await db.clear_tank(601)
+        after_601 = await chart("601")
+        after_101 = await chart("101")
+        after_all = await chart(None)
+        stats = history_cache.get_stats()
+        check("clear_tank(601): 601 항목 무효화 (빈 결과)", after_601.json() == []
+              and after_601.headers["etag"] != first.headers["etag"])
+        check("clear_tank(601): 다른 탱크 항목은 유지", stats["hits"] == before["hits"] + 1
+              and len(after_101.json()) == N_PACKETS * 2)
+        check("clear_tank(601): 전체 탱크 항목도 무효화",
+              stats["stale"] == before["stale"] + 2
+              and len(after_all.json()) == (len(UNIT_TO_TANK_ID) - 1) * N_PACKETS * 2)
+        # 다른 프로세스(ingest)의 삭제 → 세대 테이블로 감지
+        other = DBService(db_path)
+        other.db_path = db_path
+        await other.clear_all()
+        fill_db(db_path, n=50)  # 초기화 후 재수집
+        check("다른 인스턴스 clear_all → 무효화", len((await chart("101")).json()) == 100)
+        other.retention_days = (datetime.now() - BASE).days - 1  # BASE 구간은 삭제 대상
+        other._load_sys_config = lambda: None
+        await other.cleanup_old_data()
+        check("다른 인스턴스 cleanup_old_data → 무효화", (await chart("101")).json() == [])
+        generation = await db.get_data_generation("101")
+        await other.cleanup_old_data()
+        check("삭제 없는 cleanup은 세대 유지", await db.get_data_generation("101") == generation)
+        await other.close()
+
+    await db.close()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    cache_cases(check)
+    asyncio.run(endpoint_cases(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
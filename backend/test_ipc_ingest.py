@@ -0,0 +1,294 @@
+"""
+수신(ingest) 프로세스 ↔ API 워커 IPC(app.services.ipc) 검증.
+
+  - SensorFrame IPC 형식(frame_to_wire/frame_from_wire) 왕복
+  - ingest 쪽 SENSOR/브로드캐스트가 API 워커의 WebSocket 연결(JSON/바이너리)로 그대로 중계되는지
+  - API 워커 RemoteBridge 명령 RPC (STATE, pydantic 명령 패킷, UNIT_SELECT, 허용 목록, 명령 IDX 블록 예약)
+  - RemoteJobPool: 한 워커가 시작한 작업을 다른 워커가 조회/취소, JOB_PROGRESS는 모든 워커로 중계
+  - api 워커 db_service의 삭제(clear_tank/clear_all)는 ingest 프로세스에서 실행
+  - 상태 스냅샷 getter, 느린 워커 이벤트 드롭(수신 경로 비차단), ingest 재시작 후 재연결
+  - SENSOR 이벤트 중계 처리량
+
+실행: python test_ipc_ingest.py
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+import msgspec
+
+from app.config import settings
+from app.models.packet import decode_sensor
+from app.models.protocol import CommandPacketGpio
+from app.services.firmware_rollout import FirmwareRolloutService
+from app.services.db_service import DBService, IngestWriteDBService
+from app.services.ipc import (IngestClient, IngestServer, RemoteBridge, RemoteCallError, RemoteJobPool,
+                              frame_from_wire, frame_to_wire, pack_message)
+from app.services.job_pool import JobPoolService, JOB_COMPLETED
+from app.services.tcp_bridge import TCPBridgeService, UNIT_TO_TANK_ID
+from app.services.websocket_service import ws_manager, WebSocketManager
+from app.services.ws_codec import FORMAT_BINARY, FORMAT_JSON, HEADER, SensorJsonEncoder
+
+
+def make_json(order):
+    values = [{"TANK_ID": str(tank), "SENSOR_ID": str(1100 + s), "VALUE": "%.2f" % (s + order * 0.01)}
+              for tank in UNIT_TO_TANK_ID for s in range(4)]
+    values[3]["VALUE"] = "ERR"  # NaN 1개
+    state = [{"TANK_ID": tank, "STAGE": 100, "STATUS": "Run"} for tank in UNIT_TO_TANK_ID]
+    error = [{"TANK_ID": str(UNIT_TO_TANK_ID[0]), "CODE": "2"}]
+    return json.dumps({"CMD": "SENSOR", "ORDER": str(order), "DATE": "2026-06-20", "TIME": "12:00:00",
+                       "VALUES": values, "STATE": state, "ERROR": error})
+
+
+class FakeSocket:
+    def __init__(self):
+        self.texts = []
+        self.binaries = []
+
+    async def send_text(self, text):
+        self.texts.append(text)
+
+    async def send_bytes(self, data):
+        self.binaries.append(data)
+
+
+class RecordingQueue:
+    """7001 송신 큐 대신 보낸 바이트를 기록한다."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def submit(self, data, priority=None, key=None, label=None, on_written=None):
+        self.sent.append((label, data))
+        return True
+
+    def get_metrics(self):
+        return {"depth": 0, "sent": len(self.sent)}
+
+
+async def wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.005)
+    return True
+
+
+def wire_cases(check):
+    print("\n[케이스 1] SensorFrame IPC 형식 왕복")
+    frame = decode_sensor(make_json(7))
+    restored = frame_from_wire(frame_to_wire(frame))
+    # 실제 전송처럼 MessagePack 왕복까지 포함
+    body = pack_message({"ev": "sensor", "data": frame_to_wire(frame)})[4:]
+    decoded = frame_from_wire(msgspec.msgpack.decode(body)["data"])
+    same = lambda a, b: (a.order == b.order and a.date == b.date and a.time == b.time and a.cmd == b.cmd
+                         and a.vector.tank_ids == b.vector.tank_ids and a.vector.sensor_ids == b.vector.sensor_ids
+                         and a.vector.values.tobytes() == b.vector.values.tobytes()
+                         and a.vector.parse_errors == b.vector.parse_errors
+                         and a.state == b.state and a.error == b.error)
+    check("frame_to_wire → frame_from_wire 동일 (NaN 포함)", same(frame, restored))
+    check("MessagePack 왕복 동일", same(frame, decoded))
+    json_encoder = SensorJsonEncoder()
+    check("SENSOR_UPDATE JSON 동일", json_encoder.encode(frame) == json_encoder.encode(decoded))
+
+
+async def ipc_cases(check):
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "ingest.sock")
+
+    # ingest 쪽: 실제 TCPBridgeService (7001 송신 큐만 기록용으로 교체)
+    bridge = TCPBridgeService()
+    bridge._sender_writer = object()
+    bridge._command_queue = RecordingQueue()
+    db_path = os.path.join(tmp, "jobs.db")
+    ingest_db = DBService(db_path)
+    await ingest_db.init_db()
+    pool = JobPoolService(workers=1, output_dir=os.path.join(tmp, "exports"), db_path=db_path)
+    targets = {"tcp_bridge": bridge, "firmware_rollout": FirmwareRolloutService(), "job_pool": pool,
+               "db_service": ingest_db}
+    server = IngestServer(path=path, status_interval_s=0.1, targets=targets)
+    await server.start()
+
+    # api 워커 쪽: 별도 WebSocketManager (같은 프로세스에서 릴레이가 되돌아 돌지 않도록)
+    worker_ws = WebSocketManager()
+    client = IngestClient(path=path, ws=worker_ws)
+    remote = RemoteBridge(UNIT_TO_TANK_ID, client=client)
+    json_sock, bin_sock = FakeSocket(), FakeSocket()
+    await worker_ws.add_connection(json_sock, FORMAT_JSON)
+    await worker_ws.add_connection(bin_sock, FORMAT_BINARY)
+    await remote.start()
+
+    print("\n[케이스 2] 연결 + 상태 스냅샷")
+    check("연결", await client.wait_connected(3.0))
+    await wait_for(lambda: client.snapshot)
+    status = remote.get_connection_status()
+    check("get_connection_status (ingest 연결 표시)", status["type"] == "SYSTEM_CONNECTION_STATUS"
+          and status["data"]["ingest"] is True and "link" in status["data"])
+    check("선택 유닛/녹화/큐 getter", remote.get_selected_unit_id() == 601
+          and remote.get_recording_status() is False and "sent" in remote.get_command_queue_metrics())
+
+    print("\n[케이스 3] SENSOR / 브로드캐스트 중계")
+    raw = make_json(42)
+    await bridge.process_message(raw)
+    await wait_for(lambda: json_sock.texts and bin_sock.binaries)
+    local_ws = WebSocketManager()
+    local_ws.set_sensor_layout(UNIT_TO_TANK_ID)
+    expected = decode_sensor(raw)
+    local_ws.sensor_encoder.update_layout(expected)
+    check("JSON SENSOR_UPDATE = 단일 프로세스 결과", json_sock.texts[-1] == local_ws.json_encoder.encode(expected))
+    got, want = bin_sock.binaries[-1], local_ws.sensor_encoder.encode_binary(expected)
+    # 헤더의 인코딩 시각(ts)만 다르다
+    strip_ts = lambda f: HEADER.unpack_from(f)[:5] + HEADER.unpack_from(f)[6:] + (bytes(f[HEADER.size:]),)
+    check("바이너리 프레임 = 단일 프로세스 결과", strip_ts(got) == strip_ts(want))
+    before = len(json_sock.texts)
+    await ws_manager.broadcast({"type": "LINK_ALERT", "data": {"degraded": True}})
+    await wait_for(lambda: len(json_sock.texts) > before)
+    check("브로드캐스트 중계", json.loads(json_sock.texts[-1]) == {"type": "LINK_ALERT", "data": {"degraded": True}})
+
+    print("\n[케이스 4] 명령 RPC")
+    sent = bridge._command_queue.sent
+    ok = await remote.send_state_command("Run", unit_id=101)
+    check("STATE → ingest tcp_bridge", ok is True and sent[-1][0] == "STATE" and bridge.get_tank_states()[101] == "Run")
+    packet = CommandPacketGpio(cmd="GPIO", unit_id="102", tank_id="102", idx=str(await remote.allocate_command_idx()),
+                               value=[True, False] * 4)
+    ok = await remote.send_command(packet)
+    check("pydantic 명령 패킷 직렬화 동일",
+          ok is True and sent[-1][1] == packet.model_dump_json(by_alias=True).encode("utf-8") + b"\n")
+    remote.set_selected_unit_id(103)
+    check("UNIT_SELECT 전달", await wait_for(lambda: bridge.get_selected_unit_id() == 103)
+          and remote.get_selected_unit_id() == 103)
+    try:
+        await client.call("tcp_bridge.stop")
+        rejected = False
+    except RemoteCallError:
+        rejected = True
+    check("허용 목록 밖 메서드 거부", rejected and bridge._sender_writer is not None)
+    check("롤아웃 목록 RPC", await client.call("firmware_rollout.list_rollouts") == [])
+
+    print("\n[케이스 4-1] 명령 IDX 블록 예약")
+    calls = client.rpc_calls
+    first = int(packet.idx)
+    more = [await remote.allocate_command_idx() for _ in range(5)]
+    check("블록 안에서는 RPC 없이 연속 발급", more == list(range(first + 1, first + 6)) and client.rpc_calls == calls)
+    check("ingest 카운터는 블록 뒤에서 이어짐", bridge.next_command_idx() >= first + settings.ipc_idx_block)
+    other = RemoteBridge(UNIT_TO_TANK_ID, client=client)  # 재시작한 워커 (같은 PID여도 무관)
+    before = bridge._command_idx
+    check("다른 워커는 겹치지 않는 새 블록", await other.allocate_command_idx() == before + 1
+          and bridge._command_idx == before + settings.ipc_idx_block)
+
+    print("\n[케이스 4-2] 작업 풀은 ingest 프로세스에 하나 (워커 간 공유)")
+    ws_b, sock_b = WebSocketManager(), FakeSocket()
+    await ws_b.add_connection(sock_b, FORMAT_JSON)
+    client_b = IngestClient(path=path, ws=ws_b)  # 다른 uvicorn 워커
+    await client_b.start()
+    await client_b.wait_connected(3.0)
+    jobs_a, jobs_b = RemoteJobPool(client), RemoteJobPool(client_b)
+    job = await jobs_a.run_job("export", {"start": "2026-06-01 00:00:00", "end": "2026-06-02 00:00:00"})
+    check("워커 A: 내보내기 완료 + 결과 경로", job["state"] == JOB_COMPLETED and os.path.exists(job["path"]))
+    seen = await jobs_b.get_job(job["job_id"])
+    check("워커 B: 같은 작업 조회", seen is not None and seen["state"] == JOB_COMPLETED
+          and job["job_id"] in [j["job_id"] for j in await jobs_b.list_jobs()])
+    check("워커 B: 결과 경로, 없는 작업 취소는 None", (await jobs_b.get_job(job["job_id"], with_path=True))["path"]
+          == job["path"] and await jobs_b.cancel_job("missing") is None
+          and await jobs_b.cancel_job(job["job_id"]) is False)
+
+    def progress_sent(sock):
+        return any(json.loads(t)["type"] == "JOB_PROGRESS" and json.loads(t)["data"]["job_id"] == job["job_id"]
+                   and json.loads(t)["data"]["state"] == JOB_COMPLETED for t in sock.texts)
+
+    check("JOB_PROGRESS가 두 워커 모두로", await wait_for(lambda: progress_sent(json_sock) and progress_sent(sock_b)))
+    await client_b.stop()
+
+    print("\n[케이스 4-3] api 워커의 DB 삭제는 ingest에서 실행")
+    worker_db = IngestWriteDBService(db_path, client=client)
+    calls = server.rpc_calls
+    generation = await ingest_db.get_data_generation("101")
+    cleared = await worker_db.clear_tank(101)
+    check("clear_tank RPC → ingest DB 세대 증가", cleared is True and server.rpc_calls == calls + 1
+          and await ingest_db.get_data_generation("101") == generation + 1)
+    check("clear_all RPC", await worker_db.clear_all() is True and server.rpc_calls == calls + 2)
+    await worker_db.close()
+
+    print("\n[케이스 5] 느린 워커 이벤트 드롭 (수신 경로 비차단)")
+    # 연결만 하고 읽지 않는 워커
+    slow_reader, slow_writer = await asyncio.open_unix_connection(path)
+    await wait_for(lambda: server.get_stats()["workers"] == 2)
+    frame = decode_sensor(make_json(1))
+    started = time.perf_counter()
+    for i in range(3000):
+        await ws_manager.broadcast_sensor(frame)
+        if i % 20 == 0:
+            await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    stats = server.get_stats()
+    print(f"  발행 3000건 {elapsed * 1000:.0f} ms, 드롭 {stats['events_dropped']}건")
+    check("느린 워커 큐 초과분 드롭", stats["events_dropped"] > 0)
+    check("발행이 막히지 않음 (< 2s)", elapsed < 2.0)
+    slow_writer.close()
+    await wait_for(lambda: server.get_stats()["workers"] == 1)
+
+    print("\n[케이스 6] SENSOR 중계 처리량")
+    await wait_for(lambda: False, timeout=0.3)  # 케이스 5 잔여 이벤트 처리
+    count = lambda: len(bin_sock.binaries)
+    start_count = count()
+    n = 1000
+    started = time.perf_counter()
+    for i in range(n):
+        await ws_manager.broadcast_sensor(frame)
+        if i % 10 == 0:
+            await asyncio.sleep(0)
+    await wait_for(lambda: count() - start_count >= n, timeout=10.0)
+    elapsed = time.perf_counter() - started
+    received = count() - start_count
+    print(f"  {received}/{n}건 {elapsed * 1000:.0f} ms → {received / elapsed:,.0f} frames/s")
+    check("중계 처리량 > 200 frames/s", received == n and received / elapsed > 200)
+
+    print("\n[케이스 7] ingest 재시작 후 재연결")
+    await server.stop()
+    check("끊김 감지", await wait_for(lambda: not client.connected))
+    check("끊긴 동안 명령은 False", await remote.send_state_command("Stop", unit_id=101) is False)
+    check("끊긴 동안 연결 상태 false + 대시보드 통지",
+          remote.get_connection_status()["data"]["connected"] is False
+          and await wait_for(lambda: any('"ingest": false' in t for t in json_sock.texts)))
+    server = IngestServer(path=path, targets=targets)
+    await server.start()
+    check("재연결", await client.wait_connected(8.0) and await remote.send_state_command("Pause", unit_id=101))
+
+    await remote.stop()
+    await server.stop()
+    await pool.shutdown()
+    await ingest_db.close()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    wire_cases(check)
+    asyncio.run(ipc_cases(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
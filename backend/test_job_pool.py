@@ -0,0 +1,237 @@
+"""
+작업 풀(job_pool) 검증 및 내보내기 중 수신 지연 측정.
+
+  - 워커 프로세스 export 결과가 기존 이벤트 루프 pandas 내보내기와 같은지
+  - 진행률(done/total), downsample/pivot 결과, 실행 중 취소
+  - /history/export 응답: 실패 500, 취소 409, 0행은 "No data", 그 외 CSV 파일
+  - 대용량 내보내기와 동시에 SENSOR 수신(process_message + DB 저장)을 돌려
+    기존 방식(루프에서 pandas to_csv)과 작업 풀 방식의 수신 지연(p50/p99/max)을 비교
+
+실행: python test_job_pool.py
+"""
+import asyncio
+import io
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+import pandas as pd
+from litestar.exceptions import HTTPException
+
+from app.controllers import history as history_module
+from app.controllers.history import HistoryController
+from app.services.db_service import DBService
+from app.services import tcp_bridge as bridge_module
+from app.services.job_pool import Job, JobPoolService, JOB_CANCELLED, JOB_COMPLETED, JOB_FAILED
+from app.services.tcp_bridge import TCPBridgeService, UNIT_TO_TANK_ID
+
+N_PACKETS = 2000  # 2000 패킷 × 128 readings = 256,000행
+BASE = datetime(2026, 6, 1, 0, 0, 0)
+START = BASE.strftime("%Y-%m-%d %H:%M:%S")
+END = (BASE + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def fill_db(db_path):
+    with sqlite3.connect(db_path) as conn:
+        for i in range(N_PACKETS):
+            created = (BASE + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+            packet_id = conn.execute("INSERT INTO packets (order_num, created_at) VALUES (?, ?)",
+                                     (i, created)).lastrowid
+            conn.executemany(
+                "INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, ?, ?, ?)",
+                [(packet_id, str(tank), 1100 + s, None if (i + s) % 97 == 0 else t * 0.5 + s + i * 0.25)
+                 for t, tank in enumerate(UNIT_TO_TANK_ID) for s in range(4)])
+            conn.executemany("INSERT INTO states (packet_id, tank_id, stage, status) VALUES (?, ?, ?, ?)",
+                             [(packet_id, str(tank), 100, "Run") for tank in UNIT_TO_TANK_ID])
+
+
+def make_json(order):
+    values = [{"TANK_ID": str(tank), "SENSOR_ID": str(1100 + s), "VALUE": "%.2f" % (s + order * 0.01)}
+              for tank in UNIT_TO_TANK_ID for s in range(4)]
+    state = [{"TANK_ID": tank, "STAGE": 100, "STATUS": "Run"} for tank in UNIT_TO_TANK_ID]
+    return json.dumps({"CMD": "SENSOR", "ORDER": str(order), "DATE": "2026-06-20", "TIME": "12:00:00",
+                       "VALUES": values, "STATE": state, "ERROR": []})
+
+
+async def legacy_export(db, start, end):
+    """기존 /history/export: 이벤트 루프에서 dict 변환 + pandas to_csv"""
+    data = await db.get_export_data(start, end)
+    df = pd.DataFrame(data)
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False)
+    return buf.getvalue()
+
+
+# 측정 구간이 바뀌어도 ORDER는 이어서 증가 (같은 ORDER를 다시 보내면 중복으로 버려진다)
+_orders = itertools.count(10_000)
+
+
+async def measure_ingest(bridge, export_coro, period=0.01):
+    """export_coro가 도는 동안 period마다 SENSOR 1건을 처리하고 (예정 시각 → 처리 완료) 지연을 모은다."""
+    latencies = []
+    export_task = asyncio.create_task(export_coro)
+    loop = asyncio.get_running_loop()
+    next_at = loop.time()
+    while not export_task.done():
+        next_at += period
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+        await bridge.process_message(make_json(next(_orders)))
+        latencies.append((loop.time() - next_at) * 1000.0)
+        if loop.time() > next_at + 1.0:
+            next_at = loop.time()  # 크게 밀리면 예정 시각 재설정 (밀린 만큼만 기록)
+    await export_task
+    latencies.sort()
+    pick = lambda p: latencies[min(len(latencies) - 1, int(p * (len(latencies) - 1)))]
+    return {"n": len(latencies), "p50": pick(0.5), "p99": pick(0.99), "max": latencies[-1]}
+
+
+async def scenario(check):
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "jobs.db")
+    db = DBService(db_path)
+    db.db_path = db_path  # sys.ini 설정과 무관하게 임시 DB 사용
+    await db.init_db()
+    fill_db(db_path)
+    pool = JobPoolService(workers=2, output_dir=os.path.join(tmp, "exports"), db_path=db_path)
+
+    print("\n[케이스 1] export 결과 = 기존 pandas 내보내기")
+    small_end = (BASE + timedelta(seconds=49)).strftime("%Y-%m-%d %H:%M:%S")
+    job = await pool.wait(pool.start("export", {"start": START, "end": small_end}))
+    with open(job.path, encoding="utf-8") as f:
+        pooled = f.read()
+    legacy = (await legacy_export(db, START, small_end)).decode("utf-8")
+    check("완료", job.state == JOB_COMPLETED and job.rows == 50 * 128)
+    check("CSV 내용 동일", pooled.splitlines() == legacy.splitlines())
+    check("진행률 done == total", job.done == job.total == job.rows and job.to_dict()["progress_pct"] == 100.0)
+
+    print("\n[케이스 2] downsample / pivot")
+    job = await pool.wait(pool.start("downsample", {"start": START, "end": END, "bucket_s": 60, "tank_id": "601"}))
+    with open(job.path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    # 2000초 = 34개 1분 버킷 × 센서 4개
+    check("downsample 버킷 수", job.state == JOB_COMPLETED and job.rows == 34 * 4 and len(lines) == job.rows + 1)
+    check("downsample 평균", lines[1].split(",")[:3] == ["2026-06-01 00:00:00", "601", "1100"])
+    job = await pool.wait(pool.start("pivot", {"start": START, "end": END, "sensor_ids": [1100, 1101]}))
+    header = open(job.path, encoding="utf-8").readline().strip().split(",")
+    check("pivot 행/열", job.state == JOB_COMPLETED and job.rows == N_PACKETS
+          and len(header) == 1 + len(UNIT_TO_TANK_ID) * 2)
+
+    print("\n[케이스 3] 실행 중 취소")
+    pool_small = JobPoolService(workers=1, output_dir=os.path.join(tmp, "exports"), db_path=db_path)
+    job = pool_small.start("export", {"start": START, "end": END})
+    while job.done == 0 and not job.finished:
+        await asyncio.sleep(0.01)
+    check("취소 요청", pool_small.cancel(job.id))
+    await pool_small.wait(job)
+    await asyncio.sleep(0.5)  # 워커가 취소 플래그를 확인하고 .part 파일 정리
+    leftovers = [f for f in os.listdir(os.path.join(tmp, "exports")) if f.endswith(".part")]
+    check("취소 상태 + 결과 파일 없음", job.state == JOB_CANCELLED and not os.path.exists(job.path) and not leftovers)
+    follow = await pool_small.wait(pool_small.start("downsample", {"start": START, "end": END, "bucket_s": 3600}))
+    check("취소 후 워커 재사용", follow.state == JOB_COMPLETED)
+    await pool_small.shutdown()
+
+    print("\n[케이스 3-1] /history/export 응답 상태")
+    original_pool = history_module.job_pool
+    controller = HistoryController.__new__(HistoryController)  # 라우터 없이 핸들러만 호출
+    export_csv = HistoryController.export_csv.fn
+
+    class FinishedPool:
+        """start 즉시 state로 끝나는 작업을 돌려주는 job_pool 대역"""
+
+        def __init__(self, state):
+            self.state = state
+
+        async def run_job(self, kind, params):
+            job = Job(0, kind, params, tmp)
+            job.state, job.error = self.state, "boom" if self.state == JOB_FAILED else None
+            return job.to_dict(with_path=True)
+
+    async def export_status(start, end):
+        try:
+            response = await export_csv(controller, start=start, end=end)
+        except HTTPException as e:
+            return e.status_code, e.detail
+        return 200, response.file_path
+
+    try:
+        history_module.job_pool = FinishedPool(JOB_FAILED)
+        status, detail = await export_status(START, END)
+        check("실패 작업 → 500", status == 500 and "boom" in detail)
+        history_module.job_pool = FinishedPool(JOB_CANCELLED)
+        check("취소 작업 → 409", (await export_status(START, END))[0] == 409)
+        history_module.job_pool = pool
+        status, body = await export_status("2000-01-01 00:00:00", "2000-01-02 00:00:00")
+        check("완료 + 0행 → 200 No data", status == 200 and body.read() == b"No data")
+        status, path = await export_status(START, small_end)
+        check("완료 → CSV 파일", status == 200 and os.path.exists(path))
+    finally:
+        history_module.job_pool = original_pool
+
+    print(f"\n[케이스 4] 대용량 내보내기({N_PACKETS * 128:,}행) 중 SENSOR 수신 지연 (10ms 주기)")
+    bridge_module.db_service = db
+    bridge = TCPBridgeService()
+    bridge.is_recording = True
+    with sqlite3.connect(db_path) as conn:
+        before = conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0]
+
+    idle = await measure_ingest(bridge, asyncio.sleep(1.0))
+    started = time.perf_counter()
+    legacy = await measure_ingest(bridge, legacy_export(db, START, END))
+    t_legacy = time.perf_counter() - started
+    started = time.perf_counter()
+    pooled = await measure_ingest(bridge, pool.wait(pool.start("export", {"start": START, "end": END})))
+    t_pool = time.perf_counter() - started
+    # 수신 경로는 저장을 create_task로 넘기므로 밀린 저장이 끝날 때까지 기다린다
+    expected = idle["n"] + legacy["n"] + pooled["n"]
+    deadline = time.monotonic() + 15.0
+    while time.monotonic() < deadline:
+        with sqlite3.connect(db_path) as conn:
+            saved = conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0] - before
+        if saved >= expected:
+            break
+        await asyncio.sleep(0.2)
+
+    print(f"  {'':<22}{'패킷':>6}{'p50(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}{'내보내기(s)':>13}")
+    for name, r, t in (("유휴", idle, None), ("기존: 루프 pandas", legacy, t_legacy), ("작업 풀", pooled, t_pool)):
+        print(f"  {name:<22}{r['n']:>6}{r['p50']:>10.1f}{r['p99']:>10.1f}{r['max']:>10.1f}"
+              f"{(f'{t:.2f}' if t else '-'):>13}")
+    check("작업 풀: 수신 p99 < 50ms", pooled["p99"] < 50)
+    check("작업 풀 최대 지연이 기존보다 작음", pooled["max"] < legacy["max"])
+    check("내보내기 중 수신 패킷 모두 저장 (WAL)", saved == expected)
+
+    await pool.shutdown()
+    await db.close()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    asyncio.run(scenario(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,244 @@
+"""
+PING/PONG 링크 품질 모니터(link_monitor) 검증. 시각은 모두 가짜 타임스탬프로 넣는다.
+
+  - record_sent / PONG 매칭으로 RTT, 지터, 늦게 온 PONG
+  - expire()의 손실 집계 (timeout_s 경계 포함)
+  - update_degraded()의 degraded 진입/복구, 표본 부족/PONG 미지원 시 판단 보류
+  - 브리지: 7001로 받은 PONG이 link_monitor에 기록되고 degraded 전환 시 LINK_ALERT 브로드캐스트
+  - PING 전송 시각은 송신 큐가 실제로 쓴 시각 (앞 명령의 느린 drain 대기가 RTT에 섞이지 않음),
+    병합으로 대체되어 보내지 않은 PING은 손실로 세지 않음
+
+실행: python test_link_monitor.py
+"""
+import asyncio
+import json
+import logging
+import sys
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from app.config import settings
+from app.services import tcp_bridge as bridge_module
+from app.services.command_queue import PRIORITY_PING, CommandQueue
+from app.services.link_monitor import LinkMonitor
+from app.services.tcp_bridge import TCPBridgeService
+
+# degraded 전환 경고는 이 테스트에서 의도된 것
+logging.getLogger("app.services.link_monitor").setLevel(logging.ERROR)
+
+
+def new_monitor():
+    return LinkMonitor(window=10, timeout_s=3.0, rtt_degraded_ms=500.0, loss_degraded_pct=20.0)
+
+
+def ping(monitor, idx, sent_at, rtt_ms=None):
+    """sent_at에 PING을 보내고, rtt_ms가 있으면 그만큼 뒤에 PONG을 받는다."""
+    monitor.record_sent(idx, now=sent_at)
+    if rtt_ms is not None:
+        return monitor.record_reply(str(idx), now=sent_at + rtt_ms / 1000.0)
+    return None
+
+
+def monitor_cases(check):
+    print("\n[케이스 1] RTT / 지터")
+    monitor = new_monitor()
+    rtts = [ping(monitor, i, 100.0 + i, rtt) for i, rtt in enumerate((10.0, 30.0, 20.0))]
+    stats = monitor.get_stats()
+    print(f"  RTT {[round(r, 3) for r in rtts]}, 통계 {stats}")
+    check("IDX로 짝지은 RTT", [round(r, 3) for r in rtts] == [10.0, 30.0, 20.0])
+    check("평균/최소/최대/마지막", (stats["rtt_avg_ms"], stats["rtt_min_ms"], stats["rtt_max_ms"], stats["rtt_last_ms"])
+          == (20.0, 10.0, 30.0, 20.0))
+    check("지터 = 연속 RTT 차이 평균", stats["jitter_ms"] == 15.0)
+    check("대기 PING 없음, 손실 0%", stats["pending"] == 0 and stats["loss_pct"] == 0.0)
+    check("모르는 IDX의 PONG은 늦은 응답", monitor.record_reply("999", now=110.0) is None and monitor.late_total == 1)
+
+    print("\n[케이스 2] expire() 손실 집계")
+    monitor = new_monitor()
+    monitor.record_sent(1, now=0.0)
+    monitor.record_sent(2, now=1.0)
+    monitor.expire(now=2.9)
+    check("timeout_s 전에는 대기", monitor.get_stats()["pending"] == 2 and monitor.lost_total == 0)
+    monitor.expire(now=3.0)
+    check("timeout_s가 지난 PING만 손실", monitor.get_stats()["pending"] == 1 and monitor.lost_total == 1)
+    monitor.record_sent(3, now=4.5)  # 전송 시에도 만료 처리
+    check("record_sent가 만료 PING을 손실 처리", monitor.lost_total == 2 and monitor.get_stats()["pending"] == 1)
+    check("손실 뒤 도착한 PONG은 늦은 응답", monitor.record_reply("1", now=5.0) is None and monitor.late_total == 1)
+    monitor.record_reply("3", now=4.6)
+    stats = monitor.get_stats()
+    print(f"  표본 {stats['samples']}, 손실 {stats['loss_pct']}%")
+    check("손실률 = 손실 / 윈도우 표본", stats["samples"] == 3 and stats["loss_pct"] == round(2 * 100 / 3, 2))
+
+    print("\n[케이스 3] degraded 진입/복구")
+    monitor = new_monitor()
+    monitor.record_sent(0, now=0.0)
+    monitor.expire(now=10.0)
+    check("PONG을 한 번도 못 받으면 판단 보류", monitor.update_degraded() is None and not monitor.degraded)
+    t = 10.0
+    for i in range(1, 4):
+        ping(monitor, i, t, 10.0)
+        t += 1.0
+    check("표본 5개 미만이면 판단 보류", monitor.update_degraded() is None)
+    for i in range(4, 6):
+        ping(monitor, i, t, 10.0)
+        t += 1.0
+    check("정상 링크는 바뀜 없음", monitor.update_degraded() is None and not monitor.degraded)
+
+    # 손실 4/9 (처음 PING 0 포함) = 44.4% ≥ 20%
+    for i in range(6, 9):
+        monitor.record_sent(i, now=t)
+        t += 1.0
+    monitor.expire(now=t + 3.0)
+    t += 3.0
+    check("손실률 초과 → degraded 진입", monitor.update_degraded() is True and monitor.degraded)
+    check("같은 상태면 다시 알리지 않음", monitor.update_degraded() is None)
+
+    # 윈도우(10)를 정상 응답으로 채우면 손실이 밀려나 복구
+    for i in range(9, 19):
+        ping(monitor, i, t, 10.0)
+        t += 1.0
+    check("손실이 윈도우에서 빠지면 복구", monitor.update_degraded() is False and not monitor.degraded)
+
+    for i in range(19, 29):
+        ping(monitor, i, t, 800.0)
+        t += 1.0
+    check("평균 RTT 초과 → degraded 진입", monitor.update_degraded() is True
+          and monitor.get_stats()["rtt_avg_ms"] == 800.0)
+    monitor.reset()
+    check("reset: 윈도우/degraded 초기화, 누적 카운터 유지", not monitor.degraded
+          and monitor.get_stats()["samples"] == 0 and monitor.sent_total == 29)
+
+
+async def bridge_cases(check):
+    print("\n[케이스 4] 브리지 PONG 처리")
+    bridge = TCPBridgeService()
+    bridge.link_monitor = LinkMonitor(window=10, timeout_s=3.0, rtt_degraded_ms=1.0, loss_degraded_pct=20.0)
+    messages = []
+
+    async def record_message(message):
+        messages.append(message)
+
+    original_broadcast = bridge_module.ws_manager.broadcast
+    bridge_module.ws_manager.broadcast = record_message
+    try:
+        for i in range(5):
+            bridge.link_monitor.record_sent(str(i))
+            await asyncio.sleep(0.005)
+            await bridge.process_message(json.dumps({"CMD": "PONG", "IDX": str(i), "NOTE": "OK"}))
+    finally:
+        bridge_module.ws_manager.broadcast = original_broadcast
+    alerts = [m for m in messages if m["type"] == "LINK_ALERT"]
+    stats = bridge.link_monitor.get_stats()
+    print(f"  PONG 5건, RTT 평균 {stats['rtt_avg_ms']}ms, LINK_ALERT {len(alerts)}건")
+    check("PONG이 RTT로 기록", stats["received_total"] == 5 and stats["rtt_min_ms"] >= 5.0)
+    check("degraded 전환 시 LINK_ALERT 1건", len(alerts) == 1 and alerts[0]["data"]["degraded"] is True)
+    check("연결 상태에 링크 통계 포함", bridge.get_connection_status()["data"]["link"]["degraded"] is True)
+
+
+async def queue_cases(check):
+    print("\n[케이스 5] 큐 대기 제외 RTT / 대체된 PING")
+    monitor = LinkMonitor(window=10, timeout_s=0.05, rtt_degraded_ms=500.0, loss_degraded_pct=20.0)
+    queue = CommandQueue()
+    futures = [
+        queue.submit(b"ping-%d\n" % i, PRIORITY_PING, key="PING", label="PING",
+                     on_written=lambda now, idx=str(i): monitor.record_sent(idx, now))
+        for i in (1, 2)
+    ]
+
+    class Writer:
+        def write(self, data):
+            pass
+
+        async def drain(self):
+            pass
+
+    task = asyncio.create_task(queue.run(Writer()))
+    await asyncio.gather(*futures)
+    task.cancel()
+    check("쓴 PING만 전송 기록", monitor.sent_total == 1 and monitor.get_stats()["pending"] == 1)
+    monitor.record_reply("2")
+    await asyncio.sleep(0.06)
+    monitor.expire()
+    check("대체된 PING은 손실 아님", monitor.lost_total == 0 and monitor.late_total == 0)
+
+    # 실제 7001 연결: 큰 명령의 drain이 1초 걸리는 동안 PING이 큐에서 기다린다
+    settings.ping_interval_s = 0.5
+    bridge = TCPBridgeService()
+    original_broadcast = bridge_module.ws_manager.broadcast
+
+    async def ignore(message):
+        pass
+
+    bridge_module.ws_manager.broadcast = ignore
+    server = await asyncio.start_server(bridge.handle_sender_connection, "127.0.0.1", 0)
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+
+    async def fake_pi():
+        # PING에 바로 PONG
+        while line := await reader.readline():
+            cmd = json.loads(line)
+            if cmd.get("CMD") == "PING":
+                writer.write(json.dumps({"CMD": "PONG", "IDX": cmd["IDX"], "NOTE": "OK"}).encode() + b"\n")
+                await writer.drain()
+
+    pi_task = asyncio.create_task(fake_pi())
+    try:
+        for _ in range(100):
+            if bridge.link_monitor.received_total:
+                break
+            await asyncio.sleep(0.01)
+        sender = bridge._sender_writer
+        fast_drain = sender.drain
+
+        async def slow_drain():
+            sender.drain = fast_drain
+            await asyncio.sleep(1.0)
+            await fast_drain()
+
+        sender.drain = slow_drain
+        first_reply = bridge.link_monitor.last_reply_at
+        await bridge.send_raw_json({"CMD": "REF", "DATA": "x" * 1000})
+        for _ in range(100):
+            if bridge.link_monitor.received_total >= 2:
+                break
+            await asyncio.sleep(0.01)
+        stats = bridge.link_monitor.get_stats()
+        # 두 번째 PING은 0.5초 뒤 큐에 들어가 drain이 끝날 때(약 1초 뒤)까지 기다렸다
+        gap_ms = (bridge.link_monitor.last_reply_at - first_reply) * 1000
+        print(f"  PONG 간격 {gap_ms:.0f} ms (PING 간격 500 ms), 측정 RTT {stats['rtt_last_ms']} ms")
+        check("RTT에 큐 대기 제외", stats["received_total"] == 2 and gap_ms > 900 and stats["rtt_last_ms"] < 200)
+        check("손실 없음", stats["lost_total"] == 0)
+    finally:
+        pi_task.cancel()
+        writer.close()
+        server.close()
+        bridge_module.ws_manager.broadcast = original_broadcast
+        await bridge.stop()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    monitor_cases(check)
+    asyncio.run(bridge_cases(check))
+    asyncio.run(queue_cases(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,116 @@
+"""
+이벤트 루프 지연 모니터 / 샘플링 프로파일러 검증.
+
+  - 유휴 상태 지연 샘플 수집과 유휴 CPU 부하
+  - 루프를 막는 동기 작업(CSV 생성 흉내) 발생 시 지연 히스토그램 반영 + 막은 함수의 스택 캡처
+  - 프로파일러 start/stop → folded stack 파일 (flamegraph.pl / speedscope 입력)
+  - /api/system/loop, /api/system/profiler 엔드포인트
+
+실행: python test_loop_monitor.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from litestar import Litestar, Router
+from litestar.testing import TestClient
+
+from app.controllers.system import SystemController
+from app.services.loop_monitor import LoopMonitor, SamplingProfiler
+
+
+def blocking_export(seconds):
+    """이벤트 루프에서 동기로 도는 무거운 작업"""
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(1000))
+    return total
+
+
+async def monitor_cases(check):
+    monitor = LoopMonitor(interval_s=0.05, slow_threshold_ms=100, max_events=5)
+    await monitor.start()
+
+    print("\n[케이스 1] 유휴 상태")
+    cpu_before = time.process_time()
+    await asyncio.sleep(1.0)
+    cpu_idle = time.process_time() - cpu_before
+    stats = monitor.get_stats()
+    check("지연 샘플 수집", stats["samples"] >= 15)
+    check("유휴 시 느린 구간 없음", stats["slow_total"] == 0)
+    print(f"  유휴 1초 CPU 시간: {cpu_idle * 1000:.1f} ms (p99 지연 {stats['lag_p99_ms']} ms)")
+
+    print("\n[케이스 2] 루프 차단 감지")
+    blocking_export(0.4)
+    await asyncio.sleep(0.15)
+    stats = monitor.get_stats()
+    events = monitor.get_slow_events()
+    check("최대 지연 반영", stats["lag_max_ms"] >= 300)
+    check("히스토그램 >200ms 버킷", stats["histogram"]["<=500ms"] >= 1)
+    check("느린 구간 1건 + 해소", len(events) == 1 and events[0]["resolved"] and events[0]["lag_ms"] >= 300)
+    check("막은 함수 스택 캡처", any("blocking_export" in line for line in events[0]["stack"]))
+
+    print("\n[케이스 3] 프로파일러 folded stack")
+    profiler = SamplingProfiler(output_dir=tempfile.mkdtemp(), max_duration_s=5)
+    check("시작", profiler.start(threading.get_ident(), rate_hz=200))
+    check("중복 시작 거부", not profiler.start(threading.get_ident()))
+    blocking_export(0.3)
+    await asyncio.sleep(0.05)
+    result = profiler.stop()
+    with open(result["path"], encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    parsed = [line.rsplit(" ", 1) for line in lines]
+    check("folded 형식 (스택;... 횟수)", all(len(p) == 2 and p[1].isdigit() for p in parsed)
+          and sum(int(p[1]) for p in parsed) == result["samples"])
+    hot = sum(int(c) for stack, c in parsed if "blocking_export" in stack)
+    check("핫스팟 포함", hot >= result["samples"] * 0.5)
+    print(f"  샘플 {result['samples']}개, 고유 스택 {result['unique_stacks']}개 → {os.path.basename(result['path'])}")
+
+    await monitor.stop()
+    check("모니터 종료", not monitor.running)
+
+
+def endpoint_cases(check):
+    print("\n[케이스 4] /api/system 엔드포인트")
+    app = Litestar(route_handlers=[Router(path="/api", route_handlers=[SystemController])])
+    with TestClient(app) as client:
+        check("GET /system/loop", "histogram" in client.get("/api/system/loop").json())
+        started = client.post("/api/system/profiler/start", json={"rate_hz": 50, "duration_s": 2}).json()
+        check("POST /system/profiler/start", started["success"] and started["running"])
+        stopped = client.post("/api/system/profiler/stop").json()
+        check("POST /system/profiler/stop", stopped["success"] and os.path.exists(stopped["result"]["path"]))
+        os.remove(stopped["result"]["path"])
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    asyncio.run(monitor_cases(check))
+    endpoint_cases(check)
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,160 @@
+"""
+SENSOR 패킷 내부 표현(SensorFrame, msgspec) 검증 및 벤치마크.
+
+  - decode_sensor 결과가 기존 pydantic SensorPacket과 같은 내용인지 (to_packet 비교)
+  - 문자열 숫자/형식 오류 VALUE/ERROR 생략 처리, 필수 필드 누락 시 ValidationError
+  - process_message가 SENSOR를 SensorFrame으로 넘기는지
+를 확인하고, 패킷 1건당 할당(tracemalloc 블록/바이트)과 처리 시간(µs)을 비교한다.
+
+실행: python test_packet_frame.py
+"""
+import asyncio
+import gc
+import json
+import math
+import sys
+import time
+import tracemalloc
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+import msgspec
+
+from app.models.packet import SensorFrame, decode_sensor
+from app.models.protocol import SensorPacket
+from app.services.tcp_bridge import TCPBridgeService, UNIT_TO_TANK_ID
+
+
+def make_json(order, bad=(), with_error=True):
+    values, state, error = [], [], []
+    for index, tank in enumerate(UNIT_TO_TANK_ID):
+        for i in range(4):
+            values.append({"TANK_ID": str(tank), "SENSOR_ID": str(1100 + i), "VALUE": "%.2f" % (index + i * 0.25)})
+        state.append({"TANK_ID": tank, "STAGE": 100 + index, "STATUS": "Run"})
+        error.append({"TANK_ID": str(tank), "CODE": str(index % 3)})
+    for pos, text in bad:
+        values[pos]["VALUE"] = text
+    packet = {"CMD": "SENSOR", "ORDER": str(order), "DATE": "2026-06-20", "TIME": "12:00:00",
+              "VALUES": values, "STATE": state}
+    if with_error:
+        packet["ERROR"] = error
+    return json.dumps(packet)
+
+
+def dumped(packet):
+    """NaN 비교를 위해 VALUE NaN을 None으로 바꾼 model_dump"""
+    d = packet.model_dump(by_alias=True)
+    for v in d["VALUES"]:
+        if math.isnan(v["VALUE"]):
+            v["VALUE"] = None
+    return d
+
+
+def measure(fn, raw, n):
+    """패킷 1건당 (µs, 할당 블록 수, 할당 바이트). 두 경로 모두 같은 방식으로 측정한다."""
+    for _ in range(50):
+        fn(raw)
+    gc.collect()
+    started = time.perf_counter()
+    for _ in range(n):
+        fn(raw)
+    elapsed = (time.perf_counter() - started) / n * 1e6
+
+    # 패킷 1건이 살아 있는 동안 점유하는 메모리 (생성 직후 스냅샷 차이)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    keep = fn(raw)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(s.count_diff for s in stats)
+    size = sum(s.size_diff for s in stats)
+    del keep
+    return elapsed, blocks, size
+
+
+async def bridge_case(check):
+    received = []
+    bridge = TCPBridgeService()
+
+    async def sink(packet):
+        received.append(packet)
+
+    bridge.handle_sensor_packet = sink
+    await bridge.process_message(make_json(5))
+    await bridge.process_message('{"CMD": "SENSOR", "ORDER": "6"}')  # 필수 필드 누락 → 로그만
+    await bridge.process_message('{"CMD": "SENSOR", "ORDER": ')       # 잘못된 JSON → 로그만
+    check("process_message → SensorFrame", len(received) == 1 and isinstance(received[0], SensorFrame)
+          and received[0].order == 5)
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    print("\n[케이스 1] pydantic SensorPacket과 내용 동일")
+    raw = make_json(1)
+    frame = decode_sensor(raw)
+    check("정상 패킷", dumped(frame.to_packet()) == dumped(SensorPacket(**json.loads(raw))))
+    raw = make_json(2, bad=[(3, "ERR"), (7, None), (8, "")])
+    frame = decode_sensor(raw)
+    check("형식 오류 VALUE", dumped(frame.to_packet()) == dumped(SensorPacket(**json.loads(raw))))
+    check("형식 오류 집계", frame.vector.parse_errors == 3 and math.isnan(frame.vector.values[3]))
+    frame = decode_sensor(make_json(3, with_error=False))
+    check("ERROR 생략 시 빈 목록", frame.error == [] and len(frame.state) == len(UNIT_TO_TANK_ID))
+    check("문자열 숫자 변환", frame.order == 3 and frame.vector.tank_ids[0] == 601
+          and frame.vector.sensor_ids[1] == 1101)
+    check("from_packet 왕복", dumped(SensorFrame.from_packet(frame.to_packet()).to_packet())
+          == dumped(frame.to_packet()))
+
+    try:
+        decode_sensor('{"CMD": "SENSOR", "ORDER": "4"}')
+        missing = False
+    except msgspec.ValidationError:
+        missing = True
+    check("필수 필드 누락 → ValidationError", missing)
+
+    print("\n[케이스 2] process_message 경로")
+    asyncio.run(bridge_case(check))
+
+    print("\n[벤치마크] SENSOR 패킷 1건 (32탱크 × 4센서) 파싱")
+    n = 2000
+    paths = {
+        "pydantic SensorPacket": lambda text: SensorPacket(**json.loads(text)),
+        "msgspec SensorFrame": decode_sensor,
+    }
+    rows = {}
+    for label, raw in (("정상", make_json(7)), ("형식 오류 1건", make_json(8, bad=[(0, "ERR")]))):
+        for name, fn in paths.items():
+            rows[(label, name)] = measure(fn, raw, n)
+    print(f"  {'입력':<14}{'경로':<24}{'µs/패킷':>9}{'할당 블록':>10}{'바이트':>9}")
+    for (label, name), (us, blocks, size) in rows.items():
+        print(f"  {label:<14}{name:<24}{us:>9.1f}{blocks:>10}{size:>9}")
+    for label in ("정상", "형식 오류 1건"):
+        base = rows[(label, "pydantic SensorPacket")]
+        new = rows[(label, "msgspec SensorFrame")]
+        print(f"  {label}: 시간 x{base[0] / new[0]:.1f}, 블록 x{base[1] / max(new[1], 1):.1f}, 바이트 x{base[2] / max(new[2], 1):.1f}")
+    base = rows[("정상", "pydantic SensorPacket")]
+    new = rows[("정상", "msgspec SensorFrame")]
+    check("할당 블록 감소", new[1] < base[1])
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
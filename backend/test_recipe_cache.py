@@ -0,0 +1,163 @@
+"""
+레시피 캐시(recipe_cache) 오프라인 검증 + 32개 탱크 연속 전송 스트레스 테스트.
+
+라즈베리파이 없이, 로컬 TCP 서버로 포트 7001 연결을 흉내 내어
+사전 직렬화된 REF 페이로드가 pydantic 직렬화 결과와 바이트 단위로 같은지,
+32개 탱크에 연속 전송했을 때 모든 REF가 도착하는지 확인한다.
+
+실행: python test_recipe_cache.py
+"""
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from litestar.exceptions import NotFoundException
+
+from app.controllers import recipe as recipe_controller
+from app.models.protocol import CommandPacketRef, RecipeDataItem
+from app.services.recipe_cache import RecipeCache
+from app.services.tcp_bridge import TCPBridgeService, UNIT_TO_TANK_ID
+
+SAMPLE_RECIPE = Path(__file__).resolve().parent.parent / "reference" / "ref1.json"
+
+
+async def read_packets(reader, expected_refs, timeout=5.0):
+    """개행 구분 패킷을 읽어 REF가 expected_refs개 모일 때까지 수집."""
+    packets = []
+    refs = 0
+    deadline = time.monotonic() + timeout
+    while refs < expected_refs and time.monotonic() < deadline:
+        line = await asyncio.wait_for(reader.readline(), timeout=deadline - time.monotonic())
+        if not line:
+            break
+        packets.append(line)
+        if json.loads(line)["CMD"] == "REF":
+            refs += 1
+    return packets
+
+
+async def run_async(check, workdir: Path):
+    cache = RecipeCache(workdir)
+
+    # ── 케이스 1: 사전 직렬화 결과가 pydantic 직렬화와 동일 ─────────────────
+    print("\n[케이스 1] render_ref == CommandPacketRef.model_dump_json")
+    recipe = cache.get("ref1.json")
+    content = recipe.content
+    expected = CommandPacketRef(
+        cmd="REF", idx=content["IDX"], tank_id="101", unit_id="101",
+        stage=content["STAGE"], step=content["STEP"],
+        data=[RecipeDataItem(**d) for d in content["DATA"]], send=False,
+    ).model_dump_json(by_alias=True).encode("utf-8") + b"\n"
+    check("바이트 단위 동일", recipe.render_ref(idx=0, tank_id=101) == expected)
+
+    # ── 케이스 2: 캐시 적중 / mtime 변경 시 재로딩 / 목록 무효화 ──────────────
+    print("\n[케이스 2] 캐시 적중과 무효화")
+    check("두 번째 조회는 같은 객체(캐시 적중)", cache.get("ref1.json") is recipe)
+    listing = cache.list_recipes()
+    check("목록 캐시 적중", cache.list_recipes() is listing)
+    shutil.copy(workdir / "ref1.json", workdir / "ref2.json")
+    os.utime(workdir, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+    check("파일 추가 후 목록 갱신", [f["filename"] for f in cache.list_recipes()] == ["ref1.json", "ref2.json"])
+    modified = dict(content, STEP="7200")
+    (workdir / "ref1.json").write_text(json.dumps(modified), encoding="utf-8")
+    st = (workdir / "ref1.json").stat()
+    os.utime(workdir / "ref1.json", ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    reloaded = cache.get("ref1.json")
+    check("mtime 변경 시 재로딩", reloaded is not recipe and reloaded.content["STEP"] == "7200")
+
+    # ── 케이스 2-1: 컨트롤러 오류 메시지 ───────────────────────────────────
+    print("\n[케이스 2-1] 레시피 조회 오류 구분")
+    (workdir / "broken.json").write_text('{"CMD": "REF", ', encoding="utf-8")
+    original_cache = recipe_controller.recipe_cache
+    recipe_controller.recipe_cache = cache
+
+    async def get_detail(filename):
+        try:
+            await recipe_controller.RecipeController.get_recipe_content.fn(None, filename)
+        except NotFoundException as e:
+            return e.detail
+        return None
+
+    try:
+        check("잘못된 JSON → Invalid JSON", (await get_detail("broken.json")).startswith("Invalid JSON format"))
+        check("디렉토리 밖 경로 → Invalid file path", await get_detail("../ref1.json") == "Invalid file path")
+    finally:
+        recipe_controller.recipe_cache = original_cache
+    (workdir / "broken.json").unlink()
+
+    # ── 케이스 3: 32개 탱크 연속 전송 (스트레스) ─────────────────────────────
+    print("\n[케이스 3] 32개 탱크에 레시피 연속 전송")
+    bridge = TCPBridgeService()
+    server = await asyncio.start_server(bridge.handle_sender_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await asyncio.sleep(0.05)
+
+    t0 = time.perf_counter()
+    results = [await bridge.send_recipe_compiled(reloaded, tank_id=t) for t in UNIT_TO_TANK_ID]
+    cached_elapsed = time.perf_counter() - t0
+    packets = await read_packets(reader, len(UNIT_TO_TANK_ID))
+    refs = [json.loads(p) for p in packets if json.loads(p)["CMD"] == "REF"]
+    check("32건 모두 전송 성공", all(results) and len(results) == 32)
+    check("REF 32개 수신", len(refs) == 32)
+    check("탱크별 TANK_ID 일치", [int(r["TANK_ID"]) for r in refs] == UNIT_TO_TANK_ID)
+
+    # 비교: 기존 dict 경로 (전송마다 DATA 재파싱)
+    t0 = time.perf_counter()
+    for t in UNIT_TO_TANK_ID:
+        bridge._selected_unit_id = t
+        await bridge.send_recipe(modified)
+    legacy_elapsed = time.perf_counter() - t0
+    await read_packets(reader, len(UNIT_TO_TANK_ID))
+    print(f"  캐시 경로: {cached_elapsed * 1000:.1f} ms / 32건, 기존 경로: {legacy_elapsed * 1000:.1f} ms / 32건")
+
+    # 파일에 IDX가 없으면 REF는 직전 Initial STATE의 IDX를 쓴다 (send_recipe와 동일)
+    no_idx = {k: v for k, v in modified.items() if k != "IDX"}
+    (workdir / "noidx.json").write_text(json.dumps(no_idx), encoding="utf-8")
+    await bridge.send_recipe_compiled(cache.get("noidx.json"), tank_id=101)
+    sent = {p["CMD"]: p for p in map(json.loads, await read_packets(reader, 1))}
+    check("IDX 없는 레시피: REF IDX == Initial STATE IDX", sent["REF"]["IDX"] == str(sent["STATE"]["IDX"]))
+
+    writer.close()
+    await asyncio.sleep(0.1)  # 서버 측 핸들러가 연결 종료를 처리할 시간
+    server.close()
+    await server.wait_closed()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        shutil.copy(SAMPLE_RECIPE, workdir / "ref1.json")
+        asyncio.run(run_async(check, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
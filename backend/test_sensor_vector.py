@@ -0,0 +1,111 @@
+"""
+SENSOR VALUE 숫자 벡터(SensorVector) 검증 및 벤치마크.
+
+  - VALUE 문자열이 파싱 시 한 번 float로 변환되고, 형식 오류는 NaN + parse_errors로 집계되는지
+  - handle_sensor_packet이 같은 벡터로 DB에 저장하는지 (NaN → NULL, 형식 오류가 있어도 패킷 저장)
+  - 기존 행별 dict + float(r['VALUE']) 방식 대비 수신~저장 준비 시간(µs)
+
+실행: python test_sensor_vector.py
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import timeit
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from app.models.packet import decode_sensor
+from app.models.protocol import SensorPacket
+from app.services.db_service import DBService
+from app.services import tcp_bridge as bridge_module
+from app.services.tcp_bridge import TCPBridgeService, UNIT_TO_TANK_ID
+
+
+def make_json(order, bad=()):
+    values = []
+    for index, tank in enumerate(UNIT_TO_TANK_ID):
+        for i in range(4):
+            values.append({"TANK_ID": str(tank), "SENSOR_ID": str(1100 + i), "VALUE": "%.2f" % (index + i * 0.5)})
+    for pos, text in bad:
+        values[pos]["VALUE"] = text
+    state = [{"TANK_ID": tank, "STAGE": 100, "STATUS": "Run"} for tank in UNIT_TO_TANK_ID]
+    return json.dumps({"CMD": "SENSOR", "ORDER": str(order), "DATE": "2026-06-20", "TIME": "12:00:00",
+                       "VALUES": values, "STATE": state, "ERROR": []})
+
+
+async def db_case(check):
+    db_path = os.path.join(tempfile.mkdtemp(), "vector.db")
+    db = DBService(db_path)
+    db.db_path = db_path  # sys.ini 설정과 무관하게 임시 DB 사용
+    await db.init_db()
+    bridge_module.db_service = db
+
+    bridge = TCPBridgeService()
+    bridge.is_recording = True
+    await bridge.process_message(make_json(1, bad=[(0, "ERR"), (9, "")]))
+    await asyncio.sleep(0.3)  # create_task로 저장
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT tank_id, sensor_id, value FROM readings ORDER BY id").fetchall()
+    check("형식 오류가 있어도 패킷 저장", len(rows) == 128)
+    check("형식 오류 → NULL", rows[0][2] is None and rows[9][2] is None)
+    check("정상 값 float 저장", rows[1] == ("601", 1101, 0.5) and isinstance(rows[2][2], float))
+    check("수신 통계 parse_errors", bridge.get_ingest_stats() == {"sensor_packets": 1, "value_parse_errors": 2})
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    print("\n[케이스 1] 파싱 시 숫자 벡터 변환")
+    packet = decode_sensor(make_json(1, bad=[(3, "ERR"), (4, None)]))
+    vector = packet.vector
+    check("벡터 길이", len(vector) == 128)
+    check("float 변환", vector.values[1] == 0.5 and packet.to_packet().values[1].value == 0.5)
+    check("형식 오류 NaN + 집계", vector.values[3] != vector.values[3] and vector.parse_errors == 2)
+    check("TANK_ID/SENSOR_ID 배열", vector.tank_ids[0] == 601 and vector.sensor_ids[3] == 1103)
+
+    print("\n[케이스 2] 수신 → DB 저장")
+    asyncio.run(db_case(check))
+
+    print("\n[벤치마크] 패킷 1건: 브로드캐스트/DB 저장용 데이터 준비")
+    legacy_packet = SensorPacket(**json.loads(make_json(2)))
+    packet = decode_sensor(make_json(2))
+
+    def legacy():
+        # 기존: 행별 model_dump dict → save_packet에서 float(r['VALUE'])
+        readings = [r.model_dump(by_alias=True) for r in legacy_packet.values]
+        return [(1, str(r['TANK_ID']), r['SENSOR_ID'], float(r['VALUE'])) for r in readings]
+
+    def vectorized():
+        v = packet.vector
+        return list(zip([1] * len(v), map(str, v.tank_ids), v.sensor_ids, v.values))
+
+    n = 2000
+    t_legacy = timeit.timeit(legacy, number=n) / n * 1e6
+    t_vector = timeit.timeit(vectorized, number=n) / n * 1e6
+    print(f"  행별 dict + float():   {t_legacy:7.1f} µs")
+    print(f"  숫자 벡터 재사용:      {t_vector:7.1f} µs  (x{t_legacy / t_vector:.1f})")
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
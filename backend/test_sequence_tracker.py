@@ -0,0 +1,179 @@
+"""
+SENSOR ORDER 연속성 검사(sequence_tracker) 검증.
+
+  - 정상/손실 구간/중복/늦게 온 패킷/카운터 재시작 판정, 손실 구간 원인(재연결, resync)
+  - 재시작한 Pi가 예전 ORDER를 다시 써도(DATE/TIME이 다르면) 중복으로 버리지 않는지
+  - 포트 7000 재연결 후 Pi가 다시 보낸 패킷이 브로드캐스트/DB 저장 전에 버려지는지
+  - 녹화 중 손실 구간이 sequence_gaps에 저장되고 get_sequence_gaps로 조회되는지
+  - 패킷 1건당 판정 시간(µs)
+
+실행: python test_sequence_tracker.py
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import timeit
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from app.models.packet import decode_sensor
+from app.services.db_service import DBService
+from app.services import tcp_bridge as bridge_module
+from app.services.sequence_tracker import (
+    CAUSE_GAP, CAUSE_RECONNECT, CAUSE_RESYNC, CAUSE_RESTART,
+    SEQ_DUPLICATE, SEQ_FIRST, SEQ_GAP, SEQ_LATE, SEQ_OK, SEQ_RESTART, SequenceTracker,
+)
+from app.services.tcp_bridge import TCPBridgeService, UNIT_TO_TANK_ID
+
+
+def make_json(order, time="12:00:00"):
+    values = [{"TANK_ID": str(tank), "SENSOR_ID": "1100", "VALUE": "%.2f" % order} for tank in UNIT_TO_TANK_ID]
+    state = [{"TANK_ID": tank, "STAGE": 100, "STATUS": "Run"} for tank in UNIT_TO_TANK_ID]
+    return json.dumps({"CMD": "SENSOR", "ORDER": str(order), "DATE": "2026-06-20", "TIME": time,
+                       "VALUES": values, "STATE": state, "ERROR": []})
+
+
+def stamp(order):
+    return ("2026-06-20", "12:%02d:%02d" % (order // 60 % 60, order % 60))
+
+
+def tracker_cases(check):
+    print("\n[케이스 1] 판정")
+    tracker = SequenceTracker("tcp", window=100, restart_jump=1000)
+    verdicts = [tracker.check(order, stamp(order))[0] for order in (1, 2, 3)]
+    check("첫 패킷 / 연속", verdicts == [SEQ_FIRST, SEQ_OK, SEQ_OK])
+    check("같은 ORDER + 같은 DATE/TIME → 중복", tracker.check(3, stamp(3))[0] == SEQ_DUPLICATE)
+
+    verdict, gap = tracker.check(6, stamp(6))
+    check("손실 구간 (4, 5)", verdict == SEQ_GAP and gap.missing == 2 and gap.cause == CAUSE_GAP
+          and (gap.prev_order, gap.next_order) == (3, 6))
+    check("늦게 온 패킷은 받고 손실 수에서 뺀다", tracker.check(4, stamp(4))[0] == SEQ_LATE
+          and tracker.total.missing == 1 and tracker.check(4, stamp(4))[0] == SEQ_DUPLICATE)
+
+    tracker.connect()
+    verdict, gap = tracker.check(10, stamp(10))
+    check("재연결 뒤 손실 구간 원인", verdict == SEQ_GAP and gap.cause == CAUSE_RECONNECT and gap.missing == 3)
+    tracker.resync()
+    check("resync 뒤 끊김이 없으면 구간 없음", tracker.check(11, stamp(11)) == (SEQ_OK, None))
+    tracker.resync()
+    verdict, gap = tracker.check(15, stamp(15))
+    check("resync 뒤 손실 구간 원인", verdict == SEQ_GAP and gap.cause == CAUSE_RESYNC)
+    stats = tracker.get_stats()
+    print(f"  전체 {stats['total']}")
+    print(f"  현재 연결 {stats['connection']}")
+    check("손실률 = 빠진 패킷 / (받은 + 빠진)",
+          stats["total"]["missing"] == 7 and stats["total"]["loss_pct"] == round(7 / (stats["total"]["accepted"] + 7) * 100, 3))
+    check("현재 연결 통계는 재연결 때 초기화", stats["connection"]["gaps"] == 2 and stats["connection"]["duplicates"] == 0)
+
+    print("\n[케이스 2] 카운터 재시작")
+    verdict, gap = tracker.check(1, ("2026-06-21", "08:00:00"))
+    check("Pi 재시작으로 예전 ORDER 재사용 → 재시작 (버리지 않음)",
+          verdict == SEQ_RESTART and gap.cause == CAUSE_RESTART and gap.missing is None)
+    check("재시작 뒤 연속", tracker.check(2, ("2026-06-21", "08:00:01"))[0] == SEQ_OK)
+    check("restart_jump보다 큰 건너뜀 → 재시작", tracker.check(50_000, stamp(0))[0] == SEQ_RESTART
+          and tracker.total.restarts == 2 and tracker.total.missing == 7)
+
+
+async def bridge_cases(check):
+    print("\n[케이스 3] 포트 7000 재연결 후 재전송 패킷")
+    db_path = os.path.join(tempfile.mkdtemp(), "sequence.db")
+    db = DBService(db_path)
+    db.db_path = db_path  # sys.ini 설정과 무관하게 임시 DB 사용
+    await db.init_db()
+    bridge_module.db_service = db
+
+    bridge = TCPBridgeService()
+    bridge.is_recording = True
+    broadcast = []
+
+    async def count_broadcast(packet):
+        broadcast.append(packet.order)
+
+    original_broadcast = bridge_module.ws_manager.broadcast_sensor
+    bridge_module.ws_manager.broadcast_sensor = count_broadcast
+    server = await asyncio.start_server(bridge.handle_receiver_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        async def send(orders):
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            for order in orders:
+                writer.write(make_json(order, time="12:00:%02d" % order).encode())
+            await writer.drain()
+            await asyncio.sleep(0.3)
+            writer.close()
+            await writer.wait_closed()
+            await asyncio.sleep(0.1)
+
+        await send([1, 2, 3, 4])
+        # 재연결: Pi가 ACK 받지 못한 3, 4를 다시 보내고, 5~6은 연결이 끊긴 사이 유실
+        await send([3, 4, 7, 8])
+        await asyncio.sleep(0.3)  # create_task로 저장
+    finally:
+        server.close()
+        await server.wait_closed()
+        bridge_module.ws_manager.broadcast_sensor = original_broadcast
+
+    with sqlite3.connect(db_path) as conn:
+        stored = [row[0] for row in conn.execute("SELECT order_num FROM packets ORDER BY order_num")]
+        gaps = conn.execute("SELECT source, cause, prev_order, next_order, missing FROM sequence_gaps").fetchall()
+    stats = bridge.get_sequence_stats()["tcp"]
+    print(f"  브로드캐스트 {broadcast}, 저장 {stored}, 손실 구간 {gaps}")
+    check("중복은 브로드캐스트 전에 버림", broadcast == [1, 2, 3, 4, 7, 8])
+    check("중복은 DB에 저장하지 않음", stored == [1, 2, 3, 4, 7, 8])
+    check("손실 구간 저장 (재연결, 5~6)", gaps == [("tcp", CAUSE_RECONNECT, 4, 7, 2)])
+    check("메트릭", stats["connections"] == 2 and stats["total"]["duplicates"] == 2
+          and stats["connection"]["missing"] == 2 and stats["recent_gaps"][0]["missing"] == 2)
+
+    rows = await db.get_sequence_gaps("2000-01-01 00:00:00", "2100-01-01 00:00:00")
+    check("이력 조회 get_sequence_gaps", len(rows) == 1 and rows[0]["missing"] == 2 and rows[0]["gap_end"])
+    check("구간 밖 조회는 비어 있음", await db.get_sequence_gaps("2000-01-01 00:00:00", "2000-01-02 00:00:00") == [])
+
+    print("\n[케이스 4] 추적하지 않는 경로 (CAN)")
+    before = len(broadcast)
+    bridge_module.ws_manager.broadcast_sensor = count_broadcast
+    try:
+        packet = decode_sensor(make_json(8, time="12:00:08"))
+        await bridge.handle_sensor_packet(packet, source="can")
+        await bridge.handle_sensor_packet(packet, source="can")
+    finally:
+        bridge_module.ws_manager.broadcast_sensor = original_broadcast
+    check("CAN 경로는 ORDER 검사 없이 전달", len(broadcast) - before == 2)
+    await db.close()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    tracker_cases(check)
+    asyncio.run(bridge_cases(check))
+
+    print("\n[벤치마크] 패킷 1건 판정")
+    tracker = SequenceTracker("bench")
+    orders = iter(range(10**9))
+    n = 200_000
+    t_check = timeit.timeit(lambda: tracker.check(next(orders), ("2026-06-20", "12:00:00")), number=n) / n * 1e6
+    print(f"  SequenceTracker.check: {t_check:.2f} µs")
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,188 @@
+"""
+시계열 카탈로그(series_stats) 검증.
+
+  - save_packet 후 카탈로그 = readings GROUP BY (행 수, 첫/마지막 시각)
+  - clear_tank / clear_all / cleanup_old_data(날짜, 크기)에서 행 수·첫 시각 갱신
+  - 카탈로그 이전에 만든 DB: init_db는 전체 GROUP BY 없이 끝나고(complete=False), run_migrations가
+    readings id 구간별로 채운다. 채우는 중의 save_packet/날짜 정리도 카탈로그에 맞게 반영
+  - 기존 DB의 idx_readings_series 빌드도 init_db가 아닌 run_migrations에서 (그 뒤 idx_readings_tank_sensor 삭제)
+  - 카탈로그 조회 vs readings 전체 GROUP BY 시간, save_packet 지연
+
+실행: python test_series_stats.py
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime, timedelta
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from app.models.packet import SensorVector, TankStatus
+from app.services.db_service import DBService
+from app.services.tcp_bridge import UNIT_TO_TANK_ID
+
+BASE = datetime(2026, 6, 1, 0, 0, 0)
+ts = lambda sec: (BASE + timedelta(seconds=sec)).strftime("%Y-%m-%d %H:%M:%S")
+STATES = [TankStatus(t, 100, "Run") for t in UNIT_TO_TANK_ID]
+
+SCAN_QUERY = """
+    SELECT r.tank_id, r.sensor_id, COUNT(*), MIN(p.created_at), MAX(p.created_at)
+    FROM readings r JOIN packets p ON r.packet_id = p.id
+    GROUP BY r.tank_id, r.sensor_id ORDER BY r.tank_id, r.sensor_id
+"""
+CATALOG_QUERY = "SELECT tank_id, sensor_id, row_count, first_at, last_at FROM series_stats ORDER BY tank_id, sensor_id"
+
+
+def make_vector(order, tanks=UNIT_TO_TANK_ID, sensors=4):
+    tank_ids = array("l", [t for t in tanks for _ in range(sensors)])
+    sensor_ids = array("l", [1100 + s for _ in tanks for s in range(sensors)])
+    values = array("d", [order * 0.1 + i for i in range(len(tank_ids))])
+    return SensorVector(tank_ids, sensor_ids, values, 0)
+
+
+def catalog_matches(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(CATALOG_QUERY).fetchall() == conn.execute(SCAN_QUERY).fetchall()
+
+
+def index_names(db_path):
+    """readings의 (tank_id, sensor_id) 인덱스 이름 (packet_id 인덱스 제외)"""
+    with sqlite3.connect(db_path) as conn:
+        return {name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='readings' AND name != 'idx_readings_packet'")}
+
+
+async def scenario(check):
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "series.db")
+    db = DBService(db_path)
+    db.db_path = db_path  # sys.ini 설정과 무관하게 임시 DB 사용
+    await db.init_db()
+    check("새 DB는 init_db에서 바로 시계열 인덱스", index_names(db_path) == {"idx_readings_series"})
+
+    print("\n[케이스 1] save_packet → 카탈로그")
+    for i in range(200):
+        # 일부 패킷은 탱크 절반만 포함
+        tanks = UNIT_TO_TANK_ID if i % 5 else UNIT_TO_TANK_ID[:16]
+        assert await db.save_packet(i, ts(i), make_vector(i, tanks), STATES)
+    check("행 수/첫·마지막 시각 = readings GROUP BY", catalog_matches(db_path))
+    stats = await db.get_series_stats()
+    series = stats["series"]
+    check("get_series_stats", stats["complete"] and len(series) == len(UNIT_TO_TANK_ID) * 4
+          and series[0]["first_at"] == ts(0) and series[0]["last_at"] == ts(199))
+
+    print("\n[케이스 2] clear_tank / cleanup_old_data / clear_all")
+    await db.clear_tank(UNIT_TO_TANK_ID[0])
+    check("clear_tank 후 일치", catalog_matches(db_path)
+          and all(s["tank_id"] != str(UNIT_TO_TANK_ID[0]) for s in (await db.get_series_stats())["series"]))
+    # 날짜 기준: BASE + 50초 이전 삭제
+    db.retention_days = (datetime.now() - (BASE + timedelta(seconds=50))).total_seconds() / 86400
+    db._load_sys_config = lambda: None
+    await db.cleanup_old_data()
+    check("날짜 정리 후 일치 (첫 시각 갱신)", catalog_matches(db_path)
+          and (await db.get_series_stats())["series"][0]["first_at"] > ts(0))
+    # 크기 기준: 상한을 아주 작게
+    db.retention_days = 3650
+    db.max_size_mb = 0
+    await db.cleanup_old_data()
+    with sqlite3.connect(db_path) as conn:
+        left = conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0]
+    check("크기 정리 후 일치", catalog_matches(db_path) and left < 150)
+    await db.clear_all()
+    check("clear_all 후 비어 있음", (await db.get_series_stats())["series"] == [])
+
+    print("\n[케이스 3] 카탈로그 이전 DB 채우기")
+    old_path = os.path.join(tmp, "old.db")
+    with sqlite3.connect(old_path) as conn:
+        conn.executescript("""
+            CREATE TABLE packets (id INTEGER PRIMARY KEY AUTOINCREMENT, order_num INTEGER, created_at DATETIME);
+            CREATE TABLE readings (id INTEGER PRIMARY KEY AUTOINCREMENT, packet_id INTEGER, tank_id TEXT,
+                                   sensor_id INTEGER, value REAL);
+            CREATE INDEX idx_readings_tank_sensor ON readings(tank_id, sensor_id);
+        """)
+        for i in range(2000):
+            packet_id = conn.execute("INSERT INTO packets (order_num, created_at) VALUES (?, ?)",
+                                     (i, ts(i))).lastrowid
+            conn.executemany("INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, ?, ?, ?)",
+                             [(packet_id, str(t), 1100 + s, float(i)) for t in UNIT_TO_TANK_ID for s in range(4)])
+    old = DBService(old_path)
+    old.db_path = old_path
+    started = time.perf_counter()
+    await old.init_db()
+    t_init = (time.perf_counter() - started) * 1000
+    stats = await old.get_series_stats()
+    print(f"  init_db {t_init:.1f} ms")
+    check("init_db는 채우지 않고 미완료 표시", not stats["complete"] and stats["series"] == [])
+    check("init_db는 시계열 인덱스를 만들지 않고 기존 인덱스 유지", index_names(old_path) == {"idx_readings_tank_sensor"})
+
+    # 채우는 중에 저장(id > target)과 날짜 정리(반영 전 구간 포함)가 끼어든다
+    backfill = asyncio.create_task(old.run_migrations(chunk_rows=5000))
+    cursors = []
+    for i in range(30):
+        await old.save_packet(5000 + i, ts(3000 + i), make_vector(i), STATES)
+        with sqlite3.connect(old_path) as conn:
+            cursors.append(conn.execute(
+                "SELECT cursor FROM schema_migrations WHERE name = 'series_stats_backfill'").fetchone())
+    old.retention_days = (datetime.now() - (BASE + timedelta(seconds=100))).total_seconds() / 86400
+    old._load_sys_config = lambda: None
+    await old.cleanup_old_data()
+    await backfill
+    check("구간별로 진행", any(c and 0 < c[0] for c in cursors))
+    stats = await old.get_series_stats()
+    check("채우기 완료 후 readings와 일치", stats["complete"] and catalog_matches(old_path)
+          and stats["series"][0]["first_at"] == ts(100))
+    check("마이그레이션이 시계열 인덱스를 만들고 기존 인덱스 삭제", index_names(old_path) == {"idx_readings_series"})
+
+    print("\n[케이스 4] 카탈로그 조회 vs 전체 GROUP BY")
+    with sqlite3.connect(old_path) as conn:
+        started = time.perf_counter()
+        conn.execute(SCAN_QUERY).fetchall()
+        total = conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+        t_scan = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        conn.execute(CATALOG_QUERY).fetchall()
+        conn.execute("SELECT SUM(row_count) FROM series_stats").fetchone()
+        t_catalog = (time.perf_counter() - started) * 1000
+    print(f"  readings {total:,}행: 전체 스캔 {t_scan:.1f} ms, 카탈로그 {t_catalog:.2f} ms")
+    check("카탈로그 조회가 빠름", t_catalog * 10 < t_scan)
+
+    started = time.perf_counter()
+    for i in range(200):
+        await old.save_packet(10_000 + i, ts(5000 + i), make_vector(i), STATES)
+    t_save = (time.perf_counter() - started) / 200 * 1000
+    print(f"  save_packet(128 readings + 카탈로그) 평균 {t_save:.2f} ms")
+    check("저장 후에도 일치", catalog_matches(old_path))
+
+    await db.close()
+    await old.close()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    asyncio.run(scenario(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,163 @@
+"""
+백엔드 시작 시간 회귀 검증.
+
+  - python -X importtime -c "import app.main": 무거운 의존성(pandas/numpy/requests/pyarrow)을 시작 시 불러오지 않는지,
+    app.main import 시간
+  - uvicorn 프로세스 시작 → 첫 WebSocket 메시지(SYSTEM_CONNECTION_STATUS)까지 시간
+  - 보관 기간이 지난 데이터가 많은 DB로 시작해도 정리/VACUUM이 준비 전에 돌지 않고,
+    준비 후 백그라운드에서 실행되는지 (db_cleanup_start_delay_s)
+
+포트 7000/7001과 임의의 HTTP 포트를 사용한다.
+
+실행: python test_startup.py
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from websockets.asyncio.client import connect
+
+from app.services.db_service import DBService
+from app.services.tcp_bridge import UNIT_TO_TANK_ID
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("pandas", "numpy", "requests", "pyarrow")
+IMPORT_BUDGET_S = 3.0  # 라즈베리파이 4 기준 여유 있게
+FIRST_MESSAGE_BUDGET_S = 8.0
+CLEANUP_DELAY_S = 3.0
+OLD_PACKETS = 3000  # 보관 기간(30일)이 지난 2020년 데이터
+
+
+def import_cases(check):
+    print("\n[케이스 1] import app.main (-X importtime)")
+    code = f"import sys, app.main; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BACKEND_DIR,
+                          capture_output=True, text=True, timeout=60)
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, total, name = line.split("|")
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total) / 1e6
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    top = sorted(((t, n) for n, t in cumulative.items() if n.startswith("app.") and n.count(".") == 2),
+                 reverse=True)[:3]
+    print(f"  app.main {cumulative.get('app.main', 0):.3f}s, 느린 모듈: "
+          + ", ".join(f"{n} {t:.3f}s" for t, n in top))
+    check("import 성공", proc.returncode == 0 and "app.main" in cumulative)
+    check(f"무거운 의존성 미로드 {HEAVY_MODULES}", not loaded)
+    check(f"import app.main < {IMPORT_BUDGET_S}s", cumulative.get("app.main", 1e9) < IMPORT_BUDGET_S)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def count_packets(db_path):
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+        return conn.execute("SELECT COUNT(*) FROM packets").fetchone()[0]
+
+
+async def first_message(port, started, timeout):
+    """서버가 뜰 때까지 재시도하며 첫 WebSocket 메시지와 그때까지 걸린 시간."""
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        try:
+            async with connect(f"ws://127.0.0.1:{port}/ws/status", open_timeout=1) as ws:
+                message = await asyncio.wait_for(ws.recv(), timeout=2)
+                return json.loads(message), time.perf_counter() - started
+        except (OSError, asyncio.TimeoutError):
+            await asyncio.sleep(0.02)
+    return None, None
+
+
+async def server_cases(check):
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "startup.db")
+    db = DBService(db_path)
+    db.db_path = db_path  # sys.ini 설정과 무관하게 임시 DB 사용
+    await db.init_db()
+    await db.close()
+    with sqlite3.connect(db_path) as conn:
+        for i in range(OLD_PACKETS):
+            packet_id = conn.execute("INSERT INTO packets (order_num, created_at) VALUES (?, ?)",
+                                     (i, f"2020-01-01 {i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}")).lastrowid
+            conn.executemany("INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, ?, ?, ?)",
+                             [(packet_id, str(t), 1100 + s, float(i)) for t in UNIT_TO_TANK_ID for s in range(4)])
+
+    print(f"\n[케이스 2] uvicorn 시작 → 첫 WebSocket 메시지 (오래된 패킷 {OLD_PACKETS}개 DB)")
+    port = free_port()
+    env = dict(os.environ, DB_PATH=db_path, PROCESS_ROLE="all", STATE_DIR=os.path.join(tmp, "state"),
+               DB_CLEANUP_START_DELAY_S=str(CLEANUP_DELAY_S))
+    log_path = os.path.join(tmp, "server.log")
+    with open(log_path, "w") as log:
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    try:
+        message, elapsed = await first_message(port, started, timeout=30)
+        packets_at_ready = count_packets(db_path)
+        if message is None:
+            print(open(log_path, encoding="utf-8", errors="replace").read()[-2000:])
+        else:
+            print(f"  첫 메시지 {elapsed:.2f}s: {message['type']}")
+        check("첫 메시지 = SYSTEM_CONNECTION_STATUS",
+              message is not None and message.get("type") == "SYSTEM_CONNECTION_STATUS")
+        check(f"첫 메시지 < {FIRST_MESSAGE_BUDGET_S}s", elapsed is not None and elapsed < FIRST_MESSAGE_BUDGET_S)
+        check("준비 전에 정리/VACUUM 안 함 (오래된 데이터 그대로)", packets_at_ready == OLD_PACKETS)
+
+        print("\n[케이스 3] 준비 후 백그라운드 정리")
+        deadline = time.perf_counter() + CLEANUP_DELAY_S + 30
+        while count_packets(db_path) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.2)
+        cleaned_at = time.perf_counter() - started
+        print(f"  시작 후 {cleaned_at:.2f}s에 정리 완료")
+        check("지연 후 보관 기간 정리 실행", count_packets(db_path) == 0 and cleaned_at >= CLEANUP_DELAY_S)
+        still, _ = await first_message(port, time.perf_counter(), timeout=5)
+        check("정리 후에도 WebSocket 응답", still is not None)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    import_cases(check)
+    asyncio.run(server_cases(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
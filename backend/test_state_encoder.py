@@ -0,0 +1,73 @@
+"""
+STATE 인코더(state_encoder) 검증 및 벤치마크.
+
+템플릿 직렬화 결과가 기존 방식(StateDataItem 32개 + CommandPacketState.model_dump_json)과
+바이트 단위로 같은지 확인하고, STATE 명령 1건당 소요 시간(µs)을 비교한다.
+
+실행: python test_state_encoder.py
+"""
+import sys
+import timeit
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from app.models.protocol import CommandPacketState, StateDataItem
+from app.services.state_encoder import StateEncoder
+from app.services.tcp_bridge import UNIT_TO_TANK_ID
+
+
+def encode_pydantic(states, idx, stage):
+    """기존 send_state_command 방식."""
+    state_data_list = [
+        StateDataItem(UNIT_ID=str(t), TANK_ID=str(t), STAGE=stage, STATUS=states.get(t, "None"))
+        for t in UNIT_TO_TANK_ID
+    ]
+    packet = CommandPacketState(cmd="STATE", idx=idx, data=state_data_list)
+    return packet.model_dump_json(by_alias=True).encode('utf-8') + b'\n'
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    encoder = StateEncoder(UNIT_TO_TANK_ID)
+    states = {t: "None" for t in UNIT_TO_TANK_ID}
+
+    print("\n[케이스 1] 초기 상태 벡터 출력 동일성")
+    check("IDX int", encoder.encode(1) == encode_pydantic(states, 1, 100))
+    check("IDX str", encoder.encode("7") == encode_pydantic(states, "7", 100))
+
+    print("\n[케이스 2] 상태 변경 후 출력 동일성")
+    for t, status in [(601, "Run"), (101, "Pause"), (131, "Stop"), (118, "Initial")]:
+        encoder.set_status(t, status)
+        states[t] = status
+    check("여러 탱크 상태 반영", encoder.encode(42, stage=201) == encode_pydantic(states, 42, 201))
+    check("매핑에 없는 TANK_ID 거부", encoder.set_status(999, "Run") is False)
+    check("상태 조회", encoder.get_status(101) == "Pause")
+
+    print("\n[벤치마크] STATE 명령 1건당 직렬화 시간")
+    n = 2000
+    t_pyd = timeit.timeit(lambda: encode_pydantic(states, 42, 100), number=n) / n * 1e6
+    t_tpl = timeit.timeit(lambda: encoder.encode(42, 100), number=n) / n * 1e6
+    print(f"  pydantic(32 StateDataItem + model_dump_json): {t_pyd:8.1f} µs")
+    print(f"  템플릿(StateEncoder.encode):                   {t_tpl:8.1f} µs  (x{t_pyd / t_tpl:.1f})")
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,223 @@
+"""
+브리지 상태 저널(state_journal) 검증.
+
+  - 탱크 상태 벡터/선택 유닛/명령 IDX가 재시작(정상 종료, 비정상 종료) 후 복원되는지
+  - Stop은 배치를 기다리지 않고 바로 fsync, 나머지는 state_journal_flush_s 동안 모아 fsync 한 번
+  - 쓰다 만 마지막 줄 무시, 압축(스냅샷 교체) 후에도 같은 상태
+  - IDX 예약: 블록마다 한 번만 기록, 재시작 후 이전에 쓴 IDX를 재사용하지 않음 (PING 순환, 유닛 선택 GET_VERSION 포함)
+  - 시작 시 복원 시간 (스냅샷 + 저널 1000건)
+  - 스레드가 write + fsync 하는 동안 루프에서 들어온 기록도 모두 저널에, 쓰기 실패한 묶음은 버퍼에 남음
+
+실행: python test_state_journal.py
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from app.config import settings
+from app.services.state_encoder import StateEncoder
+from app.services.state_journal import COUNTER_COMMAND, COUNTER_PING, JOURNAL_FILE, StateJournal
+from app.services.tcp_bridge import UNIT_TO_TANK_ID, TCPBridgeService
+
+FLUSH_S = 0.3
+
+# 7001 미연결 전송 실패 경고는 이 테스트에서 의도된 것
+logging.getLogger("app.services.tcp_bridge").setLevel(logging.ERROR)
+
+
+def new_bridge(state_dir):
+    """저널을 복원한 새 브리지 (서버는 열지 않음 = 재시작)"""
+    settings.state_dir = state_dir
+    settings.state_journal_flush_s = FLUSH_S
+    bridge = TCPBridgeService()
+    bridge._restore_state()
+    return bridge
+
+
+def journal_lines(state_dir):
+    with open(os.path.join(state_dir, JOURNAL_FILE), "rb") as f:
+        return f.read().splitlines()
+
+
+async def restart_cases(check):
+    state_dir = tempfile.mkdtemp()
+
+    print("\n[케이스 1] 정상 종료 후 재시작")
+    bridge = new_bridge(state_dir)
+    check("빈 저널: 기본 상태", set(bridge.get_tank_states().values()) == {"None"}
+          and bridge.get_selected_unit_id() == 601)
+    idx_before = bridge._command_idx
+    bridge.set_selected_unit_id(105)
+    check("유닛 선택 GET_VERSION도 명령 IDX 카운터 사용", bridge._command_idx == idx_before + 1)
+    # 7001 연결이 없어 전송은 실패하지만 상태 벡터는 갱신된다
+    await bridge.send_state_batch({601: "Run", 101: "Pause", 131: "Initial"})
+    await bridge.send_state_command("Run")
+    expected_states = bridge.get_tank_states()
+    expected_packet = bridge._state_encoder.encode(1)
+    last_idx = bridge._command_idx
+    await bridge.stop()
+
+    bridge = new_bridge(state_dir)
+    check("탱크 상태 벡터 복원", bridge.get_tank_states() == expected_states
+          and bridge.get_tank_states()[105] == "Run")
+    check("복원 후 STATE 패킷 동일", bridge._state_encoder.encode(1) == expected_packet)
+    check("선택 유닛 복원", bridge.get_selected_unit_id() == 105)
+    check("명령 IDX 재사용 없음", bridge.next_command_idx() > last_idx)
+    print(f"  IDX: 종료 전 {last_idx} → 재시작 후 {bridge._command_idx}")
+
+    print("\n[케이스 2] Stop 즉시 fsync / 나머지는 배치")
+    await bridge.send_state_batch({102: "Stop"})
+    await asyncio.sleep(0.05)
+    check("Stop은 flush 간격 전에 디스크에 기록", any(b'"Stop"' in line for line in journal_lines(state_dir)))
+
+    fsyncs = bridge._state_journal.fsyncs
+    for i in range(200):
+        await bridge.send_state_batch({UNIT_TO_TANK_ID[i % 32]: ("Run", "Pause")[i % 2]})
+    await asyncio.sleep(FLUSH_S * 2)
+    used = bridge._state_journal.fsyncs - fsyncs
+    print(f"  상태 변경 200건 → fsync {used}회")
+    check("상태 변경 200건을 fsync 몇 번으로 묶음", 1 <= used <= 3)
+
+    print("\n[케이스 3] 비정상 종료 (close 없이 재시작)")
+    await bridge.send_state_batch({103: "Stop", 104: "Run"})
+    block_start = bridge.reserve_command_idx(1000)  # api 워커에 내준 IDX 블록
+    await asyncio.sleep(FLUSH_S * 2)
+    expected_states = bridge.get_tank_states()
+    last_idx = bridge._command_idx
+    bridge._state_journal = None  # 종료 처리 없이 버림
+    bridge = new_bridge(state_dir)
+    check("fsync된 상태 복원", bridge.get_tank_states() == expected_states)
+    check("명령 IDX 재사용 없음 (api 워커 블록 포함)", bridge.next_command_idx() > last_idx
+          and last_idx == block_start + 999)
+    await bridge.stop()
+
+
+def journal_cases(check):
+    print("\n[케이스 4] 쓰다 만 마지막 줄")
+    state_dir = tempfile.mkdtemp()
+    journal = StateJournal(state_dir)
+    journal.load()
+    journal.record_tank(601, "Run")
+    journal.record_tank(101, "Pause")
+    with open(journal.journal_path, "ab") as f:
+        f.write(b'{"k":"tank","t":102,"v":"Ru')
+    journal = StateJournal(state_dir)
+    state = journal.load()
+    check("완전한 줄만 재생", state.tanks == {601: "Run", 101: "Pause"} and journal.torn_records == 1)
+    journal.record_tank(102, "Stop")
+    state = StateJournal(state_dir).load()
+    check("잘라낸 뒤 이어 쓴 기록 재생", state.tanks == {601: "Run", 101: "Pause", 102: "Stop"})
+
+    print("\n[케이스 5] 압축")
+    state_dir = tempfile.mkdtemp()
+    journal = StateJournal(state_dir, compact_records=50)
+    journal.load()
+    for i in range(120):
+        journal.record_tank(UNIT_TO_TANK_ID[i % 32], f"S{i}")
+    expected = dict(journal.state.tanks)
+    print(f"  기록 120건 → 압축 {journal.compactions}회, 남은 저널 {len(journal_lines(state_dir))}줄")
+    check("압축 후 저널이 짧게 유지", journal.compactions == 2 and len(journal_lines(state_dir)) < 50)
+    check("스냅샷 + 저널로 같은 상태", StateJournal(state_dir).load().tanks == expected)
+
+    print("\n[케이스 6] IDX 예약")
+    state_dir = tempfile.mkdtemp()
+    journal = StateJournal(state_dir, counter_block=100)
+    journal.load()
+    for idx in range(1, 251):
+        journal.reserve(COUNTER_COMMAND, idx)
+    check("250개 IDX에 예약 기록 3건", len(journal_lines(state_dir)) == 3)
+    check("복원 값이 쓴 IDX보다 큼", StateJournal(state_dir).load().counters[COUNTER_COMMAND] > 250)
+    journal.reserve(COUNTER_PING, 99990)
+    journal.reserve(COUNTER_PING, 0)  # 0~99,999 순환
+    restored = StateJournal(state_dir)
+    restored.load()
+    check("PING 순환 후 다시 예약", 0 < restored.restore_counter(COUNTER_PING) % 100000 <= 100)
+
+    print("\n[케이스 7] 시작 시 복원 시간")
+    state_dir = tempfile.mkdtemp()
+    journal = StateJournal(state_dir, compact_records=10_000)
+    journal.load()
+    for i in range(1000):
+        journal.record_tank(UNIT_TO_TANK_ID[i % 32], ("Run", "Pause", "Stop")[i % 3])
+    journal._write_snapshot(journal.state.to_dict())
+    for i in range(1000):
+        journal.record_tank(UNIT_TO_TANK_ID[i % 32], ("Initial", "Run")[i // 32 % 2])
+    expected = StateEncoder(UNIT_TO_TANK_ID)
+    for tank_id, status in journal.state.tanks.items():
+        expected.set_status(tank_id, status)
+    restored = StateJournal(state_dir)
+    state = restored.load()
+    print(f"  스냅샷 + 저널 {len(journal_lines(state_dir))}줄 복원 {restored.load_ms:.2f}ms")
+    check("복원 상태 일치", state.tanks == expected.as_dict())
+    check("복원 < 50ms", restored.load_ms < 50)
+
+
+async def flush_cases(check):
+    print("\n[케이스 8] 스레드에서 쓰는 동안 들어온 기록 / 쓰기 실패")
+    state_dir = tempfile.mkdtemp()
+    journal = StateJournal(state_dir, flush_s=0.01, compact_records=10_000)
+    journal.load()
+    write_batch = journal._write_batch
+    in_thread = []
+
+    def slow_write(batch):
+        in_thread.append(len(batch))
+        time.sleep(0.05)  # write + fsync가 느린 디스크
+        write_batch(batch)
+
+    journal._write_batch = slow_write
+    for i in range(200):
+        journal.record_tank(UNIT_TO_TANK_ID[i % 32], f"S{i}")
+        await asyncio.sleep(0.002)  # 스레드가 쓰는 동안 루프에서 계속 기록
+    await journal._flush_task
+    check(f"여러 묶음으로 나눠 씀 ({len(in_thread)}회)", len(in_thread) > 1 and sum(in_thread) == 200)
+    check("모든 기록이 저널에", len(journal_lines(state_dir)) == 200
+          and StateJournal(state_dir).load().tanks == journal.state.tanks)
+
+    def failing_write(batch):
+        raise OSError("disk full")
+
+    journal._write_batch = failing_write
+    logging.getLogger("app.services.state_journal").setLevel(logging.CRITICAL)
+    journal.record_tank(601, "Stop")
+    journal.record_tank(101, "Run")
+    await journal._flush_task
+    check("쓰기 실패한 기록은 버퍼에 남음", journal.get_stats()["pending"] == 2)
+    journal._write_batch = write_batch
+    await journal.close()
+    state = StateJournal(state_dir).load()
+    check("다음 flush에서 순서대로 기록", state.tanks[601] == "Stop" and state.tanks[101] == "Run")
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    asyncio.run(restart_cases(check))
+    journal_cases(check)
+    asyncio.run(flush_cases(check))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
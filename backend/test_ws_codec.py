@@ -0,0 +1,224 @@
+"""
+WebSocket SENSOR_UPDATE 형식(ws_codec) 검증 및 벤치마크.
+
+  - 서브프로토콜/쿼리 협상, 연결 시 SENSOR_LAYOUT 전송
+  - 바이너리/MessagePack 프레임을 레이아웃으로 복원한 값이 JSON 형식과 같은지
+  - 새 SENSOR_ID 등장 시 레이아웃 버전 증가 및 재전송
+를 확인하고, 형식별 페이로드 크기와 인코딩/파싱 시간(µs)을 비교한다.
+
+실행: python test_ws_codec.py
+"""
+import asyncio
+import json
+import math
+import sys
+import timeit
+from array import array
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+import msgspec
+from litestar import Litestar, Router
+from litestar.testing import TestClient
+
+from app.controllers.websocket import websocket_handler
+from app.models.packet import decode_sensor
+from app.models.protocol import STATUS_CODES
+from app.services.tcp_bridge import UNIT_TO_TANK_ID
+from app.services.websocket_service import WebSocketManager
+from app.services.ws_codec import HEADER, SensorFrameEncoder, SensorJsonEncoder, negotiate
+
+SENSOR_IDS = [1100, 1101, 1102, 1103]
+
+
+def make_packet(order, sensor_ids=SENSOR_IDS, malformed=True, time="12:00:00"):
+    values, state, error = [], [], []
+    for index, tank in enumerate(UNIT_TO_TANK_ID):
+        for i, sid in enumerate(sensor_ids):
+            values.append({"TANK_ID": str(tank), "SENSOR_ID": str(sid), "VALUE": "%.2f" % (index * 1.5 + i + order)})
+        state.append({"TANK_ID": tank, "STAGE": 100 + index, "STATUS": STATUS_CODES[index % len(STATUS_CODES)]})
+        error.append({"TANK_ID": str(tank), "CODE": str(index % 3)})
+    if malformed:
+        values[5]["VALUE"] = "ERR"  # 잘못된 값 → NaN / None
+    return decode_sensor(json.dumps({"CMD": "SENSOR", "ORDER": str(order), "DATE": "2026-06-20", "TIME": time,
+                                     "VALUES": values, "STATE": state, "ERROR": error}))
+
+
+def decode_binary(frame, layout):
+    """대시보드 측 디코딩과 같은 방식으로 바이너리 프레임을 푼다."""
+    magic, version, _flags, layout_version, order, _ts, n_tanks, n_sensors = HEADER.unpack_from(frame)
+    pos = HEADER.size
+    n_values = n_tanks * n_sensors
+    values = array("f", frame[pos:pos + 4 * n_values]); pos += 4 * n_values
+    stage = array("H", frame[pos:pos + 2 * n_tanks]); pos += 2 * n_tanks
+    error = array("H", frame[pos:pos + 2 * n_tanks]); pos += 2 * n_tanks
+    status = frame[pos:pos + n_tanks]
+    readings = {}
+    for ti, tank in enumerate(layout["tank_ids"]):
+        for si, sid in enumerate(layout["sensor_ids"]):
+            readings[(tank, sid)] = values[ti * n_sensors + si]
+    return {"magic": magic, "version": version, "layout_version": layout_version, "order": order,
+            "readings": readings, "stage": list(stage), "error": list(error),
+            "status": [layout["status_codes"][c] for c in status]}
+
+
+def same_value(a, b):
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return abs(a - b) < 1e-3
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, data):
+        self.sent.append(("text", data))
+
+    async def send_bytes(self, data):
+        self.sent.append(("bytes", data))
+
+
+async def broadcast_cases(check):
+    manager = WebSocketManager()
+    manager.set_sensor_layout(UNIT_TO_TANK_ID)
+    sockets = {fmt: FakeSocket() for fmt in ("json", "msgpack", "binary")}
+    for fmt, sock in sockets.items():
+        await manager.add_connection(sock, fmt)
+
+    print("\n[케이스 2] 연결 시 레이아웃 전송")
+    check("JSON 연결은 레이아웃 없음", sockets["json"].sent == [])
+    first = json.loads(sockets["binary"].sent[0][1])
+    check("바이너리 연결에 SENSOR_LAYOUT 전송", first["type"] == "SENSOR_LAYOUT" and first["data"]["format"] == "binary")
+
+    print("\n[케이스 3] 형식별 SENSOR_UPDATE 내용 동일성")
+    packet = make_packet(1)
+    for sock in sockets.values():
+        sock.sent.clear()
+    await manager.broadcast_sensor(packet)
+
+    json_msg = json.loads(sockets["json"].sent[0][1])
+    dumped = packet.to_packet().model_dump(by_alias=True)
+    for v in dumped["VALUES"]:
+        if math.isnan(v["VALUE"]):
+            v["VALUE"] = None  # JSON에는 NaN이 없으므로 null
+    check("JSON 형식 유지 (VALUE 숫자, 형식 오류 null)", json_msg == {"type": "SENSOR_UPDATE", "data": dumped})
+    json_encoder = SensorJsonEncoder()
+    times = ["12:%02d:%02d" % divmod(second, 60) for second in range(120)]
+    encoded = [json.loads(json_encoder.encode(make_packet(1, time=t)))["data"]["TIME"] for t in times]
+    check("TIME이 매초 바뀌어도 문자열 메모는 늘지 않음", encoded == times
+          and len(json_encoder._quoted) == 1 + len(STATUS_CODES) + 3)
+
+    kinds = [k for k, _ in sockets["binary"].sent]
+    check("센서 추가로 레이아웃 재전송 후 프레임", kinds == ["text", "bytes"])
+    layout = json.loads(sockets["binary"].sent[0][1])["data"]
+    check("레이아웃 센서 순서", layout["sensor_ids"] == SENSOR_IDS and layout["tank_ids"] == UNIT_TO_TANK_ID)
+    decoded = decode_binary(sockets["binary"].sent[1][1], layout)
+    vector = packet.vector
+    expected = {k: v for k, v in zip(zip(vector.tank_ids, vector.sensor_ids), vector.values)}
+    check("바이너리 값 복원", all(same_value(decoded["readings"][k], v) for k, v in expected.items()))
+    check("바이너리 헤더", decoded["magic"] == b"SU" and decoded["order"] == 1
+          and decoded["layout_version"] == layout["version"])
+    check("바이너리 STAGE/STATUS/ERROR", decoded["stage"] == [s.stage for s in packet.state]
+          and decoded["status"] == [s.status for s in packet.state]
+          and decoded["error"] == [int(e.code) for e in packet.error])
+
+    mp_layout = json.loads(sockets["msgpack"].sent[0][1])["data"]
+    mp = msgspec.msgpack.decode(sockets["msgpack"].sent[1][1])
+    n_sensors = len(mp_layout["sensor_ids"])
+    ok = True
+    for (tank, sid), v in expected.items():
+        got = mp["VALUES"][mp_layout["tank_ids"].index(tank) * n_sensors + mp_layout["sensor_ids"].index(sid)]
+        ok &= (got is None) if math.isnan(v) else got == v
+    check("MessagePack 값 복원 (float64 그대로)", ok)
+
+    print("\n[케이스 4] 레이아웃 변경 시에만 재전송")
+    for sock in sockets.values():
+        sock.sent.clear()
+    await manager.broadcast_sensor(make_packet(2))
+    check("같은 레이아웃이면 프레임만", [k for k, _ in sockets["binary"].sent] == ["bytes"])
+    version = manager.sensor_encoder.layout_version
+    sockets["binary"].sent.clear()
+    await manager.broadcast_sensor(make_packet(3, SENSOR_IDS + [800]))
+    check("새 SENSOR_ID → 레이아웃 버전 증가 + 재전송",
+          manager.sensor_encoder.layout_version == version + 1
+          and [k for k, _ in sockets["binary"].sent] == ["text", "bytes"])
+
+
+def negotiate_cases(check):
+    print("\n[케이스 1] 형식 협상")
+    check("서브프로토콜 우선", negotiate(["foo", "sensor.binary.v1"], "json") == ("binary", "sensor.binary.v1"))
+    check("쿼리 파라미터", negotiate([], "msgpack") == ("msgpack", None))
+    check("기본값 JSON", negotiate([], None) == ("json", None))
+
+    app = Litestar(route_handlers=[Router(path="/ws", route_handlers=[websocket_handler])])
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/status", subprotocols=["sensor.binary.v1"]) as ws:
+            check("accept 서브프로토콜 응답", ws.accepted_subprotocol == "sensor.binary.v1")
+            check("첫 메시지 SENSOR_LAYOUT", json.loads(ws.receive_text())["type"] == "SENSOR_LAYOUT")
+        with client.websocket_connect("/ws/status") as ws:
+            check("기본 연결은 기존 CONNECTION_STATUS부터", json.loads(ws.receive_text())["type"] != "SENSOR_LAYOUT")
+
+
+def benchmark():
+    print("\n[벤치마크] SENSOR_UPDATE 1건 (32탱크 × 4센서)")
+    packet = make_packet(7, malformed=False)
+    encoder = SensorFrameEncoder(UNIT_TO_TANK_ID)
+    encoder.update_layout(packet)
+
+    json_encoder = SensorJsonEncoder()
+    legacy = packet.to_packet()  # 기존 pydantic SensorPacket (변환 비용은 제외)
+    encoders = {
+        "JSON(dump)": lambda: json.dumps({"type": "SENSOR_UPDATE", "data": legacy.model_dump(by_alias=True)}),
+        "JSON": lambda: json_encoder.encode(packet),
+        "MessagePack": lambda: encoder.encode_msgpack(packet),
+        "binary": lambda: encoder.encode_binary(packet),
+    }
+    payloads = {name: fn() for name, fn in encoders.items()}
+    n_values = len(encoder.tank_ids) * len(encoder.sensor_ids)
+    decoders = {
+        "JSON(dump)": lambda: [v["VALUE"] for v in json.loads(payloads["JSON(dump)"])["data"]["VALUES"]],
+        "JSON": lambda: [v["VALUE"] for v in json.loads(payloads["JSON"])["data"]["VALUES"]],
+        "MessagePack": lambda: msgspec.msgpack.decode(payloads["MessagePack"])["VALUES"],
+        "binary": lambda: array("f", payloads["binary"][HEADER.size:HEADER.size + 4 * n_values]),
+    }
+    n = 2000
+    base_size = len(payloads["JSON(dump)"].encode())
+    base_enc = timeit.timeit(encoders["JSON(dump)"], number=n) / n * 1e6
+    base_dec = timeit.timeit(decoders["JSON(dump)"], number=n) / n * 1e6
+    print(f"  {'형식':<12}{'크기(B)':>9}{'인코딩(µs)':>12}{'파싱(µs)':>11}")
+    for name in encoders:
+        size = len(payloads[name]) if isinstance(payloads[name], bytes) else len(payloads[name].encode())
+        t_enc = timeit.timeit(encoders[name], number=n) / n * 1e6
+        t_dec = timeit.timeit(decoders[name], number=n) / n * 1e6
+        print(f"  {name:<12}{size:>9}{t_enc:>12.1f}{t_dec:>11.1f}   "
+              f"(크기 x{base_size / size:.1f}, 인코딩 x{base_enc / t_enc:.1f}, 파싱 x{base_dec / t_dec:.1f})")
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    negotiate_cases(check)
+    asyncio.run(broadcast_cases(check))
+    benchmark()
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
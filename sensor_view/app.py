@@ -3,10 +3,23 @@ import sqlite3
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
+import numpy as np
 import pandas as pd
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib import dates as mdates
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
 
+from plot_engine import clamp_window, fetch_plot_series, normalize_time, point_count
+from query_worker import QueryJob, QueryWorker
+from series_selection import (
+    SeriesSelection,
+    fetch_sensor_counts,
+    fetch_series_catalog,
+    iter_readings,
+    time_window,
+)
+from virtual_table import READINGS_COLUMNS, ReadingsPager, VirtualTable, compile_filters
+
 
 class SensorViewerApp:
     def __init__(self, root: tk.Tk) -> None:
@@ -22,11 +35,18 @@ class SensorViewerApp:
 
         self.sensor_id_list: list[int] = []  # 하위 호환용 (단일 sensor_id 선택 시)
         self.tank_sensor_list: list[tuple[str, int]] = []  # (tank_id, sensor_id) 목록 — DB의 실제 시계열 개수 반영
-        self.table_data: list[tuple] = []
-        self.filtered_data: list[tuple] = []  # 필터된 데이터 (현재 테이블에 표시된 데이터)
+        self.table_criteria: tuple[str, list, SeriesSelection | None] | None = None  # Load Data 시점의 조회 조건 (필터 적용 기준)
+        self.table_total = 0  # 필터 적용 전 행 수
+        self.plot_state: dict | None = None  # 현재 그래프의 조회 조건과 라벨별 Line2D (확대 시 재조회용)
+        self._zoom_after_id: str | None = None
+        self._xlim_cid: int | None = None
 
         self._build_ui()
 
+        # DB 조회/CSV 쓰기/그래프 데이터 준비는 워커 스레드에서 실행 (Esc 또는 Cancel로 중단)
+        self.worker = QueryWorker(self.root, self.status_var.set)
+        self.root.bind("<Escape>", lambda e: self.cancel_query())
+
     def _build_ui(self) -> None:
         top_frame = ttk.Frame(self.root, padding=8)
         top_frame.pack(fill="x")
@@ -96,6 +116,9 @@ class SensorViewerApp:
         ttk.Button(button_frame, text="Export CSV", command=self.export_csv).pack(
             fill="x", pady=2
         )
+        ttk.Button(button_frame, text="Cancel", command=self.cancel_query).pack(
+            fill="x", pady=2
+        )
 
         # 데이터 테이블 프레임 (DB Browser 스타일)
         table_frame = ttk.LabelFrame(self.root, text="Data Table", padding=8)
@@ -105,7 +128,7 @@ class SensorViewerApp:
         filter_frame = ttk.Frame(table_frame)
         filter_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 4))
 
-        columns = ("id", "packet_id", "tank_id", "sensor_id", "value")
+        columns = READINGS_COLUMNS
         self.filter_vars: dict[str, tk.StringVar] = {}
         for i, col in enumerate(columns):
             ttk.Label(filter_frame, text=col, width=12, anchor="center").grid(row=0, column=i, padx=2)
@@ -118,20 +141,9 @@ class SensorViewerApp:
         ttk.Button(filter_frame, text="Filter", command=self.apply_filter).grid(row=1, column=len(columns), padx=6)
         ttk.Button(filter_frame, text="Clear", command=self.clear_filter).grid(row=1, column=len(columns)+1, padx=2)
 
-        # Treeview 테이블
-        self.data_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=8)
-        for col in columns:
-            self.data_tree.heading(col, text=col)
-            self.data_tree.column(col, width=100, anchor="center")
-        
-        # 스크롤바
-        tree_scroll_y = ttk.Scrollbar(table_frame, orient="vertical", command=self.data_tree.yview)
-        tree_scroll_x = ttk.Scrollbar(table_frame, orient="horizontal", command=self.data_tree.xview)
-        self.data_tree.configure(yscrollcommand=tree_scroll_y.set, xscrollcommand=tree_scroll_x.set)
-        
-        self.data_tree.grid(row=1, column=0, sticky="nsew")
-        tree_scroll_y.grid(row=1, column=1, sticky="ns")
-        tree_scroll_x.grid(row=2, column=0, sticky="ew")
+        # 가상 테이블: 보이는 행만 그리고 스크롤할 때 DB에서 페이지 단위로 읽는다
+        self.table = VirtualTable(table_frame, columns)
+        self.table.grid(row=1, column=0, sticky="nsew")
         table_frame.grid_rowconfigure(1, weight=1)
         table_frame.grid_columnconfigure(0, weight=1)
 
@@ -141,6 +153,8 @@ class SensorViewerApp:
         self.figure = Figure(figsize=(8, 4), dpi=100)
         self.ax = self.figure.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.figure, master=chart_frame)
+        # 툴바 확대/이동 후 보이는 구간만 화면 해상도로 다시 조회한다
+        NavigationToolbar2Tk(self.canvas, chart_frame).pack(side="bottom", fill="x")
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
         status_bar = ttk.Label(
@@ -168,23 +182,51 @@ class SensorViewerApp:
             messagebox.showerror("Not Found", f"DB not found:\n{db_path}")
             return
 
+        self.worker.submit(
+            "Load Info",
+            lambda job: self._query_metadata(job, db_path),
+            self._on_metadata_loaded,
+            lambda exc: messagebox.showerror("DB Error", str(exc)),
+        )
+
+    def _query_metadata(self, job: QueryJob, db_path: str) -> tuple | None:
+        """(워커 스레드) 시간 범위, 탱크×센서별 행 수, 전체 행 수. 필수 테이블이 없으면 None."""
+        conn = job.connect(db_path)
         try:
-            with sqlite3.connect(db_path) as conn:
-                if not self._has_required_tables(conn):
-                    messagebox.showerror(
-                        "Invalid DB",
-                        "Required tables not found. Expecting 'packets' and 'readings'.",
-                    )
-                    return
-
-                min_time, max_time = self._fetch_time_range(conn)
-                sensor_counts = self._fetch_sensor_counts(conn)
+            if not self._has_required_tables(conn):
+                return None
+            job.progress("time range")
+            min_time, max_time = self._fetch_time_range(conn)
+            catalog = fetch_series_catalog(conn)
+            if catalog is not None:
+                sensor_counts = catalog
+                total_readings = sum(count for _, _, count in catalog)
+            else:
+                # 카탈로그가 없거나 아직 채우는 중인 DB: readings 전체 스캔
+                job.progress("sensor counts", force=True)
+                sensor_counts = fetch_sensor_counts(conn)
+                job.progress("total rows", force=True)
                 total_readings = self._fetch_total_readings(conn)
+            return min_time, max_time, sensor_counts, total_readings, catalog is not None
+        finally:
+            conn.close()
 
-            self._update_info(min_time, max_time, sensor_counts, total_readings)
-            self.status_var.set("DB info loaded.")
-        except sqlite3.Error as exc:
-            messagebox.showerror("DB Error", str(exc))
+    def _on_metadata_loaded(self, result: tuple | None) -> None:
+        if result is None:
+            messagebox.showerror(
+                "Invalid DB",
+                "Required tables not found. Expecting 'packets' and 'readings'.",
+            )
+            self.status_var.set("Invalid DB.")
+            return
+        *info, from_catalog = result
+        self._update_info(*info)
+        self.status_var.set("DB info loaded (series catalog)." if from_catalog else "DB info loaded.")
+
+    def cancel_query(self) -> None:
+        """실행 중인 조회/내보내기/그래프 작업 취소."""
+        if not self.worker.cancel():
+            self.status_var.set("Nothing to cancel.")
 
     def _has_required_tables(self, conn: sqlite3.Connection) -> bool:
         rows = conn.execute(
@@ -206,16 +248,6 @@ class SensorViewerApp:
         row = conn.execute("SELECT COUNT(*) FROM readings").fetchone()
         return int(row[0]) if row else 0
 
-    def _fetch_sensor_counts(self, conn: sqlite3.Connection) -> list[tuple[str, int, int]]:
-        """(tank_id, sensor_id) 조합별 행 개수 조회. 동일 sensor_id가 여러 탱크에 있으면 각각 별도 시계열로 센다."""
-        rows = conn.execute(
-            """SELECT tank_id, sensor_id, COUNT(*)
-               FROM readings
-               GROUP BY tank_id, sensor_id
-               ORDER BY tank_id, sensor_id"""
-        ).fetchall()
-        return [(str(tank_id), int(sensor_id), int(count)) for tank_id, sensor_id, count in rows]
-
     def _update_info(
         self,
         min_time: str | None,
@@ -253,154 +285,269 @@ class SensorViewerApp:
         if "~" in label:
             self.end_var.set(label.split("~")[1].strip())
 
-    def _fetch_readings_by_criteria(self, limit: int | None = None) -> list[tuple]:
-        """날짜·탱크·센서 조건에 맞는 readings 조회. limit=None이면 전체, 정수면 해당 개수만."""
-        db_path = self.db_path_var.get().strip()
-        if not db_path:
-            return []
+    def _build_criteria(self) -> tuple[str, str, str, list, SeriesSelection | None] | None:
+        """날짜 구간, 탱크 조건(readings WHERE 조각과 파라미터), 선택한 시계열. 필수 입력이 없으면 None.
+
+        선택한 (tank_id, sensor_id)는 OR 조건으로 풀지 않고 SeriesSelection(임시 테이블 조인)으로 넘긴다.
+        시각은 normalize_time으로 맞추며(날짜만 입력 가능), 형식이 틀리면 ValueError.
+        """
         start_text = self.start_var.get().strip()
         end_text = self.end_var.get().strip()
         if not start_text or not end_text:
-            return []
+            return None
+        start_text, end_text = normalize_time(start_text), normalize_time(end_text, end=True)
         selected_pairs = self._get_selected_tank_sensor_pairs()
         tank_filter = self.tank_var.get().strip()
 
-        query = """
-            SELECT r.id, r.packet_id, r.tank_id, r.sensor_id, r.value
-            FROM readings r
-            JOIN packets p ON r.packet_id = p.id
-            WHERE p.created_at BETWEEN ? AND ?
-        """
-        params: list = [start_text, end_text]
-        if selected_pairs:
-            conds = " OR ".join(
-                "(r.tank_id = ? AND r.sensor_id = ?)" for _ in selected_pairs
-            )
-            query += f" AND ({conds})"
-            for t_id, s_id in selected_pairs:
-                params.append(t_id)
-                params.append(s_id)
+        where, params = "1", []
         if tank_filter:
-            query += " AND r.tank_id = ?"
-            params.append(tank_filter)
-        query += " ORDER BY r.id ASC"
-        if limit is not None:
-            query += f" LIMIT {limit}"
+            where, params = "r.tank_id = ?", [tank_filter]
+        selection = None
+        if selected_pairs:
+            selection = SeriesSelection(selected_pairs, total=len(self.tank_sensor_list) or None)
+        return start_text, end_text, where, params, selection
 
-        try:
-            with sqlite3.connect(db_path) as conn:
-                return conn.execute(query, params).fetchall()
-        except sqlite3.Error:
-            return []
+    @staticmethod
+    def _readings_where(start: str, end: str, where: str, params: list) -> tuple[str, list]:
+        """날짜 구간을 포함한 readings 조건 (테이블/CSV용)."""
+        window, window_params = time_window(start, end)
+        return f"{window} AND {where}", window_params + params
 
-    def load_data_table(self) -> None:
-        """DB Browser처럼 readings 테이블 데이터를 테이블에 표시 (최대 5000행)."""
+    def _fetch_readings(
+        self,
+        job: QueryJob,
+        db_path: str,
+        where: str,
+        params: list,
+        selection: SeriesSelection | None,
+        chunk_rows: int = 50000,
+    ):
+        """(워커 스레드) 조건에 맞는 readings를 chunk_rows씩 읽어 내보낸다. 청크마다 취소 확인과 진행률 보고."""
+        conn = job.connect(db_path)
+        try:
+            fetched = 0
+            for rows in iter_readings(conn, where, params, selection, chunk_rows):
+                job.check()
+                fetched += len(rows)
+                job.progress(f"{fetched:,} rows")
+                yield rows
+        finally:
+            conn.close()
+
+    def _require_criteria(self) -> tuple[str, str, str, str, list, SeriesSelection | None] | None:
+        """DB 경로와 날짜·탱크·센서 조건. 빠진 입력이 있으면 경고 후 None."""
         db_path = self.db_path_var.get().strip()
         if not db_path:
             messagebox.showwarning("Missing DB", "Please select a database file.")
-            return
-        start_text = self.start_var.get().strip()
-        end_text = self.end_var.get().strip()
-        if not start_text or not end_text:
+            return None
+        try:
+            criteria = self._build_criteria()
+        except ValueError:
+            # 워커 스레드의 "DB Error" 대신 입력 단계에서 알린다
+            messagebox.showwarning("Invalid Range", "Start/End must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS.")
+            return None
+        if criteria is None:
             messagebox.showwarning("Missing Range", "Please enter start and end time.")
+            return None
+        return db_path, *criteria
+
+    def load_data_table(self) -> None:
+        """DB Browser처럼 readings 테이블 데이터를 테이블에 표시 (스크롤 위치의 페이지만 조회, 행 수 제한 없음)."""
+        required = self._require_criteria()
+        if required is None:
             return
+        _, start, end, where, params, selection = required
 
-        try:
-            rows = self._fetch_readings_by_criteria(limit=5000)
-            self.table_data = rows
-            self.clear_filter()
-            self.status_var.set(f"Loaded {len(rows)} rows (max 5000 for table).")
-        except sqlite3.Error as exc:
+        self.table_criteria = (*self._readings_where(start, end, where, params), selection)
+        self.table_total = 0
+        self.clear_filter()
+
+    def _show_table(self, where: str, params: list, selection: SeriesSelection | None, on_loaded=None) -> None:
+        """조건에 맞는 readings를 가상 테이블에 연결. 행 수와 첫 화면은 워커 스레드에서 조회한다."""
+        db_path = self.db_path_var.get().strip()
+        pager = ReadingsPager(db_path, where, params, selection)
+        visible = self.table.visible_rows()
+
+        def query(job: QueryJob) -> ReadingsPager:
+            pager.set_interrupt(lambda: job.cancelled)
+            try:
+                pager.count()
+                pager.rows(0, visible)
+            except BaseException:
+                pager.close()
+                raise
+            pager.set_interrupt(None)
+            return pager
+
+        def on_done(result: ReadingsPager) -> None:
+            self.table.set_pager(result)
+            if on_loaded is not None:
+                on_loaded(result.count())
+
+        def on_error(exc: Exception) -> None:
+            self.table.set_pager(None)
             messagebox.showerror("DB Error", str(exc))
 
+        self.worker.submit("Load Data", query, on_done, on_error)
+
     def apply_filter(self) -> None:
-        """필터 조건에 맞는 데이터만 표시"""
-        columns = ("id", "packet_id", "tank_id", "sensor_id", "value")
-        
-        # 필터 조건 가져오기
-        filters = {col: self.filter_vars[col].get().strip() for col in columns}
-
-        # 기존 데이터 삭제
-        for item in self.data_tree.get_children():
-            self.data_tree.delete(item)
-
-        # 필터링된 데이터 저장 및 삽입
-        self.filtered_data = []
-        for row in self.table_data:
-            match = True
-            for i, col in enumerate(columns):
-                filter_val = filters[col]
-                if filter_val:
-                    # 문자열 포함 비교 (대소문자 무시)
-                    if filter_val.lower() not in str(row[i]).lower():
-                        match = False
-                        break
-            if match:
-                self.filtered_data.append(row)
-                self.data_tree.insert("", "end", values=row)
-
-        self.status_var.set(f"Showing {len(self.filtered_data)} of {len(self.table_data)} rows.")
+        """필터 조건에 맞는 데이터만 표시
+
+        숫자 열(id, packet_id, sensor_id, value)은 '12', '10..20', '>=5' 형식의 정확히/범위 비교,
+        tank_id는 접두사 비교로 SQL 조건을 만들어 DB에서 거른다.
+        """
+        if self.table_criteria is None:
+            return
+        filters = {col: self.filter_vars[col].get() for col in READINGS_COLUMNS}
+        try:
+            tank_ids = sorted({tank_id for tank_id, _ in self.tank_sensor_list}) or None
+            filter_sql, filter_params = compile_filters(filters, tank_ids)
+        except ValueError as exc:
+            messagebox.showwarning(
+                "Invalid Filter",
+                f"'{exc}' filter must be a number, a range like 10..20, or >=, <=, >, < a number.",
+            )
+            return
+        where, params, selection = self.table_criteria
+
+        self._show_table(
+            where + filter_sql,
+            params + filter_params,
+            selection,
+            lambda total: self.status_var.set(f"Showing {total} of {self.table_total} rows."),
+        )
 
     def clear_filter(self) -> None:
         """필터 초기화 및 전체 데이터 표시"""
         # 필터 입력 초기화
         for var in self.filter_vars.values():
             var.set("")
+        if self.table_criteria is None:
+            return
 
-        # 기존 데이터 삭제
-        for item in self.data_tree.get_children():
-            self.data_tree.delete(item)
-
-        # 전체 데이터 삽입 및 필터 데이터 초기화
-        self.filtered_data = list(self.table_data)
-        for row in self.table_data:
-            self.data_tree.insert("", "end", values=row)
+        self._show_table(*self.table_criteria, self._on_table_loaded)
 
-        self.status_var.set(f"Showing {len(self.table_data)} rows.")
+    def _on_table_loaded(self, total: int) -> None:
+        self.table_total = total
+        self.status_var.set(f"Loaded {total} rows.")
 
     def plot_selected(self) -> None:
-        """날짜·선택 조건에 맞는 전체 데이터를 그래프로 표시 (제한 없음)."""
-        db_path = self.db_path_var.get().strip()
-        if not db_path:
-            messagebox.showwarning("Missing DB", "Please select a database file.")
-            return
-        start_text = self.start_var.get().strip()
-        end_text = self.end_var.get().strip()
-        if not start_text or not end_text:
-            messagebox.showwarning("Missing Range", "Please enter start and end time.")
-            return
+        """날짜·선택 조건에 맞는 전체 구간을 시간 축 그래프로 표시.
 
-        rows = self._fetch_readings_by_criteria(limit=None)
-        if not rows:
-            messagebox.showwarning("No Data", "No data in the selected date range and filters.")
-            self._clear_plot()
+        행은 청크로 읽으면서 시계열마다 픽셀 열 단위 최소/최대로 줄이므로 행 수와 무관하게
+        화면 폭만큼의 점만 그린다. 확대하면 보이는 구간을 다시 조회해 더 촘촘하게 그린다.
+        """
+        required = self._require_criteria()
+        if required is None:
             return
-
-        df = pd.DataFrame(
-            rows,
-            columns=["id", "packet_id", "tank_id", "sensor_id", "value"]
+        db_path, start, end, where, params, selection = required
+        width = self.canvas.get_tk_widget().winfo_width()
+        self.worker.submit(
+            "Plot",
+            lambda job: self._query_plot(job, db_path, where, params, selection, start, end, width),
+            lambda result: self._draw_plot(result, db_path, where, params, selection, start, end),
+            lambda exc: messagebox.showerror("DB Error", str(exc)),
         )
-        df["value"] = pd.to_numeric(df["value"], errors="coerce")
-        df = df.dropna(subset=["value"])
 
-        if df.empty:
-            messagebox.showinfo("No Data", "No valid data to plot.")
+    def _query_plot(
+        self,
+        job: QueryJob,
+        db_path: str,
+        where: str,
+        params: list,
+        selection: SeriesSelection | None,
+        start: str,
+        end: str,
+        width: int,
+    ) -> tuple[list, int]:
+        """(워커 스레드) [start, end] 구간을 width 픽셀에 맞춰 줄인 시계열."""
+
+        def on_chunk(fetched: int) -> None:
+            job.check()
+            job.progress(f"{fetched:,} rows")
+
+        conn = job.connect(db_path)
+        try:
+            return fetch_plot_series(conn, where, params, start, end, width, selection, on_chunk=on_chunk)
+        finally:
+            conn.close()
+
+    def _draw_plot(
+        self,
+        result: tuple[list, int],
+        db_path: str,
+        where: str,
+        params: list,
+        selection: SeriesSelection | None,
+        start: str,
+        end: str,
+    ) -> None:
+        """(메인 스레드) 준비된 시계열로 그래프를 그린다."""
+        series, rows = result
+        if not rows:
+            messagebox.showwarning("No Data", "No data in the selected date range and filters.")
             self._clear_plot()
+            self.status_var.set("No data.")
             return
 
-        df["tank_sensor"] = df["tank_id"].astype(str) + "-" + df["sensor_id"].astype(str)
-        self.ax.clear()
-        for label in df["tank_sensor"].unique():
-            subset = df[df["tank_sensor"] == label]
-            self.ax.plot(range(len(subset)), subset["value"].values, label=label)
+        self._clear_plot(draw=False)
+        lines = {}
+        for s in series:
+            (lines[s.label],) = self.ax.plot(s.x, s.y, label=s.label)
         self.ax.set_title("Sensor Data (Full by date/filter)")
-        self.ax.set_xlabel("Index")
+        self.ax.set_xlabel("Time")
         self.ax.set_ylabel("Value")
         self.ax.grid(True, linestyle="--", alpha=0.3)
         self.ax.legend(loc="upper right")
+        self.figure.autofmt_xdate()
         self.canvas.draw()
 
-        self.status_var.set(f"Plotted {len(df)} data points (full).")
+        self.plot_state = {"db_path": db_path, "where": where, "params": params, "selection": selection,
+                           "start": start, "end": end, "lines": lines}
+        self._xlim_cid = self.ax.callbacks.connect("xlim_changed", self._on_xlim_changed)
+        self.status_var.set(f"Plotted {rows} rows as {point_count(series)} points.")
+
+    def _on_xlim_changed(self, ax) -> None:
+        # 툴바로 확대/이동하는 동안 연속으로 불리므로 마지막 변경 후 0.3초 뒤에 한 번만 재조회
+        if self._zoom_after_id is not None:
+            self.root.after_cancel(self._zoom_after_id)
+        self._zoom_after_id = self.root.after(300, self._refetch_visible)
+
+    def _refetch_visible(self) -> None:
+        self._zoom_after_id = None
+        state = self.plot_state
+        if state is None:
+            return
+        # matplotlib 날짜 숫자(일 단위) → epoch 초
+        epoch = mdates.date2num(np.datetime64("1970-01-01T00:00:00"))
+        x0, x1 = ((x - epoch) * 86400.0 for x in self.ax.get_xlim())
+        window = clamp_window(x0, x1, state["start"], state["end"])
+        if window is None:
+            return
+        width = self.canvas.get_tk_widget().winfo_width()
+        self.worker.submit(
+            "Zoom",
+            lambda job: self._query_plot(
+                job, state["db_path"], state["where"], state["params"], state["selection"], *window, width
+            ),
+            lambda result: self._update_plot(state, result, window),
+            lambda exc: messagebox.showerror("DB Error", str(exc)),
+        )
+
+    def _update_plot(self, state: dict, result: tuple[list, int], window: tuple[str, str]) -> None:
+        """(메인 스레드) 확대 구간 재조회 결과로 선 데이터만 교체 (축 범위는 유지)."""
+        if state is not self.plot_state:
+            return
+        series, rows = result
+        by_label = {s.label: s for s in series}
+        for label, line in state["lines"].items():
+            s = by_label.get(label)
+            if s is None:
+                line.set_data([], [])
+            else:
+                line.set_data(s.x, s.y)
+        self.canvas.draw_idle()
+        self.status_var.set(f"{window[0]} ~ {window[1]}: {rows} rows as {point_count(series)} points.")
 
     def _get_selected_sensor_ids(self) -> list[int]:
         indices = self.sensor_listbox.curselection()
@@ -410,27 +557,23 @@ class SensorViewerApp:
         indices = self.sensor_listbox.curselection()
         return [self.tank_sensor_list[i] for i in indices]
 
-    def _clear_plot(self) -> None:
+    def _clear_plot(self, draw: bool = True) -> None:
+        if self._xlim_cid is not None:
+            self.ax.callbacks.disconnect(self._xlim_cid)
+            self._xlim_cid = None
+        self.plot_state = None
         self.ax.clear()
         self.ax.set_title("Sensor Data")
-        self.canvas.draw()
+        if draw:
+            self.canvas.draw()
 
     def export_csv(self) -> None:
         """날짜·선택 조건에 맞는 전체 데이터를 CSV로 내보내기 (제한 없음)."""
-        db_path = self.db_path_var.get().strip()
-        if not db_path:
-            messagebox.showwarning("Missing DB", "Please select a database file.")
-            return
-        start_text = self.start_var.get().strip()
-        end_text = self.end_var.get().strip()
-        if not start_text or not end_text:
-            messagebox.showwarning("Missing Range", "Please enter start and end time.")
-            return
-
-        rows = self._fetch_readings_by_criteria(limit=None)
-        if not rows:
-            messagebox.showwarning("No Data", "No data in the selected date range and filters.")
+        required = self._require_criteria()
+        if required is None:
             return
+        db_path, start, end, where, params, selection = required
+        where, params = self._readings_where(start, end, where, params)
 
         save_path = filedialog.asksaveasfilename(
             title="Save CSV",
@@ -440,23 +583,59 @@ class SensorViewerApp:
         if not save_path:
             return
 
+        self.worker.submit(
+            "Export CSV",
+            lambda job: self._write_csv(job, db_path, where, params, selection, save_path),
+            lambda rows: self._on_csv_saved(save_path, rows),
+            self._on_csv_error,
+        )
+
+    def _write_csv(
+        self,
+        job: QueryJob,
+        db_path: str,
+        where: str,
+        params: list,
+        selection: SeriesSelection | None,
+        save_path: str,
+    ) -> int:
+        """(워커 스레드) 청크 단위로 CSV에 이어 쓴다. 취소/실패/결과 없음이면 쓰던 파일을 지운다."""
+        written = 0
         try:
-            df = pd.DataFrame(
-                rows,
-                columns=["id", "packet_id", "tank_id", "sensor_id", "value"]
-            )
-            df.to_csv(save_path, index=False, encoding="utf-8-sig")
-            self.status_var.set(f"CSV saved: {save_path} ({len(df)} rows, full).")
-        except OSError as e:
+            for rows in self._fetch_readings(job, db_path, where, params, selection):
+                df = pd.DataFrame(rows, columns=["id", "packet_id", "tank_id", "sensor_id", "value"])
+                df.to_csv(
+                    save_path,
+                    index=False,
+                    encoding="utf-8-sig" if written == 0 else "utf-8",
+                    mode="w" if written == 0 else "a",
+                    header=written == 0,
+                )
+                written += len(df)
+        except BaseException:
+            if written and os.path.exists(save_path):
+                os.remove(save_path)
+            raise
+        return written
+
+    def _on_csv_saved(self, save_path: str, rows: int) -> None:
+        if not rows:
+            messagebox.showwarning("No Data", "No data in the selected date range and filters.")
+            self.status_var.set("No data.")
+            return
+        self.status_var.set(f"CSV saved: {save_path} ({rows} rows, full).")
+
+    def _on_csv_error(self, exc: Exception) -> None:
+        if isinstance(exc, OSError):
             messagebox.showerror(
                 "Save Error",
-                f"Cannot write file.\n\n{e}",
+                f"Cannot write file.\n\n{exc}",
             )
             self.status_var.set("CSV save failed (file/path error).")
-        except Exception as e:
+        else:
             messagebox.showerror(
                 "CSV Export Error",
-                f"Export failed.\n\n{e}",
+                f"Export failed.\n\n{exc}",
             )
             self.status_var.set("CSV export failed.")
 
@@ -0,0 +1,248 @@
+"""
+sensor_view 일괄 내보내기 (화면 없이).
+
+DB와 시간 범위를 주면 탱크마다 데이터 파일(CSV 또는 Parquet)과 PNG 그래프를 만든다.
+탱크별 작업은 프로세스 풀에서 병렬로 실행하고, 프로세스마다 읽기 전용(mode=ro) 연결을 따로 연다.
+조회는 뷰어와 같은 코드(series_selection, plot_engine)를 쓴다.
+
+  - 데이터: Export CSV와 같은 열/순서 (id 순), 청크 단위로 이어 쓴다
+  - 그래프: Plot과 같은 픽셀 열 최소/최대 축소, 탱크의 모든 시계열
+  - Parquet은 pyarrow, PNG는 matplotlib이 필요하다 (없으면 시작 전에 알림)
+
+실행: python batch.py sensor_data.db --start "2026-06-01 00:00:00" --end "2026-06-02 00:00:00" -o report
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from plot_engine import fetch_plot_series, point_count
+from series_selection import (
+    SeriesSelection, connect_read_only, fetch_sensor_counts, fetch_series_catalog, iter_readings, time_window,
+)
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+CSV_COLUMNS = ["id", "packet_id", "tank_id", "sensor_id", "value"]
+PNG_DPI = 100
+PNG_HEIGHT_IN = 6
+
+
+def connect_ro(db_path: str) -> sqlite3.Connection:
+    return connect_read_only(db_path)
+
+
+def _write_csv(chunks, path: str) -> int:
+    written = 0
+    for rows in chunks:
+        df = pd.DataFrame(rows, columns=CSV_COLUMNS)
+        df.to_csv(
+            path,
+            index=False,
+            encoding="utf-8-sig" if written == 0 else "utf-8",
+            mode="w" if written == 0 else "a",
+            header=written == 0,
+        )
+        written += len(df)
+    return written
+
+
+def _write_parquet(chunks, path: str) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()), ("packet_id", pa.int64()), ("tank_id", pa.string()),
+        ("sensor_id", pa.int64()), ("value", pa.float64()),
+    ])
+    written = 0
+    writer = None
+    try:
+        for rows in chunks:
+            df = pd.DataFrame(rows, columns=CSV_COLUMNS)
+            df["tank_id"] = df["tank_id"].astype(str)
+            if writer is None:
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            written += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def _render_png(series, tank_id: str, start: str, end: str, width: int, path: str) -> None:
+    # pyplot 없이 Figure만 사용 (화면/GUI 백엔드 불필요, 프로세스마다 독립)
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(width / PNG_DPI, PNG_HEIGHT_IN), dpi=PNG_DPI)
+    ax = figure.add_subplot(111)
+    for s in series:
+        ax.plot(s.x, s.y, label=s.label)
+    ax.set_title(f"Tank {tank_id}  ({start} ~ {end})")
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Value")
+    ax.grid(True, linestyle="--", alpha=0.3)
+    ax.legend(loc="upper right")
+    figure.autofmt_xdate()
+    figure.savefig(path)
+
+
+def export_tank(
+    db_path: str,
+    tank_id: str,
+    pairs: list[tuple[str, int]],
+    total_series: int,
+    start: str,
+    end: str,
+    out_dir: str,
+    data_format: str,
+    png: bool,
+    width: int,
+) -> dict:
+    """(풀 프로세스) 탱크 하나의 데이터 파일과 그래프. 결과가 없으면 파일을 만들지 않는다."""
+    started, cpu_started = time.perf_counter(), time.process_time()
+    result = {"tank_id": tank_id, "rows": 0, "points": 0, "files": []}
+    selection = SeriesSelection(pairs, total=total_series)
+    window, window_params = time_window(start, end)
+    conn = connect_ro(db_path)
+    try:
+        if data_format != "none":
+            path = os.path.join(out_dir, f"tank_{tank_id}.{data_format}")
+            writer = _write_csv if data_format == "csv" else _write_parquet
+            try:
+                result["rows"] = writer(iter_readings(conn, window, window_params, selection), path)
+            except BaseException:
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+            if result["rows"]:
+                result["files"].append(path)
+        if png:
+            series, rows = fetch_plot_series(conn, "1", [], start, end, width, selection)
+            if data_format == "none":
+                result["rows"] = rows
+            if rows:
+                path = os.path.join(out_dir, f"tank_{tank_id}.png")
+                _render_png(series, tank_id, start, end, width, path)
+                result["points"] = point_count(series)
+                result["files"].append(path)
+    finally:
+        conn.close()
+    result["seconds"] = time.perf_counter() - started
+    result["cpu_seconds"] = time.process_time() - cpu_started
+    return result
+
+
+def _check_optional(data_format: str, png: bool) -> str | None:
+    """필요한 선택 패키지가 없으면 안내 문구."""
+    try:
+        if data_format == "parquet":
+            import pyarrow.parquet  # noqa: F401
+        if png:
+            import matplotlib.figure  # noqa: F401
+    except ImportError as exc:
+        return f"{exc.name} 패키지가 필요합니다 (pip install {exc.name.split('.')[0]}). --no-png / --format csv로 제외할 수 있습니다."
+    return None
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="탱크별 CSV/Parquet + PNG 일괄 내보내기 (병렬)")
+    parser.add_argument("db", help="sensor_data.db 경로")
+    parser.add_argument("--start", help="시작 시각 'YYYY-MM-DD HH:MM:SS' (기본: DB 처음)")
+    parser.add_argument("--end", help="끝 시각 (기본: DB 마지막)")
+    parser.add_argument("-o", "--out-dir", default="batch_out", help="출력 폴더 (기본: batch_out)")
+    parser.add_argument("--format", dest="data_format", choices=("csv", "parquet", "none"), default="csv",
+                        help="데이터 파일 형식 (기본: csv, none이면 그래프만)")
+    parser.add_argument("--no-png", dest="png", action="store_false", help="그래프를 만들지 않음")
+    parser.add_argument("--tanks", nargs="+", help="대상 tank_id (기본: 전체)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--width", type=int, default=1600, help="그래프 폭 픽셀 (기본: 1600)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"DB 파일이 없습니다: {args.db}")
+        return 2
+    message = _check_optional(args.data_format, args.png)
+    if message:
+        print(message)
+        return 2
+
+    conn = connect_ro(args.db)
+    try:
+        min_time, max_time = conn.execute("SELECT MIN(created_at), MAX(created_at) FROM packets").fetchone()
+        catalog = fetch_series_catalog(conn)
+        series = catalog if catalog is not None else fetch_sensor_counts(conn)
+    finally:
+        conn.close()
+    start = args.start or min_time
+    end = args.end or max_time
+    if start is None or end is None:
+        print("packets가 비어 있습니다.")
+        return 1
+
+    by_tank: dict[str, list[tuple[str, int]]] = defaultdict(list)
+    for tank_id, sensor_id, _ in series:
+        by_tank[tank_id].append((tank_id, sensor_id))
+    tanks = sorted(by_tank)
+    if args.tanks:
+        missing = sorted(set(args.tanks) - set(tanks))
+        if missing:
+            print(f"DB에 없는 탱크: {', '.join(missing)}")
+        tanks = [tank_id for tank_id in tanks if tank_id in set(args.tanks)]
+    if not tanks:
+        print("내보낼 탱크가 없습니다.")
+        return 1
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    workers = max(1, min(args.workers, len(tanks)))
+    print(f"{args.db}: {start} ~ {end}, 탱크 {len(tanks)}개, 프로세스 {workers}개 → {args.out_dir}")
+
+    started = time.perf_counter()
+    results, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(export_tank, args.db, tank_id, by_tank[tank_id], len(series), start, end,
+                        args.out_dir, args.data_format, args.png, args.width): tank_id
+            for tank_id in tanks
+        }
+        for future in as_completed(futures):
+            tank_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                failed.append(tank_id)
+                print(f"  [FAIL] tank {tank_id}: {exc}")
+                continue
+            results.append(result)
+            note = "" if result["files"] else " (데이터 없음)"
+            print(f"  tank {tank_id}: {result['rows']:,} rows, {len(result['files'])} files,"
+                  f" {result['seconds']:.2f}s{note}")
+    wall = time.perf_counter() - started
+
+    # 프로세스들이 실제로 쓴 CPU 시간 합 / 벽시계 = 동시에 일한 코어 수 (코어보다 프로세스가 많으면 대기 시간은 빠짐)
+    busy = sum(r["cpu_seconds"] for r in results)
+    print("\n" + "=" * 50)
+    print(f"전체 {sum(r['rows'] for r in results):,} rows, 파일 {sum(len(r['files']) for r in results)}개")
+    print(f"벽시계 {wall:.2f}s (탱크별 CPU 합계 {busy:.2f}s, 병렬 {busy / wall:.1f}x)")
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
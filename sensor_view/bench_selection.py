@@ -0,0 +1,133 @@
+"""
+시계열 선택 조회 벤치마크: OR 조건 vs 임시 테이블 조인.
+
+  - 1 / 10 / 128개 시계열을 골라 행 수(COUNT)와 그래프 조회(fetch_plot_series)를 두 방식으로 비교
+  - OR: (r.tank_id = ? AND r.sensor_id = ?) OR ... (이전 방식)
+  - 조인: SeriesSelection 임시 테이블 + readings(tank_id, sensor_id, packet_id, value) 인덱스
+  - 두 방식의 행 수/그래프 점이 같은지도 확인
+
+DB 경로를 주지 않으면 16 탱크 × 8 센서 × 10,000 패킷 임시 DB를 만든다.
+실제 DB는 백엔드가 시작 후 백그라운드 마이그레이션으로 idx_readings_series를 만든 뒤에 측정한다.
+
+실행: python bench_selection.py [sensor_data.db]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from plot_engine import fetch_plot_series, point_count
+from series_selection import SeriesSelection, connect_read_only, time_window
+
+TANKS = [str(t) for t in (*range(101, 109), *range(201, 209))]
+SENSORS = [1100 + s for s in range(8)]
+BASE = datetime(2026, 6, 1, 0, 0, 0)
+WIDTH = 1200
+
+
+def build_db(path: str, packets: int = 10_000) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE packets (id INTEGER PRIMARY KEY AUTOINCREMENT, order_num INTEGER, created_at DATETIME);
+            CREATE INDEX idx_packets_created_at ON packets(created_at);
+            CREATE TABLE readings (id INTEGER PRIMARY KEY AUTOINCREMENT, packet_id INTEGER, tank_id TEXT,
+                                   sensor_id INTEGER, value REAL);
+        """)
+        for i in range(packets):
+            created = (BASE + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+            packet_id = conn.execute("INSERT INTO packets (order_num, created_at) VALUES (?, ?)",
+                                     (i, created)).lastrowid
+            conn.executemany(
+                "INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, ?, ?, ?)",
+                [(packet_id, t, s, (i % 600) * 0.1 + k) for k, (t, s) in enumerate((t, s) for t in TANKS for s in SENSORS)])
+        conn.execute("CREATE INDEX idx_readings_series ON readings(tank_id, sensor_id, packet_id, value)")
+
+
+def or_where(pairs: list[tuple[str, int]]) -> tuple[str, list]:
+    """이전 _build_criteria의 시계열 선택 조건."""
+    conds = " OR ".join("(r.tank_id = ? AND r.sensor_id = ?)" for _ in pairs)
+    return f"({conds})", [v for pair in pairs for v in pair]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def same_series(a, b) -> bool:
+    return len(a) == len(b) and all(
+        x.label == y.label and np.array_equal(x.x, y.x) and np.allclose(x.y, y.y) for x, y in zip(a, b)
+    )
+
+
+def run() -> int:
+    if len(sys.argv) > 1:
+        db_path = sys.argv[1]
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        print("임시 DB 생성 중 (128 시계열 × 10,000 패킷)...")
+        build_db(db_path)
+
+    conn = connect_read_only(db_path)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_readings_series'").fetchone() is None:
+        print("idx_readings_series가 없습니다. 백엔드를 실행해 백그라운드 마이그레이션으로 인덱스가 만들어진 뒤 측정하세요.")
+    all_pairs = [(t, int(s)) for t, s in conn.execute(
+        "SELECT DISTINCT tank_id, sensor_id FROM readings ORDER BY tank_id, sensor_id")]
+    start, end = conn.execute("SELECT MIN(created_at), MAX(created_at) FROM packets").fetchone()
+    total = conn.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+    print(f"readings {total:,}행, 시계열 {len(all_pairs)}개, {start} ~ {end}\n")
+
+    random.seed(1)
+    failed = 0
+    print(f"{'시계열':>6} | {'행 수':>10} | {'COUNT OR':>9} {'조인':>8} | {'그래프 OR':>9} {'조인':>8} | 배속")
+    for n in (1, 10, 128):
+        pairs = random.sample(all_pairs, min(n, len(all_pairs)))
+        selection = SeriesSelection(pairs, total=len(all_pairs))
+
+        where, params = or_where(pairs)
+        count_or, t_count_or = timed(lambda: conn.execute(
+            f"SELECT COUNT(*) FROM readings r JOIN packets p ON r.packet_id = p.id"
+            f" WHERE p.created_at BETWEEN ? AND ? AND {where}", [start, end, *params]
+        ).fetchone()[0])
+        selection.install(conn)
+        window, window_params = time_window(start, end)
+        count_join, t_count_join = timed(lambda: conn.execute(
+            f"SELECT COUNT(*) FROM readings r JOIN packets p ON r.packet_id = p.id"
+            f" WHERE {window} AND {selection.predicate()}", window_params
+        ).fetchone()[0])
+
+        # OR 방식: 선택 없이 조건으로 거르고 라벨 문자열을 factorize (이전 그래프 조회)
+        (plot_or, _), t_plot_or = timed(lambda: fetch_plot_series(conn, where, params, start, end, WIDTH))
+        (plot_join, _), t_plot_join = timed(lambda: fetch_plot_series(conn, "1", [], start, end, WIDTH, selection))
+        plot_or.sort(key=lambda s: s.label)
+        plot_join.sort(key=lambda s: s.label)
+
+        ok = count_or == count_join and same_series(plot_or, plot_join)
+        failed += not ok
+        print(f"{len(pairs):>6} | {count_join:>10,} | {t_count_or:>8.3f}s {t_count_join:>7.3f}s |"
+              f" {t_plot_or:>8.3f}s {t_plot_join:>7.3f}s | {t_plot_or / t_plot_join:>4.1f}x"
+              f"{'' if ok else '  결과 불일치!'}  ({point_count(plot_join):,}점)")
+
+    conn.close()
+    print("\n" + "=" * 50)
+    if failed:
+        print(f"결과 불일치 {failed}건")
+        return 1
+    print("두 방식 결과 일치 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
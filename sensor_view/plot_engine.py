@@ -0,0 +1,223 @@
+from datetime import datetime, timezone
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from series_selection import SELECTED_SERIES, SeriesSelection, time_window
+
+# created_at은 로컬 시각 문자열이므로 UTC로 보고 epoch 초로 바꿨다가 그대로 되돌려 표시한다 (시간대 변환 없음)
+PLOT_QUERY = """
+    SELECT CAST(strftime('%s', p.created_at) AS INTEGER), r.tank_id || '-' || r.sensor_id, r.value
+    FROM readings r
+    JOIN packets p ON r.packet_id = p.id
+    WHERE {window} AND {where}
+"""
+# 선택한 시계열만: 임시 테이블을 바깥 루프로 고정해 시계열마다 (tank_id, sensor_id, packet_id) 인덱스를
+# 구간만큼 범위 탐색하고, 라벨 대신 정수 code를 읽어 청크를 바로 float64 배열로 바꾼다
+SELECTED_PLOT_QUERY = f"""
+    SELECT CAST(strftime('%s', p.created_at) AS INTEGER), s.code, r.value
+    FROM {SELECTED_SERIES} s
+    CROSS JOIN readings r ON r.tank_id = s.tank_id AND r.sensor_id = s.sensor_id
+    JOIN packets p ON r.packet_id = p.id
+    WHERE {{window}} AND {{where}}
+"""
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def to_epoch(text: str) -> float:
+    return datetime.strptime(text.strip(), TIME_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+def normalize_time(text: str, end: bool = False) -> str:
+    """입력한 시각을 TIME_FORMAT 문자열로. 날짜만 있으면 시작은 그날 00:00:00, 끝은 23:59:59.
+
+    created_at 비교는 문자열 BETWEEN이라 '2026-06-01'을 그대로 끝으로 쓰면 그날 행이 빠진다.
+    형식이 맞지 않으면 ValueError.
+    """
+    text = text.strip()
+    try:
+        return datetime.strptime(text, TIME_FORMAT).strftime(TIME_FORMAT)
+    except ValueError:
+        day = datetime.strptime(text, DATE_FORMAT)
+    if end:
+        day = day.replace(hour=23, minute=59, second=59)
+    return day.strftime(TIME_FORMAT)
+
+
+def from_epoch(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime(TIME_FORMAT)
+
+
+class Series:
+    """그래프 한 줄 (x: datetime64[s], y: float). decimated면 픽셀 열마다 최소/최대 두 점."""
+
+    __slots__ = ("label", "x", "y", "decimated")
+
+    def __init__(self, label: str, x: np.ndarray, y: np.ndarray, decimated: bool) -> None:
+        self.label = label
+        self.x = x
+        self.y = y
+        self.decimated = decimated
+
+
+class MinMaxDecimator:
+    """(시각, 시계열, 값) 청크를 받아 시계열 × 픽셀 열 버킷의 최소/최대로 줄인다.
+
+    - 청크를 받는 즉시 np.minimum.at/np.maximum.at으로 (시계열 수 × width) 배열에 누적하므로
+      메모리는 화면 폭에 비례하고 전체 행을 들고 있지 않는다
+    - 구간 안의 행이 raw_limit 이하이면 원본 점을 그대로 그린다 (확대해서 좁은 구간을 볼 때)
+    """
+
+    def __init__(
+        self, t0: float, t1: float, width: int, raw_limit: int = 200_000, labels: list[str] | None = None
+    ) -> None:
+        self.t0 = t0
+        self.span = max(t1 - t0, 1.0)
+        self.width = max(int(width), 1)
+        self.raw_limit = raw_limit
+        # labels를 주면 add_coded의 code가 그 순서 번호 (SeriesSelection.labels)
+        self.labels: dict[str, int] = {label: code for code, label in enumerate(labels or [])}
+        self.rows = 0
+        self._raw: list[tuple[np.ndarray, np.ndarray, np.ndarray]] | None = []
+        self._mins = np.empty((0, self.width))
+        self._maxs = np.empty((0, self.width))
+
+    def _codes(self, keys: np.ndarray) -> np.ndarray:
+        """청크의 시계열 라벨 → 전체 시계열 번호 (청크마다 해시 factorize 한 번, 정렬 없음)."""
+        inverse, uniques = pd.factorize(keys)
+        mapping = np.array([self.labels.setdefault(str(label), len(self.labels)) for label in uniques], dtype=np.int64)
+        return mapping[inverse]
+
+    def _grow(self) -> None:
+        missing = len(self.labels) - self._mins.shape[0]
+        if missing > 0:
+            self._mins = np.vstack([self._mins, np.full((missing, self.width), np.inf)])
+            self._maxs = np.vstack([self._maxs, np.full((missing, self.width), -np.inf)])
+
+    def _accumulate(self, times: np.ndarray, codes: np.ndarray, values: np.ndarray) -> None:
+        self._grow()
+        buckets = ((times - self.t0) * (self.width / self.span)).astype(np.int64)
+        np.clip(buckets, 0, self.width - 1, out=buckets)
+        np.minimum.at(self._mins, (codes, buckets), values)
+        np.maximum.at(self._maxs, (codes, buckets), values)
+
+    def add(self, rows: list[tuple]) -> None:
+        """fetchmany 결과 (epoch 초, 'tank-sensor', value) 청크."""
+        if not rows:
+            return
+        table = np.array(rows, dtype=object)
+        times = table[:, 0].astype(np.float64)
+        keys = table[:, 1]
+        values = table[:, 2].astype(np.float64)  # NULL(None) → NaN
+        valid = ~np.isnan(values)
+        if not valid.all():
+            times, keys, values = times[valid], keys[valid], values[valid]
+        if len(values):
+            self._add_arrays(times, self._codes(keys), values)
+
+    def add_coded(self, rows: list[tuple]) -> None:
+        """fetchmany 결과 (epoch 초, code, value) 청크. 모두 숫자라 object 배열 없이 한 번에 float64로 바꾼다."""
+        if not rows:
+            return
+        table = np.array(rows, dtype=np.float64)  # NULL(None) → NaN
+        table = table[~np.isnan(table[:, 2])]
+        if len(table):
+            self._add_arrays(table[:, 0], table[:, 1].astype(np.int64), table[:, 2])
+
+    def _add_arrays(self, times: np.ndarray, codes: np.ndarray, values: np.ndarray) -> None:
+        self.rows += len(values)
+
+        if self._raw is not None:
+            self._raw.append((times, codes, values))
+            if self.rows <= self.raw_limit:
+                return
+            # 원본으로 그리기엔 많다 → 지금까지 모은 청크를 버킷으로 옮기고 이후는 바로 누적
+            for chunk in self._raw:
+                self._accumulate(*chunk)
+            self._raw = None
+            return
+        self._accumulate(times, codes, values)
+
+    def series(self) -> list[Series]:
+        names = sorted(self.labels, key=self.labels.get)
+        if self._raw is not None:
+            return self._raw_series(names)
+
+        centers = self.t0 + (np.arange(self.width) + 0.5) * (self.span / self.width)
+        result = []
+        for name in names:
+            code = self.labels[name]
+            filled = np.isfinite(self._mins[code])
+            if not filled.any():  # 선택했지만 구간에 값이 없는 시계열
+                continue
+            x = np.repeat(centers[filled], 2)
+            y = np.column_stack([self._mins[code][filled], self._maxs[code][filled]]).ravel()
+            result.append(Series(name, x.astype("datetime64[s]"), y, decimated=True))
+        return result
+
+    def _raw_series(self, names: list[str]) -> list[Series]:
+        if not self._raw:
+            return []
+        times = np.concatenate([chunk[0] for chunk in self._raw])
+        codes = np.concatenate([chunk[1] for chunk in self._raw])
+        values = np.concatenate([chunk[2] for chunk in self._raw])
+        # 시계열, 시각 순으로 한 번 정렬한 뒤 경계에서 자른다
+        order = np.lexsort((times, codes))
+        codes = codes[order]
+        bounds = np.searchsorted(codes, np.arange(len(names) + 1))
+        return [
+            Series(name, times[order[start:end]].astype("datetime64[s]"), values[order[start:end]], decimated=False)
+            for name, start, end in zip(names, bounds[:-1], bounds[1:])
+            if end > start
+        ]
+
+
+def fetch_plot_series(
+    conn,
+    where: str,
+    params: list,
+    start: str,
+    end: str,
+    width: int,
+    selection: SeriesSelection | None = None,
+    chunk_rows: int = 50000,
+    on_chunk: Callable[[int], None] | None = None,
+) -> tuple[list[Series], int]:
+    """[start, end] 구간 readings를 화면 폭(width 픽셀)에 맞춰 줄인 시계열 목록과 읽은 행 수.
+
+    where/params: 시각 외의 readings 조건 (없으면 "1"). selection이 없으면 모든 시계열.
+    """
+    window, window_params = time_window(start, end)
+    if selection is not None:
+        selection.install(conn)
+        decimator = MinMaxDecimator(to_epoch(start), to_epoch(end), width, labels=selection.labels)
+        query, add = SELECTED_PLOT_QUERY, decimator.add_coded
+    else:
+        decimator = MinMaxDecimator(to_epoch(start), to_epoch(end), width)
+        query, add = PLOT_QUERY, decimator.add
+    cursor = conn.execute(query.format(window=window, where=where), [*window_params, *params])
+    fetched = 0
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        add(rows)
+        fetched += len(rows)
+        if on_chunk is not None:
+            on_chunk(fetched)
+    return decimator.series(), decimator.rows
+
+
+def clamp_window(x0: float, x1: float, start: str, end: str) -> tuple[str, str] | None:
+    """확대 구간(epoch 초)을 조회 범위 안으로 자른 created_at 문자열. 비어 있으면 None."""
+    low = max(x0, to_epoch(start))
+    high = min(x1, to_epoch(end))
+    if high <= low:
+        return None
+    return from_epoch(np.floor(low)), from_epoch(np.ceil(high))
+
+
+def point_count(series: Iterable[Series]) -> int:
+    return sum(len(s.y) for s in series)
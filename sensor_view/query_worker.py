@@ -0,0 +1,159 @@
+import queue
+import sqlite3
+import threading
+import time
+import tkinter as tk
+from typing import Any, Callable
+
+from series_selection import connect_read_only
+
+
+class QueryCancelled(Exception):
+    """작업이 취소됨 (Cancel 버튼/Esc 또는 새 작업 시작)."""
+
+
+class QueryJob:
+    """워커 스레드에서 실행 중인 작업 하나. 작업 함수는 job을 받아 진행률 보고와 취소 확인에 쓴다."""
+
+    def __init__(self, worker: "QueryWorker", label: str) -> None:
+        self.worker = worker
+        self.label = label
+        self.cancel_event = threading.Event()
+        self._last_progress = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def check(self) -> None:
+        if self.cancel_event.is_set():
+            raise QueryCancelled()
+
+    def progress(self, text: str, force: bool = False) -> None:
+        """상태 표시줄 갱신 (0.2초에 한 번만 전달)."""
+        now = time.monotonic()
+        if force or now - self._last_progress >= 0.2:
+            self._last_progress = now
+            self.worker._post(self, self.worker._progress, f"{self.label}: {text} (Esc to cancel)")
+
+    def connect(self, db_path: str) -> sqlite3.Connection:
+        """취소 시 실행 중인 SQL을 중단하는 읽기 전용 연결 (progress handler → 'interrupted')."""
+        conn = connect_read_only(db_path)
+        conn.set_progress_handler(lambda: 1 if self.cancel_event.is_set() else 0, 10000)
+        return conn
+
+
+class QueryWorker:
+    """Tk 메인 스레드 밖에서 DB 조회를 실행하는 단일 워커 스레드.
+
+    - submit한 작업은 순서대로 하나씩 실행하고, 새 작업을 넣으면 실행 중/대기 중 작업은 취소한다
+      (화면에는 마지막 요청 결과만 의미가 있다)
+    - 결과/오류/진행률은 큐에 넣고 메인 스레드가 root.after 주기로 꺼내 콜백을 호출한다
+      (Tk 위젯은 메인 스레드에서만 만진다)
+    - 취소된 작업의 결과는 버린다
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, root: tk.Misc, on_status: Callable[[str], None]) -> None:
+        self.root = root
+        self.on_status = on_status
+        self._jobs: queue.Queue = queue.Queue()
+        self._results: queue.Queue = queue.Queue()
+        self._current: QueryJob | None = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="sensor-view-query", daemon=True)
+        self._thread.start()
+        self.root.after(self.POLL_MS, self._poll)
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None
+
+    def submit(
+        self,
+        label: str,
+        fn: Callable[[QueryJob], Any],
+        on_done: Callable[[Any], None],
+        on_error: Callable[[Exception], None] | None = None,
+    ) -> QueryJob:
+        """fn(job)을 워커 스레드에서 실행하고 결과로 메인 스레드에서 on_done(result)를 호출한다."""
+        self.cancel()
+        job = QueryJob(self, label)
+        with self._lock:
+            self._current = job
+        self.on_status(f"{label}... (Esc to cancel)")
+        self._jobs.put((job, fn, on_done, on_error))
+        return job
+
+    def cancel(self) -> bool:
+        """실행 중인 작업 취소. 취소할 작업이 있었으면 True."""
+        with self._lock:
+            job, self._current = self._current, None
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def _post(self, job: QueryJob, callback: Callable, *args) -> None:
+        self._results.put((job, callback, args))
+
+    def _run(self) -> None:
+        while True:
+            job, fn, on_done, on_error = self._jobs.get()
+            if job.cancelled:
+                continue
+            try:
+                result = fn(job)
+                job.check()
+                self._post(job, self._finish, on_done, result)
+            except QueryCancelled:
+                self._post(job, self._finish_cancelled)
+            except sqlite3.OperationalError as exc:
+                if job.cancelled:  # progress handler가 SQL을 중단함
+                    self._post(job, self._finish_cancelled)
+                else:
+                    self._post(job, self._finish_error, on_error, exc)
+            except Exception as exc:
+                self._post(job, self._finish_error, on_error, exc)
+
+    def _poll(self) -> None:
+        try:
+            while True:
+                try:
+                    job, callback, args = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                # 취소된 작업은 '취소됨' 통지만 전달
+                if job.cancelled and callback != self._finish_cancelled:
+                    continue
+                callback(job, *args)
+        finally:
+            # 콜백에서 예외가 나도 폴링은 계속
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _progress(self, job: QueryJob, text: str) -> None:
+        self.on_status(text)
+
+    def _release(self, job: QueryJob) -> None:
+        with self._lock:
+            if self._current is job:
+                self._current = None
+
+    def _finish(self, job: QueryJob, on_done: Callable, result: Any) -> None:
+        self._release(job)
+        on_done(result)
+
+    def _finish_error(self, job: QueryJob, on_error: Callable | None, exc: Exception) -> None:
+        self._release(job)
+        self.on_status(f"{job.label} failed.")
+        if on_error is not None:
+            on_error(exc)
+
+    def _finish_cancelled(self, job: QueryJob) -> None:
+        self._release(job)
+        if self._current is None:  # 새 작업이 시작되어 취소된 경우는 그 작업 상태를 유지
+            self.on_status(f"{job.label} cancelled.")
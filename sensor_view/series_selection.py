@@ -0,0 +1,151 @@
+import os
+import sqlite3
+from typing import Iterable, Iterator
+
+# 선택한 시계열 목록을 올려 두는 연결별 임시 테이블 (읽기 전용 연결에서도 temp 스키마는 쓸 수 있다)
+SELECTED_SERIES = "temp.selected_series"
+
+# 행 순서(r.id)로 읽을 때: 선택이 좁으면 인덱스로 모아 정렬, 넓으면 id 순서로 훑으며 임시 테이블 확인
+SELECTION_IN = f"(r.tank_id, r.sensor_id) IN (SELECT tank_id, sensor_id FROM {SELECTED_SERIES})"
+SELECTION_EXISTS = (
+    f"EXISTS (SELECT 1 FROM {SELECTED_SERIES} s WHERE s.tank_id = r.tank_id AND s.sensor_id = r.sensor_id)"
+)
+
+
+def read_only_uri(db_path: str) -> str:
+    """sqlite 읽기 전용 URI. 경로의 %, ?, #은 URI에서 뜻이 있으므로 이스케이프한다."""
+    path = os.path.abspath(db_path).replace("%", "%25").replace("?", "%3f").replace("#", "%23")
+    return f"file:{path}?mode=ro"
+
+
+def connect_read_only(db_path: str, **kwargs) -> sqlite3.Connection:
+    return sqlite3.connect(read_only_uri(db_path), uri=True, **kwargs)
+
+
+# 테이블/CSV 행 순서 (저장 순서)
+READINGS_QUERY = """
+    SELECT r.id, r.packet_id, r.tank_id, r.sensor_id, r.value
+    FROM readings r
+    JOIN packets p ON r.packet_id = p.id
+    WHERE {where}
+    ORDER BY r.id ASC
+"""
+
+
+def time_window(start: str, end: str) -> tuple[str, list]:
+    """created_at 구간 조건과 같은 구간의 packet_id 범위.
+
+    readings에는 시각 열이 없으므로 구간에 든 packets의 id 최소/최대로 readings(tank_id, sensor_id,
+    packet_id) 인덱스를 범위 탐색한다. 범위는 시각 조건을 만족하는 행을 모두 포함하므로
+    (저장 순서와 시각 순서가 달라도) 결과는 created_at 조건만 쓴 것과 같다.
+    """
+    sql = (
+        "p.created_at BETWEEN ? AND ? AND r.packet_id BETWEEN"
+        " (SELECT MIN(id) FROM packets WHERE created_at BETWEEN ? AND ?) AND"
+        " (SELECT MAX(id) FROM packets WHERE created_at BETWEEN ? AND ?)"
+    )
+    return sql, [start, end] * 3
+
+
+class SeriesSelection:
+    """목록에서 고른 (tank_id, sensor_id) 시계열.
+
+    (tank_id = ? AND sensor_id = ?) OR ... 조건은 시계열 수만큼 길어지고 SQLite가 항목마다 인덱스를
+    따로 훑으므로, 선택을 연결마다 임시 테이블에 넣고 readings 인덱스와 조인한다.
+    code는 선택 순서 번호로, 그래프 조회가 라벨 문자열 대신 정수로 시계열을 구분하는 데 쓴다.
+    """
+
+    def __init__(self, pairs: Iterable[tuple[str, int]], total: int | None = None) -> None:
+        self.pairs = list(dict.fromkeys((str(tank_id), int(sensor_id)) for tank_id, sensor_id in pairs))
+        self.total = total  # DB의 전체 시계열 수 (모르면 None)
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    @property
+    def labels(self) -> list[str]:
+        return [f"{tank_id}-{sensor_id}" for tank_id, sensor_id in self.pairs]
+
+    @property
+    def broad(self) -> bool:
+        # virtual_table._prefix_predicate와 같은 기준: 전체의 1/4을 넘으면 id 순서로 훑는 편이 빠르다
+        return self.total is not None and len(self.pairs) * 4 > self.total
+
+    def install(self, conn: sqlite3.Connection) -> None:
+        """conn에 선택 목록 임시 테이블을 (다시) 만든다."""
+        conn.execute(f"DROP TABLE IF EXISTS {SELECTED_SERIES}")
+        conn.execute(f"""
+            CREATE TABLE {SELECTED_SERIES} (
+                code INTEGER PRIMARY KEY,
+                tank_id TEXT NOT NULL,
+                sensor_id INTEGER NOT NULL,
+                UNIQUE (tank_id, sensor_id)
+            )
+        """)
+        conn.executemany(
+            f"INSERT INTO {SELECTED_SERIES} (code, tank_id, sensor_id) VALUES (?, ?, ?)",
+            [(code, tank_id, sensor_id) for code, (tank_id, sensor_id) in enumerate(self.pairs)],
+        )
+
+    def predicate(self, ordered: bool = False) -> str:
+        """readings r에 대한 선택 조건 (install 한 연결에서만 유효).
+
+        ordered: ORDER BY r.id로 앞에서부터 읽는 조회 (테이블 페이지, CSV). 넓은 선택이면 정렬 없이
+        id 순서로 훑도록 EXISTS로 쓴다.
+        """
+        return SELECTION_EXISTS if ordered and self.broad else SELECTION_IN
+
+
+def fetch_series_catalog(conn: sqlite3.Connection) -> list[tuple[str, int, int]] | None:
+    """백엔드가 저장/삭제 때 갱신하는 series_stats 카탈로그의 (tank_id, sensor_id, 행 수).
+
+    테이블이 없거나 백엔드가 기존 readings로 카탈로그를 채우는 중이면(schema_migrations에 남아 있음) None.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='series_stats'"
+    ).fetchone()
+    if not exists:
+        return None
+    migrating = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='schema_migrations'"
+    ).fetchone() and conn.execute(
+        "SELECT 1 FROM schema_migrations WHERE name = 'series_stats_backfill'"
+    ).fetchone()
+    if migrating:
+        return None
+    rows = conn.execute(
+        """SELECT tank_id, sensor_id, row_count
+           FROM series_stats
+           ORDER BY tank_id, sensor_id"""
+    ).fetchall()
+    return [(str(tank_id), int(sensor_id), int(count)) for tank_id, sensor_id, count in rows]
+
+
+def fetch_sensor_counts(conn: sqlite3.Connection) -> list[tuple[str, int, int]]:
+    """(tank_id, sensor_id) 조합별 행 개수 조회. 동일 sensor_id가 여러 탱크에 있으면 각각 별도 시계열로 센다."""
+    rows = conn.execute(
+        """SELECT tank_id, sensor_id, COUNT(*)
+           FROM readings
+           GROUP BY tank_id, sensor_id
+           ORDER BY tank_id, sensor_id"""
+    ).fetchall()
+    return [(str(tank_id), int(sensor_id), int(count)) for tank_id, sensor_id, count in rows]
+
+
+def iter_readings(
+    conn: sqlite3.Connection,
+    where: str,
+    params: list,
+    selection: SeriesSelection | None = None,
+    chunk_rows: int = 50000,
+) -> Iterator[list[tuple]]:
+    """조건(날짜 구간 포함)과 선택에 맞는 readings를 id 순서로 chunk_rows씩 읽는다."""
+    if selection is not None:
+        selection.install(conn)
+        where = f"{where} AND {selection.predicate(ordered=True)}"
+    cursor = conn.execute(READINGS_QUERY.format(where=where), params)
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        yield rows
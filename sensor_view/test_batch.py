@@ -0,0 +1,159 @@
+"""
+일괄 내보내기 CLI(batch.py) 검증. 경로에 공백/?/#/%가 들어간 임시 DB를 만들어 실제 명령으로 실행한다.
+
+  - 읽기 전용 URI 이스케이프: 특수 문자 경로의 DB를 열고, DB 파일은 바꾸지 않는다
+  - 탱크별 CSV = 같은 구간 readings (id 순), --tanks 필터와 없는 탱크 안내
+  - series_stats 카탈로그가 있을 때와 백엔드가 아직 채우는 중일 때(readings 스캔) 결과가 같은지
+  - DB 없음 / packets 비어 있음 / 선택 패키지 없음 종료 코드
+
+PNG(matplotlib)와 Parquet(pyarrow)이 없어도 돌도록 --no-png --format csv로 실행한다.
+
+실행: python test_batch.py
+"""
+import csv
+import hashlib
+import importlib.util
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BATCH = os.path.join(HERE, "batch.py")
+TANKS = ["101", "102", "601"]
+SENSORS = [1100, 1101]
+START, END = "2026-06-01 00:00:20", "2026-06-01 00:01:30"
+
+
+def build_db(path: str, packets: int = 120, catalog: str | None = None):
+    """catalog: None(카탈로그 없음) / 'ready' / 'migrating'(백엔드가 채우는 중)"""
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE packets (id INTEGER PRIMARY KEY AUTOINCREMENT, order_num INTEGER, created_at DATETIME);
+            CREATE TABLE readings (id INTEGER PRIMARY KEY AUTOINCREMENT, packet_id INTEGER, tank_id TEXT,
+                                   sensor_id INTEGER, value REAL);
+        """)
+        for i in range(packets):
+            packet_id = conn.execute("INSERT INTO packets (order_num, created_at) VALUES (?, ?)",
+                                     (i, f"2026-06-01 00:{i // 60:02d}:{i % 60:02d}")).lastrowid
+            conn.executemany("INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, ?, ?, ?)",
+                             [(packet_id, t, s, i + s / 10000) for t in TANKS for s in SENSORS])
+        if catalog:
+            conn.executescript("""
+                CREATE TABLE series_stats (tank_id TEXT NOT NULL, sensor_id INTEGER NOT NULL, row_count INTEGER NOT NULL,
+                                           first_at DATETIME, last_at DATETIME, PRIMARY KEY (tank_id, sensor_id));
+                CREATE TABLE schema_migrations (name TEXT PRIMARY KEY, cursor INTEGER NOT NULL DEFAULT 0,
+                                                target INTEGER NOT NULL DEFAULT 0);
+            """)
+            if catalog == "ready":
+                conn.execute("""INSERT INTO series_stats SELECT r.tank_id, r.sensor_id, COUNT(*), MIN(p.created_at),
+                                MAX(p.created_at) FROM readings r JOIN packets p ON r.packet_id = p.id
+                                GROUP BY r.tank_id, r.sensor_id""")
+            else:
+                # 채우는 중: 카탈로그에는 탱크 하나만 반영된 상태
+                conn.execute("INSERT INTO series_stats VALUES ('101', 1100, 1, NULL, NULL)")
+                conn.execute("INSERT INTO schema_migrations VALUES ('series_stats_backfill', 0, 999999)")
+
+
+def expected_rows(db_path: str, tank_id: str) -> list[list[str]]:
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            """SELECT r.id, r.packet_id, r.tank_id, r.sensor_id, r.value FROM readings r
+               JOIN packets p ON r.packet_id = p.id
+               WHERE p.created_at BETWEEN ? AND ? AND r.tank_id = ? ORDER BY r.id""",
+            (START, END, tank_id)).fetchall()
+    return [[str(v) for v in row] for row in rows]
+
+
+def read_csv(path: str) -> list[list[str]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.reader(f))[1:]
+
+
+def digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def run_batch(*args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, BATCH, *args], cwd=HERE, capture_output=True, text=True,
+                          encoding="utf-8", timeout=120)
+
+
+def export_cases(check, tmp: str):
+    folder = os.path.join(tmp, "data dir ?#% 1")
+    os.makedirs(folder)
+    for catalog in (None, "ready", "migrating"):
+        print(f"\n[케이스] 특수 문자 경로, 카탈로그 {catalog or '없음'}")
+        db_path = os.path.join(folder, f"sensor data #{catalog}?.db")
+        build_db(db_path, catalog=catalog)
+        before = digest(db_path)
+        out_dir = os.path.join(folder, f"out {catalog} #?")
+        proc = run_batch(db_path, "--start", START, "--end", END, "-o", out_dir,
+                         "--no-png", "--format", "csv", "--workers", "2")
+        check(f"종료 코드 0 ({proc.returncode})", proc.returncode == 0)
+        if proc.returncode != 0:
+            print(proc.stdout, proc.stderr)
+        files = sorted(os.listdir(out_dir)) if os.path.isdir(out_dir) else []
+        check(f"탱크별 CSV {files}", files == [f"tank_{t}.csv" for t in TANKS])
+        check("CSV = 구간 readings (id 순)", bool(files) and all(
+            read_csv(os.path.join(out_dir, name)) == expected_rows(db_path, name[5:-4]) for name in files))
+        check("DB 파일/옆 파일 그대로 (읽기 전용)", digest(db_path) == before
+              and not os.path.exists(db_path + "-wal") and not os.path.exists(db_path + "-journal"))
+
+    print("\n[케이스] --tanks 필터")
+    out_dir = os.path.join(folder, "only 601")
+    proc = run_batch(db_path, "--tanks", "601", "999", "-o", out_dir, "--no-png")
+    files = sorted(os.listdir(out_dir)) if os.path.isdir(out_dir) else []
+    check("선택한 탱크만, 없는 탱크 안내", proc.returncode == 0 and files == ["tank_601.csv"]
+          and "DB에 없는 탱크: 999" in proc.stdout)
+    path = os.path.join(out_dir, "tank_601.csv")
+    check("구간 생략 시 DB 전체", os.path.exists(path) and len(read_csv(path)) == 120 * len(SENSORS))
+
+
+def error_cases(check, tmp: str):
+    print("\n[케이스] 종료 코드")
+    proc = run_batch(os.path.join(tmp, "no such ?.db"), "--no-png")
+    check("DB 없음 → 2", proc.returncode == 2 and "DB 파일이 없습니다" in proc.stdout)
+    empty = os.path.join(tmp, "empty #.db")
+    build_db(empty, packets=0)
+    proc = run_batch(empty, "--no-png", "-o", os.path.join(tmp, "empty out"))
+    check("packets 비어 있음 → 1", proc.returncode == 1 and "packets가 비어 있습니다" in proc.stdout)
+    for flags, module in ((["--format", "parquet", "--no-png"], "pyarrow"), ([], "matplotlib")):
+        proc = run_batch(empty, *flags, "-o", os.path.join(tmp, "optional out"))
+        if importlib.util.find_spec(module) is None:
+            check(f"{module} 없음 → 2, 설치 안내", proc.returncode == 2 and f"pip install {module}" in proc.stdout)
+        else:
+            check(f"{module} 있음 → 선택 패키지 검사 통과", proc.returncode == 1)
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_cases(check, tmp)
+        error_cases(check, tmp)
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,194 @@
+"""
+그래프 엔진(plot_engine) 검증. 임시 DB를 만들어 쓰므로 sensor_data.db는 필요 없다.
+
+  - MinMaxDecimator: 픽셀 열 버킷마다 최소/최대가 원본 값의 최소/최대와 같은지 (청크 나눔, add/add_coded, NaN 무시)
+  - 원본 점 한도 이하이면 원본 그대로, 도중에 한도를 넘어도 한 번에 넣은 결과와 같은지
+  - normalize_time: 날짜만 입력하면 시작 00:00:00 / 끝 23:59:59, 형식 오류는 ValueError
+  - 날짜만 입력한 구간으로 fetch_plot_series가 그날 마지막 행까지 읽는지
+  - clamp_window: 확대 구간을 조회 범위로 자르기
+
+실행: python test_plot_engine.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+import numpy as np
+
+from plot_engine import MinMaxDecimator, clamp_window, fetch_plot_series, normalize_time, to_epoch
+
+T0, T1 = to_epoch("2026-06-01 00:00:00"), to_epoch("2026-06-01 06:00:00")
+LABELS = ["101-1100", "101-1101", "601-1103"]
+
+
+def make_rows(n: int, seed: int = 3):
+    """(epoch 초, 라벨, 값) 행. 값의 2%는 NULL."""
+    rng = np.random.default_rng(seed)
+    times = rng.integers(int(T0), int(T1) + 1, n)
+    codes = rng.integers(0, len(LABELS), n)
+    values = rng.normal(20, 5, n).round(2)
+    values[rng.random(n) < 0.02] = np.nan
+    # 버킷 안의 극값이 살아남는지 보려고 튀는 값을 섞는다
+    spikes = rng.choice(n, 20, replace=False)
+    values[spikes] = rng.choice([-1000.0, 1000.0], 20)
+    return [(int(t), LABELS[c], None if np.isnan(v) else float(v)) for t, c, v in zip(times, codes, values)]
+
+
+def bucket_extremes(rows, width: int) -> dict:
+    """버킷별 (최소, 최대)를 파이썬으로 직접 계산 {라벨: {버킷: (min, max)}}"""
+    span = T1 - T0
+    result: dict = {}
+    for t, label, v in rows:
+        if v is None:
+            continue
+        bucket = min(max(int((t - T0) * (width / span)), 0), width - 1)
+        low, high = result.setdefault(label, {}).get(bucket, (v, v))
+        result[label][bucket] = (min(low, v), max(high, v))
+    return result
+
+
+def decimated_extremes(series, width: int) -> dict:
+    centers = T0 + (np.arange(width) + 0.5) * ((T1 - T0) / width)
+    buckets = {int(c): i for i, c in enumerate(centers)}
+    result = {}
+    for s in series:
+        x = s.x.astype(np.int64)
+        result[s.label] = {buckets[int(x[i])]: (s.y[i], s.y[i + 1]) for i in range(0, len(x), 2)}
+    return result
+
+
+def feed(decimator, rows, chunk: int, coded: bool = False):
+    for i in range(0, len(rows), chunk):
+        part = rows[i:i + chunk]
+        if coded:
+            decimator.add_coded([(t, LABELS.index(label), v) for t, label, v in part])
+        else:
+            decimator.add(part)
+    return decimator.series()
+
+
+def same_series(a, b) -> bool:
+    return [s.label for s in a] == [s.label for s in b] and all(
+        np.array_equal(x.x, y.x) and np.array_equal(x.y, y.y) for x, y in zip(a, b))
+
+
+def decimator_cases(check):
+    print("\n[케이스 1] 버킷 최소/최대 보존")
+    rows = make_rows(50_000)
+    width = 300
+    expected = bucket_extremes(rows, width)
+    series = feed(MinMaxDecimator(T0, T1, width, raw_limit=1000), rows, 4096)
+    check("줄임 모드", all(s.decimated for s in series) and len(series) == len(LABELS))
+    check("버킷마다 (최소, 최대) = 원본", decimated_extremes(series, width) == expected)
+    check("튀는 값 ±1000 보존", all({-1000.0, 1000.0} <= set(s.y.tolist()) for s in series))
+    check("점 수 ≤ 시계열 × 폭 × 2", sum(len(s.y) for s in series) <= len(LABELS) * width * 2)
+    valid = sum(v is not None for _, _, v in rows)
+    decimator = MinMaxDecimator(T0, T1, width, raw_limit=1000)
+    feed(decimator, rows, 4096)
+    check(f"NULL 제외 행 수 {decimator.rows}", decimator.rows == valid)
+
+    coded = feed(MinMaxDecimator(T0, T1, width, raw_limit=1000, labels=LABELS), rows, 4096, coded=True)
+    by_label = lambda items: sorted(items, key=lambda s: s.label)
+    check("add_coded = add", same_series(by_label(coded), by_label(series)))
+    other_chunks = feed(MinMaxDecimator(T0, T1, width, raw_limit=1000), rows, 777)
+    check("청크 크기와 무관", same_series(other_chunks, series))
+
+    print("\n[케이스 2] 원본 점 / 한도 전환")
+    small = make_rows(800, seed=5)
+    raw = feed(MinMaxDecimator(T0, T1, width, raw_limit=1000), small, 100)
+    ok = not any(s.decimated for s in raw)
+    for s in raw:
+        # 같은 시각의 점끼리는 순서를 보지 않는다
+        points = sorted((t, v) for t, label, v in small if label == s.label and v is not None)
+        x = s.x.astype(np.int64)
+        ok &= np.all(np.diff(x) >= 0) and sorted(zip(x.tolist(), s.y.tolist())) == points
+    check("한도 이하: 시계열별 시각 순 원본 점", ok)
+    switched = feed(MinMaxDecimator(T0, T1, width, raw_limit=3000), rows[:10_000], 1000)
+    at_once = feed(MinMaxDecimator(T0, T1, width, raw_limit=0), rows[:10_000], 10_000)
+    check("도중에 한도를 넘어도 한 번에 줄인 결과와 같음",
+          all(s.decimated for s in switched) and same_series(switched, at_once))
+
+    print("\n[케이스 3] 범위 밖 시각/빈 시계열")
+    decimator = MinMaxDecimator(T0, T1, 10, raw_limit=0, labels=["a", "b"])
+    decimator.add_coded([(T0 - 100, 0, 5.0), (T1 + 100, 0, 7.0), (T0 + 1, 1, None)])
+    series = decimator.series()
+    check("범위 밖은 양 끝 버킷, 값 없는 시계열은 생략",
+          [s.label for s in series] == ["a"] and series[0].y.tolist() == [5.0, 5.0, 7.0, 7.0])
+
+
+def time_cases(check, db_path: str):
+    print("\n[케이스 4] normalize_time")
+    check("날짜만: 시작 00:00:00", normalize_time("2026-06-01") == "2026-06-01 00:00:00")
+    check("날짜만: 끝 23:59:59", normalize_time(" 2026-06-01 ", end=True) == "2026-06-01 23:59:59")
+    check("시각 포함은 그대로", normalize_time("2026-06-01 12:34:56", end=True) == "2026-06-01 12:34:56")
+    check("한 자리 시각도 두 자리로", normalize_time("2026-06-01 1:02:03") == "2026-06-01 01:02:03")
+    for text in ("2026-06-01T00:00:00", "2026/06/01", "2026-02-30", ""):
+        try:
+            normalize_time(text)
+            ok = False
+        except ValueError:
+            ok = True
+        check(f"{text!r} → ValueError", ok)
+
+    print("\n[케이스 5] 날짜만 입력한 구간 조회")
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript("""
+            CREATE TABLE packets (id INTEGER PRIMARY KEY AUTOINCREMENT, order_num INTEGER, created_at DATETIME);
+            CREATE TABLE readings (id INTEGER PRIMARY KEY AUTOINCREMENT, packet_id INTEGER, tank_id TEXT,
+                                   sensor_id INTEGER, value REAL);
+        """)
+        times = ["2026-05-31 23:59:59", "2026-06-01 00:00:00", "2026-06-01 12:00:00",
+                 "2026-06-01 23:59:30", "2026-06-01 23:59:59", "2026-06-02 00:00:00"]
+        for i, created_at in enumerate(times):
+            packet_id = conn.execute("INSERT INTO packets (order_num, created_at) VALUES (?, ?)",
+                                     (i, created_at)).lastrowid
+            conn.execute("INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, '101', 1100, ?)",
+                         (packet_id, float(i)))
+    conn = sqlite3.connect(db_path)
+    try:
+        start, end = normalize_time("2026-06-01"), normalize_time("2026-06-01", end=True)
+        series, rows = fetch_plot_series(conn, "1", [], start, end, 800)
+        check(f"그날 행 전부 ({rows}행, 23:59:59 포함)", rows == 4 and series[0].y.tolist() == [1.0, 2.0, 3.0, 4.0])
+        _, rows = fetch_plot_series(conn, "1", [], start, "2026-06-01 00:00:00", 800)
+        check("끝을 00:00:00으로 두면 그날이 빠짐 (정규화가 필요한 이유)", rows == 1)
+    finally:
+        conn.close()
+
+    print("\n[케이스 6] clamp_window")
+    start, end = "2026-06-01 00:00:00", "2026-06-01 06:00:00"
+    check("안쪽 구간은 초 단위로 넓혀 자름", clamp_window(T0 + 10.4, T0 + 20.6, start, end)
+          == ("2026-06-01 00:00:10", "2026-06-01 00:00:21"))
+    check("바깥으로 넘친 구간은 조회 범위로", clamp_window(T0 - 500, T1 + 500, start, end) == (start, end))
+    check("겹치지 않으면 None", clamp_window(T1 + 1, T1 + 100, start, end) is None)
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    decimator_cases(check)
+    with tempfile.TemporaryDirectory() as tmp:
+        time_cases(check, os.path.join(tmp, "sensor_data.db"))
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,216 @@
+"""
+조회 워커(query_worker.QueryWorker) 검증. Tk 창 없이 root.after만 흉내 내는 가짜 root로 메인 루프를 돌린다.
+
+  - submit한 작업은 워커 스레드에서 실행되고 결과 콜백은 메인(폴링) 스레드에서 호출
+  - 진행률은 0.2초에 한 번만 (force는 바로) 상태 표시줄로
+  - 새 submit은 실행 중인 작업을 취소하고 그 결과는 버림, cancel()은 실행 중인 SQL도 중단
+  - 작업 오류(일반 예외, 취소가 아닌 sqlite3.OperationalError)는 on_error로, 콜백 예외 뒤에도 폴링 계속
+
+실행: python test_query_worker.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from query_worker import QueryWorker
+
+# 취소하지 않으면 오래 걸리는 SQL (재귀 CTE로 큰 합계)
+SLOW_SQL = """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 500000000)
+    SELECT SUM(i) FROM n
+"""
+
+
+class FakeRoot:
+    """root.after 예약만 기록하고 pump에서 메인 스레드로 실행한다."""
+
+    def __init__(self):
+        self._pending = []
+
+    def after(self, ms, callback):
+        self._pending.append(callback)
+
+    def pump(self, until, timeout=5.0):
+        """until()이 참이 될 때까지 예약된 폴링을 돌린다. 콜백 예외는 Tk처럼 기록만 하고 계속."""
+        deadline = time.monotonic() + timeout
+        errors = []
+        while not until() and time.monotonic() < deadline:
+            pending, self._pending = self._pending, []
+            for callback in pending:
+                try:
+                    callback()
+                except Exception as exc:
+                    errors.append(exc)
+            time.sleep(0.01)
+        return errors
+
+
+def make_worker():
+    root = FakeRoot()
+    status = []
+    worker = QueryWorker(root, status.append)
+    return root, worker, status
+
+
+def basic_cases(check):
+    print("\n[케이스 1] 제출 → 워커 스레드 실행 → 메인 스레드 콜백")
+    root, worker, status = make_worker()
+    main = threading.current_thread()
+    seen = {}
+
+    def fn(job):
+        seen["fn_thread"] = threading.current_thread()
+        return 42
+
+    def on_done(result):
+        seen["result"] = result
+        seen["done_thread"] = threading.current_thread()
+
+    worker.submit("Load Info", fn, on_done)
+    check("제출하면 busy", worker.busy)
+    root.pump(lambda: "result" in seen)
+    check("결과 전달", seen.get("result") == 42)
+    check("작업은 워커 스레드, 콜백은 메인 스레드",
+          seen.get("fn_thread") is not main and seen.get("done_thread") is main)
+    check("완료 후 busy 해제", not worker.busy)
+    check("시작 상태 표시", status[0] == "Load Info... (Esc to cancel)")
+    check("취소할 작업 없으면 False", worker.cancel() is False)
+
+    print("\n[케이스 2] 진행률 전달 간격")
+
+    def progress(job):
+        for i in range(50):
+            job.progress(f"step {i}")
+        job.progress("last", force=True)
+        return None
+
+    done = []
+    worker.submit("Plot", progress, done.append)
+    root.pump(lambda: done)
+    steps = [s for s in status if s.startswith("Plot: ")]
+    check(f"0.2초 안의 진행률은 한 번만 ({len(steps)}건)",
+          steps == ["Plot: step 0 (Esc to cancel)", "Plot: last (Esc to cancel)"])
+
+
+def cancel_cases(check, db_path: str):
+    print("\n[케이스 3] 새 작업 제출이 실행 중 작업을 취소")
+    root, worker, status = make_worker()
+    started = threading.Event()
+    results = []
+
+    def slow(job):
+        started.set()
+        while True:
+            job.check()
+            time.sleep(0.01)
+
+    first = worker.submit("Load Data", slow, lambda r: results.append(("first", r)))
+    started.wait(2)
+    second = worker.submit("Plot", lambda job: "plot", lambda r: results.append(("second", r)))
+    root.pump(lambda: results and not worker.busy)
+    root.pump(lambda: False, timeout=0.2)  # 첫 작업의 취소 통지까지 처리
+    check("첫 작업 취소", first.cancelled and not second.cancelled)
+    check("결과는 새 작업 것만", results == [("second", "plot")])
+    check("새 작업 상태를 '취소됨'으로 덮지 않음", "Load Data cancelled." not in status)
+
+    print("\n[케이스 4] cancel()이 실행 중인 SQL을 중단")
+    errors, results = [], []
+
+    def query(job):
+        conn = job.connect(db_path)
+        try:
+            started.set()
+            return conn.execute(SLOW_SQL).fetchone()
+        finally:
+            conn.close()
+
+    started.clear()
+    job = worker.submit("Load Data", query, results.append, errors.append)
+    started.wait(2)
+    time.sleep(0.05)
+    t0 = time.monotonic()
+    check("cancel → True", worker.cancel() is True)
+    root.pump(lambda: "Load Data cancelled." in status)
+    elapsed = time.monotonic() - t0
+    check(f"SQL 중단 후 취소 통지 ({elapsed * 1000:.0f} ms)", "Load Data cancelled." in status and elapsed < 2)
+    check("취소는 결과/오류 콜백 없음", job.cancelled and results == [] and errors == [])
+
+
+def error_cases(check, db_path: str):
+    print("\n[케이스 5] 오류 전달")
+    root, worker, status = make_worker()
+    errors, results = [], []
+
+    def broken(job):
+        raise ValueError("bad filter")
+
+    worker.submit("Load Data", broken, results.append, errors.append)
+    root.pump(lambda: errors)
+    check("일반 예외 → on_error", len(errors) == 1 and isinstance(errors[0], ValueError) and results == [])
+    check("실패 상태 표시", status[-1] == "Load Data failed." and not worker.busy)
+
+    def missing_table(job):
+        conn = job.connect(db_path)
+        try:
+            return conn.execute("SELECT * FROM no_such_table").fetchall()
+        finally:
+            conn.close()
+
+    errors.clear()
+    worker.submit("Plot", missing_table, results.append, errors.append)
+    root.pump(lambda: errors)
+    check("취소가 아닌 OperationalError → on_error",
+          len(errors) == 1 and isinstance(errors[0], sqlite3.OperationalError))
+
+    worker.submit("Export CSV", broken, results.append)
+    root.pump(lambda: not worker.busy)
+    check("on_error 없어도 실패 상태만 표시", status[-1] == "Export CSV failed.")
+
+    print("\n[케이스 6] 콜백 예외 뒤에도 폴링 계속")
+
+    def raising(result):
+        raise RuntimeError("callback bug")
+
+    worker.submit("Load Info", lambda job: 1, raising)
+    callback_errors = root.pump(lambda: not worker.busy)
+    worker.submit("Load Info", lambda job: 2, results.append)
+    root.pump(lambda: results)
+    check("콜백 예외는 폴링 밖으로", len(callback_errors) == 1 and isinstance(callback_errors[0], RuntimeError))
+    check("다음 작업 결과 전달", results == [2])
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    basic_cases(check)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "sensor_data.db")
+        sqlite3.connect(db_path).close()
+        cancel_cases(check, db_path)
+        error_cases(check, db_path)
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,148 @@
+"""
+시계열 선택(series_selection.SeriesSelection) 임시 테이블 조회 검증. 임시 DB를 만들어 쓰므로 sensor_data.db는 필요 없다.
+
+  - 임시 테이블 조건(IN / 넓은 선택의 EXISTS)으로 센 행 수 = 같은 선택을 그대로 쓴 (tank_id, sensor_id) IN 조회
+  - iter_readings(선택, 날짜 구간) 행/순서 = IN 조회 + ORDER BY r.id
+  - fetch_plot_series 선택 조회(CROSS JOIN + code) 점 = 선택 없이 IN 조건으로 읽은 점
+  - 인덱스가 idx_readings_series일 때와 마이그레이션 전(idx_readings_tank_sensor)일 때 모두
+
+실행: python test_series_selection.py
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+import numpy as np
+
+from plot_engine import fetch_plot_series
+from series_selection import READINGS_QUERY, SeriesSelection, connect_read_only, iter_readings, time_window
+
+TANKS = [str(t) for t in (*range(101, 109), *range(201, 203), 601, 10)]
+SENSORS = [1100 + s for s in range(4)]
+TOTAL = len(TANKS) * len(SENSORS)
+
+SELECTIONS = {
+    "1개": [("102", 1101)],
+    "없는 시계열 포함": [("601", 1103), ("999", 1100), ("10", 1100)],
+    "중복 포함": [("201", 1100), ("105", 1102), ("201", 1100)],
+    "넓은 선택 (1/4 초과)": [(t, s) for t in TANKS[:6] for s in SENSORS],
+}
+WINDOWS = [None, ("2026-06-01 00:01:00", "2026-06-01 00:03:30")]
+
+
+def build_db(path: str, index: str, packets: int = 300):
+    """packets × 탱크 × 센서 readings (일부 값은 NULL). index: 시계열 인덱스 DDL."""
+    rng = random.Random(7)
+    with sqlite3.connect(path) as conn:
+        conn.executescript(f"""
+            CREATE TABLE packets (id INTEGER PRIMARY KEY AUTOINCREMENT, order_num INTEGER, created_at DATETIME);
+            CREATE TABLE readings (id INTEGER PRIMARY KEY AUTOINCREMENT, packet_id INTEGER, tank_id TEXT,
+                                   sensor_id INTEGER, value REAL);
+            CREATE INDEX idx_packets_created_at ON packets(created_at);
+            {index};
+        """)
+        for i in range(packets):
+            packet_id = conn.execute("INSERT INTO packets (order_num, created_at) VALUES (?, ?)",
+                                     (i, f"2026-06-01 00:{i // 60:02d}:{i % 60:02d}")).lastrowid
+            conn.executemany(
+                "INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, ?, ?, ?)",
+                [(packet_id, t, s, None if rng.random() < 0.02 else round(rng.uniform(-10, 40), 1))
+                 for t in TANKS for s in SENSORS])
+
+
+def plain_in(pairs: list[tuple]) -> tuple[str, list]:
+    """같은 선택을 임시 테이블 없이 쓴 조건"""
+    values = ",".join("(?, ?)" for _ in pairs)
+    return f"(r.tank_id, r.sensor_id) IN (VALUES {values})", [v for pair in pairs for v in pair]
+
+
+def window_sql(window) -> tuple[str, list]:
+    return time_window(*window) if window else ("1", [])
+
+
+def same_series(got, expected) -> bool:
+    if [s.label for s in got] != [s.label for s in expected]:
+        return False
+    return all(np.array_equal(a.x, b.x) and np.array_equal(a.y, b.y) and a.decimated == b.decimated
+               for a, b in zip(got, expected))
+
+
+def db_cases(check, db_path: str, name: str):
+    conn = connect_read_only(db_path)
+    try:
+        print(f"\n[{name}] 행 수: 임시 테이블 조건 = IN 조회")
+        for title, pairs in SELECTIONS.items():
+            selection = SeriesSelection(pairs, total=TOTAL)
+            selection.install(conn)
+            plain, plain_params = plain_in(selection.pairs)
+            for window in WINDOWS:
+                where, params = window_sql(window)
+                count = lambda cond, extra: conn.execute(
+                    f"SELECT COUNT(*) FROM readings r JOIN packets p ON r.packet_id = p.id WHERE {where} AND {cond}",
+                    params + extra).fetchone()[0]
+                expected = count(plain, plain_params)
+                got = [count(selection.predicate(ordered), []) for ordered in (False, True)]
+                check(f"{title} {'구간' if window else '전체'}: {expected}행", expected > 0 and got == [expected] * 2)
+
+        print(f"\n[{name}] iter_readings = IN 조회 + ORDER BY r.id")
+        for title, pairs in SELECTIONS.items():
+            selection = SeriesSelection(pairs, total=TOTAL)
+            plain, plain_params = plain_in(selection.pairs)
+            for window in WINDOWS:
+                where, params = window_sql(window)
+                expected = conn.execute(READINGS_QUERY.format(where=f"{where} AND {plain}"),
+                                        params + plain_params).fetchall()
+                got = [row for chunk in iter_readings(conn, where, params, selection, chunk_rows=97) for row in chunk]
+                check(f"{title} {'구간' if window else '전체'}: {len(got)}행", got == expected)
+
+        print(f"\n[{name}] fetch_plot_series 선택 조회 = IN 조건 조회")
+        start, end = "2026-06-01 00:00:00", "2026-06-01 00:04:59"
+        for title, pairs in SELECTIONS.items():
+            selection = SeriesSelection(pairs, total=TOTAL)
+            plain, plain_params = plain_in(selection.pairs)
+            got, got_rows = fetch_plot_series(conn, "1", [], start, end, 800, selection, chunk_rows=101)
+            expected, rows = fetch_plot_series(conn, plain, plain_params, start, end, 800)
+            # 선택 순서와 IN 조회의 첫 등장 순서가 다를 수 있어 라벨로 맞춘다
+            order = {label: i for i, label in enumerate(selection.labels)}
+            expected.sort(key=lambda s: order[s.label])
+            check(f"{title}: 시계열 {len(got)}개 {got_rows}행", got_rows == rows and same_series(got, expected))
+    finally:
+        conn.close()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, index in (
+            ("idx_readings_series", "CREATE INDEX idx_readings_series ON readings(tank_id, sensor_id, packet_id, value)"),
+            ("마이그레이션 전 idx_readings_tank_sensor", "CREATE INDEX idx_readings_tank_sensor ON readings(tank_id, sensor_id)"),
+        ):
+            db_path = os.path.join(tmp, f"{name}.db")
+            build_db(db_path, index)
+            db_cases(check, db_path, name)
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
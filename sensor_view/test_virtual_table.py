@@ -0,0 +1,173 @@
+"""
+가상 테이블(virtual_table) 필터/페이지 검증. 임시 DB를 만들어 쓰므로 sensor_data.db는 필요 없다.
+
+  - 필터 문법 → SQL 조각/파라미터: '12', 'a..b', '..b', '>=x', '<x', 형식 오류는 ValueError(열 이름)
+  - tank_id 접두사: 목록을 모르면 범위 비교, 알면 IN 목록, 1/4을 넘게 맞으면 단항 +로 인덱스 끄기
+  - compile_filters 조건으로 읽은 행이 같은 조건의 파이썬 필터 결과와 같은지
+  - ReadingsPager: anchor/OFFSET 점프로 읽은 구간이 전체 목록의 같은 구간과 같은지, 행 수/페이지 캐시
+
+실행: python test_virtual_table.py
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+# Windows cp949 콘솔에서 유니코드 출력 깨짐 방지
+try:
+    sys.stdout.reconfigure(encoding='utf-8')
+except Exception:
+    pass
+
+from series_selection import SeriesSelection
+from virtual_table import ReadingsPager, _numeric_predicate, _prefix_predicate, compile_filters
+
+TANKS = [str(t) for t in (*range(101, 109), *range(201, 203), 601)]
+SENSORS = [1100 + s for s in range(4)]
+
+
+def build_db(path: str, packets: int = 300) -> list[tuple]:
+    """packets × 탱크 × 센서 readings를 만들고 (id, packet_id, tank_id, sensor_id, value) 목록을 돌려준다."""
+    rng = random.Random(42)
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE packets (id INTEGER PRIMARY KEY AUTOINCREMENT, order_num INTEGER, created_at DATETIME);
+            CREATE TABLE readings (id INTEGER PRIMARY KEY AUTOINCREMENT, packet_id INTEGER, tank_id TEXT,
+                                   sensor_id INTEGER, value REAL);
+            CREATE INDEX idx_readings_series ON readings(tank_id, sensor_id, packet_id, value);
+        """)
+        for i in range(packets):
+            packet_id = conn.execute("INSERT INTO packets (order_num, created_at) VALUES (?, ?)",
+                                     (i, f"2026-06-01 00:{i // 60:02d}:{i % 60:02d}")).lastrowid
+            conn.executemany(
+                "INSERT INTO readings (packet_id, tank_id, sensor_id, value) VALUES (?, ?, ?, ?)",
+                [(packet_id, t, s, round(rng.uniform(-10, 40), 1)) for t in TANKS for s in SENSORS])
+        return conn.execute("SELECT id, packet_id, tank_id, sensor_id, value FROM readings ORDER BY id").fetchall()
+
+
+def query(conn, where: str, params: list) -> list[tuple]:
+    return conn.execute(
+        "SELECT r.id, r.packet_id, r.tank_id, r.sensor_id, r.value FROM readings r"
+        f" JOIN packets p ON r.packet_id = p.id WHERE 1{where} ORDER BY r.id", params
+    ).fetchall()
+
+
+def grammar_cases(check):
+    print("\n[케이스 1] 숫자 필터 문법")
+    cases = [
+        (("id", "12", int), ("r.id = ?", [12])),
+        (("packet_id", "10..20", int), ("r.packet_id >= ? AND r.packet_id <= ?", [10, 20])),
+        (("value", " 1.5 .. ", float), ("r.value >= ?", [1.5])),
+        (("value", "..-2.5", float), ("r.value <= ?", [-2.5])),
+        (("sensor_id", ">=1101", int), ("r.sensor_id >= ?", [1101])),
+        (("value", "< 3.5", float), ("r.value < ?", [3.5])),
+        (("id", "=7", int), ("r.id = ?", [7])),
+    ]
+    for (column, text, cast), expected in cases:
+        got = _numeric_predicate(column, text, cast)
+        check(f"{column} {text!r} → {got[0]} {got[1]}", got == expected)
+    for text in ("..", "abc", ">=x", "1..b"):
+        try:
+            _numeric_predicate("id", text, int)
+            ok = False
+        except ValueError:
+            ok = True
+        check(f"{text!r} → ValueError", ok)
+
+    print("\n[케이스 2] tank_id 접두사")
+    check("목록 모름 → 범위 비교", _prefix_predicate("tank_id", "10") == ("r.tank_id >= ? AND r.tank_id < ?", ["10", "11"]))
+    check("좁은 접두사 → 인덱스 IN", _prefix_predicate("tank_id", "20", TANKS)
+          == ("r.tank_id IN (?,?)", ["201", "202"]))
+    check("1/4 초과 → +로 인덱스 끄기", _prefix_predicate("tank_id", "10", TANKS)
+          == (f"+r.tank_id IN ({','.join('?' * 8)})", [str(t) for t in range(101, 109)]))
+    check("맞는 값 없음 → 0", _prefix_predicate("tank_id", "9", TANKS) == ("0", []))
+
+    print("\n[케이스 3] compile_filters")
+    where, params = compile_filters({"value": ">=1", "tank_id": "6", "id": "5..", "sensor_id": " "}, TANKS)
+    print(f"  {where} {params}")
+    check("열 순서대로 AND, 빈 입력은 무시", where == " AND r.id >= ? AND r.tank_id IN (?) AND r.value >= ?"
+          and params == [5, "601", 1.0])
+    try:
+        compile_filters({"id": "1", "packet_id": "x"})
+        column = None
+    except ValueError as e:
+        column = str(e)
+    check("형식 오류는 열 이름으로 ValueError", column == "packet_id")
+
+
+def db_cases(check, db_path: str, rows: list[tuple]):
+    print("\n[케이스 4] SQL 결과 = 파이썬 필터")
+    filters = [
+        ({"value": "0..10"}, lambda r: 0 <= r[4] <= 10),
+        ({"tank_id": "10", "sensor_id": ">=1102"}, lambda r: r[2].startswith("10") and r[3] >= 1102),
+        ({"tank_id": "20", "value": "<0"}, lambda r: r[2].startswith("20") and r[4] < 0),
+        ({"packet_id": "..50", "tank_id": "601"}, lambda r: r[1] <= 50 and r[2] == "601"),
+        ({"id": "100", "value": "..100"}, lambda r: r[0] == 100),
+        ({"tank_id": "9"}, lambda r: False),
+    ]
+    conn = sqlite3.connect(db_path)
+    try:
+        for filt, keep in filters:
+            expected = [r for r in rows if keep(r)]
+            for tank_ids in (TANKS, None):
+                where, params = compile_filters(filt, tank_ids)
+                got = query(conn, where, params)
+                check(f"{filt} (목록 {'있음' if tank_ids else '없음'}) {len(got)}행", got == expected)
+    finally:
+        conn.close()
+
+    print("\n[케이스 5] ReadingsPager 페이지/점프")
+    where, params = compile_filters({"tank_id": "10", "value": ">=5"}, TANKS)
+    expected = [r for r in rows if r[2].startswith("10") and r[4] >= 5]
+    pager = ReadingsPager(db_path, "1" + where, params, page_size=37, max_cached_pages=3)
+    try:
+        check("행 수", pager.count() == len(expected))
+        far = len(expected) - 50
+        check("멀리 점프 (anchor + OFFSET)", pager.rows(far, 20) == expected[far:far + 20])
+        check("점프한 페이지 anchor만 기억", len(pager._anchors) <= 3)
+        check("앞쪽 구간", pager.rows(5, 100) == expected[5:105])
+        check("페이지 경계를 걸친 구간", pager.rows(36, 2) == expected[36:38])
+        check("끝을 넘는 구간은 남은 행만", pager.rows(len(expected) - 3, 10) == expected[-3:])
+        check("끝 뒤 offset은 빈 목록", pager.rows(len(expected) + 100, 10) == [])
+        check("캐시 페이지 수 한도", len(pager._pages) <= 3)
+        pages = [pager.page(p) for p in range(len(expected) // 37 + 1)]
+        check("처음부터 순서대로 읽어도 같음", [r for page in pages for r in page] == expected)
+    finally:
+        pager.close()
+
+    selection = SeriesSelection([("102", 1101), ("601", 1103)], total=len(TANKS) * len(SENSORS))
+    expected = [r for r in rows if (r[2], r[3]) in {("102", 1101), ("601", 1103)} and r[1] > 100]
+    pager = ReadingsPager(db_path, "r.packet_id > ?", [100], selection, page_size=50)
+    try:
+        check("선택 시계열 행 수", pager.count() == len(expected))
+        check("선택 시계열 점프", pager.rows(333, 40) == expected[333:373])
+    finally:
+        pager.close()
+
+
+def run():
+    results = []
+
+    def check(name, ok):
+        results.append((name, ok))
+        print(f"  [{'PASS' if ok else 'FAIL'}] {name}")
+
+    grammar_cases(check)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "sensor_data.db")
+        rows = build_db(db_path)
+        db_cases(check, db_path, rows)
+
+    # 결과 요약
+    print("\n" + "=" * 50)
+    failed = [n for n, ok in results if not ok]
+    if failed:
+        print(f"실패 {len(failed)}건: {failed}")
+        return 1
+    print(f"전체 {len(results)}건 통과 ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,299 @@
+import sqlite3
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+from typing import Callable
+
+from series_selection import SeriesSelection, connect_read_only
+
+READINGS_FROM = """
+    FROM readings r
+    JOIN packets p ON r.packet_id = p.id
+"""
+READINGS_COLUMNS = ("id", "packet_id", "tank_id", "sensor_id", "value")
+
+# 필터 입력 → SQL 조건. 숫자 열은 정확히/범위, tank_id는 접두사 (모두 파라미터 바인딩)
+NUMERIC_FILTER_COLUMNS = {"id": int, "packet_id": int, "sensor_id": int, "value": float}
+FILTER_OPERATORS = (">=", "<=", ">", "<", "=")
+
+
+def _numeric_predicate(column: str, text: str, cast) -> tuple[str, list]:
+    """'12', '10..20', '>=5', '<3.5' 형식을 r.column 비교로 바꾼다. 형식이 틀리면 ValueError."""
+    if ".." in text:
+        low, high = (part.strip() for part in text.split("..", 1))
+        conds, params = [], []
+        if low:
+            conds.append(f"r.{column} >= ?")
+            params.append(cast(low))
+        if high:
+            conds.append(f"r.{column} <= ?")
+            params.append(cast(high))
+        if not conds:
+            raise ValueError(text)
+        return " AND ".join(conds), params
+    for op in FILTER_OPERATORS:
+        if text.startswith(op):
+            return f"r.{column} {op} ?", [cast(text[len(op):].strip())]
+    return f"r.{column} = ?", [cast(text)]
+
+
+def _prefix_predicate(column: str, prefix: str, known: list[str] | None = None) -> tuple[str, list]:
+    """접두사 일치를 인덱스를 탈 수 있는 비교로 바꾼다. (LIKE 'x%'는 인덱스 미사용)
+
+    DB에 있는 값 목록(known)을 알면 정확한 IN 목록으로 바꾸고, 전체의 1/4을 넘게 맞으면
+    인덱스로 행마다 찾아가는 것보다 id 순서로 훑는 편이 빠르므로 단항 +로 인덱스를 끈다.
+    """
+    if known is None:
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return f"r.{column} >= ? AND r.{column} < ?", [prefix, upper]
+    matched = [value for value in known if value.startswith(prefix)]
+    if not matched:
+        return "0", []
+    target = f"r.{column}" if len(matched) * 4 <= len(known) else f"+r.{column}"
+    return f"{target} IN ({','.join('?' * len(matched))})", matched
+
+
+def compile_filters(filters: dict[str, str], tank_ids: list[str] | None = None) -> tuple[str, list]:
+    """필터 행 입력을 ' AND ...' SQL 조각과 파라미터로 만든다. 잘못된 숫자 형식은 ValueError(열 이름).
+
+    tank_ids: DB의 tank_id 목록 (Load Info 결과). 주면 tank_id 접두사를 선택도에 맞는 조건으로 바꾼다.
+    """
+    where, params = "", []
+    for column in READINGS_COLUMNS:
+        text = filters.get(column, "").strip()
+        if not text:
+            continue
+        if column in NUMERIC_FILTER_COLUMNS:
+            try:
+                cond, values = _numeric_predicate(column, text, NUMERIC_FILTER_COLUMNS[column])
+            except ValueError:
+                raise ValueError(column) from None
+        else:
+            cond, values = _prefix_predicate(column, text, tank_ids)
+        where += f" AND {cond}"
+        params.extend(values)
+    return where, params
+
+
+class ReadingsPager:
+    """조건에 맞는 readings를 페이지 단위로 읽는다 (keyset: WHERE r.id > ? ORDER BY r.id LIMIT n).
+
+    OFFSET으로 페이지를 읽으면 뒤로 갈수록 앞 행을 모두 건너뛰어야 하므로, 각 페이지가 시작하는
+    직전 id(anchor)를 기억해 두고 그 id 다음부터 읽는다. 스크롤바로 멀리 점프할 때만 가장 가까운
+    anchor에서 id 하나를 OFFSET으로 찾는다. 읽은 페이지는 최근 것 몇 개만 보관한다.
+    selection을 주면 연결을 열 때 임시 테이블로 올리고 조건에 더한다.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        where_sql: str = "",
+        params: list | None = None,
+        selection: SeriesSelection | None = None,
+        page_size: int = 500,
+        max_cached_pages: int = 16,
+    ) -> None:
+        self.db_path = db_path
+        self.where_sql = where_sql or "1"
+        self.params = list(params or [])
+        self.selection = selection
+        # 행 수는 인덱스로 선택 시계열만 세고, 페이지(ORDER BY r.id)는 선택 폭에 맞는 조건으로 읽는다
+        self._count_where = self.where_sql
+        self._page_where = self.where_sql
+        if selection is not None:
+            self._count_where += f" AND {selection.predicate()}"
+            self._page_where += f" AND {selection.predicate(ordered=True)}"
+        self.page_size = page_size
+        self.max_cached_pages = max_cached_pages
+        self._conn: sqlite3.Connection | None = None
+        self._count: int | None = None
+        self._anchors: dict[int, int] = {0: 0}  # 페이지 번호 → 그 페이지 첫 행 직전 id
+        self._pages: OrderedDict[int, list[tuple]] = OrderedDict()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # 행 수/첫 화면은 조회 워커 스레드에서, 이후 스크롤 페이지는 메인 스레드에서 읽는다 (동시 사용 없음)
+            self._conn = connect_read_only(self.db_path, check_same_thread=False)
+            if self.selection is not None:
+                self.selection.install(self._conn)
+        return self._conn
+
+    def set_interrupt(self, check: Callable[[], bool] | None) -> None:
+        """check()가 True가 되면 실행 중인 SQL을 중단한다 (sqlite3.OperationalError: interrupted)."""
+        if check is None:
+            self._connection().set_progress_handler(None, 0)
+        else:
+            self._connection().set_progress_handler(lambda: 1 if check() else 0, 10000)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def count(self) -> int:
+        if self._count is None:
+            row = self._connection().execute(
+                f"SELECT COUNT(*) {READINGS_FROM} WHERE {self._count_where}", self.params
+            ).fetchone()
+            self._count = int(row[0]) if row else 0
+        return self._count
+
+    def _anchor(self, page: int) -> int | None:
+        """page 첫 행 직전 id. 가장 가까운 앞쪽 anchor에서 건너뛸 행 수만큼 id 인덱스로 찾는다."""
+        if page in self._anchors:
+            return self._anchors[page]
+        known = max(p for p in self._anchors if p < page)
+        skip = (page - known) * self.page_size
+        row = self._connection().execute(
+            f"SELECT r.id {READINGS_FROM} WHERE {self._page_where} AND r.id > ?"
+            " ORDER BY r.id ASC LIMIT 1 OFFSET ?",
+            [*self.params, self._anchors[known], skip - 1],
+        ).fetchone()
+        if row is None:
+            return None
+        self._anchors[page] = row[0]
+        return row[0]
+
+    def page(self, page: int) -> list[tuple]:
+        if page in self._pages:
+            self._pages.move_to_end(page)
+            return self._pages[page]
+        anchor = self._anchor(page)
+        if anchor is None:
+            return []
+        rows = self._connection().execute(
+            f"SELECT r.id, r.packet_id, r.tank_id, r.sensor_id, r.value {READINGS_FROM}"
+            f" WHERE {self._page_where} AND r.id > ? ORDER BY r.id ASC LIMIT ?",
+            [*self.params, anchor, self.page_size],
+        ).fetchall()
+        if len(rows) == self.page_size:
+            self._anchors.setdefault(page + 1, rows[-1][0])
+        self._pages[page] = rows
+        while len(self._pages) > self.max_cached_pages:
+            self._pages.popitem(last=False)
+        return rows
+
+    def rows(self, offset: int, limit: int) -> list[tuple]:
+        """offset번째 행부터 limit개 (보이는 구간)."""
+        result: list[tuple] = []
+        while len(result) < limit:
+            page, index = divmod(offset + len(result), self.page_size)
+            chunk = self.page(page)[index:index + limit - len(result)]
+            if not chunk:
+                break
+            result.extend(chunk)
+        return result
+
+
+class VirtualTable(ttk.Frame):
+    """보이는 행만 Treeview에 그리는 가상 테이블.
+
+    Treeview에는 화면에 보이는 줄 수만큼의 항목만 두고, 스크롤할 때 값만 바꿔 끼운다.
+    세로 스크롤바는 Treeview 대신 전체 행 수(pager.count()) 기준 위치를 표시한다.
+    """
+
+    def __init__(self, master, columns=READINGS_COLUMNS, row_height: int = 20) -> None:
+        super().__init__(master)
+        self.columns = columns
+        self.row_height = row_height
+        self.pager: ReadingsPager | None = None
+        self.offset = 0
+        self.total = 0
+
+        self.data_tree = ttk.Treeview(self, columns=columns, show="headings", height=8)
+        for col in columns:
+            self.data_tree.heading(col, text=col)
+            self.data_tree.column(col, width=100, anchor="center")
+
+        self.scroll_y = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        scroll_x = ttk.Scrollbar(self, orient="horizontal", command=self.data_tree.xview)
+        self.data_tree.configure(xscrollcommand=scroll_x.set)
+
+        self.data_tree.grid(row=0, column=0, sticky="nsew")
+        self.scroll_y.grid(row=0, column=1, sticky="ns")
+        scroll_x.grid(row=1, column=0, sticky="ew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.data_tree.bind("<Configure>", lambda e: self._render())
+        self.data_tree.bind("<MouseWheel>", self._on_wheel)
+        self.data_tree.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.data_tree.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        for key, step in (("<Prior>", "page-up"), ("<Next>", "page-down"), ("<Home>", "home"), ("<End>", "end")):
+            self.data_tree.bind(key, lambda e, s=step: self._on_key(s))
+        self.data_tree.bind("<Up>", lambda e: self._on_arrow(-1))
+        self.data_tree.bind("<Down>", lambda e: self._on_arrow(1))
+
+    def set_pager(self, pager: ReadingsPager | None) -> None:
+        if self.pager is not None:
+            self.pager.close()
+        self.pager = pager
+        self.total = pager.count() if pager else 0
+        self.offset = 0
+        self._render()
+
+    def visible_rows(self) -> int:
+        height = self.data_tree.winfo_height()
+        if height <= 1:
+            return int(self.data_tree.cget("height"))
+        # 헤더 한 줄 제외
+        return max(1, height // self.row_height - 1)
+
+    def scroll_rows(self, delta: int) -> str:
+        self._move_to(self.offset + delta)
+        return "break"
+
+    def _move_to(self, offset: int) -> None:
+        offset = max(0, min(offset, self.total - self.visible_rows()))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+
+    def _on_scrollbar(self, action: str, value: str, unit: str | None = None) -> None:
+        if action == "moveto":
+            self._move_to(int(float(value) * self.total))
+        elif action == "scroll":
+            step = self.visible_rows() if unit == "pages" else 1
+            self._move_to(self.offset + int(value) * step)
+
+    def _on_wheel(self, event) -> str:
+        return self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_key(self, step: str) -> str:
+        page = self.visible_rows()
+        target = {"page-up": self.offset - page, "page-down": self.offset + page,
+                  "home": 0, "end": self.total}[step]
+        self._move_to(target)
+        return "break"
+
+    def _on_arrow(self, delta: int):
+        # 선택이 보이는 첫/마지막 줄에서 벗어나려 할 때만 한 줄 스크롤
+        items = self.data_tree.get_children()
+        focus = self.data_tree.focus()
+        if not items or focus not in items:
+            return None
+        index = items.index(focus)
+        if (delta < 0 and index == 0) or (delta > 0 and index == len(items) - 1):
+            self.scroll_rows(delta)
+            return "break"
+        return None
+
+    def _render(self) -> None:
+        count = self.visible_rows() if self.pager else 0
+        rows = self.pager.rows(self.offset, count) if self.pager else []
+        items = self.data_tree.get_children()
+        # 줄 수가 바뀐 만큼만 항목을 추가/삭제하고 나머지는 값만 교체
+        if len(items) > len(rows):
+            self.data_tree.delete(*items[len(rows):])
+            items = items[:len(rows)]
+        for item, row in zip(items, rows):
+            self.data_tree.item(item, values=row)
+        for row in rows[len(items):]:
+            self.data_tree.insert("", "end", values=row)
+
+        if self.total:
+            first = self.offset / self.total
+            last = min(1.0, (self.offset + max(len(rows), 1)) / self.total)
+            self.scroll_y.set(first, last)
+        else:
+            self.scroll_y.set(0.0, 1.0)
@@ -93,7 +93,7 @@ export function DashboardPanel({ selectedUnitId, tempSelection, onTempSelectionC
 
             if (itemTankIdStr === targetTankIdStr) {
                 hasDataForUnit = true;
-                const val = parseFloat(item.VALUE);
+                const val = item.VALUE === null ? null : Number(item.VALUE); // 형식 오류 값(null)은 차트에서 빈 구간
                 const sensorId = parseInt(item.SENSOR_ID);
 
                 // Sensor ID Mapping (Based on StatusMonitoringCard)
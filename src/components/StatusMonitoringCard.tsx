@@ -11,7 +11,7 @@ interface StatusMonitoringCardProps {
 interface SensorValue {
   TANK_ID: number;
   SENSOR_ID: number;
-  VALUE: string;
+  VALUE: number | null; // 형식 오류 값은 null
 }
 
 // Sensor Packet Structure from Backend
@@ -46,7 +46,7 @@ export function StatusMonitoringCard({ selectedUnitId }: StatusMonitoringCardPro
             // Create a new object for the tank to ensure React detects change
             next[tankId] = {
                 ...next[tankId],
-                [sensorId]: item.VALUE
+                [sensorId]: item.VALUE === null ? '-' : Number(item.VALUE).toFixed(2)
             };
           });
           
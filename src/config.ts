@@ -45,6 +45,9 @@ export const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || `http://${curre
 const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
 export const WS_URL = import.meta.env.VITE_WS_URL || `${wsProtocol}//${currentHost}:${BACKEND_PORT}/ws/status`;
 
+// SENSOR_UPDATE 수신 형식: 'json'(기본) | 'binary' (헤더 + float32 배열, 백엔드 ws_codec.py 참고)
+export const WS_FORMAT: 'json' | 'binary' = import.meta.env.VITE_WS_FORMAT === 'binary' ? 'binary' : 'json';
+
 console.log('App Config:', {
   API_BASE_URL,
   WS_URL,
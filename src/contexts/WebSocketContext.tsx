@@ -1,5 +1,5 @@
 import React, { createContext, useContext, useEffect, useRef, useState, useCallback, ReactNode } from 'react';
-import { WS_URL } from '../config';
+import { WS_URL, WS_FORMAT } from '../config';
 
 export interface WebSocketMessage {
   type: string;
@@ -16,6 +16,67 @@ interface WebSocketContextType {
 
 const WebSocketContext = createContext<WebSocketContextType | null>(null);
 
+// 바이너리 SENSOR_UPDATE 프레임 레이아웃 (연결 시 SENSOR_LAYOUT 메시지로 수신)
+interface SensorLayout {
+  version: number;
+  tank_ids: number[];
+  sensor_ids: number[];
+  status_codes: string[];
+  header_bytes: number;
+}
+
+// 바이너리 프레임을 기존 JSON SENSOR_UPDATE와 같은 형태로 변환
+// 헤더(24B): MAGIC(2) VERSION(u8) FLAGS(u8) LAYOUT_VERSION(u16) pad(2) ORDER(u32) TIMESTAMP(f64) N_TANKS(u16) N_SENSORS(u16)
+function decodeSensorFrame(buffer: ArrayBuffer, layout: SensorLayout): WebSocketMessage | null {
+  const view = new DataView(buffer);
+  const layoutVersion = view.getUint16(4, true);
+  if (layoutVersion !== layout.version) {
+    return null;
+  }
+  const order = view.getUint32(8, true);
+  const timestamp = view.getFloat64(12, true);
+  const nTanks = view.getUint16(20, true);
+  const nSensors = view.getUint16(22, true);
+
+  let pos = layout.header_bytes;
+  const values = new Float32Array(buffer, pos, nTanks * nSensors);
+  pos += 4 * nTanks * nSensors;
+  const stage = new Uint16Array(buffer.slice(pos, pos + 2 * nTanks));
+  pos += 2 * nTanks;
+  const error = new Uint16Array(buffer.slice(pos, pos + 2 * nTanks));
+  pos += 2 * nTanks;
+  const status = new Uint8Array(buffer, pos, nTanks);
+
+  const VALUES: any[] = [];
+  const STATE: any[] = [];
+  const ERROR: any[] = [];
+  for (let t = 0; t < nTanks; t++) {
+    const tankId = layout.tank_ids[t];
+    for (let s = 0; s < nSensors; s++) {
+      const value = values[t * nSensors + s];
+      if (!Number.isNaN(value)) {
+        VALUES.push({ TANK_ID: tankId, SENSOR_ID: layout.sensor_ids[s], VALUE: value });
+      }
+    }
+    STATE.push({ TANK_ID: tankId, STAGE: stage[t], STATUS: layout.status_codes[status[t]] ?? 'None' });
+    ERROR.push({ TANK_ID: tankId, CODE: String(error[t]) });
+  }
+
+  const date = new Date(timestamp * 1000);
+  return {
+    type: 'SENSOR_UPDATE',
+    data: {
+      CMD: 'SENSOR',
+      ORDER: order,
+      DATE: date.toLocaleDateString('sv-SE'),
+      TIME: date.toLocaleTimeString('ko-KR', { hour12: false }),
+      VALUES,
+      STATE,
+      ERROR,
+    },
+  };
+}
+
 export function WebSocketProvider({ children }: { children: ReactNode }) {
   const [isConnected, setIsConnected] = useState(false);
   const [lastMessage, setLastMessage] = useState<WebSocketMessage | null>(null);
@@ -23,12 +84,14 @@ export function WebSocketProvider({ children }: { children: ReactNode }) {
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectTimeoutRef = useRef<NodeJS.Timeout | null>(null);
   const reconnectAttempts = useRef(0);
+  const sensorLayoutRef = useRef<SensorLayout | null>(null);
   const maxReconnectAttempts = 1000; // Keep trying
   const reconnectDelay = 3000;
 
   const connect = useCallback(() => {
     try {
-      const ws = new WebSocket(WS_URL);
+      const ws = WS_FORMAT === 'binary' ? new WebSocket(WS_URL, ['sensor.binary.v1']) : new WebSocket(WS_URL);
+      ws.binaryType = 'arraybuffer';
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -40,7 +103,19 @@ export function WebSocketProvider({ children }: { children: ReactNode }) {
 
       ws.onmessage = (event) => {
         try {
+          if (event.data instanceof ArrayBuffer) {
+            const layout = sensorLayoutRef.current;
+            const decoded = layout ? decodeSensorFrame(event.data, layout) : null;
+            if (decoded) {
+              setLastMessage(decoded);
+            }
+            return;
+          }
           const message: WebSocketMessage = JSON.parse(event.data);
+          if (message.type === 'SENSOR_LAYOUT') {
+            sensorLayoutRef.current = message.data;
+            return;
+          }
           setLastMessage(message);
         } catch (err) {
           console.error('Failed to parse WebSocket message:', err);